@@ -0,0 +1,400 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zipfile
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from xml.etree import ElementTree
+
+import numpy as np
+import requests
+import snowballstemmer
+from bs4 import BeautifulSoup
+
+# Parâmetros usuais do BM25
+K1 = 1.2
+B = 0.75
+PALAVRAS_POR_PASSAGEM = 120
+# Acima desta fração de passagens removidas, o índice em memória é reconstruído a partir do banco
+FRACAO_COMPACTACAO = 0.3
+# Cobertura dos termos da consulta pelo título de uma página que indica o mesmo assunto
+COBERTURA_SOBREPOSICAO = 0.7
+
+PALAVRAS_VAZIAS = frozenset("""
+a à às ao aos as até com como da das de dela dele deles do dos e é ela elas ele eles em entre era essa esse
+esta este eu foi for há isso isto já la lhe mais mas me mesmo meu minha muito na não nas nem no nos nós
+nossa nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus sua
+suas são só também te tem têm um uma umas uns você vocês vai vão
+""".split())
+
+_PALAVRA = re.compile(r"[^\W\d_]+|\d+")
+_REMOVER_HTML = ("script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg")
+_stemmer = snowballstemmer.stemmer("portuguese")
+
+
+@dataclass
+class Pagina:
+    url: str
+    titulo: str
+    texto: str
+
+
+@dataclass
+class Trecho:
+    url: str
+    titulo: str
+    texto: str
+    pontuacao: float
+
+
+@lru_cache(maxsize=100_000)
+def _radical(palavra):
+    # O stemmer espera acentos; a comparação é feita sem eles ("otimização" == "otimizacao")
+    radical = _stemmer.stemWord(palavra)
+    return "".join(c for c in unicodedata.normalize("NFKD", radical) if not unicodedata.combining(c))
+
+
+def termos(texto):
+    return [_radical(palavra) for palavra in _PALAVRA.findall(texto.lower()) if palavra not in PALAVRAS_VAZIAS]
+
+
+def dividir_passagens(texto, palavras_por_passagem=PALAVRAS_POR_PASSAGEM):
+    # Parágrafos agrupados até ~N palavras; parágrafos enormes são cortados por palavras
+    passagens, atual, tamanho = [], [], 0
+    for paragrafo in re.split(r"\n\s*\n", texto):
+        palavras = paragrafo.split()
+        while len(palavras) > palavras_por_passagem:
+            passagens.append(" ".join(palavras[:palavras_por_passagem]))
+            palavras = palavras[palavras_por_passagem:]
+        if not palavras:
+            continue
+        if tamanho + len(palavras) > palavras_por_passagem and atual:
+            passagens.append("\n\n".join(atual))
+            atual, tamanho = [], 0
+        atual.append(" ".join(palavras))
+        tamanho += len(palavras)
+    if atual:
+        passagens.append("\n\n".join(atual))
+    return passagens
+
+
+def extrair_html(html, url=""):
+    sopa = BeautifulSoup(html, "html.parser")
+    canonico = sopa.find("link", rel="canonical")
+    if canonico is not None and canonico.get("href"):
+        url = canonico["href"]
+    titulo = sopa.title.get_text(strip=True) if sopa.title else ""
+    h1 = sopa.find("h1")
+    if not titulo and h1 is not None:
+        titulo = h1.get_text(strip=True)
+    for elemento in sopa(_REMOVER_HTML):
+        elemento.decompose()
+    # Menus e rodapés ficam fora do <main>/<article> quando a página os marca
+    corpo = sopa.find("main") or sopa.find("article") or sopa.body or sopa
+    texto = re.sub(r"\n\s*\n\s*", "\n\n", corpo.get_text("\n")).strip()
+    return Pagina(url=url, titulo=titulo or url, texto=texto)
+
+
+def urls_sitemap(url, sessao=None, limite=None):
+    """URLs de um sitemap, seguindo índices de sitemaps."""
+    sessao = sessao or requests.Session()
+    pendentes, urls = [url], []
+    while pendentes and (limite is None or len(urls) < limite):
+        resposta = sessao.get(pendentes.pop(0), timeout=30)
+        resposta.raise_for_status()
+        raiz = ElementTree.fromstring(resposta.content)
+        # Compara pelos nomes locais: sitemaps usam o namespace do sitemaps.org
+        enderecos = [(elemento.text or "").strip() for elemento in raiz.iter() if elemento.tag.endswith("loc")]
+        if raiz.tag.endswith("sitemapindex"):
+            pendentes += enderecos
+        else:
+            urls += enderecos
+    return urls[:limite]
+
+
+def paginas_sitemap(url, limite=None, max_workers=16, ao_concluir=None):
+    """Baixa as páginas do sitemap em paralelo; páginas que falham são puladas.
+
+    ``ao_concluir(concluidas, total)`` é chamado na thread de quem chamou.
+    """
+    sessao = requests.Session()
+    urls = urls_sitemap(url, sessao, limite)
+
+    def baixar(endereco):
+        try:
+            resposta = sessao.get(endereco, timeout=30)
+            resposta.raise_for_status()
+        except requests.RequestException:
+            return None
+        # Bytes: o BeautifulSoup detecta a codificação pelo <meta charset> quando o servidor não informa
+        return extrair_html(resposta.content, endereco)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for concluidas, pagina in enumerate(executor.map(baixar, urls), start=1):
+            if ao_concluir is not None:
+                ao_concluir(concluidas, len(urls))
+            if pagina is not None:
+                yield pagina
+
+
+def _ler_arquivo(nome, conteudo):
+    if nome.lower().endswith((".html", ".htm")):
+        return extrair_html(conteudo, nome)
+    texto = conteudo.decode("utf-8", errors="ignore")
+    # Markdown e texto: o primeiro título (ou linha) vira o título da página
+    primeira = next((linha.strip("# ").strip() for linha in texto.splitlines() if linha.strip()), nome)
+    return Pagina(url=nome, titulo=primeira, texto=texto)
+
+
+EXTENSOES = (".html", ".htm", ".md", ".txt")
+
+
+def paginas_zip(arquivo):
+    """Páginas de uma exportação HTML (ou markdown) compactada em zip."""
+    with zipfile.ZipFile(arquivo) as pacote:
+        for nome in pacote.namelist():
+            if nome.lower().endswith(EXTENSOES):
+                yield _ler_arquivo(nome, pacote.read(nome))
+
+
+def paginas_pasta(caminho):
+    for raiz, _, arquivos in os.walk(caminho):
+        for arquivo in sorted(arquivos):
+            if arquivo.lower().endswith(EXTENSOES):
+                completo = os.path.join(raiz, arquivo)
+                with open(completo, "rb") as f:
+                    yield _ler_arquivo(os.path.relpath(completo, caminho), f.read())
+
+
+class IndiceSite:
+    """Índice BM25 das páginas já publicadas de um site, para dar contexto às gerações.
+
+    As páginas são divididas em passagens de ~120 palavras. O texto fica em SQLite; em
+    memória ficam só as listas invertidas (ids e frequências em ``array`` compacto, lidos
+    pelo numpy sem cópia), o tamanho de cada passagem e os termos dos títulos. Reindexar
+    uma página só troca as passagens dela, e só quando o conteúdo mudou; passagens trocadas
+    viram lápides até a próxima compactação.
+    """
+
+    def __init__(self, caminho):
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                titulo TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                atualizado_em REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS passagens (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                texto TEXT NOT NULL,
+                termos TEXT NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS passagens_url ON passagens (url)")
+        self._carregar()
+
+    def _carregar(self):
+        with self._lock:
+            self._listas = {}
+            self._tamanhos = array("I")
+            self._ativas = bytearray()
+            self._removidas = 0
+            self._titulos = {}
+            for url, titulo in self._db.execute("SELECT url, titulo FROM paginas"):
+                self._titulos[url] = (titulo, set(termos(titulo)))
+            for id_passagem, texto_termos in self._db.execute("SELECT id, termos FROM passagens ORDER BY id"):
+                self._indexar(id_passagem, texto_termos.split())
+
+    def _indexar(self, id_passagem, termos_passagem):
+        if id_passagem >= len(self._tamanhos):
+            falta = id_passagem + 1 - len(self._tamanhos)
+            self._tamanhos.extend([0] * falta)
+            self._ativas.extend(bytes(falta))
+        self._tamanhos[id_passagem] = len(termos_passagem)
+        self._ativas[id_passagem] = 1
+        for termo, frequencia in Counter(termos_passagem).items():
+            if termo not in self._listas:
+                self._listas[termo] = (array("i"), array("H"))
+            ids, frequencias = self._listas[termo]
+            ids.append(id_passagem)
+            frequencias.append(min(frequencia, 65535))
+
+    def adicionar(self, paginas, lote=200):
+        """Indexa as páginas; as que não mudaram desde a última vez são puladas.
+
+        Grava em lotes de ``lote`` páginas: enquanto o próximo lote é baixado ou lido,
+        o índice continua respondendo às buscas.
+        """
+        resultado = Counter()
+        pendentes = []
+        for pagina in paginas:
+            pendentes.append(pagina)
+            if len(pendentes) >= lote:
+                resultado.update(self._gravar(pendentes))
+                pendentes = []
+        resultado.update(self._gravar(pendentes))
+        return {"novas": resultado["nova"], "atualizadas": resultado["atualizada"],
+                "inalteradas": resultado["inalterada"]}
+
+    def _gravar(self, paginas):
+        if not paginas:
+            return Counter()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                resultado = Counter(self._adicionar(pagina) for pagina in paginas)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._carregar()
+                raise
+            if self._removidas > FRACAO_COMPACTACAO * max(len(self._tamanhos), 1):
+                self._carregar()
+        return resultado
+
+    def _adicionar(self, pagina):
+        resumo = hashlib.sha256(f"{pagina.titulo}\n{pagina.texto}".encode("utf-8")).hexdigest()
+        anterior = self._db.execute("SELECT hash FROM paginas WHERE url = ?", (pagina.url,)).fetchone()
+        if anterior is not None and anterior[0] == resumo:
+            return "inalterada"
+        if anterior is not None:
+            self._remover_passagens(pagina.url)
+        self._db.execute(
+            "INSERT OR REPLACE INTO paginas (url, titulo, hash, atualizado_em) VALUES (?, ?, ?, ?)",
+            (pagina.url, pagina.titulo, resumo, time.time()),
+        )
+        self._titulos[pagina.url] = (pagina.titulo, set(termos(pagina.titulo)))
+        for passagem in dividir_passagens(pagina.texto):
+            termos_passagem = termos(passagem)
+            if not termos_passagem:
+                continue
+            # Id sempre novo, acima de todos os que estão na memória: um id liberado pelo SQLite
+            # reativaria as listas invertidas da passagem removida, que só saem na compactação
+            id_passagem = len(self._tamanhos)
+            self._db.execute(
+                "INSERT INTO passagens (id, url, texto, termos) VALUES (?, ?, ?, ?)",
+                (id_passagem, pagina.url, passagem, " ".join(termos_passagem)),
+            )
+            self._indexar(id_passagem, termos_passagem)
+        return "nova" if anterior is None else "atualizada"
+
+    def _remover_passagens(self, url):
+        for (id_passagem,) in self._db.execute("SELECT id FROM passagens WHERE url = ?", (url,)).fetchall():
+            self._ativas[id_passagem] = 0
+            self._removidas += 1
+        self._db.execute("DELETE FROM passagens WHERE url = ?", (url,))
+
+    def remover(self, url):
+        with self._lock:
+            self._remover_passagens(url)
+            self._db.execute("DELETE FROM paginas WHERE url = ?", (url,))
+            self._titulos.pop(url, None)
+
+    def _pontuar(self, consulta):
+        # BM25 vetorizado: cada termo da consulta soma sua contribuição nas passagens da sua lista
+        tamanhos = np.frombuffer(self._tamanhos, dtype=np.uint32) if len(self._tamanhos) else np.zeros(0, np.uint32)
+        ativas = np.frombuffer(self._ativas, dtype=np.uint8).astype(bool) if len(self._ativas) else np.zeros(0, bool)
+        total = int(ativas.sum())
+        if total == 0:
+            return None
+        media = float(tamanhos[ativas].mean())
+        pontuacoes = np.zeros(len(tamanhos), dtype=np.float32)
+        for termo in set(termos(consulta)):
+            if termo not in self._listas:
+                continue
+            ids = np.frombuffer(self._listas[termo][0], dtype=np.int32)
+            frequencias = np.frombuffer(self._listas[termo][1], dtype=np.uint16).astype(np.float32)
+            documentos = len(ids)
+            idf = math.log(1 + (total - documentos + 0.5) / (documentos + 0.5))
+            normalizacao = K1 * (1 - B + B * tamanhos[ids] / media)
+            pontuacoes[ids] += idf * frequencias * (K1 + 1) / (frequencias + normalizacao)
+        pontuacoes[~ativas] = 0
+        return pontuacoes
+
+    def buscar(self, consulta, k=5):
+        """As ``k`` passagens mais relevantes para a consulta, da mais para a menos relevante."""
+        with self._lock:
+            pontuacoes = self._pontuar(consulta)
+            if pontuacoes is None:
+                return []
+            k = min(k, len(pontuacoes))
+            melhores = np.argpartition(-pontuacoes, k - 1)[:k]
+            melhores = [int(i) for i in melhores[np.argsort(-pontuacoes[melhores])] if pontuacoes[i] > 0]
+            if not melhores:
+                return []
+            linhas = {
+                id_passagem: (url, texto) for id_passagem, url, texto in self._db.execute(
+                    f"SELECT id, url, texto FROM passagens WHERE id IN ({','.join('?' * len(melhores))})", melhores
+                )
+            }
+            return [
+                Trecho(linhas[i][0], self._titulos.get(linhas[i][0], ("",))[0], linhas[i][1], float(pontuacoes[i]))
+                for i in melhores if i in linhas
+            ]
+
+    def relacionadas(self, consulta, k=5):
+        """Páginas distintas mais relevantes (candidatas a link interno), com a melhor passagem de cada."""
+        paginas = {}
+        for trecho in self.buscar(consulta, k * 4):
+            paginas.setdefault(trecho.url, trecho)
+        return list(paginas.values())[:k]
+
+    def sobreposicao(self, consulta, trechos=None):
+        """Página já publicada que parece tratar do mesmo assunto, ou None.
+
+        Considera as páginas mais relevantes e mede quanto dos termos da consulta o título delas cobre.
+        """
+        termos_consulta = set(termos(consulta))
+        if len(termos_consulta) < 2:
+            return None
+        for trecho in trechos if trechos is not None else self.relacionadas(consulta):
+            _, termos_titulo = self._titulos.get(trecho.url, ("", set()))
+            cobertura = len(termos_consulta & termos_titulo) / len(termos_consulta)
+            if cobertura >= COBERTURA_SOBREPOSICAO:
+                return trecho, cobertura
+        return None
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "paginas": len(self._titulos),
+                "passagens": len(self._ativas) - self._ativas.count(0),
+                "termos": len(self._listas),
+            }
+
+    def __len__(self):
+        return len(self._titulos)
+
+
+def contexto_prompt(trechos, paginas, max_palavras=600):
+    """Bloco de contexto para o prompt: trechos do site e as páginas disponíveis para links internos."""
+    if not trechos:
+        return ""
+    partes, usadas = [], 0
+    for trecho in trechos:
+        palavras = trecho.texto.split()
+        if usadas + len(palavras) > max_palavras and partes:
+            break
+        partes.append(f"[{trecho.titulo}]({trecho.url}): {' '.join(palavras)}")
+        usadas += len(palavras)
+    links = "\n".join(f"- [{pagina.titulo}]({pagina.url})" for pagina in paginas)
+    return (
+        "**Conteúdo já publicado no site (mantenha coerência, não repita e não contradiga):**\n"
+        + "\n".join(partes)
+        + "\n\n**Páginas do site para links internos (use as mais pertinentes, com âncoras descritivas):**\n"
+        + links
+    )
@@ -0,0 +1,242 @@
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from google.api_core import exceptions
+
+# Erros que valem nova tentativa: cota estourada (429) e indisponibilidades momentâneas
+ERROS_TRANSITORIOS = (
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+)
+
+# Requisições e tokens por minuto de cada modelo (nível pago 1 da API Gemini)
+LIMITES_PADRAO = {
+    "gemini-1.5-flash": (2000, 4_000_000),
+    "gemini-1.5-pro": (1000, 4_000_000),
+}
+TOKENS_POR_IMAGEM = 258
+
+
+def nome_modelo(modelo):
+    return modelo.model_name.removeprefix("models/")
+
+
+def estimar_tokens(conteudo):
+    # Estimativa grosseira (~4 caracteres por token); imagens têm custo fixo na API
+    if isinstance(conteudo, str):
+        return max(1, len(conteudo) // 4)
+    return sum(estimar_tokens(parte) if isinstance(parte, str) else TOKENS_POR_IMAGEM for parte in conteudo)
+
+
+class BaldeTokens:
+    """Token bucket simples; o Agendador protege o acesso com o próprio lock."""
+
+    def __init__(self, capacidade, por_segundo):
+        self.capacidade = capacidade
+        self.por_segundo = por_segundo
+        self._saldo = float(capacidade)
+        self._atualizado = time.monotonic()
+
+    def _repor(self, agora):
+        self._saldo = min(self.capacidade, self._saldo + (agora - self._atualizado) * self.por_segundo)
+        self._atualizado = agora
+
+    def espera(self, quantidade, agora):
+        self._repor(agora)
+        # Pedidos maiores que a capacidade esperam o balde encher, senão nunca sairiam da fila
+        falta = min(quantidade, self.capacidade) - self._saldo
+        return max(falta, 0) / self.por_segundo
+
+    def consumir(self, quantidade, agora):
+        self._repor(agora)
+        self._saldo -= min(quantidade, self.capacidade)
+
+
+@dataclass(eq=False)
+class Ticket:
+    sessao: str
+    modelo: str
+    tokens: int
+    liberado: threading.Event = field(default_factory=threading.Event)
+    # Pedidos assíncronos: avisa o loop deles quando o ticket é liberado
+    ao_liberar: Callable = None
+
+
+@dataclass
+class EstatisticasAgendador:
+    despachadas: int = 0
+    novas_tentativas: int = 0
+    falhas: int = 0
+
+
+class Agendador:
+    """Fila única por processo para as chamadas ao Gemini.
+
+    Cada sessão tem sua própria fila; a vez é dada em rodízio entre as sessões,
+    respeitando os limites de requisições e tokens por minuto de cada modelo.
+    Erros transitórios são repetidos com backoff exponencial com jitter. ``executar``
+    bloqueia a thread de quem chama; ``executar_async`` só suspende a corrotina.
+    """
+
+    def __init__(self, limites=None, max_tentativas=5, atraso_base=1.0, atraso_maximo=30.0):
+        self._limites = {**LIMITES_PADRAO, **(limites or {})}
+        self.max_tentativas = max_tentativas
+        self.atraso_base = atraso_base
+        self.atraso_maximo = atraso_maximo
+        self._baldes = {}
+        self._filas = OrderedDict()
+        self._cond = threading.Condition()
+        self.estatisticas = EstatisticasAgendador()
+        threading.Thread(target=self._despachar, name="agendador-gemini", daemon=True).start()
+
+    def executar(self, funcao, modelo, sessao="anonima", tokens=1, ao_aguardar=None):
+        for tentativa in range(self.max_tentativas):
+            self._aguardar_vez(modelo, sessao, tokens, ao_aguardar)
+            try:
+                return funcao()
+            except ERROS_TRANSITORIOS:
+                espera = self._espera_nova_tentativa(tentativa)
+                if espera is None:
+                    raise
+                time.sleep(espera)
+
+    async def executar_async(self, funcao, modelo, sessao="anonima", tokens=1, ao_aguardar=None):
+        # ``funcao`` devolve um awaitable a cada tentativa
+        for tentativa in range(self.max_tentativas):
+            await self._aguardar_vez_async(modelo, sessao, tokens, ao_aguardar)
+            try:
+                return await funcao()
+            except ERROS_TRANSITORIOS:
+                espera = self._espera_nova_tentativa(tentativa)
+                if espera is None:
+                    raise
+                await asyncio.sleep(espera)
+
+    def _espera_nova_tentativa(self, tentativa):
+        # Segundos até a próxima tentativa; None quando elas acabaram
+        if tentativa == self.max_tentativas - 1:
+            self.estatisticas.falhas += 1
+            return None
+        self.estatisticas.novas_tentativas += 1
+        # "Full jitter": espalha as novas tentativas de várias sessões no tempo
+        return random.uniform(0, min(self.atraso_maximo, self.atraso_base * 2 ** tentativa))
+
+    def tamanho_fila(self):
+        with self._cond:
+            return sum(len(fila) for fila in self._filas.values())
+
+    def _enfileirar(self, ticket):
+        with self._cond:
+            self._filas.setdefault(ticket.sessao, deque()).append(ticket)
+            self._cond.notify()
+
+    def _aguardar_vez(self, modelo, sessao, tokens, ao_aguardar):
+        ticket = Ticket(sessao, modelo, tokens)
+        self._enfileirar(ticket)
+
+        aguardou = False
+        while not ticket.liberado.wait(0.5):
+            aguardou = True
+            if ao_aguardar is not None:
+                ao_aguardar(self._posicao(ticket))
+        if aguardou and ao_aguardar is not None:
+            ao_aguardar(0)
+
+    async def _aguardar_vez_async(self, modelo, sessao, tokens, ao_aguardar):
+        loop = asyncio.get_running_loop()
+        liberado = loop.create_future()
+        ticket = Ticket(
+            sessao, modelo, tokens,
+            ao_liberar=lambda: loop.call_soon_threadsafe(lambda: liberado.done() or liberado.set_result(None)),
+        )
+        self._enfileirar(ticket)
+
+        aguardou = False
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(liberado), 0.5)
+                    break
+                except asyncio.TimeoutError:
+                    aguardou = True
+                    if ao_aguardar is not None:
+                        ao_aguardar(self._posicao(ticket))
+        except asyncio.CancelledError:
+            # Pedido cancelado ainda na fila: sai dela para não gastar a vez de outra chamada
+            self._remover(ticket)
+            raise
+        if aguardou and ao_aguardar is not None:
+            ao_aguardar(0)
+
+    def _remover(self, ticket):
+        with self._cond:
+            fila = self._filas.get(ticket.sessao)
+            if fila is not None and ticket in fila:
+                fila.remove(ticket)
+                if not fila:
+                    del self._filas[ticket.sessao]
+
+    def _posicao(self, ticket):
+        # Posição simulando o rodízio: quem está à frente na própria fila e,
+        # em cada outra sessão, os pedidos que serão atendidos antes deste
+        with self._cond:
+            sessoes = list(self._filas)
+            if ticket.sessao not in self._filas:
+                return 0
+            fila = self._filas[ticket.sessao]
+            indice = fila.index(ticket) if ticket in fila else 0
+            ordem = sessoes.index(ticket.sessao)
+            posicao = indice + 1
+            for i, sessao in enumerate(sessoes):
+                if sessao != ticket.sessao:
+                    posicao += min(len(self._filas[sessao]), indice + 1 if i < ordem else indice)
+            return posicao
+
+    def _baldes_modelo(self, modelo):
+        if modelo not in self._baldes:
+            rpm, tpm = self._limites.get(modelo, LIMITES_PADRAO["gemini-1.5-flash"])
+            self._baldes[modelo] = (BaldeTokens(rpm, rpm / 60), BaldeTokens(tpm, tpm / 60))
+        return self._baldes[modelo]
+
+    def _despachar(self):
+        with self._cond:
+            while True:
+                self._cond.wait(timeout=self._liberar_proximos())
+
+    def _liberar_proximos(self):
+        # Devolve quantos segundos esperar até o próximo pedido caber nos limites (None = até chegar pedido)
+        menor_espera = None
+        liberou = True
+        while liberou:
+            liberou = False
+            agora = time.monotonic()
+            for sessao in list(self._filas):
+                fila = self._filas[sessao]
+                ticket = fila[0]
+                requisicoes, tokens = self._baldes_modelo(ticket.modelo)
+                espera = max(requisicoes.espera(1, agora), tokens.espera(ticket.tokens, agora))
+                if espera > 0:
+                    menor_espera = espera if menor_espera is None else min(menor_espera, espera)
+                    continue
+                requisicoes.consumir(1, agora)
+                tokens.consumir(ticket.tokens, agora)
+                fila.popleft()
+                ticket.liberado.set()
+                if ticket.ao_liberar is not None:
+                    ticket.ao_liberar()
+                self.estatisticas.despachadas += 1
+                # A sessão atendida vai para o fim do rodízio
+                if fila:
+                    self._filas.move_to_end(sessao)
+                else:
+                    del self._filas[sessao]
+                liberou = True
+                break
+        return menor_espera
@@ -0,0 +1,299 @@
+import html
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+import numpy as np
+
+OK = "ok"
+ALERTA = "alerta"
+PROBLEMA = "problema"
+ICONES = {OK: "✅", ALERTA: "⚠️", PROBLEMA: "❌"}
+PONTOS = {OK: 1.0, ALERTA: 0.5, PROBLEMA: 0.0}
+
+# Faixas de referência (conteúdo web em pt-BR)
+PALAVRAS_POR_FRASE_MAX = 20
+PALAVRAS_POR_PARAGRAFO_MAX = 80
+SNIPPET_MIN, SNIPPET_MAX = 40, 60
+DENSIDADE_MIN, DENSIDADE_MAX, DENSIDADE_EXCESSO = 0.005, 0.025, 0.03
+# Pontuação de variantes: qualidade técnica, cobertura da palavra-chave e tamanho pedido
+PESO_TECNICO, PESO_COBERTURA, PESO_TAMANHO = 0.4, 0.35, 0.25
+TERMO_MIN = 3
+
+_TITULO = re.compile(r"(?m)^[ \t]*(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_ITEM_LISTA = re.compile(r"(?m)^[ \t]*(?:[-*+]|\d+[.)])[ \t]+\S")
+_TABELA = re.compile(r"(?m)^[ \t]*\|.*\|[ \t]*$")
+_PALAVRA = re.compile(r"[^\W\d_]+(?:[-'][^\W\d_]+)*")
+_VOGAIS = re.compile(r"[aeiouyáéíóúâêôãõàü]+", re.IGNORECASE)
+# Fim de frase: pontuação final, linha em branco ou início de item de lista (itens sem ponto final)
+_FIM_FRASE = re.compile(r"[.!?…]+(?=\s|$)|\n[ \t]*\n|\n(?=[ \t]*(?:[-*+]|\d+[.)])[ \t])")
+_FIM_PARAGRAFO = re.compile(r"\n[ \t]*\n")
+_TOKEN = re.compile(r"\S+\s*")
+
+
+@dataclass
+class Verificacao:
+    nome: str
+    valor: str
+    status: str
+    dica: str = ""
+
+
+@dataclass
+class AnaliseSEO:
+    palavras: int = 0
+    frases: int = 0
+    paragrafos: int = 0
+    legibilidade: float = 0.0
+    palavras_por_frase: float = 0.0
+    frases_longas: float = 0.0
+    paragrafos_longos: float = 0.0
+    titulos: dict = field(default_factory=dict)
+    saltos_titulos: int = 0
+    densidade_palavra_chave: float = None
+    ocorrencias_palavra_chave: int = 0
+    palavra_chave_no_inicio: bool = False
+    palavra_chave_em_titulos: bool = False
+    palavras_primeiro_paragrafo: int = 0
+    paragrafos_snippet: int = 0
+    itens_lista: int = 0
+    linhas_tabela: int = 0
+    verificacoes: list = field(default_factory=list)
+
+    @property
+    def pontuacao(self):
+        if not self.verificacoes:
+            return 0
+        return round(100 * sum(PONTOS[v.status] for v in self.verificacoes) / len(self.verificacoes))
+
+    def fatos(self):
+        """Resumo compacto das medições para incluir no prompt no lugar de pedir que o modelo as estime."""
+        linhas = [f"- Pontuação técnica local: {self.pontuacao}/100"]
+        linhas += [f"- {v.nome}: {v.valor} ({v.status})" for v in self.verificacoes]
+        return "\n".join(linhas)
+
+
+def nivel_legibilidade(indice):
+    if indice >= 75:
+        return "muito fácil"
+    if indice >= 50:
+        return "fácil"
+    if indice >= 25:
+        return "difícil"
+    return "muito difícil"
+
+
+def _normalizar(texto):
+    # Compara palavras sem diferenciar maiúsculas e acentos ("otimização" == "otimizacao")
+    sem_acentos = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in sem_acentos if not unicodedata.combining(c))
+
+
+def _contar_sequencia(palavras, alvo):
+    # Ocorrências da sequência de palavras ``alvo`` em ``palavras`` (vetorizado por deslocamento)
+    k = len(alvo)
+    if k == 0 or len(palavras) < k:
+        return 0
+    iguais = np.ones(len(palavras) - k + 1, dtype=bool)
+    for deslocamento, termo in enumerate(alvo):
+        iguais &= palavras[deslocamento:len(palavras) - k + 1 + deslocamento] == termo
+    return int(iguais.sum())
+
+
+def _por_grupo(posicoes_palavras, limites):
+    # Quantas palavras caem em cada trecho delimitado por ``limites`` (frases ou parágrafos), sem trechos vazios
+    if len(posicoes_palavras) == 0:
+        return np.zeros(0, dtype=int)
+    contagem = np.bincount(np.searchsorted(limites, posicoes_palavras, side="right"))
+    return contagem[contagem > 0]
+
+
+def analisar_conteudo(texto, palavra_chave=""):
+    """Mede localmente, em uma passada, o que o validador pedia ao modelo para estimar.
+
+    Legibilidade pelo índice de Flesch adaptado ao português (Martins et al., 1996):
+    248,835 − 1,015 × palavras/frase − 84,6 × sílabas/palavra, com sílabas estimadas
+    por grupos de vogais.
+    """
+    analise = AnaliseSEO()
+    titulos = _TITULO.findall(texto)
+    corpo = _TITULO.sub("", texto)
+
+    correspondencias = list(_PALAVRA.finditer(corpo))
+    inicios = np.fromiter((m.start() for m in correspondencias), dtype=np.int64, count=len(correspondencias))
+    palavras = np.array([_normalizar(m.group()) for m in correspondencias], dtype=str)
+    fins_frase = np.fromiter((m.end() for m in _FIM_FRASE.finditer(corpo)), dtype=np.int64)
+    fins_paragrafo = np.fromiter((m.end() for m in _FIM_PARAGRAFO.finditer(corpo)), dtype=np.int64)
+    vogais = np.fromiter((m.start() for m in _VOGAIS.finditer(corpo)), dtype=np.int64)
+
+    por_frase = _por_grupo(inicios, fins_frase)
+    por_paragrafo = _por_grupo(inicios, fins_paragrafo)
+    if len(inicios):
+        silabas = np.maximum(np.bincount(np.searchsorted(inicios, vogais, side="right") - 1, minlength=len(inicios)), 1)
+    else:
+        silabas = np.zeros(0, dtype=int)
+
+    analise.palavras = len(palavras)
+    analise.frases = len(por_frase)
+    analise.paragrafos = len(por_paragrafo)
+    if analise.palavras:
+        analise.palavras_por_frase = float(por_frase.mean())
+        analise.legibilidade = float(np.clip(
+            248.835 - 1.015 * analise.palavras_por_frase - 84.6 * silabas.mean(), 0, 100
+        ))
+        analise.frases_longas = float((por_frase > 25).mean())
+        analise.paragrafos_longos = float((por_paragrafo > PALAVRAS_POR_PARAGRAFO_MAX).mean())
+        analise.palavras_primeiro_paragrafo = int(por_paragrafo[0])
+        analise.paragrafos_snippet = int(((por_paragrafo >= SNIPPET_MIN) & (por_paragrafo <= SNIPPET_MAX)).sum())
+
+    niveis = [len(marcas) for marcas, _ in titulos]
+    analise.titulos = {f"H{nivel}": niveis.count(nivel) for nivel in sorted(set(niveis))}
+    analise.saltos_titulos = sum(1 for anterior, atual in zip(niveis, niveis[1:]) if atual > anterior + 1)
+    analise.itens_lista = len(_ITEM_LISTA.findall(texto))
+    analise.linhas_tabela = len(_TABELA.findall(texto))
+
+    alvo = [_normalizar(m.group()) for m in _PALAVRA.finditer(palavra_chave or "")]
+    if alvo and analise.palavras:
+        analise.ocorrencias_palavra_chave = _contar_sequencia(palavras, alvo)
+        analise.densidade_palavra_chave = analise.ocorrencias_palavra_chave * len(alvo) / analise.palavras
+        analise.palavra_chave_no_inicio = _contar_sequencia(palavras[:100], alvo) > 0
+        texto_titulos = [_normalizar(m.group()) for _, titulo in titulos for m in _PALAVRA.finditer(titulo)]
+        analise.palavra_chave_em_titulos = _contar_sequencia(np.array(texto_titulos, dtype=str), alvo) > 0
+
+    analise.verificacoes = _verificar(analise)
+    return analise
+
+
+def _faixa(valor, bom, aceitavel, maior_melhor=True):
+    if maior_melhor:
+        return OK if valor >= bom else ALERTA if valor >= aceitavel else PROBLEMA
+    return OK if valor <= bom else ALERTA if valor <= aceitavel else PROBLEMA
+
+
+def _verificar(a):
+    verificacoes = [
+        Verificacao(
+            "Tamanho do conteúdo", f"{a.palavras} palavras", _faixa(a.palavras, 300, 150),
+            "Conteúdos muito curtos raramente são citados como fonte",
+        ),
+        Verificacao(
+            "Legibilidade (Flesch-PT)", f"{a.legibilidade:.0f} – {nivel_legibilidade(a.legibilidade)}",
+            _faixa(a.legibilidade, 50, 30), "Frases mais curtas e palavras mais simples sobem o índice",
+        ),
+        Verificacao(
+            "Palavras por frase", f"{a.palavras_por_frase:.1f} em média · {a.frases_longas:.0%} acima de 25",
+            _faixa(a.palavras_por_frase, PALAVRAS_POR_FRASE_MAX, 25, maior_melhor=False),
+            "Divida frases longas; assistentes citam frases autocontidas",
+        ),
+        Verificacao(
+            "Parágrafos longos", f"{a.paragrafos_longos:.0%} com mais de {PALAVRAS_POR_PARAGRAFO_MAX} palavras",
+            _faixa(a.paragrafos_longos, 0.0, 0.2, maior_melhor=False), "Prefira parágrafos de até 3 linhas",
+        ),
+    ]
+
+    total_titulos = sum(a.titulos.values())
+    if total_titulos == 0:
+        status = PROBLEMA
+    else:
+        status = OK if a.titulos.get("H2", 0) >= 2 and a.saltos_titulos == 0 else ALERTA
+    descricao = " · ".join(f"{nivel}: {quantidade}" for nivel, quantidade in a.titulos.items()) or "nenhum título"
+    if a.saltos_titulos:
+        descricao += f" · {a.saltos_titulos} salto(s) de nível"
+    verificacoes.append(Verificacao(
+        "Estrutura de títulos", descricao, status, "Use H2/H3 em ordem, sem pular níveis",
+    ))
+
+    if a.densidade_palavra_chave is not None:
+        densidade = a.densidade_palavra_chave
+        if densidade > DENSIDADE_EXCESSO or densidade == 0:
+            status = PROBLEMA
+        elif DENSIDADE_MIN <= densidade <= DENSIDADE_MAX:
+            status = OK
+        else:
+            status = ALERTA
+        verificacoes.append(Verificacao(
+            "Densidade da palavra-chave", f"{densidade:.1%} ({a.ocorrencias_palavra_chave} ocorrências)", status,
+            f"Mire entre {DENSIDADE_MIN:.1%} e {DENSIDADE_MAX:.1%}, sem repetição forçada",
+        ))
+        presencas = a.palavra_chave_no_inicio + a.palavra_chave_em_titulos
+        verificacoes.append(Verificacao(
+            "Palavra-chave em destaque",
+            f"início: {'sim' if a.palavra_chave_no_inicio else 'não'} · títulos: {'sim' if a.palavra_chave_em_titulos else 'não'}",
+            OK if presencas == 2 else ALERTA if presencas == 1 else PROBLEMA,
+            "Cite o termo nas primeiras 100 palavras e em pelo menos um título",
+        ))
+
+    primeiro_snippet = SNIPPET_MIN <= a.palavras_primeiro_paragrafo <= SNIPPET_MAX
+    verificacoes.append(Verificacao(
+        "Resposta para snippet",
+        f"1º parágrafo com {a.palavras_primeiro_paragrafo} palavras · {a.paragrafos_snippet} parágrafo(s) de "
+        f"{SNIPPET_MIN}–{SNIPPET_MAX}",
+        OK if primeiro_snippet else ALERTA if a.paragrafos_snippet else PROBLEMA,
+        f"Abra com uma resposta direta de {SNIPPET_MIN} a {SNIPPET_MAX} palavras",
+    ))
+    verificacoes.append(Verificacao(
+        "Listas e tabelas", f"{a.itens_lista} itens de lista · {a.linhas_tabela} linhas de tabela",
+        OK if a.itens_lista or a.linhas_tabela else ALERTA, "Passos e comparações em listas/tabelas são mais citáveis",
+    ))
+    return verificacoes
+
+
+@dataclass
+class Variante:
+    texto: str
+    pontuacao: int
+    palavras: int
+    legibilidade: float
+    cobertura: float
+
+
+def _termos(texto):
+    # Termos distintos com pelo menos TERMO_MIN letras ("de", "em" e "com" não contam)
+    return {_normalizar(m.group()) for m in _PALAVRA.finditer(texto or "") if len(m.group()) >= TERMO_MIN}
+
+
+def pontuar_variantes(textos, palavra_chave="", palavras_alvo=None):
+    """Pontuação local (0–100) de textos alternativos, para escolher um sem chamar o modelo.
+
+    Combina a pontuação técnica de ``analisar_conteudo``, a fração dos termos de
+    ``palavra_chave`` presentes no texto e, com ``palavras_alvo``, a proximidade do tamanho pedido.
+    """
+    alvo = _termos(palavra_chave)
+    variantes = []
+    for texto in textos:
+        analise = analisar_conteudo(texto, palavra_chave)
+        cobertura = len(alvo & _termos(texto)) / len(alvo) if alvo else 1.0
+        if palavras_alvo:
+            tamanho = max(0.0, 1 - abs(analise.palavras - palavras_alvo) / palavras_alvo)
+        else:
+            tamanho = 1.0 if analise.palavras else 0.0
+        variantes.append(Variante(
+            texto=texto,
+            pontuacao=round(PESO_TECNICO * analise.pontuacao + 100 * (PESO_COBERTURA * cobertura + PESO_TAMANHO * tamanho)),
+            palavras=analise.palavras,
+            legibilidade=analise.legibilidade,
+            cobertura=cobertura,
+        ))
+    return variantes
+
+
+def marcar_diferencas(base, texto):
+    """``texto`` em markdown com ``<mark>`` nas palavras que não aparecem na mesma posição de ``base``.
+
+    Compara palavra a palavra e só marca palavras e números: espaços, quebras de linha e marcadores
+    de título, lista e tabela ficam intactos. Todo o texto sai com HTML escapado, já que o resultado
+    é exibido com ``unsafe_allow_html``.
+    """
+    tokens = _TOKEN.findall(texto)
+    comparador = SequenceMatcher(
+        None, [token.strip() for token in _TOKEN.findall(base)], [token.strip() for token in tokens], autojunk=False
+    )
+    partes = [texto[:len(texto) - len(texto.lstrip())]]
+    for operacao, _, _, inicio, fim in comparador.get_opcodes():
+        for token in tokens[inicio:fim]:
+            palavra = html.escape(token.rstrip(), quote=False)
+            if operacao != "equal" and any(c.isalnum() for c in palavra):
+                palavra = f"<mark>{palavra}</mark>"
+            partes.append(palavra + token[len(token.rstrip()):])
+    return "".join(partes)
@@ -0,0 +1,107 @@
+"""Serviço HTTP com as ferramentas do AIO Agent, sem Streamlit.
+
+Uso:
+    python api.py --porta 8080
+
+Rotas:
+    GET  /ferramentas               lista as ferramentas e seus campos
+    GET  /metrics                   métricas das chamadas ao modelo no formato Prometheus
+    POST /ferramentas/{nome}        {"campo": "valor", ...} -> {"texto": ...}
+    POST /lote                      {"itens": [{"ferramenta": ..., "entradas": {...}}, ...]}
+                                    resposta em NDJSON, uma linha por item assim que termina
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from google.api_core.exceptions import GoogleAPIError
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from ferramentas import FERRAMENTAS, executar_ferramenta_async
+from llm import criar_cliente
+
+CHAVE_CLIENTE = web.AppKey("cliente")
+CHAVE_LIMITE = web.AppKey("limite")
+
+
+async def _executar(app, nome, entradas):
+    # O semáforo limita as ferramentas em andamento; a chamada ao modelo não ocupa thread
+    async with app[CHAVE_LIMITE]:
+        inicio = time.perf_counter()
+        texto = await executar_ferramenta_async(app[CHAVE_CLIENTE], nome, entradas, "api")
+        return {"ferramenta": nome, "texto": texto, "segundos": round(time.perf_counter() - inicio, 3)}
+
+
+async def listar_ferramentas(request):
+    return web.json_response([ferramenta.descrever() for ferramenta in FERRAMENTAS.values()])
+
+
+async def metricas(request):
+    metricas_llm = request.app[CHAVE_CLIENTE].metricas
+    corpo = metricas_llm.exportar() if metricas_llm is not None else b""
+    return web.Response(body=corpo, headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+async def gerar(request):
+    nome = request.match_info["nome"]
+    if nome not in FERRAMENTAS:
+        raise web.HTTPNotFound(text=json.dumps({"erro": f"Ferramenta desconhecida: {nome}"}), content_type="application/json")
+    try:
+        entradas = await request.json()
+        return web.json_response(await _executar(request.app, nome, entradas))
+    except (ValueError, TypeError) as erro:
+        return web.json_response({"erro": str(erro)}, status=400)
+    except GoogleAPIError as erro:
+        return web.json_response({"erro": str(erro)}, status=503)
+
+
+async def lote(request):
+    corpo = await request.json()
+    itens = corpo.get("itens", [])
+    resposta = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await resposta.prepare(request)
+
+    async def processar(indice, item):
+        try:
+            resultado = await _executar(request.app, item.get("ferramenta"), item.get("entradas", {}))
+        except (ValueError, TypeError, GoogleAPIError) as erro:
+            resultado = {"ferramenta": item.get("ferramenta"), "erro": str(erro)}
+        return {"indice": indice, **resultado}
+
+    tarefas = [asyncio.create_task(processar(indice, item)) for indice, item in enumerate(itens)]
+    for concluida in asyncio.as_completed(tarefas):
+        await resposta.write((json.dumps(await concluida, ensure_ascii=False) + "\n").encode("utf-8"))
+    await resposta.write_eof()
+    return resposta
+
+
+def criar_app(cliente=None, concorrencia=None):
+    concorrencia = concorrencia or int(os.getenv("AIO_API_CONCORRENCIA", "32"))
+    app = web.Application(client_max_size=20 * 1024 * 1024)
+    app[CHAVE_CLIENTE] = cliente or criar_cliente()
+    app[CHAVE_LIMITE] = asyncio.Semaphore(concorrencia)
+
+    async def configurar_pool(app):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concorrencia))
+
+    app.on_startup.append(configurar_pool)
+    app.add_routes([
+        web.get("/ferramentas", listar_ferramentas),
+        web.get("/metrics", metricas),
+        web.post("/ferramentas/{nome}", gerar),
+        web.post("/lote", lote),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP do AIO Agent")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--concorrencia", type=int, help="chamadas simultâneas ao modelo (padrão: AIO_API_CONCORRENCIA ou 32)")
+    args = parser.parse_args()
+    web.run_app(criar_app(concorrencia=args.concorrencia), host=args.host, port=args.porta)
@@ -0,0 +1,167 @@
+import re
+import time
+from concurrent.futures import as_completed
+
+# Seções obrigatórias do Construtor de Páginas e a fatia do orçamento de palavras de cada uma.
+# O resumo executivo tem tamanho fixo; as demais dividem o restante pelos pesos.
+SECOES_ARTIGO = [
+    ("Resumo executivo", "máximo 45 palavras", 0.0),
+    ("Introdução", "contextualize o problema", 0.15),
+    ("Análise detalhada", "com dados e exemplos", 0.40),
+    ("Soluções práticas", "passo a passo", 0.30),
+    ("Conclusão", "recapitulação + próximos passos", 0.15),
+]
+PALAVRAS_RESUMO = 45
+
+NIVEIS_LEITURA = [
+    "Simples (ensino fundamental)",
+    "Intermediário (ensino médio)",
+    "Avançado (superior)",
+    "Técnico (especialistas)",
+]
+
+
+def prompt_artigo(target_query, key_points, word_count, reading_level, contexto_site=""):
+    return f"""
+    Você é um redator especialista em SEO para IA. Crie um artigo completo que será citado como fonte por assistentes de IA.
+
+    **Consulta do Usuário:** {target_query}
+    **Destaques Principais:** {key_points}
+    **Tamanho:** {word_count} palavras
+    **Nível:** {reading_level}
+
+    {contexto_site}
+
+    **Estrutura Requerida:**
+    1. Resumo executivo (máximo 45 palavras)
+    2. Introdução (contextualize o problema)
+    3. Análise detalhada (com dados e exemplos)
+    4. Soluções práticas (passo a passo)
+    5. Conclusão (recapitulação + próximos passos)
+
+    **Formato:**
+    - Use markdown
+    - Títulos claros (##, ###)
+    - Listas e tabelas quando apropriado
+    - Linguagem natural e técnica balanceada
+    """
+
+
+def distribuir_palavras(word_count):
+    restante = max(word_count - PALAVRAS_RESUMO, 0)
+    return [
+        PALAVRAS_RESUMO if peso == 0.0 else round(restante * peso)
+        for _, _, peso in SECOES_ARTIGO
+    ]
+
+
+def prompt_esboco(target_query, key_points, reading_level, contexto_site=""):
+    secoes = "\n".join(
+        f"{i}. {titulo} ({descricao})"
+        for i, (titulo, descricao, _) in enumerate(SECOES_ARTIGO, start=1)
+    )
+    return f"""
+    Você é um redator especialista em SEO para IA. Monte apenas o ESBOÇO de um artigo.
+
+    **Consulta do Usuário:** {target_query}
+    **Destaques Principais:** {key_points}
+    **Nível:** {reading_level}
+
+    {contexto_site}
+
+    **Seções (nesta ordem):**
+    {secoes}
+
+    **Formato:**
+    Exatamente 5 linhas, uma por seção, no formato:
+    N. Título da seção: tópico; tópico; tópico
+    Sem texto antes ou depois das 5 linhas.
+    """
+
+
+def interpretar_esboco(texto):
+    # Cada linha "N. título: tópicos" vira o resumo da seção N; seções ausentes usam o padrão
+    esboco = [f"{titulo} ({descricao})" for titulo, descricao, _ in SECOES_ARTIGO]
+    for linha in texto.splitlines():
+        encontrado = re.match(r"^\s*[*#-]*\s*(\d)\s*[.)]\s*(.+)$", linha)
+        if encontrado:
+            indice = int(encontrado.group(1)) - 1
+            if 0 <= indice < len(esboco):
+                esboco[indice] = encontrado.group(2).strip().strip("*")
+    return esboco
+
+
+def prompt_secao(target_query, key_points, reading_level, esboco, indice, palavras, contexto_site=""):
+    titulo, descricao, _ = SECOES_ARTIGO[indice]
+    esboco_formatado = "\n".join(f"{i}. {linha}" for i, linha in enumerate(esboco, start=1))
+    return f"""
+    Você é um redator especialista em SEO para IA. Escreva APENAS a seção {indice + 1} de um artigo que será citado como fonte por assistentes de IA.
+
+    **Consulta do Usuário:** {target_query}
+    **Destaques Principais:** {key_points}
+    **Nível:** {reading_level}
+
+    **Esboço completo do artigo (para manter coerência):**
+    {esboco_formatado}
+
+    **Seção a escrever:** {titulo} ({descricao})
+    **Pauta da seção:** {esboco[indice]}
+    **Tamanho:** cerca de {palavras} palavras
+
+    {contexto_site}
+
+    **Formato:**
+    - Comece com o título "## {titulo}"
+    - Use ### para subtítulos, listas e tabelas quando apropriado
+    - Não repita o conteúdo das outras seções nem escreva introdução ou conclusão do artigo
+    - Linguagem natural e técnica balanceada
+    """
+
+
+def gerar_artigo_paralelo(cliente, modelo, target_query, key_points, word_count, reading_level,
+                          ao_concluir_secao=None, sessao=None, contexto_site=""):
+    """Gera o esboço e depois as seções em paralelo no laço do cliente, devolvendo o artigo montado em ordem.
+
+    ``ao_concluir_secao(indice, texto)`` é chamado na thread de quem chamou,
+    à medida que cada seção termina, para permitir atualizar a interface.
+    ``contexto_site`` (trechos do site do cliente) vai para o esboço e para cada seção.
+    """
+    inicio = time.perf_counter()
+    esboco = interpretar_esboco(
+        cliente.gerar(
+            modelo, prompt_esboco(target_query, key_points, reading_level, contexto_site),
+            sessao=sessao, ferramenta="construtor_paginas",
+        )
+    )
+    tempo_esboco = time.perf_counter() - inicio
+
+    orcamento = distribuir_palavras(word_count)
+    secoes = [None] * len(SECOES_ARTIGO)
+    duracoes = [0.0] * len(SECOES_ARTIGO)
+
+    async def gerar_secao(indice):
+        inicio_secao = time.perf_counter()
+        prompt = prompt_secao(
+            target_query, key_points, reading_level, esboco, indice, orcamento[indice], contexto_site
+        )
+        texto = await cliente.gerar_async(modelo, prompt, sessao=sessao, ferramenta="construtor_paginas")
+        return indice, texto, time.perf_counter() - inicio_secao
+
+    futuros = [cliente.laco.executar(gerar_secao(indice)) for indice in range(len(SECOES_ARTIGO))]
+    try:
+        for futuro in as_completed(futuros):
+            indice, texto, duracao = futuro.result()
+            secoes[indice] = texto.strip()
+            duracoes[indice] = duracao
+            if ao_concluir_secao is not None:
+                ao_concluir_secao(indice, secoes[indice])
+    finally:
+        # Uma seção falhou (ou quem chamou desistiu): as outras não continuam no loop
+        cliente.laco.cancelar(futuros)
+
+    return {
+        "texto": "\n\n".join(secoes),
+        "tempo_esboco": tempo_esboco,
+        "tempo_total": time.perf_counter() - inicio,
+        "duracoes_secoes": duracoes,
+    }
@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+from google.api_core.exceptions import GoogleAPIError
+
+from acervo import extrair_html
+from coleta import USER_AGENT, extrair_fatos, ler_corpo
+from ferramentas import executar_ferramenta
+
+# Faixas das verificações locais
+TITULO_MIN, TITULO_MAX = 30, 60
+DESCRICAO_MIN, DESCRICAO_MAX = 70, 160
+PALAVRAS_MIN = 300
+COBERTURA_ALT_MIN = 0.9
+TAMANHO_LOTE = 64
+
+OK = "ok"
+SINALIZADA = "sinalizada"
+ERRO = "erro"
+
+
+def ler_urls(texto):
+    # Uma URL por linha; linhas vazias, comentários e repetições são ignorados
+    vistas = set()
+    for linha in texto.splitlines():
+        url = linha.strip()
+        if url.startswith(("http://", "https://")) and url not in vistas:
+            vistas.add(url)
+            yield url
+
+
+def _normalizar_titulo(titulo):
+    sem_acentos = unicodedata.normalize("NFKD", titulo.lower())
+    return re.sub(r"\W+", " ", "".join(c for c in sem_acentos if not unicodedata.combining(c))).strip()
+
+
+class EstadoAuditoria:
+    """Estado em disco da auditoria de um site: hash, validadores HTTP e resultado de cada URL.
+
+    Numa nova execução, páginas com o mesmo HTML (ou respondidas com 304) reaproveitam o
+    resultado anterior sem verificações nem chamadas ao modelo.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.diretorio / "estado.db", isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                hash TEXT,
+                etag TEXT,
+                modificado_em TEXT,
+                registro TEXT NOT NULL,
+                auditado_em REAL NOT NULL
+            )
+        """)
+
+    @property
+    def caminho_resultados(self):
+        return self.diretorio / "resultados.jsonl"
+
+    def anterior(self, url):
+        linha = self._db.execute(
+            "SELECT hash, etag, modificado_em, registro FROM urls WHERE url = ?", (url,)
+        ).fetchone()
+        if linha is None:
+            return None
+        return {"hash": linha[0], "etag": linha[1], "modificado_em": linha[2], "registro": json.loads(linha[3])}
+
+    def salvar(self, registro, etag=None, modificado_em=None):
+        # Erros não guardam hash: a página é baixada e verificada de novo na próxima execução
+        self._db.execute(
+            "INSERT OR REPLACE INTO urls (url, hash, etag, modificado_em, registro, auditado_em) VALUES (?, ?, ?, ?, ?, ?)",
+            (registro["url"], registro.get("hash"), etag, modificado_em, json.dumps(registro, ensure_ascii=False),
+             time.time()),
+        )
+
+    def fechar(self):
+        self._db.close()
+
+
+def verificar_lote(paginas, titulos_vistos):
+    """Verificações locais de um lote de páginas ``(url, html)``, vetorizadas sobre o lote.
+
+    ``titulos_vistos`` (título normalizado -> primeira URL) acumula os títulos entre lotes
+    para detectar títulos duplicados no site. Devolve ``(fatos, problemas)`` por página.
+    """
+    fatos = [extrair_fatos(html, url) for url, html in paginas]
+    titulo = np.array([len(f.titulo) for f in fatos])
+    descricao = np.array([len(f.descricao) for f in fatos])
+    h1 = np.array([sum(nivel == "h1" for nivel, _ in f.titulos) for f in fatos])
+    palavras = np.array([f.palavras for f in fatos])
+    imagens = np.array([f.imagens for f in fatos])
+    com_alt = np.array([f.imagens_com_alt for f in fatos])
+    cobertura = np.divide(com_alt, imagens, out=np.ones(len(fatos)), where=imagens > 0)
+
+    verificacoes = [
+        (titulo == 0, lambda i: "title ausente"),
+        ((titulo > 0) & ((titulo < TITULO_MIN) | (titulo > TITULO_MAX)),
+         lambda i: f"title com {titulo[i]} caracteres (ideal {TITULO_MIN}–{TITULO_MAX})"),
+        (descricao == 0, lambda i: "meta description ausente"),
+        ((descricao > 0) & ((descricao < DESCRICAO_MIN) | (descricao > DESCRICAO_MAX)),
+         lambda i: f"meta description com {descricao[i]} caracteres (ideal {DESCRICAO_MIN}–{DESCRICAO_MAX})"),
+        (h1 != 1, lambda i: f"{h1[i]} H1 (ideal: exatamente 1)"),
+        (palavras < PALAVRAS_MIN, lambda i: f"conteúdo raso: {palavras[i]} palavras (mínimo {PALAVRAS_MIN})"),
+        (cobertura < COBERTURA_ALT_MIN,
+         lambda i: f"{imagens[i] - com_alt[i]} de {imagens[i]} imagens sem alt"),
+    ]
+    problemas = [[] for _ in fatos]
+    for mascara, descrever in verificacoes:
+        for indice in np.flatnonzero(mascara):
+            problemas[indice].append(descrever(indice))
+
+    for indice, f in enumerate(fatos):
+        chave = _normalizar_titulo(f.titulo)
+        if not chave:
+            continue
+        primeira = titulos_vistos.setdefault(chave, f.url)
+        if primeira != f.url:
+            problemas[indice].append(f"title duplicado com {primeira}")
+    return list(zip(fatos, problemas))
+
+
+def _registro(url, fatos, problemas, resumo):
+    return {
+        "url": url,
+        "status": SINALIZADA if problemas else OK,
+        "hash": resumo,
+        "titulo": fatos.titulo,
+        "problemas": problemas,
+        "metricas": {
+            "title": len(fatos.titulo),
+            "meta_description": len(fatos.descricao),
+            "h1": sum(nivel == "h1" for nivel, _ in fatos.titulos),
+            "palavras": fatos.palavras,
+            "imagens": fatos.imagens,
+            "imagens_com_alt": fatos.imagens_com_alt,
+        },
+        "avaliacao": None,
+        "erro": None,
+    }
+
+
+async def _auditar(urls, estado, cliente, concorrencia, concorrencia_llm, tipo_conteudo, timeout, ao_atualizar,
+                   sessao):
+    loop = asyncio.get_running_loop()
+    urls = iter(urls)
+    # Filas limitadas: downloads esperam quando as verificações ou o modelo ficam para trás
+    baixadas = asyncio.Queue(maxsize=TAMANHO_LOTE * 2)
+    vagas_llm = asyncio.Semaphore(concorrencia_llm)
+    executor = ThreadPoolExecutor(max_workers=concorrencia_llm + 1, thread_name_prefix="auditoria")
+    contagem = Counter()
+    titulos_vistos = {}
+    pendentes_llm = set()
+
+    saida = open(estado.caminho_resultados, "w", encoding="utf-8")
+
+    def registrar(registro, etag=None, modificado_em=None, reaproveitada=False):
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        if not reaproveitada:
+            estado.salvar(registro, etag, modificado_em)
+        contagem[registro["status"]] += 1
+        contagem["inalteradas"] += reaproveitada
+        if ao_atualizar is not None:
+            ao_atualizar(registro, contagem)
+
+    async def baixar(sessao_http):
+        for url in urls:
+            anterior = estado.anterior(url)
+            cabecalhos = {}
+            if anterior is not None and anterior["hash"]:
+                if anterior["etag"]:
+                    cabecalhos["If-None-Match"] = anterior["etag"]
+                if anterior["modificado_em"]:
+                    cabecalhos["If-Modified-Since"] = anterior["modificado_em"]
+            try:
+                async with sessao_http.get(url, headers=cabecalhos) as resposta:
+                    if resposta.status == 304 and cabecalhos:
+                        await baixadas.put((url, None, anterior, None, None))
+                        continue
+                    resposta.raise_for_status()
+                    html = await ler_corpo(resposta)
+                    etag = resposta.headers.get("ETag")
+                    modificado_em = resposta.headers.get("Last-Modified")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as erro:
+                # ValueError: página acima do tamanho máximo
+                await baixadas.put((url, erro, None, None, None))
+                continue
+            await baixadas.put((url, html, anterior, etag, modificado_em))
+
+    async def avaliar(registro, html):
+        # Só páginas sinalizadas passam pelo validador; o texto principal é extraído só para elas
+        try:
+            texto = extrair_html(html, registro["url"]).texto
+            registro["avaliacao"] = await loop.run_in_executor(
+                executor, executar_ferramenta, cliente, "validador_seo",
+                {"content_to_check": texto, "content_type": tipo_conteudo}, sessao,
+            )
+        except (ValueError, GoogleAPIError) as erro:
+            registro["erro"] = str(erro)
+        finally:
+            vagas_llm.release()
+
+    async def processar_lote(lote, metadados):
+        resultados = await loop.run_in_executor(executor, verificar_lote, lote, titulos_vistos)
+        for (url, html), (fatos, problemas), (resumo, etag, modificado_em) in zip(lote, resultados, metadados):
+            registro = _registro(url, fatos, problemas, resumo)
+            if problemas and cliente is not None:
+                await vagas_llm.acquire()
+                tarefa = asyncio.create_task(avaliar(registro, html))
+                pendentes_llm.add(tarefa)
+                tarefa.add_done_callback(
+                    lambda concluida, registro=registro, etag=etag, modificado_em=modificado_em: (
+                        pendentes_llm.discard(concluida), registrar(registro, etag, modificado_em)
+                    )
+                )
+            else:
+                registrar(registro, etag, modificado_em)
+
+    async def consumir():
+        lote, metadados = [], []
+        while True:
+            item = await baixadas.get()
+            if item is None:
+                break
+            url, html, anterior, etag, modificado_em = item
+            if isinstance(html, BaseException):
+                registrar({"url": url, "status": ERRO, "hash": None, "problemas": [],
+                           "erro": str(html) or type(html).__name__})
+                continue
+            resumo = hashlib.sha256(html).hexdigest() if html is not None else None
+            if anterior is not None and (html is None or anterior["hash"] == resumo):
+                # Página igual à da última execução: o título ainda conta para os duplicados
+                registro = anterior["registro"]
+                titulos_vistos.setdefault(_normalizar_titulo(registro.get("titulo") or ""), url)
+                registrar(registro, reaproveitada=True)
+                continue
+            lote.append((url, html))
+            metadados.append((resumo, etag, modificado_em))
+            if len(lote) >= TAMANHO_LOTE:
+                await processar_lote(lote, metadados)
+                lote, metadados = [], []
+        if lote:
+            await processar_lote(lote, metadados)
+        if pendentes_llm:
+            await asyncio.wait(set(pendentes_llm))
+
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concorrencia, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=5),
+            headers={"User-Agent": USER_AGENT},
+        ) as sessao_http:
+            consumidor = asyncio.create_task(consumir())
+            await asyncio.gather(*(baixar(sessao_http) for _ in range(concorrencia)))
+            await baixadas.put(None)
+            await consumidor
+    finally:
+        saida.close()
+        executor.shutdown(wait=False)
+    return dict(contagem)
+
+
+def auditar(urls, diretorio, cliente=None, concorrencia=20, concorrencia_llm=4, tipo_conteudo="Blog Post",
+            timeout=20, ao_atualizar=None, sessao=None):
+    """Audita as ``urls`` em fluxo: download assíncrono limitado, verificações locais em lotes e
+    o validador SEO só para as páginas sinalizadas (sem ``cliente``, só as verificações locais).
+
+    Cada resultado é gravado assim que sai em ``<diretorio>/resultados.jsonl``, então a memória
+    usada não cresce com o número de URLs (``urls`` pode ser um gerador). ``ao_atualizar(registro,
+    contagem)`` é chamado na thread de quem chamou.
+    """
+    estado = EstadoAuditoria(diretorio)
+    try:
+        return asyncio.run(_auditar(
+            urls, estado, cliente, concorrencia, concorrencia_llm, tipo_conteudo, timeout, ao_atualizar, sessao
+        ))
+    finally:
+        estado.fechar()
@@ -0,0 +1,93 @@
+"""Benchmark do índice BM25 do site do cliente.
+
+Indexa N páginas sintéticas (vocabulário com frequência de Zipf, ~400 palavras cada)
+num banco temporário e mede: tempo de indexação, tempo de recarga do índice a partir
+do banco, latência p50/p99 de ``buscar`` e de ``relacionadas`` e uma reindexação
+incremental (10% das páginas alteradas, o resto pulado pelo hash).
+
+Uso:
+    python benchmarks/acervo.py
+    python benchmarks/acervo.py --paginas 50000 --consultas 500
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from acervo import IndiceSite, Pagina  # noqa: E402
+
+SILABAS = ("ma", "ke", "ti", "ng", "co", "nte", "ú", "do", "se", "o", "ven", "das", "loja", "pre", "ço",
+           "tra", "fe", "go", "re", "des", "so", "ci", "ais", "au", "to", "çã", "cr", "pa", "gi", "na", "lu")
+
+
+def gerar_paginas(quantidade, palavras, pesos, alteradas=0):
+    # Texto determinístico por página; as ``alteradas`` primeiras ganham uma nova versão
+    for numero in range(quantidade):
+        aleatorio = random.Random(numero * 2 + (numero < alteradas))
+        paragrafos = [
+            " ".join(aleatorio.choices(palavras, cum_weights=pesos, k=aleatorio.randint(30, 90)))
+            for _ in range(aleatorio.randint(4, 8))
+        ]
+        titulo = " ".join(aleatorio.choices(palavras, cum_weights=pesos, k=6))
+        yield Pagina(f"https://exemplo.com.br/pagina-{numero}", titulo, "\n\n".join(paragrafos))
+
+
+def percentis(tempos):
+    tempos = sorted(tempos)
+    return statistics.median(tempos) * 1000, tempos[int(0.99 * (len(tempos) - 1))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=50_000)
+    parser.add_argument("--consultas", type=int, default=500)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(11)
+    palavras = sorted({"".join(aleatorio.choices(SILABAS, k=aleatorio.randint(2, 4))) for _ in range(20_000)})
+    pesos = list(itertools.accumulate(1 / posicao for posicao in range(1, len(palavras) + 1)))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "acervo.db")
+        indice = IndiceSite(caminho)
+        inicio = time.perf_counter()
+        indice.adicionar(gerar_paginas(args.paginas, palavras, pesos))
+        estatisticas = indice.estatisticas()
+        print(
+            f"indexação: {estatisticas['paginas']:,} páginas, {estatisticas['passagens']:,} trechos, "
+            f"{estatisticas['termos']:,} termos em {time.perf_counter() - inicio:.1f}s"
+        )
+
+        inicio = time.perf_counter()
+        indice = IndiceSite(caminho)
+        print(f"recarga do banco: {time.perf_counter() - inicio:.1f}s")
+
+        consultas = [
+            " ".join(aleatorio.choices(palavras, cum_weights=pesos, k=aleatorio.randint(3, 8)))
+            for _ in range(args.consultas)
+        ]
+        for nome, funcao in (("buscar", indice.buscar), ("relacionadas", indice.relacionadas)):
+            tempos = []
+            for consulta in consultas:
+                inicio = time.perf_counter()
+                funcao(consulta)
+                tempos.append(time.perf_counter() - inicio)
+            p50, p99 = percentis(tempos)
+            print(f"{nome}: p50 {p50:.1f} ms · p99 {p99:.1f} ms")
+
+        # Reindexação do site inteiro com 10% das páginas alteradas: o resto é pulado pelo hash
+        inicio = time.perf_counter()
+        resultado = indice.adicionar(gerar_paginas(args.paginas, palavras, pesos, alteradas=args.paginas // 10))
+        print(f"reindexação: {resultado} em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark da auditoria do site contra um servidor HTTP local.
+
+O servidor (aiohttp, numa thread própria) serve N páginas sintéticas com ETag: parte com
+title curto, sem meta description, com dois H1, conteúdo raso, imagens sem alt ou título
+repetido. Só as verificações locais rodam (sem modelo). Mede:
+- primeira auditoria: vazão em páginas/s e, com ``--memoria``, o pico de memória do Python
+  (tracemalloc, que deixa tudo bem mais lento), que só cresce com os títulos guardados para
+  detectar duplicados;
+- segunda auditoria com 5% das páginas alteradas: as demais voltam com 304 e reaproveitam o
+  resultado anterior.
+
+Uso:
+    python benchmarks/auditoria.py
+    python benchmarks/auditoria.py --paginas 20000 --concorrencia 50
+    python benchmarks/auditoria.py --paginas 2000 --memoria
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from aiohttp import web
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from auditoria import ERRO, OK, SINALIZADA, auditar  # noqa: E402
+
+PARAGRAFO = "<p>Texto da página sobre marketing digital, conteúdo e otimização para buscadores.</p>"
+VERSAO = {"alteradas": 0}
+
+
+def pagina(numero):
+    versao = 2 if numero < VERSAO["alteradas"] else 1
+    problema = numero % 10
+    titulo = f"Guia de marketing digital número {numero} | Loja Exemplo"
+    if problema == 1:
+        titulo = f"Página {numero}"
+    elif problema == 2:
+        titulo = "Guia de marketing digital | Loja Exemplo"
+    descricao = "" if problema == 3 else (
+        f"Tudo sobre marketing digital para pequenas empresas: estratégias, ferramentas e exemplos ({numero})."
+    )
+    h1 = "<h1>Guia</h1><h1>Outro H1</h1>" if problema == 4 else f"<h1>Guia {numero}</h1>"
+    texto = PARAGRAFO * (5 if problema == 5 else 40) + f"<p>Revisão {versao}.</p>"
+    imagens = '<img src="/a.jpg"><img src="/b.jpg">' if problema == 6 else '<img src="/a.jpg" alt="Gráfico">'
+    return (
+        f'<!doctype html><html lang="pt-BR"><head><title>{titulo}</title>'
+        f'<meta name="description" content="{descricao}"></head>'
+        f"<body>{h1}{imagens}{texto}</body></html>"
+    ), f'"{numero}-{versao}"'
+
+
+def criar_app():
+    async def servir(requisicao):
+        html, etag = pagina(int(requisicao.match_info["numero"]))
+        if requisicao.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/pagina/{numero}", servir)
+    return app
+
+
+def iniciar_servidor():
+    loop = asyncio.new_event_loop()
+    pronto = threading.Event()
+    endereco = {}
+
+    async def subir():
+        runner = web.AppRunner(criar_app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        endereco["porta"] = site._server.sockets[0].getsockname()[1]
+        pronto.set()
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(subir(), loop)
+    pronto.wait()
+    return f"http://127.0.0.1:{endereco['porta']}"
+
+
+def rodar(base, paginas, pasta, concorrencia, memoria):
+    urls = (f"{base}/pagina/{numero}" for numero in range(paginas))
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    contagem = auditar(urls, pasta, concorrencia=concorrencia)
+    segundos = time.perf_counter() - inicio
+    pico = ""
+    if memoria:
+        pico = f" · pico de memória {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MB"
+        tracemalloc.stop()
+    return contagem, segundos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=10_000)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--memoria", action="store_true", help="mede o pico de memória com tracemalloc")
+    args = parser.parse_args()
+
+    base = iniciar_servidor()
+    with tempfile.TemporaryDirectory() as pasta:
+        # Um décimo das páginas antes, para mostrar que o pico de memória não acompanha o total
+        for rotulo, paginas, destino in (("amostra", args.paginas // 10, f"{pasta}/amostra"),
+                                         ("auditoria", args.paginas, f"{pasta}/site")):
+            contagem, segundos, pico = rodar(base, paginas, destino, args.concorrencia, args.memoria)
+            print(
+                f"{rotulo}: {paginas:,} páginas em {segundos:.1f}s ({paginas / segundos:,.0f}/s) · "
+                f"{contagem.get(OK, 0):,} ok · {contagem.get(SINALIZADA, 0):,} sinalizadas · "
+                f"{contagem.get(ERRO, 0)} erros{pico}"
+            )
+        # Seis em cada dez páginas têm algum problema (o primeiro título repetido não conta)
+        assert contagem.get(SINALIZADA, 0) >= args.paginas * 6 // 10 - 1, contagem
+
+        VERSAO["alteradas"] = args.paginas // 20
+        contagem, segundos, pico = rodar(base, args.paginas, f"{pasta}/site", args.concorrencia, args.memoria)
+        print(
+            f"reauditoria ({VERSAO['alteradas']:,} alteradas): {segundos:.1f}s · "
+            f"{contagem.get('inalteradas', 0):,} inalteradas{pico}"
+        )
+        assert contagem.get("inalteradas", 0) == args.paginas - VERSAO["alteradas"], contagem
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Teste de carga: chamadas bloqueantes num pool de threads contra corrotinas no laço compartilhado.
+
+Simula N usuários simultâneos, cada um com uma chamada a um modelo simulado (latência
+log-normal), passando pelo agendador real, com o mesmo limite de threads nos dois desenhos:
+- bloqueante: como era a API, cada pedido vai para o pool com ``asyncio.to_thread`` e
+  ``Agendador.executar`` + ``generate_content``; uma thread fica presa por chamada em andamento;
+- assíncrono: ``ClienteLLM.gerar_async`` no laço compartilhado (``generate_content_async`` e
+  ``Agendador.executar_async``); o pool fica livre.
+
+Mede vazão (chamadas/s), p50/p95 da latência vista pelo usuário e o pico de threads do processo.
+
+Uso:
+    python benchmarks/carga_assincrona.py
+    python benchmarks/carga_assincrona.py --usuarios 1000 --threads 32 --latencia 0.8
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from agendador import Agendador  # noqa: E402
+from gemini_falso import ModeloFalso  # noqa: E402
+from laco import laco_compartilhado  # noqa: E402
+from llm import ClienteLLM  # noqa: E402
+
+# Limites altos: o que se mede é o custo de esperar a API, não a cota
+LIMITES = {"falso/carga": (1_000_000, 1_000_000_000)}
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+async def rodar(usuarios, threads, chamar):
+    # O mesmo pool limitado nos dois desenhos, como o AIO_API_CONCORRENCIA da API
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+    pico = threading.active_count()
+    rodando = True
+
+    async def amostrar():
+        nonlocal pico
+        while rodando:
+            pico = max(pico, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    async def usuario(indice):
+        inicio = time.perf_counter()
+        await chamar(indice)
+        return time.perf_counter() - inicio
+
+    amostragem = asyncio.create_task(amostrar())
+    inicio = time.perf_counter()
+    latencias = await asyncio.gather(*(usuario(indice) for indice in range(usuarios)))
+    total = time.perf_counter() - inicio
+    rodando = False
+    await amostragem
+    return latencias, total, pico
+
+
+def bloqueante(modelo, agendador):
+    def chamar_na_thread(indice):
+        prompt = f"Pergunta {indice}"
+        return agendador.executar(
+            lambda: modelo.generate_content(prompt).text, "falso/carga", sessao=f"usuario-{indice}", tokens=10
+        )
+
+    async def chamar(indice):
+        return await asyncio.to_thread(chamar_na_thread, indice)
+
+    return chamar
+
+
+def assincrono(modelo, cliente):
+    laco = cliente.laco
+
+    async def chamar(indice):
+        corrotina = cliente.gerar_async(modelo, f"Pergunta {indice}", sessao=f"usuario-{indice}", ferramenta="carga")
+        return await asyncio.wrap_future(laco.executar(corrotina))
+
+    return chamar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latencia", type=float, default=0.5, help="mediana da latência simulada (s)")
+    parser.add_argument("--dispersao", type=float, default=0.5, help="desvio do log da latência (caudas)")
+    args = parser.parse_args()
+
+    modelo = ModeloFalso("falso/carga", latencia=args.latencia, dispersao=args.dispersao)
+    # Cria o laço antes das medições para a thread dele não contar como pico de um dos lados
+    laco_compartilhado()
+    desenhos = (
+        ("bloqueante", bloqueante(modelo, Agendador(LIMITES))),
+        ("assíncrono", assincrono(modelo, ClienteLLM(agendador=Agendador(LIMITES)))),
+    )
+    print(f"{args.usuarios} usuários simultâneos · {args.threads} threads · latência ~{args.latencia}s")
+    for rotulo, chamar in desenhos:
+        latencias, total, pico = asyncio.run(rodar(args.usuarios, args.threads, chamar))
+        print(
+            f"{rotulo:<11} {args.usuarios / total:7.1f} chamadas/s · p50 {statistics.median(latencias):.2f}s · "
+            f"p95 {percentil(latencias, 95):.2f}s · total {total:.1f}s · pico de {pico} threads"
+        )
+
+
+if __name__ == "__main__":
+    main()
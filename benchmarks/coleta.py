@@ -0,0 +1,142 @@
+"""Benchmark da coleta de páginas do Otimizador Visual contra um servidor HTTP local.
+
+O servidor (aiohttp, numa thread própria) serve uma página com ETag e 304, outra sem
+validadores e uma lenta. Mede o tempo de cada caminho da coleta e confere os fatos extraídos:
+- rede: primeira coleta (download e análise do HTML);
+- recente: mesma URL logo em seguida (memória, sem ir à rede);
+- não modificada: revalidação com If-None-Match respondida com 304;
+- mesmo conteúdo: servidor sem ETag devolvendo o mesmo HTML (fatos reaproveitados pelo hash);
+- N páginas distintas coletadas ao mesmo tempo pelo mesmo pool de conexões;
+- timeout de uma página lenta.
+
+Uso:
+    python benchmarks/coleta.py
+    python benchmarks/coleta.py --paginas 500 --atraso 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+from aiohttp import web
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from coleta import MESMO_CONTEUDO, NAO_MODIFICADA, RECENTE, REDE, ColetorPaginas  # noqa: E402
+
+HTML = """<!doctype html>
+<html lang="pt-BR"><head>
+<title>Tênis de corrida leve | Loja Exemplo</title>
+<meta name="description" content="Tênis de corrida com amortecimento e frete grátis.">
+<link rel="canonical" href="https://loja.exemplo.com.br/tenis">
+<meta property="og:title" content="Tênis de corrida"><meta property="og:image" content="/og.png">
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [{"@type": "Product"}, {"@type": "BreadcrumbList"}]}</script>
+</head><body>
+<h1>Tênis de corrida leve</h1><h2>Amortecimento</h2><h2>Tamanhos</h2><h3>Tabela de medidas</h3>
+<img src="/a.jpg" alt="Tênis azul"><img src="/b.jpg"><img src="/c.jpg" alt="">
+<a href="/outros">Outros</a><a href="https://externo.com">Parceiro</a>
+""" + "<p>Conteúdo da página de produto.</p>" * 400 + "</body></html>"
+ETAG = '"v1"'
+
+
+def criar_app(atraso):
+    async def com_etag(requisicao):
+        await asyncio.sleep(atraso)
+        if requisicao.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(text=HTML, content_type="text/html", headers={"ETag": ETAG})
+
+    async def sem_validadores(requisicao):
+        await asyncio.sleep(atraso)
+        return web.Response(text=HTML, content_type="text/html")
+
+    async def lenta(requisicao):
+        await asyncio.sleep(30)
+        return web.Response(text=HTML, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/pagina", com_etag)
+    app.router.add_get("/sem-etag", sem_validadores)
+    app.router.add_get("/lenta", lenta)
+    app.router.add_get("/produto/{numero}", sem_validadores)
+    return app
+
+
+def iniciar_servidor(atraso):
+    loop = asyncio.new_event_loop()
+    pronto = threading.Event()
+    endereco = {}
+
+    async def subir():
+        runner = web.AppRunner(criar_app(atraso))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        endereco["porta"] = site._server.sockets[0].getsockname()[1]
+        pronto.set()
+
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(subir(), loop)
+    pronto.wait()
+    return f"http://127.0.0.1:{endereco['porta']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=200, help="páginas distintas coletadas ao mesmo tempo")
+    parser.add_argument("--atraso", type=float, default=0.05, help="latência simulada do servidor, em segundos")
+    args = parser.parse_args()
+
+    base = iniciar_servidor(args.atraso)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "coleta.db")
+        coletor = ColetorPaginas(caminho, timeout=2)
+        esperados = [
+            (f"{base}/pagina", REDE),
+            (f"{base}/pagina", RECENTE),
+            (f"{base}/sem-etag", MESMO_CONTEUDO),
+        ]
+        for url, origem in esperados:
+            coleta = coletor.coletar(url)
+            print(f"{coleta.origem:>15}: {coleta.segundos * 1000:7.1f} ms  {url}")
+            assert coleta.origem == origem, (coleta.origem, origem)
+
+        fatos = coleta.fatos
+        assert fatos.titulo.startswith("Tênis de corrida") and fatos.descricao
+        assert set(fatos.dados_estruturados) == {"Product", "BreadcrumbList"}
+        assert (fatos.imagens, fatos.imagens_com_alt) == (3, 1)
+        assert [nivel for nivel, _ in fatos.titulos] == ["h1", "h2", "h2", "h3"]
+        print(fatos.resumo())
+
+        # Outro processo (sem a memória recente) revalida com o ETag guardado no banco
+        coletor.fechar()
+        coletor = ColetorPaginas(caminho, timeout=2)
+        coleta = coletor.coletar(f"{base}/pagina")
+        print(f"{coleta.origem:>15}: {coleta.segundos * 1000:7.1f} ms  (revalidação)")
+        assert coleta.origem == NAO_MODIFICADA
+
+        inicio = time.perf_counter()
+        futuros = [coletor.iniciar(f"{base}/produto/{numero}") for numero in range(args.paginas)]
+        wait(futuros)
+        total = time.perf_counter() - inicio
+        print(
+            f"{args.paginas} páginas simultâneas em {total:.2f}s "
+            f"({args.paginas * args.atraso:.1f}s se fossem em sequência)"
+        )
+
+        inicio = time.perf_counter()
+        try:
+            coletor.coletar(f"{base}/lenta")
+        except TimeoutError:
+            print(f"página lenta: timeout em {time.perf_counter() - inicio:.1f}s")
+        coletor.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Mede quanto custa um rerun do app a cada interação, usando o modelo local simulado.
+
+Compara o rerun completo do script (o que toda tecla custava antes dos fragmentos)
+com a execução isolada de cada ferramenta (o que um ``st.fragment`` reexecuta).
+
+Uso:
+    python benchmarks/rerun.py
+    python benchmarks/rerun.py --antes <revisão git>   # mede também o main.py daquela revisão
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+os.environ.setdefault("AIO_GEMINI_FALSO", "1")
+os.environ.setdefault("CACHE_DB", os.path.join(tempfile.gettempdir(), "aio_bench_cache.db"))
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+# Tempos de execução de cada corpo de fragmento, acumulados durante os reruns
+tempos_fragmentos = defaultdict(list)
+_fragment_original = st.fragment
+
+
+def _fragment_cronometrado(funcao=None, **kwargs):
+    if funcao is None:
+        return lambda f: _fragment_cronometrado(f, **kwargs)
+
+    def cronometrada(*args, **kw):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kw)
+        finally:
+            tempos_fragmentos[funcao.__name__].append(time.perf_counter() - inicio)
+
+    cronometrada.__name__ = funcao.__name__
+    cronometrada.__qualname__ = funcao.__qualname__
+    return _fragment_original(cronometrada, **kwargs)
+
+
+st.fragment = _fragment_cronometrado
+
+
+def medir(caminho_script, repeticoes):
+    os.chdir(RAIZ)
+    tempos_fragmentos.clear()
+    app = AppTest.from_file(str(caminho_script), default_timeout=120)
+
+    inicio = time.perf_counter()
+    app.run()
+    primeira_execucao = time.perf_counter() - inicio
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    # Cada "tecla" no Gerador de FAQ dispara um rerun
+    reruns = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        app.text_input(key="pergunta_10").input(f"Como integrar X com Y? {i}").run()
+        reruns.append(time.perf_counter() - inicio)
+
+    return {
+        "primeira_execucao_s": round(primeira_execucao, 4),
+        "rerun_completo_mediana_s": round(statistics.median(reruns), 4),
+        "fragmentos_mediana_s": {
+            nome: round(statistics.median(tempos), 5) for nome, tempos in sorted(tempos_fragmentos.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--antes", help="revisão git cujo main.py será medido para comparação")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    resultado = {"atual": medir(RAIZ / "main.py", args.repeticoes)}
+    if args.antes:
+        codigo = subprocess.run(
+            ["git", "show", f"{args.antes}:main.py"], cwd=RAIZ, check=True, capture_output=True, text=True
+        ).stdout
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False, encoding="utf-8") as arquivo:
+            arquivo.write(codigo)
+        try:
+            resultado["antes"] = medir(arquivo.name, args.repeticoes)
+        finally:
+            os.unlink(arquivo.name)
+
+    atual = resultado["atual"]
+    # Com fragmentos, digitar no FAQ reexecuta só o corpo do Gerador de FAQ
+    if "gerador_faq" in atual["fragmentos_mediana_s"]:
+        atual["rerun_fragmento_faq_s"] = atual["fragmentos_mediana_s"]["gerador_faq"]
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark do roteador de modelos e das chamadas com reserva (hedge), com modelos simulados.
+
+Mede:
+- as decisões do roteador para pedidos típicos: FAQ curta, artigos de 800 a 3.000 palavras,
+  reescrita de um texto perto do orçamento e a análise visual, com a latência prevista;
+- p50/p95/p99 de N chamadas a um modelo simulado com latência log-normal (caudas longas,
+  como na API real), só no principal e com reserva: a reserva recebe a chamada quando a
+  principal passa do p95 observado no aquecimento. O custo do hedge aparece como chamadas
+  a mais.
+
+Uso:
+    python benchmarks/roteamento.py
+    python benchmarks/roteamento.py --chamadas 400 --concorrencia 16 --latencia 0.5 --dispersao 0.8
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from ferramentas import FERRAMENTAS  # noqa: E402
+from gemini_falso import ModeloFalso  # noqa: E402
+from llm import ClienteLLM  # noqa: E402
+from metricas import MetricasLLM  # noqa: E402
+from roteador import PERCENTIL_RESERVA  # noqa: E402
+
+PEDIDOS = (
+    ("gerador_faq", {"faq_question": "Como integrar o CRM com o WhatsApp?"}),
+    ("construtor_paginas", {"target_query": "SEO local", "key_points": "avaliações, mapa", "word_count": 800}),
+    ("construtor_paginas", {"target_query": "SEO local", "key_points": "avaliações, mapa", "word_count": 1500}),
+    ("construtor_paginas", {"target_query": "SEO local", "key_points": "avaliações, mapa", "word_count": 3000}),
+    ("reescritor_conteudo", {"original_content": "Parágrafo sobre SEO técnico e indexação. " * 500,
+                             "target_query": "o que é SEO técnico"}),
+    ("otimizador_visual", {"page_type": "Homepage", "page_url": "https://www.exemplo.com"}),
+)
+
+
+class ModeloContado(ModeloFalso):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        with self._lock:
+            self.chamadas += 1
+        return await super().generate_content_async(contents, generation_config, stream)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+def decisoes():
+    cliente = ClienteLLM(metricas=MetricasLLM())
+    print(f"{'ferramenta':<22} {'saída':>6} {'entrada':>8}  {'modelo':<18} {'motivo':<14} prevista")
+    for nome, entradas in PEDIDOS:
+        ferramenta = FERRAMENTAS[nome]
+        decisao = ferramenta.rotear(cliente, entradas, sessao="bench")
+        print(
+            f"{nome:<22} {decisao.tokens_saida:>6} {decisao.tokens_entrada:>8}  {decisao.modelo:<18} "
+            f"{decisao.motivo:<14} {decisao.prevista:.1f}s (SLO {decisao.slo:.0f}s)"
+        )
+
+
+def medir(cliente, principal, reserva, atraso, chamadas, concorrencia):
+    def chamar(indice):
+        inicio = time.perf_counter()
+        cliente.gerar(
+            principal, f"Pergunta {indice}", sessao="bench", ferramenta="gerador_faq",
+            reserva=reserva, atraso_reserva=atraso,
+        )
+        return time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        return list(executor.map(chamar, range(chamadas)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chamadas", type=int, default=300)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--latencia", type=float, default=0.3, help="mediana da latência simulada (s)")
+    parser.add_argument("--dispersao", type=float, default=0.8, help="desvio do log da latência (caudas)")
+    args = parser.parse_args()
+
+    decisoes()
+    print()
+
+    # Sem cache nem agendador: só a latência dos modelos e o custo das repetições
+    cliente = ClienteLLM(metricas=MetricasLLM(janela=args.chamadas))
+    principal = ModeloContado("falso/principal", latencia=args.latencia, dispersao=args.dispersao)
+    reserva = ModeloContado("falso/reserva", latencia=args.latencia, dispersao=args.dispersao)
+
+    for rotulo, com_reserva in (("só o principal", False), ("com reserva", True)):
+        atraso = None
+        if com_reserva:
+            atraso = cliente.metricas.latencia("gerador_faq", PERCENTIL_RESERVA, "falso/principal")
+        antes = principal.chamadas + reserva.chamadas
+        latencias = medir(
+            cliente, principal, reserva if com_reserva else None, atraso, args.chamadas, args.concorrencia
+        )
+        extras = principal.chamadas + reserva.chamadas - antes - args.chamadas
+        print(
+            f"{rotulo:<15} p50 {statistics.median(latencias):.2f}s · p95 {percentil(latencias, 95):.2f}s · "
+            f"p99 {percentil(latencias, 99):.2f}s · máx {max(latencias):.2f}s · "
+            f"{extras} chamadas extras ({extras / args.chamadas:.0%})"
+            + (f" · reserva após {atraso:.2f}s" if atraso else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
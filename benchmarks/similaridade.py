@@ -0,0 +1,87 @@
+"""Benchmark do índice de pedidos quase idênticos (MinHash + LSH).
+
+Insere N pedidos sintéticos e mede a busca: latência p50/p99 da consulta (em µs),
+taxa de acerto para variações de pedidos guardados (palavras vazias, maiúsculas,
+uma palavra a mais) e falsos positivos para pedidos novos.
+
+Uso:
+    python benchmarks/similaridade.py
+    python benchmarks/similaridade.py --pedidos 100000 --consultas 2000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from similaridade import IndiceSimilaridade  # noqa: E402
+
+SILABAS = ("ma", "ke", "ti", "ng", "co", "nte", "ú", "do", "se", "o", "ven", "das", "loja", "pre", "ço",
+           "tra", "fe", "go", "re", "des", "so", "ci", "ais", "au", "to", "çã", "cr", "pa", "gi", "na", "lu")
+
+
+def vocabulario(aleatorio, tamanho=8000):
+    return sorted({"".join(aleatorio.choices(SILABAS, k=aleatorio.randint(2, 4))) for _ in range(tamanho)})
+
+
+def pedido(aleatorio, palavras, pesos):
+    # Pedidos de 4 a 12 palavras com frequência de Zipf, como buscas reais: poucos termos muito comuns
+    return " ".join(aleatorio.choices(palavras, weights=pesos, k=aleatorio.randint(4, 12)))
+
+
+def variacao(aleatorio, texto):
+    palavras = texto.split()
+    escolha = aleatorio.randrange(3)
+    if escolha == 0:
+        palavras.insert(aleatorio.randrange(len(palavras)), aleatorio.choice(("em", "para", "de", "com")))
+    elif escolha == 1:
+        palavras = [p.upper() if i % 2 else p for i, p in enumerate(palavras)]
+    else:
+        palavras.insert(0, "dicas:")
+    return " ".join(palavras)
+
+
+def medir(indice, textos):
+    tempos, achados = [], 0
+    for texto in textos:
+        inicio = time.perf_counter()
+        achado = indice.buscar((), texto)
+        tempos.append(time.perf_counter() - inicio)
+        achados += achado is not None
+    tempos.sort()
+    return {
+        "p50_us": round(statistics.median(tempos) * 1e6, 1),
+        "p99_us": round(tempos[int(0.99 * (len(tempos) - 1))] * 1e6, 1),
+        "taxa": round(achados / len(textos), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pedidos", type=int, default=100_000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(7)
+    indice = IndiceSimilaridade(capacidade=args.pedidos)
+    palavras = vocabulario(aleatorio)
+    pesos = [1 / posicao for posicao in range(1, len(palavras) + 1)]
+    guardados = [pedido(aleatorio, palavras, pesos) for _ in range(args.pedidos)]
+    inicio = time.perf_counter()
+    for numero, texto in enumerate(guardados):
+        indice.adicionar((), texto, f"chave-{numero}")
+    print(f"{args.pedidos:,} pedidos inseridos em {time.perf_counter() - inicio:.1f}s")
+
+    variacoes = [variacao(aleatorio, aleatorio.choice(guardados)) for _ in range(args.consultas)]
+    novos = [pedido(aleatorio, palavras, pesos) for _ in range(args.consultas)]
+    for nome, textos in (("variações de pedidos guardados", variacoes), ("pedidos novos", novos)):
+        resultado = medir(indice, textos)
+        print(f"{nome}: p50 {resultado['p50_us']} µs · p99 {resultado['p99_us']} µs · encontrados {resultado['taxa']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Bateria de benchmarks das onze ferramentas com o modelo local simulado (sem gastar cota).
+
+Para cada ferramenta mede:
+- pelo registro de ferramentas: latência p50/p95 (total e até o primeiro trecho),
+  vazão com N sessões simultâneas e pico de memória;
+- pelo app Streamlit (AppTest): tempo de um rerun comum, tempo do clique que gera
+  a resposta e pico de memória desse clique.
+
+Os resultados vão para um JSON (por padrão benchmarks/resultados/<commit>.json);
+com --comparar, as métricas que pioraram além da tolerância são listadas e o script
+sai com código 1.
+
+Uso:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --sessoes 16 --chamadas 4 --latencia 0.8 --dispersao 0.5 --taxa-erro 0.02
+    python benchmarks/suite.py --ferramentas gerador_faq validador_seo --sem-app
+    python benchmarks/suite.py --comparar benchmarks/resultados/abc1234.json
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+# Entradas de exemplo usadas pelas duas frentes (registro e AppTest)
+ENTRADAS = {
+    "construtor_paginas": {"target_query": "Como aumentar conversões com SEO em 2025?",
+                           "key_points": "Estratégias comprovadas, casos de sucesso, ferramentas essenciais"},
+    "expansor_topicos": {"main_topic": "Marketing de conteúdo", "audience": "Pequenas empresas"},
+    "analisador_resultados": {"example_response": "O SEO para IA prioriza respostas diretas, " * 20},
+    "reescritor_conteudo": {"original_content": "Parágrafo de exemplo sobre SEO técnico. " * 60,
+                            "target_query": "o que é SEO técnico"},
+    "validador_seo": {"content_to_check": "Conteúdo de blog sobre SEO local e avaliações. " * 60,
+                      "main_keyword": "SEO local"},
+    "otimizador_visual": {"page_type": "Homepage", "page_url": "https://www.exemplo.com"},
+    "comparador_produtos": {"product_a": "CRM Alfa", "product_b": "CRM Beta", "concorrente": "Beta Ltda",
+                            "comparison_aspects": "preço, integrações"},
+    "guia_comprador": {"product_category": "Notebooks", "buyer_profile": "Estudantes",
+                       "top_products": "Modelo A, Modelo B, Modelo C"},
+    "explicador_recursos": {"feature_name": "Webhooks", "product_context": "na plataforma X",
+                            "use_cases": "Integração com ERP"},
+    "desmistificador": {"myth": "SEO morreu com a IA", "truth": "Os fundamentos continuam valendo"},
+    "gerador_faq": {"faq_question": "Como integrar o CRM com o WhatsApp?"},
+}
+
+# Como preencher cada ferramenta no app: (tipo do widget, key, campo de ENTRADAS) e o botão que gera
+WIDGETS = {
+    "construtor_paginas": ([("text_input", "consulta_1", "target_query"),
+                            ("text_area", "pontos_chave_1", "key_points")], "btn_artigo_1"),
+    "expansor_topicos": ([("text_input", "tema_principal_2", "main_topic"),
+                          ("text_input", "publico_2", "audience")], "btn_ideias_2"),
+    "analisador_resultados": ([("text_area", "resposta_3", "example_response")], "btn_analise_3"),
+    "reescritor_conteudo": ([("text_area", "conteudo_4", "original_content"),
+                             ("text_input", "query_4", "target_query")], "btn_otimizar_4"),
+    "validador_seo": ([("text_area", "conteudo_5", "content_to_check"),
+                       ("text_input", "keyword_5", "main_keyword")], "btn_analisar_5"),
+    # O AppTest não simula upload de arquivos: sem imagem, o clique só mostra o aviso
+    "otimizador_visual": ([("text_input", "url_visual", "page_url")], "btn_analise_visual"),
+    "comparador_produtos": ([("text_input", "produto_a_6", "product_a"),
+                             ("text_input", "produto_b_666", "product_b"),
+                             ("text_input", "produto_b_6", "concorrente")], "btn_comparacao_6"),
+    "guia_comprador": ([("text_input", "categoria_7", "product_category"),
+                        ("text_input", "perfil_7", "buyer_profile"),
+                        ("text_area", "produtos_7", "top_products")], "btn_guia_7"),
+    "explicador_recursos": ([("text_input", "recurso_8", "feature_name")], "btn_explicacao_8"),
+    "desmistificador": ([("text_input", "mito_9", "myth"),
+                         ("text_area", "verdade_9", "truth")], "btn_resposta_9"),
+    "gerador_faq": ([("text_input", "pergunta_10", "faq_question")], "btn_faq_10"),
+}
+
+# Métricas comparadas entre execuções: maior é pior, exceto a vazão
+METRICAS_MAIOR_MELHOR = {"vazao_chamadas_s"}
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def imagem_exemplo():
+    from PIL import Image, ImageDraw
+
+    # Captura "alta" o bastante para ser dividida em dois trechos
+    imagem = Image.new("RGB", (1280, 3000), "white")
+    desenho = ImageDraw.Draw(imagem)
+    for topo in range(0, 3000, 120):
+        desenho.rectangle((80, topo + 20, 1200, topo + 90), fill=(topo % 255, 90, 160))
+    buffer = io.BytesIO()
+    imagem.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def entradas_com_variacao(nome, indice):
+    # Cada chamada recebe um texto diferente para não ser respondida pelo cache
+    entradas = dict(ENTRADAS[nome])
+    campo = WIDGETS[nome][0][0][2]
+    entradas[campo] = f"{entradas[campo]} #{indice}"
+    return entradas
+
+
+def medir_registro(nome, sessoes, chamadas, imagem_base64):
+    from agendador import Agendador
+    from ferramentas import FERRAMENTAS
+    from llm import ClienteLLM
+
+    # Sem cache: cada chamada vai ao modelo simulado, passando pelo agendador real
+    cliente = ClienteLLM(cache=None, agendador=Agendador())
+    ferramenta = FERRAMENTAS[nome]
+    modelo = cliente.modelo(ferramenta.modelo)
+    latencias, primeiros_trechos, erros = [], [], []
+    lock = threading.Lock()
+
+    def sessao(numero):
+        for i in range(chamadas):
+            entradas = entradas_com_variacao(nome, numero * chamadas + i)
+            if nome == "otimizador_visual":
+                entradas["imagem_base64"] = imagem_base64
+            inicio = time.perf_counter()
+            try:
+                resposta = cliente.gerar_stream(modelo, ferramenta.conteudo(entradas), sessao=f"bench-{numero}")
+                for _ in resposta:
+                    pass
+            except Exception as erro:
+                with lock:
+                    erros.append(type(erro).__name__)
+                continue
+            with lock:
+                latencias.append(time.perf_counter() - inicio)
+                primeiros_trechos.append(resposta.tempo_primeiro_trecho)
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        list(executor.map(sessao, range(sessoes)))
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "latencia_p50_s": _arredondar(percentil(latencias, 50)),
+        "latencia_p95_s": _arredondar(percentil(latencias, 95)),
+        "primeiro_trecho_p50_s": _arredondar(percentil(primeiros_trechos, 50)),
+        "primeiro_trecho_p95_s": _arredondar(percentil(primeiros_trechos, 95)),
+        "vazao_chamadas_s": _arredondar(len(latencias) / duracao),
+        "erros": len(erros),
+        "pico_memoria_kb": round(pico / 1024),
+    }
+
+
+def medir_app(nome, repeticoes):
+    from streamlit.testing.v1 import AppTest
+
+    campos, botao = WIDGETS[nome]
+    app = AppTest.from_file(str(RAIZ / "main.py"), default_timeout=300)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    reruns, cliques, picos = [], [], []
+    for i in range(repeticoes):
+        entradas = entradas_com_variacao(nome, i)
+        # Um rerun comum: preencher o primeiro campo (o que cada tecla custa)
+        tipo, chave, campo = campos[0]
+        inicio = time.perf_counter()
+        getattr(app, tipo)(key=chave).set_value(entradas[campo]).run()
+        reruns.append(time.perf_counter() - inicio)
+        for tipo, chave, campo in campos[1:]:
+            getattr(app, tipo)(key=chave).set_value(entradas[campo])
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        app.button(key=botao).click().run()
+        cliques.append(time.perf_counter() - inicio)
+        picos.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    return {
+        "rerun_p50_s": _arredondar(statistics.median(reruns)),
+        "clique_p50_s": _arredondar(statistics.median(cliques)),
+        "clique_p95_s": _arredondar(percentil(cliques, 95)),
+        "pico_memoria_clique_kb": round(max(picos) / 1024),
+    }
+
+
+def comparar(atual, anterior, tolerancia):
+    regressoes = []
+    for nome, frentes in atual["ferramentas"].items():
+        for frente, metricas in frentes.items():
+            base = anterior.get("ferramentas", {}).get(nome, {}).get(frente, {})
+            for metrica, valor in metricas.items():
+                antes = base.get(metrica)
+                if not antes or valor is None or metrica == "erros":
+                    continue
+                variacao = (valor - antes) / antes
+                if metrica in METRICAS_MAIOR_MELHOR:
+                    variacao = -variacao
+                if variacao > tolerancia:
+                    regressoes.append(f"{nome}.{frente}.{metrica}: {antes} -> {valor} ({variacao:+.0%})")
+    return regressoes
+
+
+def _arredondar(valor):
+    return None if valor is None else round(valor, 4)
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sem-git"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ferramentas", nargs="+", choices=sorted(ENTRADAS), default=sorted(ENTRADAS))
+    parser.add_argument("--sessoes", type=int, default=8, help="sessões simultâneas na medição de vazão")
+    parser.add_argument("--chamadas", type=int, default=3, help="chamadas por sessão")
+    parser.add_argument("--repeticoes", type=int, default=3, help="cliques por ferramenta no AppTest")
+    parser.add_argument("--latencia", type=float, default=0.3, help="mediana da latência simulada (s)")
+    parser.add_argument("--dispersao", type=float, default=0.4, help="sigma da log-normal; 0 = latência fixa")
+    parser.add_argument("--intervalo-trechos", type=float, default=0.02)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de chamadas que falham com 429")
+    parser.add_argument("--sem-app", action="store_true", help="pula as medições via AppTest")
+    parser.add_argument("--saida", help="arquivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora relativa aceita (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    simulacao = {
+        "latencia": args.latencia,
+        "dispersao": args.dispersao,
+        "intervalo_trechos": args.intervalo_trechos,
+        "taxa_erro": args.taxa_erro,
+    }
+    diretorio = tempfile.mkdtemp(prefix="aio_bench_")
+    os.environ["AIO_GEMINI_FALSO"] = "1"
+    os.environ["AIO_GEMINI_FALSO_CONFIG"] = json.dumps(simulacao)
+    os.environ["CACHE_DB"] = os.path.join(diretorio, "cache.db")
+    os.environ["TAREFAS_DB"] = os.path.join(diretorio, "tarefas.db")
+    os.chdir(RAIZ)
+
+    imagem_base64 = imagem_exemplo()
+    resultado = {
+        "commit": _commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parametros": {**simulacao, "sessoes": args.sessoes, "chamadas": args.chamadas, "repeticoes": args.repeticoes},
+        "ferramentas": {},
+    }
+    for nome in args.ferramentas:
+        print(f"· {nome}", file=sys.stderr)
+        medicoes = {"registro": medir_registro(nome, args.sessoes, args.chamadas, imagem_base64)}
+        if not args.sem_app:
+            medicoes["app"] = medir_app(nome, args.repeticoes)
+        resultado["ferramentas"][nome] = medicoes
+
+    saida = Path(args.saida) if args.saida else RAIZ / "benchmarks" / "resultados" / f"{resultado['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(json.dumps(resultado["ferramentas"], indent=2, ensure_ascii=False))
+    print(f"Resultados em {saida}", file=sys.stderr)
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        if anterior.get("parametros") != resultado["parametros"]:
+            print("Aviso: as execuções usaram parâmetros de simulação diferentes", file=sys.stderr)
+        regressoes = comparar(resultado, anterior, args.tolerancia)
+        if regressoes:
+            print(f"Regressões em relação a {anterior.get('commit', args.comparar)}:", file=sys.stderr)
+            for linha in regressoes:
+                print(f"  {linha}", file=sys.stderr)
+            return 1
+        print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {anterior.get('commit')}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+import asyncio
+import re
+import time
+from concurrent.futures import as_completed
+
+from agendador import estimar_tokens
+from analise_seo import analisar_conteudo
+
+# Conteúdos acima do limiar são processados em blocos (map) e consolidados depois (reduce).
+# Nenhum prompt passa de ~TOKENS_POR_BLOCO + instruções, seja qual for o tamanho da entrada.
+LIMIAR_DIVISAO = 3000
+TOKENS_POR_BLOCO = 2000
+ORCAMENTO_REDUCAO = 3000
+CARACTERES_POR_ITEM = 600
+# Chamadas simultâneas de um mesmo conteúdo; a fila do agendador reparte a cota entre as sessões
+MAX_SIMULTANEAS = 8
+
+# Fronteiras de divisão, da mais forte para a mais fraca: títulos, parágrafos e frases
+_SEPARADORES = (
+    re.compile(r"(?m)^(?=#{1,6}\s)"),
+    re.compile(r"\n\s*\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+)
+_RESUMO = re.compile(r"(?im)^\s*RESUMO:\s*(.+?)\s*$")
+_PONTUACAO = re.compile(r"(?i)PONTUA[CÇ][AÃ]O:\s*(\d{1,3})")
+_TLDR = re.compile(r"(?ims)^\s*TLDR:\s*(.+?)\s*(?=^\s*(?:ORDEM|A[CÇ][OÕ]ES):|\Z)")
+_ORDEM = re.compile(r"(?im)^\s*ORDEM:\s*(.+)$")
+_ACOES = re.compile(r"(?ims)^\s*A[CÇ][OÕ]ES:\s*(.+)")
+
+
+def precisa_dividir(texto):
+    return estimar_tokens(texto or "") > LIMIAR_DIVISAO
+
+
+def _unidades(texto, max_tokens, nivel=0):
+    if estimar_tokens(texto) <= max_tokens:
+        return [texto.strip()]
+    if nivel == len(_SEPARADORES):
+        # Último recurso: um "parágrafo" gigante sem pontuação é cortado por tamanho
+        passo = max_tokens * 4
+        return [texto[i:i + passo].strip() for i in range(0, len(texto), passo)]
+    partes = [parte for parte in _SEPARADORES[nivel].split(texto) if parte.strip()]
+    return [unidade for parte in partes for unidade in _unidades(parte, max_tokens, nivel + 1)]
+
+
+def dividir_em_blocos(texto, max_tokens=TOKENS_POR_BLOCO):
+    """Divide o texto em blocos de até ``max_tokens``, respeitando títulos e parágrafos.
+
+    Seções pequenas consecutivas são agrupadas no mesmo bloco; só seções grandes
+    demais são quebradas em parágrafos (e, em último caso, em frases).
+    """
+    blocos, atual = [], []
+    for unidade in _unidades(texto, max_tokens):
+        if atual and estimar_tokens("\n\n".join(atual + [unidade])) > max_tokens:
+            blocos.append("\n\n".join(atual))
+            atual = []
+        atual.append(unidade)
+    if atual:
+        blocos.append("\n\n".join(atual))
+    return blocos
+
+
+def mapear_blocos(cliente, modelo, blocos, construir_prompt, max_simultaneas=MAX_SIMULTANEAS,
+                  ao_concluir_bloco=None, sessao=None, ferramenta=None):
+    """Processa os blocos ao mesmo tempo no laço do cliente; devolve as respostas na ordem dos blocos.
+
+    ``ao_concluir_bloco(concluidos, total)`` é chamado na thread de quem chamou.
+    """
+    vagas = asyncio.Semaphore(max_simultaneas)
+
+    async def processar(indice):
+        async with vagas:
+            return await cliente.gerar_async(
+                modelo, construir_prompt(indice, blocos[indice]), sessao=sessao, ferramenta=ferramenta
+            )
+
+    futuros = {cliente.laco.executar(processar(indice)): indice for indice in range(len(blocos))}
+    respostas = [None] * len(blocos)
+    try:
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            respostas[futuros[futuro]] = futuro.result()
+            if ao_concluir_bloco is not None:
+                ao_concluir_bloco(concluidos, len(blocos))
+    finally:
+        # Um bloco falhou (ou quem chamou desistiu): os outros não continuam no loop
+        cliente.laco.cancelar(futuros)
+    return respostas
+
+
+def listar_itens(itens):
+    return "\n".join(f"[{numero}] {texto}" for numero, (_, texto) in enumerate(itens, start=1))
+
+
+def reduzir_em_arvore(cliente, modelo, itens, construir_prompt, orcamento=ORCAMENTO_REDUCAO,
+                      max_simultaneas=MAX_SIMULTANEAS, sessao=None, ferramenta=None):
+    """Condensa itens ``(indices_dos_blocos, texto)`` em grupos até a lista caber no orçamento.
+
+    Cada grupo vira um item que cobre os blocos consecutivos dos itens originais, então a
+    ordem dos blocos continua rastreável depois de qualquer número de rodadas.
+    """
+    itens = [(indices, texto[:CARACTERES_POR_ITEM]) for indices, texto in itens]
+    vagas = asyncio.Semaphore(max_simultaneas)
+
+    async def condensar(grupo):
+        indices = tuple(indice for indices_item, _ in grupo for indice in indices_item)
+        if len(grupo) == 1:
+            return grupo[0]
+        async with vagas:
+            texto = await cliente.gerar_async(
+                modelo, construir_prompt(listar_itens(grupo)), sessao=sessao, ferramenta=ferramenta
+            )
+        return indices, texto.strip()[:CARACTERES_POR_ITEM]
+
+    async def rodada(grupos):
+        return list(await asyncio.gather(*(condensar(grupo) for grupo in grupos)))
+
+    while len(itens) > 1 and estimar_tokens(listar_itens(itens)) > orcamento:
+        grupos, atual = [], []
+        for item in itens:
+            if atual and estimar_tokens(listar_itens(atual + [item])) > orcamento:
+                grupos.append(atual)
+                atual = []
+            atual.append(item)
+        grupos.append(atual)
+        if len(grupos) == len(itens):
+            # Itens grandes demais para agrupar pelo orçamento: junta de dois em dois para convergir
+            grupos = [itens[i:i + 2] for i in range(0, len(itens), 2)]
+        # Cada rodada depende da anterior; os grupos de uma rodada vão juntos para o laço
+        itens = cliente.laco.esperar(lambda _: rodada(grupos))
+    return itens
+
+
+# ----------------------------------------------
+# Reescritor de Conteúdo
+# ----------------------------------------------
+
+def prompt_reescrita_bloco(target_query, bloco, indice, total):
+    return f"""
+    Transforme este trecho de um conteúdo longo para ser perfeito para citação em IA.
+    Ele é o trecho {indice + 1} de {total}; os demais estão sendo reescritos em paralelo.
+
+    **Consulta Alvo:** {target_query}
+    **Trecho Original:**
+    {bloco}
+
+    **Instruções:**
+    1. Reescreva mantendo informações-chave
+    2. Adicione estruturação clara (H2, H3)
+    3. Insira exemplos práticos
+    4. Inclua dados quando possível
+    5. Não escreva TLDR, introdução geral nem conclusão do conteúdo inteiro
+
+    **Formato:**
+    - Markdown rigoroso
+    - Parágrafos curtos (máx. 3 linhas)
+    - Listas numeradas/bullets
+    - Na última linha, escreva "RESUMO:" seguido de uma frase que resuma o trecho
+    """
+
+
+def prompt_condensar_resumos(itens):
+    return f"""
+    Abaixo estão resumos de trechos consecutivos de um mesmo conteúdo.
+    Resuma o conjunto em no máximo duas frases, sem perder os temas principais.
+
+    {itens}
+
+    Responda apenas com o resumo.
+    """
+
+
+def prompt_consolidar_reescrita(target_query, itens):
+    return f"""
+    Um conteúdo longo foi reescrito em partes para responder à consulta "{target_query}".
+    Estes são os resumos das partes, numerados:
+
+    {itens}
+
+    **Tarefas:**
+    1. Escreva um TLDR de 40 palavras para o conteúdo inteiro
+    2. Indique a melhor ordem das partes para responder à consulta (use todos os números)
+    3. Liste de 3 a 5 ações concretas para o leitor finalizar o conteúdo
+
+    **Responda exatamente neste formato:**
+    TLDR: <texto>
+    ORDEM: <números separados por vírgula>
+    AÇÕES:
+    - <ação>
+    """
+
+
+def _separar_resumo(texto):
+    resumos = _RESUMO.findall(texto)
+    corpo = _RESUMO.sub("", texto).strip()
+    return corpo, (resumos[-1] if resumos else corpo[:200])
+
+
+def interpretar_ordem(texto, total):
+    # Mantém só números válidos e sem repetição; as partes esquecidas vão para o fim, na ordem original
+    ordem = []
+    correspondencia = _ORDEM.search(texto)
+    if correspondencia:
+        for numero in re.findall(r"\d+", correspondencia.group(1)):
+            indice = int(numero) - 1
+            if 0 <= indice < total and indice not in ordem:
+                ordem.append(indice)
+    return ordem + [indice for indice in range(total) if indice not in ordem]
+
+
+def reescrever_em_blocos(cliente, modelo, original_content, target_query, max_simultaneas=MAX_SIMULTANEAS,
+                         ao_concluir_bloco=None, sessao=None):
+    """Reescreve um conteúdo longo bloco a bloco e consolida TLDR, ordem das seções e ações finais."""
+    inicio = time.perf_counter()
+    ferramenta = "reescritor_conteudo"
+    blocos = dividir_em_blocos(original_content)
+    respostas = mapear_blocos(
+        cliente, modelo, blocos,
+        lambda indice, bloco: prompt_reescrita_bloco(target_query, bloco, indice, len(blocos)),
+        max_simultaneas, ao_concluir_bloco, sessao, ferramenta,
+    )
+    secoes, resumos = zip(*(_separar_resumo(resposta) for resposta in respostas))
+
+    itens = reduzir_em_arvore(
+        cliente, modelo, [((indice,), resumo) for indice, resumo in enumerate(resumos)],
+        prompt_condensar_resumos, max_simultaneas=max_simultaneas, sessao=sessao, ferramenta=ferramenta,
+    )
+    consolidacao = cliente.gerar(
+        modelo, prompt_consolidar_reescrita(target_query, listar_itens(itens)), sessao=sessao, ferramenta=ferramenta
+    )
+
+    tldr = _TLDR.search(consolidacao)
+    acoes = _ACOES.search(consolidacao)
+    ordem_blocos = [indice for item in interpretar_ordem(consolidacao, len(itens)) for indice in itens[item][0]]
+    partes = [f"**TLDR:** {tldr.group(1).strip()}"] if tldr else []
+    partes += [secoes[indice] for indice in ordem_blocos]
+    if acoes:
+        partes.append(f"## Próximos passos\n\n{acoes.group(1).strip()}")
+    return {"texto": "\n\n".join(partes), "blocos": len(blocos), "tempo_total": time.perf_counter() - inicio}
+
+
+# ----------------------------------------------
+# Validador SEO
+# ----------------------------------------------
+
+def prompt_validacao_bloco(bloco, main_keyword, content_type, indice, total):
+    return f"""
+    Atue como auditor de conteúdo para IA. Analise o trecho {indice + 1} de {total} de um material maior:
+
+    **Trecho:**
+    {bloco}
+
+    **Parâmetros:**
+    - Palavra-chave: {main_keyword or 'Não especificada'}
+    - Tipo: {content_type}
+
+    **Checklist de Análise:**
+    1. Clareza da resposta principal
+    2. Estrutura para citação
+    3. Densidade de informações
+    4. Autoridade e fontes
+    5. Otimização técnica
+    6. Tom e engajamento
+    7. Potencial de snippet
+
+    **Responda exatamente neste formato, sem introdução:**
+    PONTUAÇÃO: <0 a 100 para este trecho>
+    PROBLEMAS:
+    - <até 3 problemas mais graves do trecho, cada um com a correção sugerida na mesma linha>
+    """
+
+
+def prompt_condensar_problemas(itens):
+    return f"""
+    Abaixo estão problemas encontrados em trechos consecutivos de um mesmo conteúdo.
+    Selecione os 3 mais urgentes, juntando problemas equivalentes.
+
+    {itens}
+
+    Responda apenas com 3 linhas no formato "- problema: correção".
+    """
+
+
+def prompt_consolidar_validacao(main_keyword, content_type, pontuacao, itens, fatos):
+    return f"""
+    Atue como auditor de conteúdo para IA. Um material longo foi avaliado em trechos; a pontuação
+    geral (média ponderada pelo tamanho dos trechos) é {pontuacao}/100.
+
+    **Parâmetros:**
+    - Palavra-chave: {main_keyword or 'Não especificada'}
+    - Tipo: {content_type}
+
+    **Métricas do conteúdo inteiro, medidas localmente:**
+    {fatos}
+
+    **Problemas encontrados, por trecho:**
+    {itens}
+
+    **Saída:**
+    - 3 melhorias urgentes para o conteúdo inteiro (sem repetir problemas equivalentes)
+    - Sugestões concretas
+    - Exemplo de trecho otimizado
+    """
+
+
+def _interpretar_validacao(texto):
+    pontuacao = _PONTUACAO.search(texto)
+    problemas = [linha.strip() for linha in texto.splitlines() if linha.strip().startswith(("-", "*"))]
+    return (min(int(pontuacao.group(1)), 100) if pontuacao else None), "\n".join(problemas[:3])
+
+
+def validar_em_blocos(cliente, modelo, content_to_check, main_keyword, content_type, max_simultaneas=MAX_SIMULTANEAS,
+                      ao_concluir_bloco=None, sessao=None):
+    """Audita um conteúdo longo bloco a bloco e consolida a pontuação e as 3 melhorias urgentes."""
+    inicio = time.perf_counter()
+    ferramenta = "validador_seo"
+    blocos = dividir_em_blocos(content_to_check)
+    respostas = mapear_blocos(
+        cliente, modelo, blocos,
+        lambda indice, bloco: prompt_validacao_bloco(bloco, main_keyword, content_type, indice, len(blocos)),
+        max_simultaneas, ao_concluir_bloco, sessao, ferramenta,
+    )
+    avaliacoes = [_interpretar_validacao(resposta) for resposta in respostas]
+
+    # Pontuação geral calculada localmente: média ponderada pelo tamanho de cada trecho
+    pesos = [(estimar_tokens(bloco), nota) for bloco, (nota, _) in zip(blocos, avaliacoes) if nota is not None]
+    pontuacao = round(sum(peso * nota for peso, nota in pesos) / sum(peso for peso, _ in pesos)) if pesos else None
+
+    itens = reduzir_em_arvore(
+        cliente, modelo, [((indice,), problemas) for indice, (_, problemas) in enumerate(avaliacoes) if problemas],
+        prompt_condensar_problemas, max_simultaneas=max_simultaneas, sessao=sessao, ferramenta=ferramenta,
+    )
+    consolidacao = cliente.gerar(
+        modelo,
+        prompt_consolidar_validacao(main_keyword, content_type, pontuacao if pontuacao is not None else "?",
+                                    listar_itens(itens) or "Nenhum problema relevante.",
+                                    analisar_conteudo(content_to_check, main_keyword).fatos()),
+        sessao=sessao, ferramenta=ferramenta,
+    )
+
+    tabela = "\n".join(
+        f"| {indice} | {nota if nota is not None else '—'} |" for indice, (nota, _) in enumerate(avaliacoes, start=1)
+    )
+    cabecalho = f"### Pontuação geral: {pontuacao}/100" if pontuacao is not None else "### Pontuação geral indisponível"
+    texto = f"{cabecalho}\n\n| Trecho | Pontuação |\n|---|---|\n{tabela}\n\n{consolidacao.strip()}"
+    return {
+        "texto": texto,
+        "pontuacao": pontuacao,
+        "pontuacoes": [nota for nota, _ in avaliacoes],
+        "blocos": len(blocos),
+        "tempo_total": time.perf_counter() - inicio,
+    }
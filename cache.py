@@ -0,0 +1,172 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+
+# Limites do nível em disco; ao passar deles, as respostas mais antigas saem primeiro
+MAX_LINHAS_DISCO = 200_000
+MAX_CARACTERES_DISCO = 500_000_000
+# Expiradas e excedentes são removidos ao abrir o cache e a cada tantas gravações
+LIMPEZA_A_CADA = 500
+
+# Entrada guardada no cache: texto gerado + custo original da chamada
+_Entrada = namedtuple("_Entrada", ["texto", "latencia", "tamanho_prompt"])
+
+
+def normalizar_prompt(prompt):
+    # Os prompts são f-strings indentadas: espaços e quebras de linha não mudam a resposta
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def _normalizar_conteudo(conteudo):
+    # Partes binárias (imagens) entram na chave pelo hash dos bytes
+    if isinstance(conteudo, str):
+        return normalizar_prompt(conteudo)
+    return [
+        normalizar_prompt(parte) if isinstance(parte, str)
+        else {"mime_type": parte["mime_type"], "sha256": hashlib.sha256(parte["data"]).hexdigest()}
+        for parte in conteudo
+    ]
+
+
+def tamanho_conteudo(conteudo):
+    if isinstance(conteudo, str):
+        return len(conteudo)
+    return sum(len(parte) if isinstance(parte, str) else len(parte["data"]) for parte in conteudo)
+
+
+def chave_cache(modelo, prompt, config=None):
+    base = json.dumps(
+        {"modelo": modelo, "config": config or {}, "prompt": _normalizar_conteudo(prompt)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EstatisticasCache:
+    acertos_memoria: int = 0
+    acertos_disco: int = 0
+    falhas: int = 0
+    segundos_economizados: float = 0.0
+    caracteres_economizados: int = 0
+
+    @property
+    def acertos(self):
+        return self.acertos_memoria + self.acertos_disco
+
+    @property
+    def taxa_acerto(self):
+        total = self.acertos + self.falhas
+        return self.acertos / total if total else 0.0
+
+
+class CacheRespostas:
+    """Cache de respostas em dois níveis: LRU em memória com TTL e SQLite em disco.
+
+    O disco também tem limite (``max_linhas_disco`` respostas, ``max_caracteres_disco`` de texto):
+    ``limpar_expirados`` roda ao abrir o cache e a cada ``LIMPEZA_A_CADA`` gravações.
+    """
+
+    def __init__(self, caminho="cache_respostas.db", max_caracteres=5_000_000,
+                 ttl_memoria=3600, ttl_disco=7 * 24 * 3600, max_linhas_disco=MAX_LINHAS_DISCO,
+                 max_caracteres_disco=MAX_CARACTERES_DISCO):
+        # maxsize conta caracteres de texto, não número de entradas
+        self._memoria = TTLCache(
+            maxsize=max_caracteres,
+            ttl=ttl_memoria,
+            getsizeof=lambda entrada: len(entrada.texto) or 1,
+        )
+        self._max_caracteres = max_caracteres
+        self._ttl_disco = ttl_disco
+        self._max_linhas_disco = max_linhas_disco
+        self._max_caracteres_disco = max_caracteres_disco
+        self._gravacoes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                texto TEXT NOT NULL,
+                latencia REAL NOT NULL,
+                tamanho_prompt INTEGER NOT NULL,
+                criado_em REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS respostas_criado_em ON respostas (criado_em)")
+        self._db.commit()
+        self.estatisticas = EstatisticasCache()
+        self.limpar_expirados()
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                self.estatisticas.acertos_memoria += 1
+                self._contabilizar_economia(entrada)
+                return entrada.texto
+
+            linha = self._db.execute(
+                "SELECT texto, latencia, tamanho_prompt, criado_em FROM respostas WHERE chave = ?",
+                (chave,),
+            ).fetchone()
+            if linha is not None and time.time() - linha[3] < self._ttl_disco:
+                entrada = _Entrada(linha[0], linha[1], linha[2])
+                self._guardar_memoria(chave, entrada)
+                self.estatisticas.acertos_disco += 1
+                self._contabilizar_economia(entrada)
+                return entrada.texto
+
+            self.estatisticas.falhas += 1
+            return None
+
+    def guardar(self, chave, texto, latencia, tamanho_prompt):
+        entrada = _Entrada(texto, latencia, tamanho_prompt)
+        with self._lock:
+            self._guardar_memoria(chave, entrada)
+            self._db.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)",
+                (chave, texto, latencia, tamanho_prompt, time.time()),
+            )
+            self._db.commit()
+            self._gravacoes += 1
+            limpar = self._gravacoes % LIMPEZA_A_CADA == 0
+        if limpar:
+            self.limpar_expirados()
+
+    def limpar_expirados(self):
+        """Remove do disco as respostas expiradas e, acima dos limites, as mais antigas; devolve quantas."""
+        with self._lock:
+            self._memoria.expire()
+            removidas = self._db.execute(
+                "DELETE FROM respostas WHERE criado_em < ?",
+                (time.time() - self._ttl_disco,),
+            ).rowcount
+            removidas += self._db.execute("""
+                DELETE FROM respostas WHERE chave IN (
+                    SELECT chave FROM (
+                        SELECT chave, ROW_NUMBER() OVER recentes AS posicao,
+                               SUM(LENGTH(texto)) OVER recentes AS acumulado
+                        FROM respostas WINDOW recentes AS (ORDER BY criado_em DESC, rowid DESC)
+                    ) WHERE posicao > ? OR acumulado > ?
+                )
+            """, (self._max_linhas_disco, self._max_caracteres_disco)).rowcount
+            self._db.commit()
+            return removidas
+
+    def _guardar_memoria(self, chave, entrada):
+        # Respostas maiores que o limite total ficam apenas no disco
+        if len(entrada.texto) <= self._max_caracteres:
+            self._memoria[chave] = entrada
+
+    def _contabilizar_economia(self, entrada):
+        self.estatisticas.segundos_economizados += entrada.latencia
+        self.estatisticas.caracteres_economizados += entrada.tamanho_prompt + len(entrada.texto)
@@ -0,0 +1,139 @@
+"""Linha de comando para as ferramentas do AIO Agent, sem Streamlit.
+
+Uso:
+    python cli.py listar
+    python cli.py gerar gerador_faq -c faq_question="Como integrar X com Y?" -c technical_level=Avançado
+    python cli.py gerar reescritor_conteudo -c target_query="..." -a original_content=artigo.md
+    python cli.py lote pedidos.jsonl --saida resultados.jsonl --concorrencia 16
+    python cli.py auditar --sitemap https://exemplo.com.br/sitemap.xml --saida auditorias/exemplo
+    python cli.py auditar --urls urls.txt --saida auditorias/exemplo --sem-ia
+
+No modo lote, cada linha do arquivo é {"ferramenta": ..., "entradas": {...}}.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from google.api_core.exceptions import GoogleAPIError
+
+from acervo import urls_sitemap
+from auditoria import ERRO, OK, SINALIZADA, auditar as auditar_site, ler_urls
+from ferramentas import FERRAMENTAS, executar_ferramenta
+from llm import criar_cliente
+
+
+def _par(texto):
+    nome, separador, valor = texto.partition("=")
+    if not separador:
+        raise argparse.ArgumentTypeError(f"use campo=valor: {texto}")
+    return nome, valor
+
+
+def listar(args):
+    for ferramenta in FERRAMENTAS.values():
+        campos = ", ".join(f"{campo.nome}{'*' if campo.obrigatorio else ''}" for campo in ferramenta.campos)
+        print(f"{ferramenta.nome:<24} {ferramenta.modelo:<18} {campos}")
+
+
+def gerar(args):
+    entradas = dict(args.campo)
+    for nome, caminho in args.arquivo:
+        with open(caminho, encoding="utf-8") as arquivo:
+            entradas[nome] = arquivo.read()
+    print(executar_ferramenta(criar_cliente(), args.ferramenta, entradas, sessao="cli"))
+
+
+def lote(args):
+    cliente = criar_cliente()
+    with open(args.entrada, encoding="utf-8") as arquivo:
+        itens = [json.loads(linha) for linha in arquivo if linha.strip()]
+
+    def processar(indice, item):
+        try:
+            texto = executar_ferramenta(cliente, item.get("ferramenta"), item.get("entradas", {}), sessao="cli")
+            return {"indice": indice, "ferramenta": item["ferramenta"], "texto": texto}
+        except (ValueError, GoogleAPIError) as erro:
+            return {"indice": indice, "ferramenta": item.get("ferramenta"), "erro": str(erro)}
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    falhas = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+            futuros = [executor.submit(processar, indice, item) for indice, item in enumerate(itens)]
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                falhas += "erro" in resultado
+                saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+                saida.flush()
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{len(itens) - falhas} de {len(itens)} itens gerados", file=sys.stderr)
+    return 1 if falhas else 0
+
+
+def auditar(args):
+    if args.sitemap:
+        urls = urls_sitemap(args.sitemap, limite=args.limite)
+    else:
+        with open(args.urls, encoding="utf-8") as arquivo:
+            urls = list(ler_urls(arquivo.read()))[:args.limite]
+
+    def progresso(registro, contagem):
+        if registro["status"] in (SINALIZADA, ERRO):
+            print(f"{registro['status']:>10}  {registro['url']}  {'; '.join(registro['problemas'])}", file=sys.stderr)
+
+    contagem = auditar_site(
+        urls, args.saida, cliente=None if args.sem_ia else criar_cliente(), concorrencia=args.concorrencia,
+        tipo_conteudo=args.tipo, ao_atualizar=progresso, sessao="cli",
+    )
+    print(
+        f"{sum(contagem.get(status, 0) for status in (OK, SINALIZADA, ERRO))} URLs: "
+        f"{contagem.get(SINALIZADA, 0)} sinalizadas, {contagem.get(ERRO, 0)} com erro, "
+        f"{contagem.get('inalteradas', 0)} inalteradas desde a última auditoria "
+        f"(resultados em {args.saida}/resultados.jsonl)",
+        file=sys.stderr,
+    )
+    return 1 if contagem.get(ERRO) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    comandos.add_parser("listar", help="lista as ferramentas e seus campos (* = obrigatório)").set_defaults(funcao=listar)
+
+    parser_gerar = comandos.add_parser("gerar", help="executa uma ferramenta e imprime o resultado")
+    parser_gerar.add_argument("ferramenta", choices=sorted(FERRAMENTAS))
+    parser_gerar.add_argument("-c", "--campo", type=_par, action="append", default=[], help="campo=valor")
+    parser_gerar.add_argument("-a", "--arquivo", type=_par, action="append", default=[], help="campo=caminho, lê o valor de um arquivo")
+    parser_gerar.set_defaults(funcao=gerar)
+
+    parser_lote = comandos.add_parser("lote", help="executa os pedidos de um arquivo JSONL")
+    parser_lote.add_argument("entrada")
+    parser_lote.add_argument("--saida", help="arquivo JSONL de resultados (padrão: saída padrão)")
+    parser_lote.add_argument("--concorrencia", type=int, default=8)
+    parser_lote.set_defaults(funcao=lote)
+
+    parser_auditar = comandos.add_parser("auditar", help="audita as páginas de um site (verificações locais + validador SEO)")
+    origem = parser_auditar.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--sitemap", help="URL do sitemap.xml (índices de sitemap são seguidos)")
+    origem.add_argument("--urls", help="arquivo de texto com uma URL por linha")
+    parser_auditar.add_argument("--saida", required=True, help="pasta do estado e do resultados.jsonl")
+    parser_auditar.add_argument("--concorrencia", type=int, default=20, help="downloads simultâneos")
+    parser_auditar.add_argument("--limite", type=int, help="máximo de URLs auditadas")
+    parser_auditar.add_argument("--tipo", default="Blog Post", help="tipo de conteúdo para o validador SEO")
+    parser_auditar.add_argument("--sem-ia", action="store_true", help="só as verificações locais, sem o modelo")
+    parser_auditar.set_defaults(funcao=auditar)
+
+    args = parser.parse_args()
+    try:
+        return args.funcao(args) or 0
+    except (ValueError, GoogleAPIError) as erro:
+        print(f"erro: {erro}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+from cachetools import TTLCache
+
+USER_AGENT = "Mozilla/5.0 (compatible; MacforAIOAgent/1.0)"
+TAMANHO_MAXIMO = 5 * 1024 * 1024
+IMAGENS_SEM_ALT_LISTADAS = 10
+
+# Como a coleta foi resolvida
+REDE = "rede"
+NAO_MODIFICADA = "não modificada"
+MESMO_CONTEUDO = "mesmo conteúdo"
+RECENTE = "recente"
+
+
+@dataclass
+class FatosPagina:
+    url: str
+    titulo: str = ""
+    descricao: str = ""
+    canonico: str = ""
+    robots: str = ""
+    idioma: str = ""
+    titulos: list = field(default_factory=list)
+    dados_estruturados: list = field(default_factory=list)
+    open_graph: dict = field(default_factory=dict)
+    imagens: int = 0
+    imagens_com_alt: int = 0
+    imagens_sem_alt: list = field(default_factory=list)
+    links_internos: int = 0
+    links_externos: int = 0
+    palavras: int = 0
+
+    @property
+    def cobertura_alt(self):
+        return self.imagens_com_alt / self.imagens if self.imagens else None
+
+    def resumo(self):
+        """Fatos do HTML em texto compacto, para o prompt e para a interface."""
+        niveis = {}
+        for nivel, texto in self.titulos:
+            niveis.setdefault(nivel, []).append(texto)
+        linhas = [
+            f"- Title ({len(self.titulo)} caracteres): {self.titulo or 'ausente'}",
+            f"- Meta description ({len(self.descricao)} caracteres): {self.descricao or 'ausente'}",
+            f"- Canonical: {self.canonico or 'ausente'} · robots: {self.robots or 'não definido'} · "
+            f"idioma: {self.idioma or 'não definido'}",
+        ]
+        for nivel in ("h1", "h2", "h3"):
+            textos = niveis.get(nivel, [])
+            exemplos = "; ".join(f'"{texto}"' for texto in textos[:8])
+            linhas.append(f"- {nivel.upper()} ({len(textos)}): {exemplos or 'nenhum'}")
+        linhas.append(f"- Dados estruturados: {', '.join(self.dados_estruturados) or 'nenhum'}")
+        linhas.append(f"- Open Graph: {', '.join(sorted(self.open_graph)) or 'ausente'}")
+        if self.imagens:
+            linhas.append(
+                f"- Imagens com alt: {self.imagens_com_alt} de {self.imagens} ({self.cobertura_alt:.0%})"
+                + (f"; sem alt: {', '.join(self.imagens_sem_alt)}" if self.imagens_sem_alt else "")
+            )
+        else:
+            linhas.append("- Imagens: nenhuma no HTML")
+        linhas.append(f"- Links: {self.links_internos} internos · {self.links_externos} externos")
+        linhas.append(f"- Texto visível: {self.palavras} palavras")
+        return "\n".join(linhas)
+
+
+@dataclass
+class Coleta:
+    fatos: FatosPagina
+    origem: str
+    segundos: float
+
+
+async def ler_corpo(resposta, limite=TAMANHO_MAXIMO):
+    """Corpo inteiro da resposta; páginas maiores que ``limite`` bytes são recusadas com ValueError.
+
+    ``resposta.content.read(n)`` devolve só o que já está no buffer, não o corpo até ``n`` bytes:
+    uma página servida em trechos chegaria cortada.
+    """
+    if (resposta.content_length or 0) > limite:
+        raise ValueError(f"Página maior que {limite // (1024 * 1024)} MB")
+    partes, tamanho = [], 0
+    async for parte in resposta.content.iter_chunked(64 * 1024):
+        tamanho += len(parte)
+        if tamanho > limite:
+            raise ValueError(f"Página maior que {limite // (1024 * 1024)} MB")
+        partes.append(parte)
+    return b"".join(partes)
+
+
+def _tipos_json_ld(bruto):
+    try:
+        dados = json.loads(bruto)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    pendentes, tipos = [dados], []
+    while pendentes:
+        item = pendentes.pop()
+        if isinstance(item, list):
+            pendentes += item
+        elif isinstance(item, dict):
+            tipo = item.get("@type")
+            tipos += tipo if isinstance(tipo, list) else [tipo] if tipo else []
+            pendentes += item.get("@graph", [])
+    return [str(tipo) for tipo in tipos]
+
+
+def extrair_fatos(html, url):
+    """Fatos de SEO on-page de um HTML: title, description, headings, dados estruturados e alt das imagens."""
+    sopa = BeautifulSoup(html, "html.parser")
+
+    def meta(**atributos):
+        tag = sopa.find("meta", attrs=atributos)
+        return (tag.get("content") or "").strip() if tag else ""
+
+    canonico = sopa.find("link", rel="canonical")
+    html_tag = sopa.find("html")
+    fatos = FatosPagina(
+        url=url,
+        titulo=sopa.title.get_text(strip=True) if sopa.title else "",
+        descricao=meta(name="description"),
+        canonico=canonico.get("href", "") if canonico else "",
+        robots=meta(name="robots"),
+        idioma=html_tag.get("lang", "") if html_tag else "",
+        titulos=[[tag.name, tag.get_text(" ", strip=True)[:120]] for tag in sopa.find_all(["h1", "h2", "h3"])],
+        open_graph={
+            tag["property"][3:]: tag.get("content", "")
+            for tag in sopa.find_all("meta", property=True) if tag["property"].startswith("og:")
+        },
+    )
+
+    tipos = []
+    for script in sopa.find_all("script", type="application/ld+json"):
+        tipos += _tipos_json_ld(script.string)
+    # Microdata: itemtype="https://schema.org/Product" vira "Product"
+    tipos += [tag["itemtype"].rstrip("/").rsplit("/", 1)[-1] for tag in sopa.find_all(itemtype=True)]
+    fatos.dados_estruturados = list(dict.fromkeys(tipos))
+
+    imagens = sopa.find_all("img")
+    fatos.imagens = len(imagens)
+    sem_alt = [imagem.get("src", "") for imagem in imagens if not (imagem.get("alt") or "").strip()]
+    fatos.imagens_com_alt = len(imagens) - len(sem_alt)
+    fatos.imagens_sem_alt = [urljoin(url, src) for src in sem_alt[:IMAGENS_SEM_ALT_LISTADAS]]
+
+    # Palavras do texto visível (scripts e estilos já lidos acima ficam de fora)
+    for elemento in sopa(["script", "style", "noscript", "template"]):
+        elemento.decompose()
+    fatos.palavras = len((sopa.body or sopa).get_text(" ").split())
+
+    dominio = urlparse(url).netloc
+    for link in sopa.find_all("a", href=True):
+        destino = urlparse(urljoin(url, link["href"]))
+        if destino.scheme in ("http", "https"):
+            if destino.netloc == dominio:
+                fatos.links_internos += 1
+            else:
+                fatos.links_externos += 1
+    return fatos
+
+
+class ColetorPaginas:
+    """Busca páginas de forma assíncrona num event loop próprio, com um cliente HTTP compartilhado.
+
+    Cada URL guarda o ETag/Last-Modified da última resposta para a revalidação condicional,
+    e os fatos extraídos ficam em SQLite pelo hash do HTML: uma resposta 304, ou um HTML igual
+    servido em outra URL, não é analisado de novo. Resultados recentes são servidos da memória
+    sem ir à rede.
+    """
+
+    def __init__(self, caminho, conexoes=20, timeout=15, validade=300):
+        self._timeout = timeout
+        self._conexoes = conexoes
+        self._sessao = None
+        # Reentrante: o callback do Future roda na hora, com o lock já tomado, se a coleta já terminou
+        self._lock = threading.RLock()
+        self._recentes = TTLCache(maxsize=256, ttl=validade)
+        self._em_andamento = {}
+        self._db = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                modificado_em TEXT,
+                hash TEXT NOT NULL,
+                coletado_em REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS fatos (hash TEXT PRIMARY KEY, fatos TEXT NOT NULL)")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="coletor-paginas", daemon=True).start()
+
+    def iniciar(self, url):
+        """Dispara a coleta sem bloquear; pedidos repetidos da mesma URL compartilham o Future."""
+        with self._lock:
+            if url in self._recentes:
+                futuro = Future()
+                futuro.set_result(Coleta(self._recentes[url], RECENTE, 0.0))
+                return futuro
+            if url not in self._em_andamento:
+                futuro = asyncio.run_coroutine_threadsafe(self._coletar(url), self._loop)
+                self._em_andamento[url] = futuro
+                futuro.add_done_callback(lambda concluido: self._concluir(url, concluido))
+            return self._em_andamento[url]
+
+    def coletar(self, url):
+        return self.iniciar(url).result()
+
+    def _concluir(self, url, futuro):
+        with self._lock:
+            self._em_andamento.pop(url, None)
+            if not futuro.cancelled() and futuro.exception() is None:
+                self._recentes[url] = futuro.result().fatos
+
+    def fechar(self):
+        if self._sessao is not None:
+            asyncio.run_coroutine_threadsafe(self._sessao.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _cliente(self):
+        # Criada dentro do loop: o pool de conexões e o cache de DNS valem para todas as coletas
+        if self._sessao is None:
+            self._sessao = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._conexoes, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self._timeout, connect=5),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._sessao
+
+    def _fatos_guardados(self, resumo):
+        with self._lock:
+            linha = self._db.execute("SELECT fatos FROM fatos WHERE hash = ?", (resumo,)).fetchone()
+        return FatosPagina(**json.loads(linha[0])) if linha else None
+
+    async def _coletar(self, url):
+        inicio = time.perf_counter()
+        with self._lock:
+            anterior = self._db.execute(
+                "SELECT etag, modificado_em, hash FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        # Só revalida quando os fatos da versão anterior ainda estão guardados
+        anteriores = self._fatos_guardados(anterior[2]) if anterior is not None else None
+        cabecalhos = {}
+        if anteriores is not None:
+            if anterior[0]:
+                cabecalhos["If-None-Match"] = anterior[0]
+            if anterior[1]:
+                cabecalhos["If-Modified-Since"] = anterior[1]
+
+        sessao = await self._cliente()
+        async with sessao.get(url, headers=cabecalhos) as resposta:
+            if resposta.status == 304 and anteriores is not None:
+                return Coleta(anteriores, NAO_MODIFICADA, time.perf_counter() - inicio)
+            resposta.raise_for_status()
+            corpo = await ler_corpo(resposta)
+            etag = resposta.headers.get("ETag")
+            modificado_em = resposta.headers.get("Last-Modified")
+
+        resumo = hashlib.sha256(corpo).hexdigest()
+        fatos = self._fatos_guardados(resumo)
+        if fatos is not None:
+            # HTML idêntico ao de uma coleta anterior (servidor sem ETag, ou mesma página em outra URL)
+            fatos.url = url
+            origem = MESMO_CONTEUDO
+        else:
+            # Análise do HTML fora do loop, para não atrasar as outras coletas
+            fatos = await self._loop.run_in_executor(None, extrair_fatos, corpo, url)
+            origem = REDE
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO fatos (hash, fatos) VALUES (?, ?)",
+                    (resumo, json.dumps(asdict(fatos), ensure_ascii=False)),
+                )
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, etag, modificado_em, hash, coletado_em) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, modificado_em, resumo, time.time()),
+            )
+        return Coleta(fatos, origem, time.perf_counter() - inicio)
@@ -0,0 +1,494 @@
+import asyncio
+import base64
+import inspect
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+from agendador import estimar_tokens, nome_modelo
+from analise_seo import analisar_conteudo
+from artigo import NIVEIS_LEITURA, prompt_artigo
+from blocos import precisa_dividir, reescrever_em_blocos, validar_em_blocos
+from imagem import preparar_imagem
+from produtos import comparacao_em_partes, comparar_por_produto, guia_em_partes, guia_por_produto
+from tokens import TOKENS_POR_PALAVRA, comprimir, contar_tokens, estimar_chamada, truncar
+from visual import prompt_analise_visual
+
+
+@dataclass(frozen=True)
+class Campo:
+    nome: str
+    obrigatorio: bool = False
+    padrao: object = ""
+    # Parâmetros de escolha (tamanho, nível, tipo): na busca de pedidos parecidos, precisam ser iguais
+    exato: bool = False
+
+
+@dataclass(frozen=True)
+class Ferramenta:
+    """Definição de uma ferramenta: campos de entrada, modelo e construção do prompt.
+
+    A interface Streamlit, a API HTTP e a CLI montam os prompts por aqui. ``modelo`` é o
+    preferido da ferramenta; o de cada pedido sai do roteador do cliente (``rotear``).
+    """
+
+    nome: str
+    titulo: str
+    campos: tuple
+    construir_prompt: Callable
+    campo_titulo: str
+    modelo: str = "gemini-1.5-flash"
+    # Ferramentas de texto longo: acima do limiar, o campo é processado em blocos (map-reduce)
+    campo_longo: str = None
+    processar_longo: Callable = None
+    # Critério próprio para o modo em blocos, aplicado aos valores (ex. uma chamada por produto)
+    dividir: Callable = None
+    # Orçamento de tokens de entrada do prompt e tamanho típico da resposta (para a estimativa de custo)
+    orcamento_tokens: int = 6000
+    tokens_saida: int = 1200
+    # Campo com o tamanho pedido em palavras: a saída esperada acompanha o pedido
+    campo_palavras: str = None
+    # Latência aceitável em segundos; acima dela o roteador evita o modelo robusto
+    slo: float = 60.0
+
+    def validar(self, entradas):
+        faltando = [campo.nome for campo in self.campos if campo.obrigatorio and not entradas.get(campo.nome)]
+        if faltando:
+            raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+        desconhecidos = set(entradas) - {campo.nome for campo in self.campos}
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+        return {campo.nome: entradas.get(campo.nome) or campo.padrao for campo in self.campos}
+
+    def prompt(self, **entradas):
+        return self.construir_prompt(**self.ajustar(entradas))
+
+    @cached_property
+    def campos_texto(self):
+        parametros = inspect.signature(self.construir_prompt).parameters
+        return tuple(campo.nome for campo in self.campos if campo.nome in parametros)
+
+    @cached_property
+    def tokens_instrucoes(self):
+        # Parte fixa do prompt, medida uma vez com os valores padrão
+        return estimar_tokens(self.construir_prompt(**{
+            campo.nome: campo.padrao for campo in self.campos if campo.nome in self.campos_texto
+        }))
+
+    def tokens_entrada(self, valores):
+        return self.tokens_instrucoes + sum(
+            estimar_tokens(valores[nome]) for nome in self.campos_texto if isinstance(valores.get(nome), str) and valores[nome]
+        )
+
+    def ajustar(self, valores):
+        """Faz o prompt caber no orçamento: comprime os campos de texto e, se não bastar, corta o maior.
+
+        Quando o modo em blocos vai rodar para estes valores, só comprime: o excesso vai para o map-reduce.
+        """
+        if self.tokens_entrada(valores) <= self.orcamento_tokens:
+            return valores
+        valores = dict(valores)
+        grandes = sorted(
+            (nome for nome in self.campos_texto if isinstance(valores.get(nome), str) and estimar_tokens(valores[nome]) > 100),
+            key=lambda nome: len(valores[nome]), reverse=True,
+        )
+        for nome in grandes:
+            valores[nome] = comprimir(valores[nome])
+        excesso = self.tokens_entrada(valores) - self.orcamento_tokens
+        if excesso > 0 and grandes and not self.em_blocos(valores):
+            maior = grandes[0]
+            valores[maior] = truncar(valores[maior], max(estimar_tokens(valores[maior]) - excesso, 0))
+        return valores
+
+    def tokens_saida_esperados(self, valores):
+        palavras = valores.get(self.campo_palavras) if self.campo_palavras else None
+        if not palavras:
+            return self.tokens_saida
+        return max(self.tokens_saida, round(int(palavras) * TOKENS_POR_PALAVRA))
+
+    def rotear(self, cliente, valores, conteudo=None, sessao=None, registrar=True):
+        """Decisão do roteador para estas entradas (``conteudo``, se já montado, mede a entrada)."""
+        tokens = estimar_tokens(conteudo) if conteudo is not None else self.tokens_entrada(self.ajustar(valores))
+        return cliente.rotear(
+            self.nome, tokens, self.tokens_saida_esperados(valores), preferido=self.modelo, slo=self.slo,
+            sessao=sessao, registrar=registrar,
+        )
+
+    def modelo_blocos(self, cliente):
+        # Blocos e produtos são chamadas curtas, sem decisão por pedido: vão na faixa do roteador
+        # correspondente ao modelo preferido, então AIO_MODELO_RAPIDO/ROBUSTO valem também aqui
+        return cliente.modelo(cliente.roteador.faixa(self.modelo))
+
+    def estimar(self, valores, modelo=None, latencia_observada=None):
+        # Tokens, custo e latência esperados da chamada, antes de enviá-la
+        ajustados = self.ajustar(valores)
+        if modelo is not None and not self.em_blocos(ajustados):
+            tokens = contar_tokens(self.construir_prompt(**ajustados), modelo)
+        else:
+            tokens = self.tokens_entrada(ajustados)
+        originais = self.tokens_entrada(valores) if ajustados is not valores else None
+        return estimar_chamada(
+            nome_modelo(modelo) if modelo is not None else self.modelo,
+            tokens, self.tokens_saida_esperados(valores), originais, latencia_observada,
+        )
+
+    def conteudo(self, entradas):
+        # Conteúdo completo a enviar ao modelo a partir de entradas externas (API/CLI)
+        valores = self.validar(entradas)
+        if self.nome != "otimizador_visual":
+            return self.prompt(**valores)
+        # A imagem chega em base64; capturas muito altas vão como vários trechos na mesma chamada
+        partes = preparar_imagem(base64.b64decode(valores.pop("imagem_base64")))
+        return [self.prompt(**valores), *partes]
+
+    def em_blocos(self, valores):
+        if self.processar_longo is None:
+            return False
+        if self.dividir is not None:
+            return self.dividir(valores)
+        return precisa_dividir(valores.get(self.campo_longo))
+
+    def titulo_entrada(self, entradas):
+        return str(entradas.get(self.campo_titulo, ""))[:60]
+
+    def descrever(self):
+        return {
+            "nome": self.nome,
+            "titulo": self.titulo,
+            "modelo": self.modelo,
+            "campos": [
+                {"nome": campo.nome, "obrigatorio": campo.obrigatorio, "padrao": campo.padrao}
+                for campo in self.campos
+            ],
+        }
+
+
+def prompt_expansor_topicos(main_topic, audience):
+    return f"""
+    Atue como um estrategista de conteúdo para IA. Para o tema "{main_topic}", gere:
+
+    1. 10 perguntas frequentes que o público "{audience}" faz em assistentes
+    2. 5 ângulos inovadores para abordar o tema
+    3. 3 formatos de conteúdo com alto potencial de compartilhamento
+
+    Para cada item, inclua:
+    - Termos exatos de busca
+    - Potencial de trafego (baixo/médio/alto)
+    - Exemplo de resposta resumida (30 palavras)
+
+    Apresente em tabela markdown com colunas:
+    | Tipo | Termo de Busca | Potencial | Resumo Exemplo |
+    |------|----------------|-----------|----------------|
+    """
+
+
+def prompt_analisador_resultados(example_response):
+    return f"""
+    Faça uma análise detalhada desta resposta de IA:
+
+    **Resposta para Análise:**
+    {example_response}
+
+    **Itens a Avaliar:**
+    1. Estrutura da informação (hierarquia)
+    2. Tom de voz e estilo
+    3. Elementos mais citáveis
+    4. Palavras-chave estratégicas
+    5. Formatação que facilita a citação
+
+    **Saída Esperada:**
+    - Lista de pontos fortes
+    - Sugestões de melhoria
+    - Modelo para replicar o sucesso
+    - Exemplo de conteúdo otimizado
+
+    Use markdown com destaques em **negrito** para insights.
+    """
+
+
+def prompt_reescritor_conteudo(original_content, target_query, contexto_site=""):
+    return f"""
+    Transforme este conteúdo para ser perfeito para citação em IA:
+
+    **Consulta Alvo:** {target_query}
+    **Conteúdo Original:**
+    {original_content}
+
+    {contexto_site}
+
+    **Instruções:**
+    1. Comece com TLDR de 40 palavras
+    2. Reescreva mantendo informações-chave
+    3. Adicione estruturação clara (H2, H3)
+    4. Insere exemplos práticos
+    5. Inclua dados quando possível
+    6. Finalize com ações concretas
+
+    **Formato:**
+    - Markdown rigoroso
+    - Parágrafos curtos (máx. 3 linhas)
+    - Listas numeradas/bullets
+    - Destaques para citações
+    """
+
+
+def prompt_validador_seo(content_to_check, main_keyword, content_type, fatos=None):
+    # O que dá para medir (legibilidade, títulos, densidade, snippet) chega pronto da análise local
+    if fatos is None:
+        fatos = analisar_conteudo(content_to_check, main_keyword).fatos()
+    return f"""
+    Atue como auditor de conteúdo para IA. Analise este material:
+
+    **Conteúdo:**
+    {content_to_check}
+
+    **Parâmetros:**
+    - Palavra-chave: {main_keyword or 'Não especificada'}
+    - Tipo: {content_type}
+
+    **Métricas já medidas (use estes valores, não recalcule):**
+    {fatos}
+        
+    **Checklist de Análise:**
+    1. Clareza da resposta principal
+    2. Densidade de informações
+    3. Autoridade e fontes
+    4. Elementos visuais sugeridos
+    5. Tom e engajamento
+        
+    **Saída:**
+    - Pontuação de 0-100, considerando também as métricas medidas
+    - 3 melhorias urgentes
+    - Sugestões concretas
+    - Exemplo de trecho otimizado
+    """
+
+
+def prompt_comparador_produtos(product_a, product_b, concorrente, comparison_aspects):
+    return f"""
+    Crie uma comparação detalhada entre:
+    #SERVIÇO DO USUÁRIO#
+    - {product_a}
+    #CONCORRENTE#
+    - {concorrente}
+    #Produto/serviço do concorrente#
+    - {product_b}
+        
+    **Critérios:** {comparison_aspects or 'Use os padrões do mercado'}
+        
+    **Estrutura:**
+    1. Visão geral (50 palavras)
+    2. Tabela comparativa (recursos, preços, etc.)
+    3. Vantagens de cada um
+    4. Casos de uso ideais
+    5. Verdict final (quando escolher cada)
+        
+    **Formato:**
+    - Markdown com tabelas
+    - Linguagem imparcial
+    - Dados concretos quando possível
+    - Destaque para diferenciais
+    """
+
+
+def prompt_guia_comprador(product_category, buyer_profile, top_products):
+    return f"""
+    Crie um guia de compra para {product_category} direcionado a {buyer_profile}.
+
+    **Produtos Analisados:**
+    {top_products or 'Inclua os principais do mercado'}
+
+    **Seções Obrigatórias:**
+    1. Introdução (contextualize a necessidade)
+    2. Critérios de avaliação (o que considerar)
+    3. Análise individual de cada opção
+    4. Tabela comparativa
+    5. Recomendações por cenário
+    6. Onde comprar/melhores ofertas
+
+    **Tom:**
+    - Informativo mas acessível
+    - Comparativo justo
+    - Destaque para soluções ideais
+    """
+
+
+def prompt_explicador_recursos(feature_name, product_context, use_cases):
+    return f"""
+    Crie uma explicação completa sobre: {feature_name} {product_context or ''}
+
+    **Casos de Uso:** {use_cases or 'Descreva os principais'}
+
+    **Estrutura:**
+    1. Definição simples (1 frase)
+    2. Funcionamento técnico (nível adequado)
+    3. Benefícios concretos
+    4. Exemplo prático
+    5. Como acessar/configurar
+    6. Perguntas frequentes
+
+    **Formato:**
+    - Markdown com headers
+    - Screenshots sugeridos [INSERIR IMAGEM]
+    - Notas técnicas em blocos de código
+    - Links para aprofundamento
+    """
+
+
+def prompt_desmistificador(myth, truth, evidence):
+    return f"""
+    Desconstrua este mito: "{myth}"
+
+    **Verdade:** {truth}
+    **Evidências:** {evidence or 'Inclua dados relevantes'}
+
+    **Estrutura:**
+    1. Origem do mito (por que existe)
+    2. Fatos concretos (com provas)
+    3. Exemplo real/analogia
+    4. Implicações de acreditar no mito
+    5. Como aplicar a verdade na prática
+
+    **Tom:**
+    - Educativo, não confrontativo
+    - Baseado em dados
+    - Chamada para ação positiva
+    """
+
+
+def prompt_gerador_faq(faq_question, technical_level, steps_needed):
+    return f"""
+    Crie uma resposta completa para esta pergunta:
+    "{faq_question}"
+
+    **Nível Técnico:** {technical_level}
+    **Detalhamento:** {steps_needed} passos principais
+
+    **Componentes:**
+    1. Resposta direta (40 palavras)
+    2. Explicação detalhada
+    3. Passo-a-passo (se aplicável)
+    4. Problemas comuns + soluções
+    5. Recursos adicionais
+
+    **Formato:**
+    - Markdown com headers
+    - Listas numeradas para passos
+    - Destaques para dicas importantes
+    - Blocos de código se técnico
+    """
+
+
+def _registrar(*ferramentas):
+    return {ferramenta.nome: ferramenta for ferramenta in ferramentas}
+
+
+FERRAMENTAS = _registrar(
+    Ferramenta(
+        "construtor_paginas", "🔍 Construtor de Páginas",
+        (Campo("target_query", True), Campo("key_points", True),
+         Campo("word_count", padrao=800, exato=True), Campo("reading_level", padrao=NIVEIS_LEITURA[0], exato=True)),
+        prompt_artigo, "target_query",
+        tokens_saida=1600, campo_palavras="word_count",
+    ),
+    Ferramenta(
+        "expansor_topicos", "🧠 Expansor de Tópicos",
+        (Campo("main_topic", True), Campo("audience", True)),
+        prompt_expansor_topicos, "main_topic",
+    ),
+    Ferramenta(
+        "analisador_resultados", "🔬 Analisador de Resultados",
+        (Campo("example_response", True),),
+        prompt_analisador_resultados, "example_response",
+        orcamento_tokens=3000,
+    ),
+    Ferramenta(
+        "reescritor_conteudo", "✍️ Reescritor de Conteúdo",
+        (Campo("original_content", True), Campo("target_query", True)),
+        prompt_reescritor_conteudo, "target_query",
+        campo_longo="original_content", processar_longo=reescrever_em_blocos,
+        tokens_saida=2000,
+    ),
+    Ferramenta(
+        "validador_seo", "✅ Validador SEO",
+        (Campo("content_to_check", True), Campo("main_keyword"), Campo("content_type", padrao="Blog Post", exato=True)),
+        prompt_validador_seo, "content_to_check",
+        campo_longo="content_to_check", processar_longo=validar_em_blocos,
+        tokens_saida=900,
+    ),
+    Ferramenta(
+        "otimizador_visual", "🖼️ Otimizador Visual",
+        (Campo("imagem_base64", True), Campo("page_type", padrao="Homepage", exato=True), Campo("page_url")),
+        prompt_analise_visual, "page_url",
+        modelo="gemini-1.5-pro",
+    ),
+    Ferramenta(
+        "comparador_produtos", "🆚 Comparador de Produtos",
+        (Campo("product_a", True), Campo("product_b", True), Campo("concorrente"), Campo("comparison_aspects")),
+        prompt_comparador_produtos, "product_a",
+        processar_longo=comparar_por_produto, dividir=comparacao_em_partes,
+    ),
+    Ferramenta(
+        "guia_comprador", "🛒 Guia do Comprador",
+        (Campo("product_category", True), Campo("buyer_profile", True), Campo("top_products")),
+        prompt_guia_comprador, "product_category",
+        processar_longo=guia_por_produto, dividir=guia_em_partes,
+    ),
+    Ferramenta(
+        "explicador_recursos", "⚙️ Explicador de Recursos",
+        (Campo("feature_name", True), Campo("product_context"), Campo("use_cases")),
+        prompt_explicador_recursos, "feature_name",
+    ),
+    Ferramenta(
+        "desmistificador", "❌ Desmistificador",
+        (Campo("myth", True), Campo("truth", True), Campo("evidence")),
+        prompt_desmistificador, "myth",
+    ),
+    Ferramenta(
+        "gerador_faq", "❓ Gerador de FAQ",
+        (Campo("faq_question", True), Campo("technical_level", padrao="Leigo", exato=True),
+         Campo("steps_needed", padrao=3, exato=True)),
+        prompt_gerador_faq, "faq_question",
+        tokens_saida=900, slo=20.0,
+    ),
+)
+
+
+def executar_ferramenta(cliente, nome, entradas, sessao=None):
+    ferramenta, valores = _preparar(nome, entradas)
+    if ferramenta.em_blocos(valores):
+        return ferramenta.processar_longo(cliente, ferramenta.modelo_blocos(cliente), sessao=sessao, **valores)["texto"]
+    modelo, conteudo, opcoes = _chamada_roteada(cliente, ferramenta, valores, entradas, sessao)
+    return cliente.gerar(modelo, conteudo, **opcoes)
+
+
+async def executar_ferramenta_async(cliente, nome, entradas, sessao=None):
+    """``executar_ferramenta`` para quem já roda num event loop (a API).
+
+    A chamada ao modelo corre no laço do cliente sem ocupar uma thread. O processamento
+    em blocos, síncrono, vai para o pool, mas ocupa lá uma thread só: as chamadas dos
+    blocos correm todas no laço.
+    """
+    ferramenta, valores = _preparar(nome, entradas)
+    if ferramenta.em_blocos(valores):
+        return await asyncio.to_thread(executar_ferramenta, cliente, nome, entradas, sessao)
+    modelo, conteudo, opcoes = _chamada_roteada(cliente, ferramenta, valores, entradas, sessao)
+    return await asyncio.wrap_future(cliente.laco.executar(cliente.gerar_async(modelo, conteudo, **opcoes)))
+
+
+def _preparar(nome, entradas):
+    if nome not in FERRAMENTAS:
+        raise ValueError(f"Ferramenta desconhecida: {nome}")
+    ferramenta = FERRAMENTAS[nome]
+    return ferramenta, ferramenta.ajustar(ferramenta.validar(entradas))
+
+
+def _chamada_roteada(cliente, ferramenta, valores, entradas, sessao):
+    conteudo = ferramenta.conteudo(entradas)
+    decisao = ferramenta.rotear(cliente, valores, conteudo, sessao)
+    return cliente.modelo(decisao.modelo), conteudo, {
+        "sessao": sessao,
+        "ferramenta": ferramenta.nome,
+        "reserva": cliente.modelo(decisao.reserva) if decisao.reserva else None,
+        "atraso_reserva": decisao.atraso_reserva,
+    }
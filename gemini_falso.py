@@ -0,0 +1,99 @@
+import asyncio
+import math
+import random
+import time
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+
+
+class ModeloFalso:
+    """Substituto local de ``genai.GenerativeModel`` para testes de carga sem gastar cota.
+
+    Simula latência, streaming em trechos, uma taxa configurável de erros 429 e vários
+    candidatos por chamada (``candidate_count``), recusados acima de ``max_candidatos``,
+    tanto em ``generate_content`` quanto em ``generate_content_async``.
+    Com ``dispersao`` > 0 a latência segue uma distribuição log-normal com mediana
+    ``latencia`` (caudas longas, como na API real); com 0 ela é fixa.
+    """
+
+    def __init__(self, model_name="gemini-1.5-flash", latencia=0.5, taxa_erro=0.0,
+                 trechos=8, intervalo_trechos=0.05, texto=None, dispersao=0.0, max_candidatos=8):
+        self.model_name = f"models/{model_name}"
+        self.latencia = latencia
+        self.dispersao = dispersao
+        self.taxa_erro = taxa_erro
+        self.trechos = trechos
+        self.intervalo_trechos = intervalo_trechos
+        self.texto = texto
+        self.max_candidatos = max_candidatos
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        candidatos = self._candidatos(generation_config)
+        time.sleep(self.sortear_latencia())
+        self._sortear_erro()
+        if not stream:
+            return self._resposta(contents, candidatos)
+        return self._stream(*self._texto_uso(contents, candidatos))
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        candidatos = self._candidatos(generation_config)
+        await asyncio.sleep(self.sortear_latencia())
+        self._sortear_erro()
+        if not stream:
+            return self._resposta(contents, candidatos)
+        return self._stream_async(*self._texto_uso(contents, candidatos))
+
+    def _candidatos(self, generation_config):
+        candidatos = (generation_config or {}).get("candidate_count", 1)
+        if candidatos > self.max_candidatos:
+            raise exceptions.InvalidArgument(f"candidate_count deve ser no máximo {self.max_candidatos} (simulado)")
+        return candidatos
+
+    def _sortear_erro(self):
+        if random.random() < self.taxa_erro:
+            raise exceptions.ResourceExhausted("429 Resource has been exhausted (simulado)")
+
+    def _texto_uso(self, contents, candidatos):
+        prompt = contents if isinstance(contents, str) else " ".join(p for p in contents if isinstance(p, str))
+        texto = self.texto or f"Resposta simulada ({len(prompt)} caracteres de prompt)."
+        uso = SimpleNamespace(
+            prompt_token_count=max(1, len(prompt) // 4),
+            candidates_token_count=max(1, len(texto) // 4) * candidatos,
+        )
+        return texto, uso
+
+    def _resposta(self, contents, candidatos):
+        texto, uso = self._texto_uso(contents, candidatos)
+        textos = [texto] + [f"{texto} (variante {numero + 1})" for numero in range(1, candidatos)]
+        return SimpleNamespace(
+            text=texto,
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=t)])) for t in textos],
+            usage_metadata=uso,
+        )
+
+    def sortear_latencia(self):
+        if self.dispersao <= 0:
+            return self.latencia
+        return random.lognormvariate(math.log(self.latencia), self.dispersao)
+
+    def _partes(self, texto, uso):
+        tamanho = max(1, -(-len(texto) // self.trechos))
+        partes = [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+        # Como na API real, o uso de tokens acompanha o último trecho
+        return [
+            SimpleNamespace(text=parte, usage_metadata=uso if i == len(partes) - 1 else None)
+            for i, parte in enumerate(partes)
+        ]
+
+    def _stream(self, texto, uso):
+        for i, trecho in enumerate(self._partes(texto, uso)):
+            if i:
+                time.sleep(self.intervalo_trechos)
+            yield trecho
+
+    async def _stream_async(self, texto, uso):
+        for i, trecho in enumerate(self._partes(texto, uso)):
+            if i:
+                await asyncio.sleep(self.intervalo_trechos)
+            yield trecho
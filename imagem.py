@@ -0,0 +1,90 @@
+import asyncio
+import io
+import math
+
+from PIL import Image, ImageOps
+
+# Orçamento de envio para o modelo de visão: o Gemini fatia imagens grandes em blocos
+# de 768px (258 tokens cada), então largura acima de 2 blocos só gasta upload e tokens
+LARGURA_MAXIMA = 1536
+PIXELS_MAXIMOS = 1536 * 2304
+BYTES_MAXIMOS = 1_500_000
+QUALIDADE_INICIAL = 85
+QUALIDADE_MINIMA = 50
+
+# Capturas de página inteira mais altas que isso (altura/largura) são divididas em trechos
+PROPORCAO_MAXIMA = 2.0
+SOBREPOSICAO_TRECHOS = 0.1
+
+
+def _abrir(conteudo):
+    imagem = ImageOps.exif_transpose(Image.open(io.BytesIO(conteudo)))
+    if imagem.mode in ("RGBA", "LA", "P"):
+        # JPEG não tem transparência: aplica sobre fundo branco
+        fundo = Image.new("RGB", imagem.size, "white")
+        imagem = imagem.convert("RGBA")
+        fundo.paste(imagem, mask=imagem.getchannel("A"))
+        return fundo
+    return imagem.convert("RGB")
+
+
+def _reduzir(imagem, escala):
+    largura, altura = max(1, round(imagem.width * escala)), max(1, round(imagem.height * escala))
+    return imagem.resize((largura, altura), Image.LANCZOS)
+
+
+def codificar(imagem, pixels_maximos=PIXELS_MAXIMOS, bytes_maximos=BYTES_MAXIMOS):
+    if imagem.width * imagem.height > pixels_maximos:
+        imagem = _reduzir(imagem, math.sqrt(pixels_maximos / (imagem.width * imagem.height)))
+
+    # Baixa a qualidade até caber no orçamento de bytes; se não bastar, reduz a resolução
+    qualidade = QUALIDADE_INICIAL
+    while True:
+        buffer = io.BytesIO()
+        imagem.save(buffer, format="JPEG", quality=qualidade, optimize=True)
+        if buffer.tell() <= bytes_maximos or min(imagem.size) <= 256:
+            return {"mime_type": "image/jpeg", "data": buffer.getvalue()}
+        if qualidade > QUALIDADE_MINIMA:
+            qualidade -= 10
+        else:
+            imagem = _reduzir(imagem, 0.8)
+
+
+def dividir_em_trechos(imagem):
+    altura_trecho = int(imagem.width * PROPORCAO_MAXIMA)
+    if imagem.height <= altura_trecho:
+        return [imagem]
+    passo = int(altura_trecho * (1 - SOBREPOSICAO_TRECHOS))
+    trechos = []
+    for topo in range(0, imagem.height, passo):
+        trechos.append(imagem.crop((0, topo, imagem.width, min(topo + altura_trecho, imagem.height))))
+        if topo + altura_trecho >= imagem.height:
+            break
+    return trechos
+
+
+def preparar_imagem(conteudo):
+    """Reduz, recodifica e, se for uma captura muito alta, divide a imagem em trechos.
+
+    Tudo em memória: devolve uma lista de partes ``{"mime_type", "data"}`` prontas
+    para enviar ao modelo, de cima para baixo.
+    """
+    imagem = _abrir(conteudo)
+    if imagem.width > LARGURA_MAXIMA:
+        imagem = _reduzir(imagem, LARGURA_MAXIMA / imagem.width)
+    return [codificar(trecho) for trecho in dividir_em_trechos(imagem)]
+
+
+def analisar_trechos(cliente, modelo, prompt, partes, sessao=None, ferramenta=None):
+    # Cada trecho vai em uma chamada própria, todas ao mesmo tempo no laço do cliente; o resultado mantém a ordem
+    def analisar(indice):
+        contexto = (
+            f"\n\nEsta imagem é o trecho {indice + 1} de {len(partes)} de uma captura de página inteira, "
+            "em ordem de cima para baixo. Avalie apenas o que aparece neste trecho."
+        )
+        return cliente.gerar_async(modelo, [prompt + contexto, partes[indice]], sessao=sessao, ferramenta=ferramenta)
+
+    async def analisar_todos():
+        return list(await asyncio.gather(*(analisar(indice) for indice in range(len(partes)))))
+
+    return cliente.laco.esperar(lambda _: analisar_todos())
@@ -0,0 +1,61 @@
+import asyncio
+import queue
+import threading
+
+_laco = None
+_lock_laco = threading.Lock()
+
+
+class LacoAssincrono:
+    """Event loop asyncio numa thread própria, compartilhado pelas sessões do processo.
+
+    Código síncrono (as threads de script do Streamlit, a CLI) envia corrotinas com
+    ``executar`` e recebe um ``concurrent.futures.Future``; código assíncrono em outro
+    loop (a API) pode aguardá-lo com ``asyncio.wrap_future``. As chamadas ao modelo em
+    andamento ficam todas neste loop, sem ocupar uma thread cada.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="laco-llm", daemon=True).start()
+
+    def executar(self, corrotina):
+        return asyncio.run_coroutine_threadsafe(corrotina, self.loop)
+
+    def esperar(self, criar_corrotina, ao_aguardar=None):
+        """Executa ``criar_corrotina(avisar)`` no loop e espera o resultado na thread de quem chamou.
+
+        Os avisos de posição na fila (``avisar``) chegam a ``ao_aguardar`` nesta thread, não na do
+        loop: no Streamlit, só a thread do script pode escrever na página.
+        """
+        avisos = queue.SimpleQueue()
+        futuro = self.executar(criar_corrotina(avisos.put if ao_aguardar is not None else None))
+        try:
+            while True:
+                try:
+                    return futuro.result(timeout=0.25)
+                except TimeoutError:
+                    pass
+                finally:
+                    while not avisos.empty():
+                        ao_aguardar(avisos.get())
+        finally:
+            # Quem chamou desistiu (ex. rerun interrompido): a chamada não continua no loop
+            futuro.cancel()
+
+    def cancelar(self, futuros):
+        """Cancela os ``futuros`` de uma vez, num único passo do loop.
+
+        Cancelados um a um desta thread, o loop poderia rodar entre dois cancelamentos: um pedido
+        que esperava vaga num semáforo seria liberado pelo que acabou de ser cancelado e chegaria ao modelo.
+        """
+        futuros = list(futuros)
+        self.loop.call_soon_threadsafe(lambda: [futuro.cancel() for futuro in futuros])
+
+
+def laco_compartilhado():
+    global _laco
+    with _lock_laco:
+        if _laco is None:
+            _laco = LacoAssincrono()
+        return _laco
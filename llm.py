@@ -0,0 +1,390 @@
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from statistics import median
+
+import google.generativeai as genai
+from google.api_core.exceptions import InvalidArgument
+
+from agendador import Agendador, estimar_tokens, nome_modelo
+from cache import CacheRespostas, chave_cache, tamanho_conteudo
+from gemini_falso import ModeloFalso
+from laco import laco_compartilhado
+from metricas import CACHE, ERRO, OK, MetricasLLM, RegistroChamada, configurar_logs, tokens_uso
+from openai_compativel import ModeloOpenAI
+from roteador import Roteador
+
+
+def criar_modelo(nome):
+    """Modelo pelo nome, com o provedor no prefixo: ``openai/<modelo>`` (API compatível com a da
+    OpenAI), ``falso/<modelo>`` (simulado localmente) ou, sem prefixo, o Gemini.
+
+    Todos seguem a interface de ``genai.GenerativeModel`` usada no app: ``model_name`` e
+    ``generate_content_async(contents, generation_config, stream)``.
+    """
+    provedor, separador, modelo = nome.partition("/")
+    # AIO_GEMINI_FALSO=1 troca todos os provedores pelo modelo simulado (testes de carga sem gastar cota);
+    # AIO_GEMINI_FALSO_CONFIG ajusta a simulação, ex. {"latencia": 0.8, "dispersao": 0.5, "taxa_erro": 0.02}
+    if os.getenv("AIO_GEMINI_FALSO") == "1" or provedor == "falso":
+        return ModeloFalso(nome, **json.loads(os.getenv("AIO_GEMINI_FALSO_CONFIG", "{}")))
+    if separador and provedor == "openai":
+        return ModeloOpenAI(modelo)
+    genai.configure(api_key=os.getenv("GEM_API_KEY"))
+    return genai.GenerativeModel(nome)
+
+
+def texto_trecho(chunk):
+    # Trechos finais de stream podem vir sem partes de texto
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def textos_candidatos(response):
+    # Com candidate_count > 1, response.text não funciona: cada candidato traz as próprias partes
+    return [
+        "".join(getattr(parte, "text", "") for parte in candidato.content.parts)
+        for candidato in response.candidates
+    ]
+
+
+def criar_cliente():
+    # Configuração por variáveis de ambiente, comum à interface, à API e à CLI
+    limites = json.loads(os.getenv("AIO_LIMITES", "{}"))
+    metricas = MetricasLLM()
+    # AIO_LOGS_JSON=1 escreve uma linha JSON por chamada; AIO_METRICS_PORT abre um /metrics próprio
+    if os.getenv("AIO_LOGS_JSON") == "1":
+        configurar_logs()
+    if os.getenv("AIO_METRICS_PORT"):
+        metricas.servir(int(os.getenv("AIO_METRICS_PORT")))
+    return ClienteLLM(
+        CacheRespostas(os.getenv("CACHE_DB", "cache_respostas.db")),
+        Agendador(limites={modelo: tuple(valores) for modelo, valores in limites.items()}),
+        metricas,
+        Roteador.do_ambiente(metricas),
+    )
+
+
+class RespostaStream:
+    """Iterável de trechos de texto que mede o tempo até o primeiro trecho."""
+
+    def __init__(self, trechos, ao_concluir=None):
+        self._trechos = trechos
+        self._ao_concluir = ao_concluir
+        self._inicio = time.perf_counter()
+        self.partes = []
+        self.tempo_primeiro_trecho = None
+        self.duracao = None
+
+    def __iter__(self):
+        for trecho in self._trechos:
+            if not trecho:
+                continue
+            if self.tempo_primeiro_trecho is None:
+                self.tempo_primeiro_trecho = time.perf_counter() - self._inicio
+            self.partes.append(trecho)
+            yield trecho
+        self.duracao = time.perf_counter() - self._inicio
+        if self._ao_concluir is not None:
+            self._ao_concluir(self)
+
+    @property
+    def texto(self):
+        return "".join(self.partes)
+
+
+class ClienteLLM:
+    """Ponto único de chamada aos modelos: consulta o cache e passa pelo agendador antes de ir à API.
+
+    Toda chamada (inclusive acertos de cache e falhas) é medida em ``metricas``, com o nome
+    da ferramenta que a originou. O ``roteador`` escolhe o modelo de cada pedido (``rotear``).
+
+    As chamadas à API rodam como corrotinas (``generate_content_async``) no ``laco`` compartilhado
+    do processo: ``gerar_async`` serve a quem já está num event loop, e os métodos síncronos só
+    esperam o resultado, sem uma thread presa por chamada em andamento (variantes, reserva).
+    """
+
+    def __init__(self, cache=None, agendador=None, metricas=None, roteador=None, laco=None):
+        self.cache = cache
+        self.agendador = agendador
+        self.metricas = metricas
+        self.roteador = roteador or Roteador(metricas=metricas)
+        self.laco = laco or laco_compartilhado()
+        self._modelos = {}
+        self._lock_modelos = threading.Lock()
+        # Janela recente de tempos até o primeiro trecho (somente chamadas reais)
+        self.tempos_primeiro_trecho = deque(maxlen=200)
+        # Modelos que recusaram candidate_count > 1: variantes vão direto para chamadas simultâneas
+        self._sem_candidatos = set()
+
+    def modelo(self, nome):
+        # Um cliente de modelo por nome, criado na primeira vez que é pedido
+        with self._lock_modelos:
+            if nome not in self._modelos:
+                self._modelos[nome] = criar_modelo(nome)
+            return self._modelos[nome]
+
+    def mediana_primeiro_trecho(self):
+        return median(self.tempos_primeiro_trecho) if self.tempos_primeiro_trecho else None
+
+    def rotear(self, ferramenta, tokens_entrada, tokens_saida, preferido=None, slo=None, sessao=None,
+               registrar=True):
+        """Decisão do roteador para um pedido; com ``registrar``, ela vai para as métricas e o log."""
+        decisao = self.roteador.escolher(ferramenta, tokens_entrada, tokens_saida, preferido, slo)
+        decisao.sessao = sessao
+        if registrar and self.metricas is not None:
+            self.metricas.registrar_decisao(decisao)
+        return decisao
+
+    def gerar(self, modelo, prompt, generation_config=None, sessao=None, ao_aguardar=None, ferramenta=None,
+              ignorar_cache=False, reserva=None, atraso_reserva=None):
+        """Resposta completa do ``modelo``. Com ``reserva``, se ele não responder em ``atraso_reserva``
+        segundos, a mesma chamada vai também ao modelo reserva e vale a primeira resposta (hedge).
+        """
+        return self.laco.esperar(
+            lambda avisar: self.gerar_async(
+                modelo, prompt, generation_config, sessao, avisar, ferramenta, ignorar_cache, reserva, atraso_reserva
+            ),
+            ao_aguardar,
+        )
+
+    async def gerar_async(self, modelo, prompt, generation_config=None, sessao=None, ao_aguardar=None,
+                          ferramenta=None, ignorar_cache=False, reserva=None, atraso_reserva=None):
+        inicio = time.perf_counter()
+        chave = None
+        if self.cache is not None:
+            chave = chave_cache(modelo.model_name, prompt, generation_config)
+            # ignorar_cache: gerar de novo a pedido do usuário, mas ainda guardar o resultado novo
+            texto = None if ignorar_cache else self.cache.obter(chave)
+            if texto is not None:
+                self._medir(ferramenta, modelo, prompt, CACHE, False, inicio, texto=texto, sessao=sessao)
+                return texto
+
+        if reserva is None:
+            respondeu = modelo
+            texto = await self._gerar_uma(modelo, prompt, generation_config, sessao, ao_aguardar, ferramenta)
+        else:
+            respondeu, texto = await self._gerar_com_reserva(
+                modelo, reserva, atraso_reserva, prompt, generation_config, sessao, ao_aguardar, ferramenta
+            )
+
+        if chave is not None:
+            # A resposta da reserva fica na chave da reserva: o cache do principal só guarda texto dele
+            if respondeu is not modelo:
+                chave = chave_cache(respondeu.model_name, prompt, generation_config)
+            self.cache.guardar(chave, texto, time.perf_counter() - inicio, tamanho_conteudo(prompt))
+        return texto
+
+    async def _gerar_uma(self, modelo, prompt, generation_config, sessao, ao_aguardar, ferramenta):
+        inicio = time.perf_counter()
+        try:
+            response = await self._chamar(modelo, prompt, generation_config, False, sessao, ao_aguardar)
+            texto = response.text
+        except Exception as erro:
+            self._medir(ferramenta, modelo, prompt, ERRO, False, inicio, erro=erro, sessao=sessao)
+            raise
+        self._medir(
+            ferramenta, modelo, prompt, OK, False, inicio, texto=texto, uso=response.usage_metadata, sessao=sessao
+        )
+        return texto
+
+    async def _gerar_com_reserva(self, modelo, reserva, atraso, prompt, generation_config, sessao, ao_aguardar,
+                                 ferramenta):
+        # Assim que uma das duas responde, a outra é cancelada; devolve (modelo que respondeu, texto)
+        principal = asyncio.ensure_future(
+            self._gerar_uma(modelo, prompt, generation_config, sessao, ao_aguardar, ferramenta)
+        )
+        pendentes = {principal}
+        try:
+            concluidas, pendentes = await asyncio.wait(pendentes, timeout=atraso)
+            repetida = not concluidas
+            if repetida:
+                pendentes = {principal, asyncio.ensure_future(
+                    self._gerar_uma(reserva, prompt, generation_config, sessao, ao_aguardar, ferramenta)
+                )}
+            erro = None
+            while True:
+                for tarefa in concluidas:
+                    if tarefa.exception() is None:
+                        if repetida and self.metricas is not None:
+                            vencedor = "principal" if tarefa is principal else "reserva"
+                            self.metricas.registrar_reserva(ferramenta or "desconhecida", vencedor)
+                        return (modelo if tarefa is principal else reserva), tarefa.result()
+                    erro = tarefa.exception()
+                if not pendentes:
+                    raise erro
+                concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
+
+    def gerar_stream(self, modelo, prompt, generation_config=None, sessao=None, ao_aguardar=None, ferramenta=None,
+                     ignorar_cache=False):
+        inicio = time.perf_counter()
+        chave = None
+        if self.cache is not None:
+            chave = chave_cache(modelo.model_name, prompt, generation_config)
+            texto = None if ignorar_cache else self.cache.obter(chave)
+            if texto is not None:
+                self._medir(ferramenta, modelo, prompt, CACHE, True, inicio, texto=texto, sessao=sessao)
+                return RespostaStream(iter([texto]))
+
+        # O uso de tokens chega no último trecho; o gerador o guarda aqui para a medição final
+        uso = {}
+
+        def ao_concluir(resposta):
+            if resposta.tempo_primeiro_trecho is not None:
+                self.tempos_primeiro_trecho.append(resposta.tempo_primeiro_trecho)
+            self._medir(
+                ferramenta, modelo, prompt, OK, True, inicio, texto=resposta.texto,
+                uso=uso.get("metadata"), primeiro_trecho=resposta.tempo_primeiro_trecho, sessao=sessao,
+            )
+            if chave is not None and resposta.partes:
+                self.cache.guardar(chave, resposta.texto, resposta.duracao, tamanho_conteudo(prompt))
+
+        def trechos():
+            # Gerador preguiçoso: a chamada só parte na primeira iteração,
+            # então o tempo até o primeiro trecho inclui a fila e a ida à API.
+            # O stream é lido no loop; trechos e avisos de fila chegam aqui por uma fila
+            eventos = queue.SimpleQueue()
+            futuro = self.laco.executar(self._transmitir(modelo, prompt, generation_config, sessao, eventos))
+            try:
+                while True:
+                    tipo, valor = eventos.get()
+                    if tipo == "posicao":
+                        if ao_aguardar is not None:
+                            ao_aguardar(valor)
+                    elif tipo == "trecho":
+                        if getattr(valor, "usage_metadata", None) is not None:
+                            uso["metadata"] = valor.usage_metadata
+                        yield texto_trecho(valor)
+                    elif tipo == "erro":
+                        raise valor
+                    else:
+                        return
+            except Exception as erro:
+                self._medir(ferramenta, modelo, prompt, ERRO, True, inicio, erro=erro, sessao=sessao)
+                raise
+            finally:
+                # Leitura interrompida por quem consumia: o stream não continua no loop
+                futuro.cancel()
+
+        return RespostaStream(trechos(), ao_concluir)
+
+    async def _transmitir(self, modelo, prompt, generation_config, sessao, eventos):
+        try:
+            response = await self._chamar(
+                modelo, prompt, generation_config, True, sessao, lambda posicao: eventos.put(("posicao", posicao))
+            )
+            async for chunk in response:
+                eventos.put(("trecho", chunk))
+        except Exception as erro:
+            eventos.put(("erro", erro))
+        else:
+            eventos.put(("fim", None))
+
+    def gerar_variantes(self, modelo, prompt, quantidade, generation_config=None, sessao=None, ao_aguardar=None,
+                        ferramenta=None, ignorar_cache=False):
+        """``quantidade`` textos alternativos para o mesmo prompt.
+
+        Pede todos numa chamada só (``candidate_count``); se o modelo não aceitar, ou devolver
+        menos candidatos, os que faltam saem de chamadas simultâneas. A lista fica no cache
+        como uma entrada só, separada da resposta única do mesmo prompt.
+        """
+        return self.laco.esperar(
+            lambda avisar: self.gerar_variantes_async(
+                modelo, prompt, quantidade, generation_config, sessao, avisar, ferramenta, ignorar_cache
+            ),
+            ao_aguardar,
+        )
+
+    async def gerar_variantes_async(self, modelo, prompt, quantidade, generation_config=None, sessao=None,
+                                    ao_aguardar=None, ferramenta=None, ignorar_cache=False):
+        inicio = time.perf_counter()
+        config = {**(generation_config or {}), "candidate_count": quantidade}
+        chave = None
+        if self.cache is not None:
+            chave = chave_cache(modelo.model_name, prompt, config)
+            guardado = None if ignorar_cache else self.cache.obter(chave)
+            if guardado is not None:
+                textos = json.loads(guardado)
+                self._medir(
+                    ferramenta, modelo, prompt, CACHE, False, inicio, texto="".join(textos), sessao=sessao
+                )
+                return textos
+
+        textos = []
+        if quantidade > 1 and nome_modelo(modelo) not in self._sem_candidatos:
+            try:
+                textos = [texto for texto in await self._gerar_candidatos(
+                    modelo, prompt, config, sessao, ao_aguardar, ferramenta
+                ) if texto]
+            except InvalidArgument:
+                self._sem_candidatos.add(nome_modelo(modelo))
+        faltam = quantidade - len(textos)
+        if faltam > 0:
+            # Sem cache por chamada: o mesmo prompt repetido devolveria sempre o mesmo texto
+            respostas = await asyncio.gather(*(
+                self._gerar_candidatos(modelo, prompt, generation_config, sessao, ao_aguardar, ferramenta)
+                for _ in range(faltam)
+            ))
+            textos += [candidatos[0] for candidatos in respostas]
+
+        if chave is not None:
+            self.cache.guardar(chave, json.dumps(textos, ensure_ascii=False), time.perf_counter() - inicio,
+                               tamanho_conteudo(prompt))
+        return textos
+
+    async def _gerar_candidatos(self, modelo, prompt, generation_config, sessao, ao_aguardar, ferramenta):
+        inicio = time.perf_counter()
+        try:
+            response = await self._chamar(modelo, prompt, generation_config, False, sessao, ao_aguardar)
+            textos = textos_candidatos(response)
+        except Exception as erro:
+            self._medir(ferramenta, modelo, prompt, ERRO, False, inicio, erro=erro, sessao=sessao)
+            raise
+        self._medir(
+            ferramenta, modelo, prompt, OK, False, inicio, texto="".join(textos), uso=response.usage_metadata,
+            sessao=sessao,
+        )
+        return textos
+
+    def _medir(self, ferramenta, modelo, prompt, resultado, stream, inicio, texto="", uso=None,
+               primeiro_trecho=None, erro=None, sessao=None):
+        if self.metricas is None:
+            return
+        tokens_prompt, tokens_resposta = tokens_uso(uso)
+        self.metricas.registrar(RegistroChamada(
+            ferramenta=ferramenta or "desconhecida",
+            modelo=nome_modelo(modelo),
+            resultado=resultado,
+            stream=stream,
+            duracao=time.perf_counter() - inicio,
+            tempo_primeiro_trecho=primeiro_trecho,
+            tokens_prompt=tokens_prompt,
+            tokens_resposta=tokens_resposta,
+            caracteres_entrada=tamanho_conteudo(prompt),
+            caracteres_saida=len(texto or ""),
+            erro=f"{type(erro).__name__}: {erro}" if erro is not None else None,
+            sessao=sessao,
+        ))
+
+    async def _chamar(self, modelo, prompt, generation_config, stream, sessao, ao_aguardar):
+        def chamada():
+            return modelo.generate_content_async(prompt, generation_config=generation_config, stream=stream)
+
+        if self.agendador is None:
+            return await chamada()
+        # Com stream, erros de cota surgem já na abertura da chamada, antes do primeiro trecho
+        return await self.agendador.executar_async(
+            chamada,
+            nome_modelo(modelo),
+            sessao=sessao or "anonima",
+            tokens=estimar_tokens(prompt),
+            ao_aguardar=ao_aguardar,
+        )
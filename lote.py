@@ -0,0 +1,176 @@
+import csv
+import hashlib
+import io
+import json
+import re
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from agendador import ERROS_TRANSITORIOS
+from artigo import NIVEIS_LEITURA, prompt_artigo
+
+# Nomes aceitos para cada coluna da planilha (pt-BR e os nomes dos campos em inglês)
+COLUNAS = {
+    "consulta": ["consulta", "target_query", "query"],
+    "pontos_chave": ["pontos_chave", "pontos-chave", "key_points"],
+    "palavras": ["palavras", "tamanho", "word_count"],
+    "nivel": ["nivel", "nível", "reading_level"],
+}
+PALAVRAS_PADRAO = 800
+CAMPOS_MANIFESTO = ["linha", "consulta", "arquivo", "status", "tentativas", "segundos", "erro"]
+
+
+def ler_planilha(nome_arquivo, conteudo):
+    if nome_arquivo.lower().endswith(".xls"):
+        raise ValueError("Planilhas .xls não são suportadas: salve como .xlsx ou CSV")
+    if nome_arquivo.lower().endswith(".xlsx"):
+        tabela = pd.read_excel(io.BytesIO(conteudo), dtype=str)
+    else:
+        tabela = pd.read_csv(io.BytesIO(conteudo), dtype=str, sep=None, engine="python")
+    tabela.columns = [str(coluna).strip().lower() for coluna in tabela.columns]
+
+    renomear = {}
+    for campo, apelidos in COLUNAS.items():
+        for apelido in apelidos:
+            if apelido in tabela.columns:
+                renomear[apelido] = campo
+                break
+    tabela = tabela.rename(columns=renomear)
+    if "consulta" not in tabela.columns:
+        raise ValueError("A planilha precisa de uma coluna 'consulta'")
+
+    linhas = []
+    for registro in tabela.fillna("").to_dict("records"):
+        consulta = registro["consulta"].strip()
+        if not consulta:
+            continue
+        try:
+            palavras = int(float(registro.get("palavras") or PALAVRAS_PADRAO))
+        except ValueError:
+            palavras = PALAVRAS_PADRAO
+        nivel = registro.get("nivel", "").strip()
+        linhas.append({
+            "consulta": consulta,
+            "pontos_chave": registro.get("pontos_chave", "").strip(),
+            "palavras": min(max(palavras, 400), 1500),
+            # Aceita o nível completo ou só o começo ("Simples", "Técnico"...)
+            "nivel": next((n for n in NIVEIS_LEITURA if nivel and n.lower().startswith(nivel.lower())), NIVEIS_LEITURA[0]),
+        })
+    return linhas
+
+
+def id_lote(nome):
+    # Pelo nome escolhido, não pelo arquivo: corrigir uma linha e reenviar retoma o mesmo lote
+    return slug(nome)
+
+
+def id_linha(linha):
+    return hashlib.sha1(json.dumps(linha, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+
+def slug(texto, limite=60):
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-")[:limite] or "artigo"
+
+
+class ExecucaoLote:
+    """Guarda no disco cada artigo concluído, permitindo retomar o lote sem regerar linhas prontas."""
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    def _caminho(self, linha, extensao):
+        return self.diretorio / f"{id_linha(linha)}.{extensao}"
+
+    def concluida(self, linha):
+        return self._caminho(linha, "md").exists()
+
+    def texto(self, linha):
+        return self._caminho(linha, "md").read_text(encoding="utf-8")
+
+    def salvar(self, linha, texto):
+        # Escreve em arquivo temporário e renomeia, para não deixar artigo pela metade
+        temporario = self._caminho(linha, "md.tmp")
+        temporario.write_text(texto, encoding="utf-8")
+        temporario.replace(self._caminho(linha, "md"))
+
+
+def executar_lote(cliente, modelo, linhas, execucao, concorrencia=4, tentativas=3, ao_atualizar=None,
+                  sessao=None):
+    """Gera um artigo por linha com concorrência limitada e novas tentativas por linha.
+
+    Só erros transitórios (cota, indisponibilidade) são tentados de novo, depois das novas
+    tentativas do próprio agendador; os demais marcam a linha como falha na hora.
+
+    ``ao_atualizar(indice, registro)`` é chamado na thread de quem chamou sempre que
+    uma linha termina (com sucesso, falha ou reaproveitada de uma execução anterior).
+    """
+    registros = [None] * len(linhas)
+
+    def processar(indice):
+        linha = linhas[indice]
+        inicio = time.perf_counter()
+        erro = ""
+        for tentativa in range(1, tentativas + 1):
+            try:
+                prompt = prompt_artigo(linha["consulta"], linha["pontos_chave"], linha["palavras"], linha["nivel"])
+                execucao.salvar(linha, cliente.gerar(modelo, prompt, sessao=sessao, ferramenta="construtor_paginas"))
+                return indice, "concluida", tentativa, time.perf_counter() - inicio, ""
+            except ERROS_TRANSITORIOS as exc:
+                erro = str(exc)
+                if tentativa < tentativas:
+                    time.sleep(2 ** tentativa)
+            except Exception as exc:
+                return indice, "falhou", tentativa, time.perf_counter() - inicio, str(exc)
+        return indice, "falhou", tentativas, time.perf_counter() - inicio, erro
+
+    pendentes = []
+    for indice, linha in enumerate(linhas):
+        if execucao.concluida(linha):
+            registros[indice] = _registro(indice, linha, "reaproveitada", 0, 0.0, "")
+            if ao_atualizar is not None:
+                ao_atualizar(indice, registros[indice])
+        else:
+            pendentes.append(indice)
+
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        futuros = [executor.submit(processar, indice) for indice in pendentes]
+        for futuro in as_completed(futuros):
+            indice, status, tentativa, segundos, erro = futuro.result()
+            registros[indice] = _registro(indice, linhas[indice], status, tentativa, segundos, erro)
+            if ao_atualizar is not None:
+                ao_atualizar(indice, registros[indice])
+
+    return registros
+
+
+def _registro(indice, linha, status, tentativas, segundos, erro):
+    return {
+        "linha": indice + 1,
+        "consulta": linha["consulta"],
+        "arquivo": f"artigos/{indice + 1:04d}-{slug(linha['consulta'])}.md",
+        "status": status,
+        "tentativas": tentativas,
+        "segundos": round(segundos, 2),
+        "erro": erro,
+    }
+
+
+def montar_zip(linhas, registros, execucao):
+    buffer = io.BytesIO()
+    manifesto = io.StringIO()
+    escritor = csv.DictWriter(manifesto, fieldnames=CAMPOS_MANIFESTO)
+    escritor.writeheader()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for linha, registro in zip(linhas, registros):
+            escritor.writerow(registro)
+            if registro["status"] != "falhou":
+                arquivo_zip.writestr(registro["arquivo"], execucao.texto(linha))
+        arquivo_zip.writestr("manifesto.csv", manifesto.getvalue())
+    return buffer.getvalue()
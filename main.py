@@ -1,311 +1,465 @@
 import streamlit as st
+import datetime
+import json
 import os
-import google.generativeai as genai
-from pymongo import MongoClient
+import re
+import time
+import uuid
+import zipfile
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from google.api_core.exceptions import GoogleAPIError
+from PIL import Image
+from pymongo.errors import PyMongoError
+
+from acervo import IndiceSite, contexto_prompt, paginas_pasta, paginas_sitemap, paginas_zip, urls_sitemap
+from agendador import nome_modelo
+from analise_seo import (
+    ICONES as ICONES_VERIFICACAO, OK, analisar_conteudo, marcar_diferencas, nivel_legibilidade, pontuar_variantes
+)
+from artigo import NIVEIS_LEITURA, SECOES_ARTIGO, gerar_artigo_paralelo
+from auditoria import ERRO as ERRO_AUDITORIA, OK as OK_AUDITORIA, SINALIZADA, auditar, ler_urls
+from cache import chave_cache
+from coleta import ColetorPaginas
+from ferramentas import FERRAMENTAS, executar_ferramenta
+from imagem import preparar_imagem
+from llm import criar_cliente
+from lote import ExecucaoLote, executar_lote, id_lote, ler_planilha, montar_zip
+from repositorio import RepositorioConteudo, cliente_mongo
+from resultados import ResultadosSessao
+from similaridade import IndicePorFerramenta
+from tarefas import CONCLUIDA, FALHOU, FilaTarefas
+from visual import pipeline_visual, prompt_analise_visual
 # Configuração inicial
 st.set_page_config(
     layout="wide",
     page_title="Macfor AIO Agent",
     page_icon="assets/page-icon.png"
 )
-# CSS personalizado com novo estilo baseado nas diretrizes
-st.markdown("""
-<style>
-    /* Importação da fonte Poppins */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-    /* Fundo preto */
-    html, body, .main, .block-container {
-        background-color: #000000 !important;
-    }
-    
-    /* Estilos globais */
-    * {
-        font-family: 'Poppins', sans-serif;
-        color: #FFFFFF !important;
-    }
-    
-    /* Cabeçalhos */
-    h1 {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 700 !important;
-        font-size: 46px !important;
-        color: #FFFFFF !important;
-        margin-bottom: 0.5rem !important;
-        background: linear-gradient(90deg, #8E3EEE 0%, #04ABFD 50%, #4179FE 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    
-    h2 {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 600 !important;
-        font-size: 32px !important;
-        color: #4179FE !important;
-        margin-top: 1.5rem !important;
-    }
-    
-    h3 {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 500 !important;
-        font-size: 24px !important;
-        color: #00D4B8 !important;
-    }
-    
-    /* Texto normal */
-    .stMarkdown p, .stMarkdown li, .stMarkdown ol {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 400 !important;
-        color: #FFFFFF !important;
-        line-height: 1.8 !important;
-        font-size: 18px !important;
-    }
-    
-    /* Texto menor */
-    .stCaption, .stSubheader {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 300 !important;
-        color: #434343 !important;
-        font-size: 14px !important;
-    }
-    
-    /* Abas */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 5px;
-        flex-wrap: nowrap;
-        padding-bottom: 0;
-        border-bottom: 1px solid #434343;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 600 !important;
-        padding: 10px 20px;
-        border-radius: 6px 6px 0 0;
-        white-space: nowrap;
-        font-size: 14px;
-        transition: all 0.2s;
-        color: #434343 !important;
-        background-color: #000000 !important;
-        border: none;
-        margin-right: 2px;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(90deg, #6d13ffff 0%, #4179FE 100%) !important;
-        color: white !important;
-        border-bottom: 3px solid #00D4B8;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        color: #FFFFFF !important;
-        background-color: #434343 !important;
-    }
-    
-    /* Dropdown de abas */
-    .secondary-tabs {
-        margin: 1rem 0;
-        display: flex;
-        align-items: center;
-        gap: 10px;
-    }
-    
-    .secondary-tabs select {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 500 !important;
-        padding: 8px 15px;
-        border-radius: 6px;
-        border: 1px solid #434343 !important;
-        background-color: #000000 !important;
-        cursor: pointer;
-        color: #FFFFFF !important;
-    }
-    
-    .secondary-tabs label {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 500 !important;
-        color: #4179FE !important;
-        font-size: 14px;
-    }
-    
-    /* Campos de formulário */
-    .stTextInput input, .stTextArea textarea, .stSelectbox select {
-        font-family: 'Poppins', sans-serif !important;
-        border: 1px solid #434343 !important;
-        border-radius: 6px !important;
-        padding: 10px 12px !important;
-        background-color: #000000 !important;
-        color: #FFFFFF !important;
-    }
-    
-    .stTextInput input:focus, .stTextArea textarea:focus {
-        border-color: #4179FE !important;
-        box-shadow: 0 0 0 2px rgba(65, 121, 254, 0.2) !important;
-    }
-    
-    /* Placeholders */
-    ::placeholder {
-        color: #434343 !important;
-        opacity: 1 !important;
-    }
-    
-    /* Botões */
-    .stButton button {
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 600 !important;
-        text-transform: uppercase;
-        letter-spacing: 0.8px;
-        background: linear-gradient(90deg, #6d13ffff 0%, #4179FE 100%) !important;
-        color: white !important;
-        transition: all 0.3s;
-        border: none !important;
-        border-radius: 6px !important;
-        padding: 12px 24px !important;
-        font-size: 14px !important;
-    }
-    
-    .stButton button:hover {
-        background: linear-gradient(90deg, #8E3EEE 0%, #04ABFD 100%) !important;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);
-    }
-    
-    /* Alertas e expansores */
-    .stAlert, .stExpander {
-        border-radius: 8px !important;
-        background-color: #000000 !important;
-        border: 1px solid #434343 !important;
-    }
-    
-    .stExpander label {
-        color: #FFFFFF !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Links */
-    a {
-        color: #04ABFD !important;
-        text-decoration: none !important;
-    }
-    
-    a:hover {
-        color: #00D4B8 !important;
-        text-decoration: underline !important;
-    }
-    
-    /* Sliders */
-    .stSlider .st-ae {
-        color: #4179FE !important;
-    }
-    
-    /* Blocos de código */
-    pre {
-        background-color: #000000 !important;
-        border: 1px solid #434343 !important;
-        color: #FFFFFF !important;
-    }
-    
-    /* Logo */
-    .stImage {
-        margin-bottom: 2rem;
-    }
-    
-    /* Adaptações para mobile */
-    @media (max-width: 768px) {
-        h1 {
-            font-size: 36px !important;
-        }
-        
-        h2 {
-            font-size: 28px !important;
-        }
-        
-        h3 {
-            font-size: 22px !important;
-        }
-        
-        .stMarkdown p, .stMarkdown li, .stMarkdown ol {
-            font-size: 16px !important;
-        }
-        
-        .stTabs [data-baseweb="tab"] {
-            padding: 8px 12px;
-            font-size: 13px;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS personalizado com novo estilo baseado nas diretrizes (lido do disco uma vez por processo)
+@st.cache_data
+def carregar_css():
+    with open("assets/estilo.css", encoding="utf-8") as f:
+        return f.read()
+
+
+st.markdown(f"<style>{carregar_css()}</style>", unsafe_allow_html=True)
 
 
 st.image('assets/macLogo.png', width=300)
 st.title('AIO Agent')
 st.caption('Crie conteúdo otimizado para resultados de busca em assistentes de IA')
 
-# Inicializar Gemini
-gemini_api_key = os.getenv("GEM_API_KEY")
-genai.configure(api_key=gemini_api_key)
-modelo_texto = genai.GenerativeModel("gemini-1.5-flash")
+# Cliente único por processo: modelos, cache de respostas e fila de chamadas compartilhados entre sessões
+@st.cache_resource
+def obter_cliente_llm():
+    return criar_cliente()
+
+
+cliente_llm = obter_cliente_llm()
+# Modelo rápido do roteador para as chamadas curtas em série (seções do artigo, lote, plano de ação);
+# nas ferramentas, o modelo de cada pedido é escolhido pelo roteador
+modelo_texto = cliente_llm.modelo(cliente_llm.roteador.rapido)
+# Variantes lado a lado por geração (a API aceita até 8 candidatos, mas 4 colunas já ficam estreitas)
+MAX_VARIANTES = 4
+
+# O id da sessão fica na URL para que um navegador reconectado reencontre suas tarefas
+if "sessao" not in st.query_params:
+    st.query_params["sessao"] = uuid.uuid4().hex
+id_sessao = st.query_params["sessao"]
+
+
+# Fila de tarefas em segundo plano: as gerações continuam mesmo após reruns ou desconexões
+@st.cache_resource
+def obter_fila_tarefas():
+    def executar(tarefa):
+        payload = tarefa["payload"]
+        if "entradas" in payload:
+            # Tarefas que não cabem num prompt único (conteúdo longo) seguem o caminho do registro
+            return executar_ferramenta(cliente_llm, tarefa["ferramenta"], payload["entradas"], sessao=tarefa["sessao"])
+        return cliente_llm.gerar(
+            cliente_llm.modelo(payload["modelo"]), payload["prompt"],
+            sessao=tarefa["sessao"], ferramenta=tarefa["ferramenta"]
+        )
+
+    return FilaTarefas(
+        os.getenv("TAREFAS_DB", "tarefas.db"),
+        executar,
+        workers=int(os.getenv("AIO_WORKERS", "2"))
+    )
+
+
+fila_tarefas = obter_fila_tarefas()
+
+
+# Pedidos recentes de cada ferramenta, para oferecer o resultado de um pedido quase idêntico
+@st.cache_resource
+def obter_indice_similares():
+    return IndicePorFerramenta(FERRAMENTAS)
+
+
+indice_similares = obter_indice_similares()
+
+
+# Conteúdo já publicado de cada site de cliente (um banco SQLite por site, compartilhado entre sessões)
+@st.cache_resource
+def obter_indice_site(site):
+    pasta = os.getenv("ACERVO_DIR", "acervo")
+    os.makedirs(pasta, exist_ok=True)
+    return IndiceSite(os.path.join(pasta, re.sub(r"[^\w.-]+", "_", site.lower()) + ".db"))
+
+
+# Coleta assíncrona das URLs informadas no Otimizador Visual (cliente HTTP e cache compartilhados)
+@st.cache_resource
+def obter_coletor():
+    return ColetorPaginas(os.getenv("COLETA_DB", "coleta_paginas.db"))
+
+
+def contexto_site(consulta):
+    # Trechos do site do cliente para o prompt, sugestões de links internos e alerta de canibalização
+    site = st.session_state.get("site_cliente")
+    if not site or not consulta:
+        return ""
+    indice = obter_indice_site(site)
+    if not len(indice):
+        return ""
+    paginas = indice.relacionadas(consulta)
+    if not paginas:
+        return ""
+    sobreposicao = indice.sobreposicao(consulta, paginas)
+    if sobreposicao is not None:
+        pagina, cobertura = sobreposicao
+        st.warning(
+            f"⚠️ Possível canibalização: [{pagina.titulo}]({pagina.url}) já trata deste assunto "
+            f"({cobertura:.0%} dos termos da consulta no título). Considere atualizar essa página."
+        )
+    with st.expander(f"🔗 {len(paginas)} páginas relacionadas em {site}"):
+        for pagina in paginas:
+            st.markdown(f"- [{pagina.titulo}]({pagina.url})")
+    return contexto_prompt(indice.buscar(consulta), paginas)
+
+
+# MongoDB opcional (MONGO_URI): um cliente com pool por processo, para o histórico de conteúdo e das sessões
+@st.cache_resource
+def obter_banco():
+    if not os.getenv("MONGO_URI"):
+        return None
+    return cliente_mongo(os.getenv("MONGO_URI"))[os.getenv("MONGO_DB", "aio_agent")]
+
+
+@st.cache_resource
+def obter_repositorio():
+    banco = obter_banco()
+    if banco is None:
+        return None
+    repositorio = RepositorioConteudo(banco)
+    try:
+        repositorio.criar_indices()
+    except PyMongoError:
+        return None
+    return repositorio
+
+
+# Com o banco, os resultados de uma sessão voltam ao reabrir o link dela
+@st.cache_resource
+def obter_colecao_resultados():
+    banco = obter_banco()
+    if banco is None:
+        return None
+    colecao = banco["resultados_sessao"]
+    try:
+        colecao.create_index([("sessao", 1), ("criado_em", -1)])
+    except PyMongoError:
+        return None
+    return colecao
+
+
+repositorio = obter_repositorio()
+
+
+# Campos de cada ferramenta guardados com o resultado, para recarregar o formulário num clique
+FORMULARIOS = {
+    "construtor_paginas": ["consulta_1", "pontos_chave_1", "tamanho_1", "nivel_1"],
+    "expansor_topicos": ["tema_principal_2", "publico_2"],
+    "analisador_resultados": ["resposta_3"],
+    "reescritor_conteudo": ["conteudo_4", "query_4"],
+    "validador_seo": ["conteudo_5", "keyword_5", "tipo_5"],
+    "otimizador_visual": ["url_visual", "tipo_visual"],
+    "comparador_produtos": ["produto_a_6", "produto_b_666", "produto_b_6", "aspectos_6"],
+    "guia_comprador": ["categoria_7", "perfil_7", "produtos_7"],
+    "explicador_recursos": ["recurso_8", "contexto_8", "casos_8"],
+    "desmistificador": ["mito_9", "verdade_9", "provas_9"],
+    "gerador_faq": ["pergunta_10", "nivel_10", "passos_10"],
+}
+
+
+def resultados_sessao():
+    if "resultados" not in st.session_state:
+        st.session_state["resultados"] = ResultadosSessao(id_sessao, colecao=obter_colecao_resultados())
+    return st.session_state["resultados"]
+
+
+def guardar_resultado(ferramenta, titulo, texto, inicio=None, artefatos=None):
+    # Com ``inicio`` é uma geração nova: vai também para o histórico de conteúdo, com modelo, tempo e tokens
+    formulario = {chave: st.session_state[chave] for chave in FORMULARIOS[ferramenta] if chave in st.session_state}
+    resultados_sessao().guardar(ferramenta, titulo, texto, formulario)
+    if repositorio is not None and inicio is not None:
+        consumo = cliente_llm.metricas.consumo(ferramenta, id_sessao, inicio)
+        repositorio.registrar(
+            ferramenta, titulo, texto,
+            entradas=formulario,
+            cliente=st.session_state.get("site_cliente", ""),
+            sessao=id_sessao,
+            modelo=consumo["modelo"],
+            duracao=time.time() - inicio,
+            tokens_prompt=consumo["tokens_prompt"],
+            tokens_resposta=consumo["tokens_resposta"],
+            artefatos=artefatos
+        )
+    # Já está na tela nesta execução; exibir_resultados não repete
+    st.session_state[f"gerado_{ferramenta}"] = True
+
+
+def recarregar_formulario(id_resultado):
+    # Callback: roda antes dos widgets serem recriados, então pode mudar os valores deles
+    resultado = resultados_sessao().usar(id_resultado)
+    if resultado is not None:
+        st.session_state.update(resultado.formulario)
+
+
+def exibir_resultados(ferramenta, nome_arquivo=None):
+    # Resultados guardados: o último continua na tela nos reruns, os anteriores ficam no histórico
+    gerado_agora = st.session_state.pop(f"gerado_{ferramenta}", False)
+    ultimos = resultados_sessao().ultimos(ferramenta)
+    if not ultimos:
+        return
+    ultimo = ultimos[0]
+    if not gerado_agora:
+        resultados_sessao().usar(ultimo.id)
+        st.markdown(ultimo.texto)
+        col1, col2 = st.columns([3, 1])
+        col1.caption(f"🕘 Último resultado · {ultimo.titulo} · {time.strftime('%H:%M', time.localtime(ultimo.criado_em))}")
+        col2.button(
+            "↩️ Recarregar entradas", key=f"recarregar_{ferramenta}",
+            on_click=recarregar_formulario, args=(ultimo.id,)
+        )
+    if nome_arquivo:
+        st.download_button(
+            "📥 Baixar Resultado",
+            ultimo.texto,
+            file_name=nome_arquivo(ultimo),
+            key=f"baixar_{ferramenta}"
+        )
+    if len(ultimos) > 1:
+        # Seletor em vez de expander: várias ferramentas já ficam dentro de um expander
+        anteriores = {resultado.id: resultado for resultado in ultimos[1:]}
+        id_escolhido = st.selectbox(
+            f"📜 Resultados anteriores ({len(anteriores)})",
+            [""] + list(anteriores),
+            format_func=lambda id_resultado: "Escolha para ver" if not id_resultado else (
+                f"{time.strftime('%H:%M', time.localtime(anteriores[id_resultado].criado_em))} · "
+                f"{anteriores[id_resultado].titulo}"
+            ),
+            key=f"historico_{ferramenta}"
+        )
+        escolhido = resultados_sessao().usar(id_escolhido) if id_escolhido else None
+        if escolhido is not None:
+            st.markdown(escolhido.texto)
+            st.button(
+                "↩️ Recarregar entradas", key=f"recarregar_historico_{ferramenta}",
+                on_click=recarregar_formulario, args=(escolhido.id,)
+            )
+
+
+def exibir_stream(ferramenta, modelo, prompt, mensagem, ignorar_cache=False):
+    # Escreve os trechos num placeholder conforme chegam; o spinner só cobre a fila e a espera pelo primeiro
+    aviso_fila = st.empty()
+    area = st.empty()
+
+    def ao_aguardar(posicao):
+        if posicao:
+            aviso_fila.caption(f"⏳ Muitas gerações em andamento: você é o {posicao}º na fila")
+        else:
+            aviso_fila.empty()
+
+    resposta = cliente_llm.gerar_stream(
+        modelo, prompt, sessao=id_sessao, ao_aguardar=ao_aguardar, ferramenta=ferramenta,
+        ignorar_cache=ignorar_cache
+    )
+    trechos = iter(resposta)
+    try:
+        with st.spinner(mensagem):
+            primeiro = next(trechos, None)
+        if primeiro is not None:
+            area.markdown(primeiro + "▌")
+            for _ in trechos:
+                area.markdown(resposta.texto + "▌")
+    except GoogleAPIError as erro:
+        aviso_fila.empty()
+        area.markdown(resposta.texto)
+        st.error(f"Não foi possível gerar o conteúdo agora. Tente novamente em instantes. ({erro})")
+        return None
+    area.markdown(resposta.texto)
+    if resposta.tempo_primeiro_trecho is not None:
+        st.caption(
+            f"⏱️ Primeiro trecho em {resposta.tempo_primeiro_trecho:.2f}s · "
+            f"total {resposta.duracao:.2f}s"
+        )
+    return resposta.texto
+
+
+def pedir_regeneracao(ferramenta):
+    st.session_state[f"regenerar_{ferramenta}"] = True
+
+
+def pedido_geracao(ferramenta, clicado):
+    """(gerar, regenerar) deste rerun; o pedido de "gerar novamente" sai da sessão aqui mesmo,
+    antes de qualquer validação, para não disparar uma nova geração a cada rerun."""
+    regenerar = st.session_state.pop(f"regenerar_{ferramenta}", False)
+    return clicado or regenerar, regenerar
+
+
+def exibir_similar(ferramenta, modelo, prompt, entradas):
+    # Pedido quase idêntico a um recente: mostra o resultado guardado e oferece gerar de novo
+    similar = indice_similares.buscar(ferramenta, entradas)
+    if similar is None or similar.chave == chave_cache(modelo.model_name, prompt):
+        # Pedido igual já é atendido pelo cache exato
+        return None
+    texto = cliente_llm.cache.obter(similar.chave)
+    if texto is None:
+        return None
+    st.markdown(texto)
+    st.caption(
+        f"♻️ Resultado de um pedido quase idêntico ({similar.similaridade:.0%} parecido): "
+        f"“{FERRAMENTAS[ferramenta].titulo_entrada(similar.entradas)}”"
+    )
+    st.button(
+        "🔄 Gerar novamente", key=f"regenerar_btn_{ferramenta}",
+        on_click=pedir_regeneracao, args=(ferramenta,)
+    )
+    return texto
+
+
+def modelo_roteado(ferramenta, prompt, entradas):
+    decisao = FERRAMENTAS[ferramenta].rotear(cliente_llm, entradas or {}, prompt, id_sessao)
+    return cliente_llm.modelo(decisao.modelo)
+
+
+def gerar_resposta(ferramenta, titulo, prompt, mensagem, entradas=None, regenerar=False):
+    # Em segundo plano o clique só enfileira a tarefa; senão a resposta é transmitida na hora
+    inicio = time.time()
+    modelo = modelo_roteado(ferramenta, prompt, entradas)
+    if entradas is not None and not regenerar:
+        texto = exibir_similar(ferramenta, modelo, prompt, entradas)
+        if texto is not None:
+            guardar_resultado(ferramenta, titulo, texto)
+            return texto
+    if st.session_state.get("segundo_plano"):
+        id_tarefa = fila_tarefas.enfileirar(
+            id_sessao, ferramenta, titulo, {"modelo": nome_modelo(modelo), "prompt": prompt}
+        )
+        st.info(f"📨 Tarefa `{id_tarefa}` enfileirada. Acompanhe em \"Minhas Tarefas\", na barra lateral.")
+        return None
+    texto = exibir_stream(ferramenta, modelo, prompt, mensagem, ignorar_cache=regenerar)
+    if texto:
+        guardar_resultado(ferramenta, titulo, texto, inicio)
+    if texto and entradas is not None:
+        indice_similares.adicionar(ferramenta, entradas, chave_cache(modelo.model_name, prompt))
+    return texto
+
+
+def gerar_variantes(ferramenta, prompt, quantidade, mensagem, palavra_chave, entradas, palavras_alvo=None,
+                    regenerar=False):
+    # Variantes lado a lado, pontuadas localmente; as diferenças são marcadas em relação à mais bem pontuada
+    inicio = time.time()
+    modelo = modelo_roteado(ferramenta, prompt, entradas)
+    try:
+        with st.spinner(mensagem):
+            textos = cliente_llm.gerar_variantes(
+                modelo, prompt, quantidade, sessao=id_sessao, ferramenta=ferramenta, ignorar_cache=regenerar
+            )
+    except GoogleAPIError as erro:
+        st.error(f"Não foi possível gerar o conteúdo agora. Tente novamente em instantes. ({erro})")
+        return None
+    variantes = pontuar_variantes(textos, palavra_chave, palavras_alvo)
+    melhor = max(range(len(variantes)), key=lambda indice: variantes[indice].pontuacao)
+    for indice, (coluna, variante) in enumerate(zip(st.columns(len(variantes)), variantes)):
+        with coluna:
+            st.subheader(f"{'⭐ ' if indice == melhor else ''}Variante {indice + 1}")
+            st.metric("Pontuação local", f"{variante.pontuacao}/100")
+            st.caption(
+                f"{variante.palavras} palavras · legibilidade {variante.legibilidade:.0f} "
+                f"({nivel_legibilidade(variante.legibilidade)}) · palavra-chave {variante.cobertura:.0%}"
+            )
+            if indice == melhor:
+                st.markdown(variante.texto)
+            else:
+                st.markdown(marcar_diferencas(variantes[melhor].texto, variante.texto), unsafe_allow_html=True)
+    st.caption("⭐ Maior pontuação local · trechos destacados diferem dela")
+    guardar_resultado(ferramenta, f"{palavra_chave} (melhor de {len(variantes)} variantes)", variantes[melhor].texto, inicio)
+    st.button(
+        "🔄 Gerar novas variantes", key=f"regenerar_btn_{ferramenta}",
+        on_click=pedir_regeneracao, args=(ferramenta,)
+    )
+    return textos
+
+
+def gerar_em_blocos(ferramenta, titulo, entradas, mensagem, unidade="blocos"):
+    # Conteúdo longo (ou um produto por chamada): partes processadas em paralelo e consolidadas,
+    # em vez de um prompt único
+    if st.session_state.get("segundo_plano"):
+        id_tarefa = fila_tarefas.enfileirar(id_sessao, ferramenta, titulo, {"entradas": entradas})
+        st.info(f"📨 Tarefa `{id_tarefa}` enfileirada. Acompanhe em \"Minhas Tarefas\", na barra lateral.")
+        return None
+
+    definicao = FERRAMENTAS[ferramenta]
+    inicio = time.time()
+    progresso = st.progress(0.0, text=mensagem)
+
+    def ao_concluir_bloco(concluidos, total):
+        progresso.progress(concluidos / total, text=f"{mensagem} ({concluidos}/{total} {unidade})")
+
+    try:
+        with st.spinner(mensagem):
+            resultado = definicao.processar_longo(
+                cliente_llm, definicao.modelo_blocos(cliente_llm),
+                ao_concluir_bloco=ao_concluir_bloco, sessao=id_sessao, **entradas
+            )
+    except GoogleAPIError as erro:
+        progresso.empty()
+        st.error(f"Não foi possível gerar o conteúdo agora. Tente novamente em instantes. ({erro})")
+        return None
+    progresso.empty()
+    st.markdown(resultado["texto"])
+    st.caption(f"⏱️ {resultado['blocos']} {unidade} em paralelo · total {resultado['tempo_total']:.1f}s")
+    guardar_resultado(ferramenta, titulo, resultado["texto"], inicio)
+    return resultado["texto"]
+
+
+def exibir_estimativa(ferramenta, entradas):
+    # Custo e tempo esperados antes do clique; a latência vem do histórico da ferramenta quando existe
+    definicao = FERRAMENTAS[ferramenta]
+    if any(campo.obrigatorio and not entradas.get(campo.nome) for campo in definicao.campos):
+        return
+    # Mesma escolha de modelo que o clique faria, sem entrar no registro de decisões
+    decisao = definicao.rotear(cliente_llm, entradas, sessao=id_sessao, registrar=False)
+    estimativa = definicao.estimar(
+        entradas, modelo=cliente_llm.modelo(decisao.modelo),
+        latencia_observada=cliente_llm.metricas.latencia_mediana(ferramenta)
+    )
+    texto = (
+        f"🧮 ≈ {estimativa.tokens_entrada:,} tokens de entrada + ~{estimativa.tokens_saida:,} de saída · "
+        f"US$ {estimativa.custo:.4f} · ~{estimativa.segundos:.1f}s"
+    )
+    if estimativa.comprimida:
+        texto += (
+            f" · entrada reduzida de {estimativa.tokens_originais:,} tokens "
+            f"(orçamento de {definicao.orcamento_tokens:,})"
+        )
+    st.caption(texto)
 
-# CSS personalizado
-st.markdown("""
-<style>
-    /* Estilos para abas principais */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-        flex-wrap: nowrap;
-        padding-bottom: 5px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        padding: 8px 16px;
-        border-radius: 4px 4px 0 0;
-        white-space: nowrap;
-        font-size: 14px;
-        transition: all 0.2s;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #f0f2f6;
-        font-weight: 600;
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #f8f9fa;
-    }
-    
-    /* Estilos para o dropdown de abas secundárias */
-    .secondary-tabs {
-        margin: 0.5rem 0 1rem;
-        display: flex;
-        align-items: center;
-        gap: 8px;
-    }
-    .secondary-tabs select {
-        padding: 6px 12px;
-        border-radius: 4px;
-        border: 1px solid #ddd;
-        background-color: white;
-        cursor: pointer;
-    }
-    .secondary-tabs label {
-        font-weight: 500;
-        color: #555;
-    }
-    
-    /* Melhorias gerais */
-    textarea {
-        min-height: 120px !important;
-    }
-    [data-testid="stMarkdownContainer"] ul {
-        padding-left: 1.5rem;
-    }
-    .stButton button {
-        background-color: #4CAF50;
-        color: white;
-        transition: all 0.3s;
-    }
-    .stButton button:hover {
-        background-color: #45a049;
-    }
-</style>
-""", unsafe_allow_html=True)
 
 # ==============================================
 # NOVO SISTEMA DE ABAS
@@ -405,7 +559,8 @@ window.addEventListener('load', () => {
 # ==============================================
 
 # 1. CONSTRUTOR DE PÁGINAS DE BUSCA (índice 0)
-with tabs[0]:
+@st.fragment
+def construtor_paginas():
     st.header("📝 Construtor de Páginas para Buscas em IA")
     st.write("Crie artigos completos otimizados para serem citados por assistentes como ChatGPT e Gemini")
     
@@ -429,43 +584,154 @@ with tabs[0]:
         )
         reading_level = st.selectbox(
             "Nível de Complexidade",
-            ["Simples (ensino fundamental)", "Intermediário (ensino médio)", "Avançado (superior)", "Técnico (especialistas)"],
+            NIVEIS_LEITURA,
             key="nivel_1"
         )
     
-    if st.button("✨ Gerar Artigo Completo", key="btn_artigo_1"):
+    col1, col2 = st.columns(2)
+    with col1:
+        gerar_em_paralelo = st.checkbox(
+            "⚡ Gerar por seções em paralelo",
+            help="Cria primeiro um esboço das 5 seções e depois escreve todas ao mesmo tempo",
+            key="paralelo_1"
+        )
+    with col2:
+        variantes = st.slider(
+            "Variantes para comparar",
+            1, MAX_VARIANTES, 1,
+            help="Gera versões alternativas numa chamada só e mostra lado a lado, com pontuação local",
+            disabled=gerar_em_paralelo,
+            key="variantes_1"
+        )
+    
+    entradas = {
+        "target_query": target_query,
+        "key_points": key_points,
+        "word_count": word_count,
+        "reading_level": reading_level
+    }
+    contexto = contexto_site(target_query)
+    exibir_estimativa("construtor_paginas", entradas)
+    
+    gerar, regenerar = pedido_geracao("construtor_paginas", st.button("✨ Gerar Artigo Completo", key="btn_artigo_1"))
+    
+    if gerar:
         if not target_query or not key_points:
             st.warning("Preencha todos os campos obrigatórios (*)")
+        elif gerar_em_paralelo:
+            areas_secoes = [st.empty() for _ in SECOES_ARTIGO]
+            for area, (titulo, _, _) in zip(areas_secoes, SECOES_ARTIGO):
+                area.caption(f"⏳ {titulo}...")
+            
+            inicio = time.time()
+            try:
+                with st.spinner('Montando esboço e escrevendo seções em paralelo...'):
+                    resultado = gerar_artigo_paralelo(
+                        cliente_llm, modelo_texto, target_query, key_points, word_count, reading_level,
+                        ao_concluir_secao=lambda indice, texto: areas_secoes[indice].markdown(texto),
+                        sessao=id_sessao, contexto_site=contexto
+                    )
+            except GoogleAPIError as erro:
+                st.error(f"Não foi possível gerar o conteúdo agora. Tente novamente em instantes. ({erro})")
+            else:
+                st.caption(
+                    f"⏱️ Esboço em {resultado['tempo_esboco']:.1f}s · total {resultado['tempo_total']:.1f}s "
+                    f"(seções somariam {sum(resultado['duracoes_secoes']):.1f}s em sequência)"
+                )
+                guardar_resultado("construtor_paginas", target_query, resultado["texto"], inicio)
+                st.success("✅ Artigo gerado com otimização para citação em IA!")
+        elif variantes > 1:
+            prompt = FERRAMENTAS["construtor_paginas"].prompt(**entradas, contexto_site=contexto)
+            gerar_variantes(
+                "construtor_paginas", prompt, variantes, 'Gerando variantes do artigo...',
+                target_query, entradas, palavras_alvo=word_count, regenerar=regenerar
+            )
         else:
-            with st.spinner('Otimizando conteúdo para mecanismos de IA...'):
-                prompt = f"""
-                Você é um redator especialista em SEO para IA. Crie um artigo completo que será citado como fonte por assistentes de IA.
-
-                **Consulta do Usuário:** {target_query}
-                **Destaques Principais:** {key_points}
-                **Tamanho:** {word_count} palavras
-                **Nível:** {reading_level}
-
-                **Estrutura Requerida:**
-                1. Resumo executivo (máximo 45 palavras)
-                2. Introdução (contextualize o problema)
-                3. Análise detalhada (com dados e exemplos)
-                4. Soluções práticas (passo a passo)
-                5. Conclusão (recapitulação + próximos passos)
-
-                **Formato:**
-                - Use markdown
-                - Títulos claros (##, ###)
-                - Listas e tabelas quando apropriado
-                - Linguagem natural e técnica balanceada
-                """
-                
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            prompt = FERRAMENTAS["construtor_paginas"].prompt(**entradas, contexto_site=contexto)
+            if gerar_resposta("construtor_paginas", target_query, prompt, 'Otimizando conteúdo para mecanismos de IA...', entradas, regenerar=regenerar):
                 st.success("✅ Artigo gerado com otimização para citação em IA!")
+    exibir_resultados("construtor_paginas")
+
+    # Modo em lote: uma planilha de consultas vira um zip de artigos
+    with st.expander("📦 Modo em Lote (CSV/XLSX)", expanded=False):
+        st.write("Envie uma planilha com as colunas `consulta`, `pontos_chave`, `palavras` e `nivel` (uma linha por artigo)")
+        planilha = st.file_uploader(
+            "Planilha de consultas*",
+            type=["csv", "xlsx"],
+            key="planilha_lote_1"
+        )
+        nome_lote = st.text_input(
+            "Nome do lote",
+            placeholder="Ex: artigos-março (padrão: nome do arquivo)",
+            help="Reenviar a planilha com o mesmo nome de lote retoma o lote: só as linhas novas ou alteradas são geradas",
+            key="nome_lote_1"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            concorrencia_lote = st.slider("Gerações simultâneas", 1, 16, 4, key="concorrencia_lote_1")
+        with col2:
+            tentativas_lote = st.slider("Tentativas por linha", 1, 5, 3, key="tentativas_lote_1")
+        
+        if st.button("📦 Processar Lote", key="btn_lote_1"):
+            if planilha is None:
+                st.warning("Carregue uma planilha de consultas")
+            else:
+                conteudo_planilha = planilha.getvalue()
+                try:
+                    linhas_lote = ler_planilha(planilha.name, conteudo_planilha)
+                except ValueError as erro:
+                    st.error(str(erro))
+                    linhas_lote = []
+                
+                if linhas_lote:
+                    # O diretório é o do nome do lote; cada linha pronta é reconhecida pelo próprio conteúdo
+                    nome = nome_lote.strip() or os.path.splitext(planilha.name)[0]
+                    execucao = ExecucaoLote(os.path.join("lotes", id_lote(nome)))
+                    progresso = st.progress(0.0, text=f"0 de {len(linhas_lote)} linhas")
+                    tabela_status = st.empty()
+                    status_linhas = [
+                        {"linha": i + 1, "consulta": linha["consulta"], "status": "pendente", "segundos": None}
+                        for i, linha in enumerate(linhas_lote)
+                    ]
+                    
+                    def atualizar_linha(indice, registro):
+                        status_linhas[indice].update(status=registro["status"], segundos=registro["segundos"])
+                        prontas = sum(linha["status"] != "pendente" for linha in status_linhas)
+                        progresso.progress(prontas / len(status_linhas), text=f"{prontas} de {len(status_linhas)} linhas")
+                        tabela_status.dataframe(status_linhas, hide_index=True)
+                    
+                    tabela_status.dataframe(status_linhas, hide_index=True)
+                    registros = executar_lote(
+                        cliente_llm, modelo_texto, linhas_lote, execucao,
+                        concorrencia=concorrencia_lote,
+                        tentativas=tentativas_lote,
+                        ao_atualizar=atualizar_linha,
+                        sessao=id_sessao
+                    )
+                    # Guardado na sessão para o download sobreviver ao rerun do clique
+                    st.session_state["zip_lote_1"] = montar_zip(linhas_lote, registros, execucao)
+                    falhas = sum(registro["status"] == "falhou" for registro in registros)
+                    if falhas:
+                        st.warning(f"{falhas} linha(s) falharam. Processe o lote de novo para tentar apenas essas.")
+                    else:
+                        st.success("✅ Lote concluído!")
+        
+        if "zip_lote_1" in st.session_state:
+            st.download_button(
+                "📥 Baixar Artigos (.zip)",
+                st.session_state["zip_lote_1"],
+                file_name="artigos_lote.zip",
+                mime="application/zip",
+                key="download_lote_1"
+            )
+
+
+with tabs[0]:
+    construtor_paginas()
 
 # 2. EXPANSOR DE TÓPICOS (índice 1)
-with tabs[1]:
+@st.fragment
+def expansor_topicos():
     st.header("🧠 Gerador de Ideias para Conteúdo")
     st.write("Descubra subtópicos e perguntas que seu público pesquisa em assistentes de IA")
     
@@ -480,38 +746,32 @@ with tabs[1]:
         key="publico_2"
     )
     
-    if st.button("🧩 Gerar Ideias de Conteúdo", key="btn_ideias_2"):
+    entradas = {
+        "main_topic": main_topic,
+        "audience": audience
+    }
+    exibir_estimativa("expansor_topicos", entradas)
+    
+    gerar, regenerar = pedido_geracao("expansor_topicos", st.button("🧩 Gerar Ideias de Conteúdo", key="btn_ideias_2"))
+    
+    if gerar:
         if not main_topic or not audience:
             st.warning("Preencha todos os campos obrigatórios (*)")
         else:
-            with st.spinner('Analisando tendências de busca em IA...'):
-                prompt = f"""
-                Atue como um estrategista de conteúdo para IA. Para o tema "{main_topic}", gere:
-
-                1. 10 perguntas frequentes que o público "{audience}" faz em assistentes
-                2. 5 ângulos inovadores para abordar o tema
-                3. 3 formatos de conteúdo com alto potencial de compartilhamento
-
-                Para cada item, inclua:
-                - Termos exatos de busca
-                - Potencial de trafego (baixo/médio/alto)
-                - Exemplo de resposta resumida (30 palavras)
-
-                Apresente em tabela markdown com colunas:
-                | Tipo | Termo de Busca | Potencial | Resumo Exemplo |
-                |------|----------------|-----------|----------------|
-                """
+            prompt = FERRAMENTAS["expansor_topicos"].prompt(**entradas)
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
-                st.download_button(
-                    "📥 Baixar Tabela Completa",
-                    response.text,
-                    file_name=f"ideias_conteudo_{main_topic[:20]}.md"
-                )
+            gerar_resposta("expansor_topicos", main_topic, prompt, 'Analisando tendências de busca em IA...', entradas, regenerar=regenerar)
+    
+    # O download também é um rerun: a tabela continua na tela porque vem dos resultados guardados
+    exibir_resultados("expansor_topicos", nome_arquivo=lambda resultado: f"ideias_conteudo_{resultado.titulo[:20]}.md")
+
+
+with tabs[1]:
+    expansor_topicos()
 
 # 3. ANALISADOR DE RESULTADOS (índice 2)
-with tabs[2]:
+@st.fragment
+def analisador_resultados():
     st.header("🔍 Engenharia Reversa de Respostas de IA")
     st.write("Analise respostas de assistentes e aprenda a estruturar seu conteúdo para ser citado")
     
@@ -522,38 +782,30 @@ with tabs[2]:
         key="resposta_3"
     )
     
-    if st.button("🔬 Analisar Estrutura da Resposta", key="btn_analise_3"):
+    entradas = {
+        "example_response": example_response
+    }
+    exibir_estimativa("analisador_resultados", entradas)
+    
+    gerar, regenerar = pedido_geracao("analisador_resultados", st.button("🔬 Analisar Estrutura da Resposta", key="btn_analise_3"))
+    
+    if gerar:
         if not example_response:
             st.warning("Cole uma resposta para análise")
         else:
-            with st.spinner('Decifrando padrões de citação em IA...'):
-                prompt = f"""
-                Faça uma análise detalhada desta resposta de IA:
-
-                **Resposta para Análise:**
-                {example_response}
-
-                **Itens a Avaliar:**
-                1. Estrutura da informação (hierarquia)
-                2. Tom de voz e estilo
-                3. Elementos mais citáveis
-                4. Palavras-chave estratégicas
-                5. Formatação que facilita a citação
-
-                **Saída Esperada:**
-                - Lista de pontos fortes
-                - Sugestões de melhoria
-                - Modelo para replicar o sucesso
-                - Exemplo de conteúdo otimizado
-
-                Use markdown com destaques em **negrito** para insights.
-                """
+            prompt = FERRAMENTAS["analisador_resultados"].prompt(**entradas)
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            gerar_resposta("analisador_resultados", example_response[:60], prompt, 'Decifrando padrões de citação em IA...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("analisador_resultados")
+
+
+with tabs[2]:
+    analisador_resultados()
 
 # 4. REESCRITOR DE CONTEÚDO (índice 3)
-with tabs[3]:
+@st.fragment
+def reescritor_conteudo():
     st.header("✍️ Otimizador de Conteúdo Existente")
     st.write("Transforme artigos comuns em conteúdo perfeito para citação em IA")
     
@@ -569,39 +821,50 @@ with tabs[3]:
         key="query_4"
     )
     
-    if st.button("⚡ Otimizar para IA", key="btn_otimizar_4"):
+    entradas = {"original_content": original_content, "target_query": target_query}
+    contexto = contexto_site(target_query)
+    exibir_estimativa("reescritor_conteudo", entradas)
+    
+    gerar, regenerar = pedido_geracao("reescritor_conteudo", st.button("⚡ Otimizar para IA", key="btn_otimizar_4"))
+    
+    if gerar:
         if not original_content or not target_query:
             st.warning("Preencha todos os campos obrigatórios")
         else:
-            with st.spinner('Reescrevendo para maximizar citações...'):
-                prompt = f"""
-                Transforme este conteúdo para ser perfeito para citação em IA:
-
-                **Consulta Alvo:** {target_query}
-                **Conteúdo Original:**
-                {original_content}
-
-                **Instruções:**
-                1. Comece com TLDR de 40 palavras
-                2. Reescreva mantendo informações-chave
-                3. Adicione estruturação clara (H2, H3)
-                4. Insere exemplos práticos
-                5. Inclua dados quando possível
-                6. Finalize com ações concretas
-
-                **Formato:**
-                - Markdown rigoroso
-                - Parágrafos curtos (máx. 3 linhas)
-                - Listas numeradas/bullets
-                - Destaques para citações
-                """
-                
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            # Compressão primeiro: o que voltar a caber no orçamento vai num prompt único
+            entradas = FERRAMENTAS["reescritor_conteudo"].ajustar(entradas)
+            if FERRAMENTAS["reescritor_conteudo"].em_blocos(entradas):
+                gerado = gerar_em_blocos("reescritor_conteudo", target_query, entradas, 'Reescrevendo para maximizar citações...')
+            else:
+                prompt = FERRAMENTAS["reescritor_conteudo"].prompt(**entradas, contexto_site=contexto)
+                gerado = gerar_resposta("reescritor_conteudo", target_query, prompt, 'Reescrevendo para maximizar citações...', entradas, regenerar=regenerar)
+            if gerado:
                 st.toast('Conteúdo otimizado com sucesso!', icon='🎯')
+    
+    exibir_resultados("reescritor_conteudo")
+
+
+with tabs[3]:
+    reescritor_conteudo()
 
 # 5. VALIDADOR DE CONTEÚDO (índice 4)
-with tabs[4]:
+def exibir_scorecard(analise):
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Pontuação técnica", f"{analise.pontuacao}/100")
+    col2.metric("Legibilidade (Flesch-PT)", f"{analise.legibilidade:.0f}", nivel_legibilidade(analise.legibilidade), delta_color="off")
+    col3.metric("Palavras", analise.palavras)
+    st.markdown("\n".join(
+        f"- {ICONES_VERIFICACAO[v.status]} **{v.nome}:** {v.valor}" + (f" · _{v.dica}_" if v.status != OK else "")
+        for v in analise.verificacoes
+    ))
+
+
+# Linhas da tabela de páginas sinalizadas na auditoria (o JSONL baixado traz todas)
+SINALIZADAS_EXIBIDAS = 500
+
+
+@st.fragment
+def validador_seo():
     st.header("✅ Analisador de Qualidade SEO/IA")
     st.write("Verifique se seu conteúdo está pronto para rankear em assistentes virtuais")
     
@@ -626,42 +889,135 @@ with tabs[4]:
             key="tipo_5"
         )
     
-    if st.button("🔍 Analisar Conteúdo", key="btn_analisar_5"):
+    verificacao_rapida = st.checkbox(
+        "⚡ Verificação rápida (só métricas locais, sem IA)",
+        help="Mede legibilidade, títulos, parágrafos, densidade da palavra-chave e resposta para snippet na hora, sem chamar o modelo",
+        key="rapida_5"
+    )
+    
+    entradas = {
+        "content_to_check": content_to_check,
+        "main_keyword": main_keyword,
+        "content_type": content_type
+    }
+    if not verificacao_rapida:
+        exibir_estimativa("validador_seo", entradas)
+    
+    gerar, regenerar = pedido_geracao("validador_seo", st.button("🔍 Analisar Conteúdo", key="btn_analisar_5"))
+    
+    if gerar:
         if not content_to_check:
             st.warning("Insira o conteúdo para análise")
         else:
-            with st.spinner('Avaliando 12 fatores de otimização...'):
-                prompt = f"""
-                Atue como auditor de conteúdo para IA. Analise este material:
-
-                **Conteúdo:**
-                {content_to_check}
-
-                **Parâmetros:**
-                - Palavra-chave: {main_keyword or 'Não especificada'}
-                - Tipo: {content_type}
-                
-                **Checklist de Análise:**
-                1. Clareza da resposta principal
-                2. Estrutura para citação
-                3. Densidade de informações
-                4. Autoridade e fontes
-                5. Elementos visuais sugeridos
-                6. Otimização técnica
-                7. Tom e engajamento
-                8. Potencial de snippet
+            # Métricas locais primeiro: aparecem na hora e entram no prompt como fatos
+            analise = analisar_conteudo(content_to_check, main_keyword)
+            exibir_scorecard(analise)
+            if not verificacao_rapida:
+                titulo = main_keyword or content_to_check[:60]
+                entradas = FERRAMENTAS["validador_seo"].ajustar(entradas)
+                if FERRAMENTAS["validador_seo"].em_blocos(entradas):
+                    gerar_em_blocos("validador_seo", titulo, entradas, 'Avaliando 12 fatores de otimização...')
+                else:
+                    prompt = FERRAMENTAS["validador_seo"].prompt(**entradas, fatos=analise.fatos())
+                    gerar_resposta("validador_seo", titulo, prompt, 'Avaliando 12 fatores de otimização...', entradas, regenerar=regenerar)
+    exibir_resultados("validador_seo")
+    
+    # Auditoria do site inteiro: verificações locais em todas as páginas, IA só nas sinalizadas
+    with st.expander("🌐 Auditoria do Site", expanded=False):
+        st.write("Informe o sitemap ou uma lista de URLs. Todas as páginas passam por verificações locais "
+                 "(title, meta description, H1, conteúdo raso, títulos duplicados e alt das imagens); "
+                 "só as sinalizadas vão para a análise com IA.")
+        sitemap_auditoria = st.text_input(
+            "URL do sitemap",
+            placeholder="https://www.exemplo.com.br/sitemap.xml",
+            key="sitemap_auditoria_5"
+        )
+        urls_auditoria = st.text_area(
+            "Ou cole as URLs (uma por linha)",
+            height=120,
+            key="urls_auditoria_5"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            concorrencia_auditoria = st.slider("Downloads simultâneos", 1, 50, 20, key="concorrencia_auditoria_5")
+        with col2:
+            auditoria_com_ia = st.checkbox(
+                "Analisar páginas sinalizadas com IA",
+                value=True,
+                help="Desmarcado, só as verificações locais rodam (sem custo de modelo)",
+                key="ia_auditoria_5"
+            )
+        
+        if st.button("🌐 Auditar Site", key="btn_auditoria_5"):
+            try:
+                urls = urls_sitemap(sitemap_auditoria) if sitemap_auditoria else list(ler_urls(urls_auditoria))
+            except (requests.RequestException, ValueError) as erro:
+                st.error(f"Não foi possível ler o sitemap. ({erro})")
+                urls = None
+            if urls is not None and not urls:
+                st.warning("Informe um sitemap ou ao menos uma URL")
+            elif urls:
+                # Uma pasta por domínio: a próxima auditoria pula as páginas que não mudaram
+                dominio = urlparse(urls[0]).netloc.lower()
+                diretorio = os.path.join("auditorias", re.sub(r"[^\w.-]+", "_", dominio))
+                progresso = st.progress(0.0, text=f"0 de {len(urls)} páginas")
+                resumo = st.empty()
                 
-                **Saída:**
-                - Pontuação de 0-100
-                - 3 melhorias urgentes
-                - Sugestões concretas
-                - Exemplo de trecho otimizado
-                """
+                def atualizar_auditoria(registro, contagem):
+                    feitas = contagem[OK_AUDITORIA] + contagem[SINALIZADA] + contagem[ERRO_AUDITORIA]
+                    if feitas % 25 and feitas != len(urls):
+                        return
+                    progresso.progress(feitas / len(urls), text=f"{feitas} de {len(urls)} páginas")
+                    resumo.caption(
+                        f"{contagem[SINALIZADA]} sinalizadas · {contagem[ERRO_AUDITORIA]} com erro · "
+                        f"{contagem['inalteradas']} sem mudanças desde a última auditoria"
+                    )
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+                contagem = auditar(
+                    urls, diretorio,
+                    cliente=cliente_llm if auditoria_com_ia else None,
+                    concorrencia=concorrencia_auditoria,
+                    tipo_conteudo=content_type,
+                    ao_atualizar=atualizar_auditoria,
+                    sessao=id_sessao
+                )
+                progresso.empty()
+                st.session_state["auditoria_5"] = diretorio
+                st.success(
+                    f"✅ {len(urls)} páginas auditadas: {contagem.get(SINALIZADA, 0)} sinalizadas, "
+                    f"{contagem.get(ERRO_AUDITORIA, 0)} com erro"
+                )
+        
+        if "auditoria_5" in st.session_state:
+            caminho_resultados = os.path.join(st.session_state["auditoria_5"], "resultados.jsonl")
+            sinalizadas = []
+            with open(caminho_resultados, encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    registro = json.loads(linha)
+                    if registro["status"] != OK_AUDITORIA and len(sinalizadas) < SINALIZADAS_EXIBIDAS:
+                        sinalizadas.append({
+                            "url": registro["url"],
+                            "status": registro["status"],
+                            "problemas": "; ".join(registro["problemas"]) or registro.get("erro"),
+                        })
+            if sinalizadas:
+                st.dataframe(sinalizadas, hide_index=True, use_container_width=True)
+                st.caption(f"Até {SINALIZADAS_EXIBIDAS} páginas listadas · o arquivo completo traz as análises da IA")
+            with open(caminho_resultados, "rb") as arquivo:
+                st.download_button(
+                    "📥 Baixar Resultados (.jsonl)",
+                    arquivo,
+                    file_name="auditoria.jsonl",
+                    mime="application/jsonl",
+                    key="download_auditoria_5"
+                )
 
-with tabs[5]:
+
+with tabs[4]:
+    validador_seo()
+
+@st.fragment
+def otimizador_visual():
     st.header("🖼️ Otimizador Visual de SEO")
     st.write("Envie um print de tela do seu site e receba recomendações de melhorias de SEO")
     
@@ -683,79 +1039,87 @@ with tabs[5]:
         key="tipo_visual"
     )
     
+    # A coleta da URL começa assim que ela é digitada, enquanto o print ainda está sendo escolhido
+    coleta = obter_coletor().iniciar(page_url) if page_url.startswith(("http://", "https://")) else None
+    
     if st.button("🔎 Analisar Visualmente", key="btn_analise_visual"):
         if uploaded_file is None:
             st.warning("Por favor, carregue um print de tela")
         else:
-            with st.spinner('Analisando elementos visuais para SEO...'):
-                # Salvar a imagem temporariamente
-                with open("temp_upload.png", "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                
-                # Usar a API Gemini para análise de imagem
-                modelo_visao = genai.GenerativeModel("gemini-1.5-pro")
-                
-                prompt = f"""
-                Você é um especialista em SEO técnico e UX. Analise esta captura de tela de site e forneça recomendações detalhadas de otimização.
-
-                **Contexto:**
-                - Tipo de página: {page_type}
-                - URL: {page_url or 'Não fornecida'}
-                
-                **Itens para Avaliar:**
-                1. Estrutura visual e hierarquia de informações
-                2. Elementos de SEO on-page visíveis (títulos, headings)
-                3. Layout e espaçamento para leitura
-                4. Chamadas para ação visíveis
-                5. Elementos de confiança (selos, depoimentos)
-                6. Problemas de usabilidade aparentes
-                7. Oportunidades para rich snippets
-                8. Velocidade de carregamento (indicadores visuais)
-                
-                **Formato da Resposta:**
-                - Lista priorizada de problemas
-                - Recomendações específicas para cada um
-                - Exemplos visuais de melhorias
-                - Estimativa de impacto (baixo/médio/alto)
-                
-                **Saída:**
-                Use markdown com destaques e emojis para categorizar:
-                🔥 Problema crítico
-                ⚡ Oportunidade rápida
-                🛠️ Melhoria técnica
-                ✨ Sugestão avançada
-                """
-                
-                # Enviar a imagem e o prompt para análise
-                response = modelo_visao.generate_content([prompt, "temp_upload.png"])
-                
+            # Imagem tratada só em memória: reduzida, recodificada e dividida se for muito alta
+            try:
+                partes_imagem = preparar_imagem(uploaded_file.getvalue())
+            except (OSError, Image.DecompressionBombError):
+                # Arquivo que não é imagem (UnidentifiedImageError), truncado ou grande demais
+                st.error("Não foi possível ler a imagem enviada. Envie um print em PNG ou JPG.")
+                partes_imagem = None
+            
+            if partes_imagem is not None:
+                fatos_pagina = ""
+                if coleta is not None:
+                    try:
+                        with st.spinner("Lendo o HTML da página..."):
+                            resultado_coleta = coleta.result()
+                    except (aiohttp.ClientError, TimeoutError, ValueError) as erro:
+                        st.caption(f"⚠️ Não foi possível ler a página ({erro or type(erro).__name__}); a análise usa só a imagem")
+                    else:
+                        fatos_pagina = resultado_coleta.fatos.resumo()
+                        with st.expander(
+                            f"📄 Dados do HTML ({resultado_coleta.origem} · {resultado_coleta.segundos:.2f}s)"
+                        ):
+                            st.markdown(fatos_pagina)
+            
+                # Modelo multimodal escolhido pelo roteador (a ferramenta prefere o robusto; o SLO pode trocar)
+                modelo_visao = modelo_roteado(
+                    "otimizador_visual",
+                    [prompt_analise_visual(page_type, page_url, fatos_pagina), *partes_imagem],
+                    {"page_type": page_type, "page_url": page_url}
+                )
+            
                 # Exibir resultados
                 st.image(uploaded_file, caption="Screenshot analisado", width=600)
-                st.markdown("### 🔍 Análise de SEO Visual")
-                st.markdown(response.text)
-                
-                # Adicionar seção de recomendações práticas
-                st.markdown("### 🛠️ Plano de Ação")
-                
-                prompt_plano = """
-                Com base na análise anterior, crie um plano de ação passo-a-passo para implementar as melhorias, incluindo:
-                
-                1. Priorização (o que fazer primeiro)
-                2. Recursos necessários (time, ferramentas)
-                3. Tempo estimado por tarefa
-                4. Métricas para acompanhamento
-                
-                Formate como lista markdown numerada com prazos e responsáveis.
-                """
-                
-                plano_resposta = modelo_texto.generate_content(prompt_plano)
-                st.markdown(plano_resposta.text)
-                
-                # Limpar arquivo temporário
-                os.remove("temp_upload.png")
-                st.success("Análise concluída! Consulte as recomendações abaixo.")
+                col_analise, col_plano = st.columns(2)
+                with col_analise:
+                    st.markdown("### 🔍 Análise de SEO Visual")
+                    area_analise = st.empty()
+                with col_plano:
+                    # Adicionar seção de recomendações práticas
+                    st.markdown("### 🛠️ Plano de Ação")
+                    area_plano = st.empty()
+                    area_plano.caption("⏳ O plano começa assim que o resumo dos problemas estiver pronto")
+                areas = {"analise": area_analise, "plano": area_plano}
+            
+                # Análise e plano em pipeline: o plano parte do resumo dos problemas enquanto o detalhamento ainda chega
+                textos = {}
+                inicio = time.time()
+                try:
+                    with st.spinner('Analisando elementos visuais para SEO...'):
+                        for estagio, texto in pipeline_visual(
+                            cliente_llm, modelo_visao, modelo_texto, partes_imagem, page_type, page_url, sessao=id_sessao,
+                            fatos_pagina=fatos_pagina
+                        ):
+                            areas[estagio].markdown(texto)
+                            textos[estagio] = texto
+                except GoogleAPIError as erro:
+                    st.error(f"Não foi possível gerar o conteúdo agora. Tente novamente em instantes. ({erro})")
+                else:
+                    guardar_resultado(
+                        "otimizador_visual", page_url or page_type,
+                        f"### 🔍 Análise de SEO Visual\n\n{textos.get('analise', '')}\n\n"
+                        f"### 🛠️ Plano de Ação\n\n{textos.get('plano', '')}",
+                        inicio, artefatos={uploaded_file.name: uploaded_file.getvalue()}
+                    )
+                    st.success("Análise concluída! Consulte as recomendações abaixo.")
+    
+    exibir_resultados("otimizador_visual")
+
+
+with tabs[5]:
+    otimizador_visual()
+
 # 6. COMPARADOR DE PRODUTOS (índice 5 - agora no dropdown)
-with st.expander("🆚 Comparador de Produtos", expanded=False):
+@st.fragment
+def comparador_produtos():
     st.header("🆚 Gerador de Comparações Técnicas")
     st.write("Crie comparações detalhadas que aparecem como respostas em buscas")
     
@@ -782,41 +1146,35 @@ with st.expander("🆚 Comparador de Produtos", expanded=False):
         key="aspectos_6"
     )
     
-    if st.button("📊 Gerar Comparação Detalhada", key="btn_comparacao_6"):
+    entradas = {
+        "product_a": product_a,
+        "product_b": product_b,
+        "concorrente": concorrente,
+        "comparison_aspects": comparison_aspects
+    }
+    exibir_estimativa("comparador_produtos", entradas)
+    
+    gerar, regenerar = pedido_geracao("comparador_produtos", st.button("📊 Gerar Comparação Detalhada", key="btn_comparacao_6"))
+    
+    if gerar:
         if not product_a or not product_b:
             st.warning("Preencha os produtos para comparação")
+        elif FERRAMENTAS["comparador_produtos"].em_blocos(entradas):
+            gerar_em_blocos("comparador_produtos", f"{product_a} vs {product_b}", entradas, 'Criando análise comparativa...', "produtos")
         else:
-            with st.spinner('Criando análise comparativa...'):
-                prompt = f"""
-                Crie uma comparação detalhada entre:
-                #SERVIÇO DO USUÁRIO#
-                - {product_a}
-                #CONCORRENTE#
-                - {concorrente}
-                #Produto/serviço do concorrente#
-                - {product_b}
-                
-                **Critérios:** {comparison_aspects or 'Use os padrões do mercado'}
+            prompt = FERRAMENTAS["comparador_produtos"].prompt(**entradas)
                 
-                **Estrutura:**
-                1. Visão geral (50 palavras)
-                2. Tabela comparativa (recursos, preços, etc.)
-                3. Vantagens de cada um
-                4. Casos de uso ideais
-                5. Verdict final (quando escolher cada)
-                
-                **Formato:**
-                - Markdown com tabelas
-                - Linguagem imparcial
-                - Dados concretos quando possível
-                - Destaque para diferenciais
-                """
-                
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            gerar_resposta("comparador_produtos", f"{product_a} vs {product_b}", prompt, 'Criando análise comparativa...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("comparador_produtos")
+
+
+with st.expander("🆚 Comparador de Produtos", expanded=False):
+    comparador_produtos()
 
 # 7. GUIA DO COMPRADOR (índice 6 - agora no dropdown)
-with st.expander("🛒 Guia do Comprador", expanded=False):
+@st.fragment
+def guia_comprador():
     st.header("🛒 Criador de Guias de Compra")
     st.write("Produza guias completos que respondem a consultas do tipo 'melhor X para Y'")
     
@@ -836,36 +1194,34 @@ with st.expander("🛒 Guia do Comprador", expanded=False):
         key="produtos_7"
     )
     
-    if st.button("📋 Gerar Guia Completo", key="btn_guia_7"):
+    entradas = {
+        "product_category": product_category,
+        "buyer_profile": buyer_profile,
+        "top_products": top_products
+    }
+    exibir_estimativa("guia_comprador", entradas)
+    
+    gerar, regenerar = pedido_geracao("guia_comprador", st.button("📋 Gerar Guia Completo", key="btn_guia_7"))
+    
+    if gerar:
         if not product_category or not buyer_profile:
             st.warning("Preencha categoria e perfil do comprador")
+        elif FERRAMENTAS["guia_comprador"].em_blocos(entradas):
+            gerar_em_blocos("guia_comprador", product_category, entradas, 'Elaborando guia especializado...', "produtos")
         else:
-            with st.spinner('Elaborando guia especializado...'):
-                prompt = f"""
-                Crie um guia de compra para {product_category} direcionado a {buyer_profile}.
-
-                **Produtos Analisados:**
-                {top_products or 'Inclua os principais do mercado'}
-
-                **Seções Obrigatórias:**
-                1. Introdução (contextualize a necessidade)
-                2. Critérios de avaliação (o que considerar)
-                3. Análise individual de cada opção
-                4. Tabela comparativa
-                5. Recomendações por cenário
-                6. Onde comprar/melhores ofertas
-
-                **Tom:**
-                - Informativo mas acessível
-                - Comparativo justo
-                - Destaque para soluções ideais
-                """
+            prompt = FERRAMENTAS["guia_comprador"].prompt(**entradas)
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            gerar_resposta("guia_comprador", product_category, prompt, 'Elaborando guia especializado...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("guia_comprador")
+
+
+with st.expander("🛒 Guia do Comprador", expanded=False):
+    guia_comprador()
 
 # 8. EXPLICADOR DE RECURSOS (índice 7 - agora no dropdown)
-with st.expander("⚙️ Explicador de Recursos", expanded=False):
+@st.fragment
+def explicador_recursos():
     st.header("⚙️ Documentador de Funcionalidades")
     st.write("Crie explicações técnicas que aparecem como respostas diretas em buscas")
     
@@ -885,36 +1241,32 @@ with st.expander("⚙️ Explicador de Recursos", expanded=False):
         key="casos_8"
     )
     
-    if st.button("📚 Gerar Explicação Técnica", key="btn_explicacao_8"):
+    entradas = {
+        "feature_name": feature_name,
+        "product_context": product_context,
+        "use_cases": use_cases
+    }
+    exibir_estimativa("explicador_recursos", entradas)
+    
+    gerar, regenerar = pedido_geracao("explicador_recursos", st.button("📚 Gerar Explicação Técnica", key="btn_explicacao_8"))
+    
+    if gerar:
         if not feature_name:
             st.warning("Descreva o recurso a ser documentado")
         else:
-            with st.spinner('Criando documentação otimizada...'):
-                prompt = f"""
-                Crie uma explicação completa sobre: {feature_name} {product_context or ''}
-
-                **Casos de Uso:** {use_cases or 'Descreva os principais'}
-
-                **Estrutura:**
-                1. Definição simples (1 frase)
-                2. Funcionamento técnico (nível adequado)
-                3. Benefícios concretos
-                4. Exemplo prático
-                5. Como acessar/configurar
-                6. Perguntas frequentes
-
-                **Formato:**
-                - Markdown com headers
-                - Screenshots sugeridos [INSERIR IMAGEM]
-                - Notas técnicas em blocos de código
-                - Links para aprofundamento
-                """
+            prompt = FERRAMENTAS["explicador_recursos"].prompt(**entradas)
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            gerar_resposta("explicador_recursos", feature_name, prompt, 'Criando documentação otimizada...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("explicador_recursos")
+
+
+with st.expander("⚙️ Explicador de Recursos", expanded=False):
+    explicador_recursos()
 
 # 9. DESMISTIFICADOR (índice 8 - agora no dropdown)
-with st.expander("❌ Desmistificador de Conceitos", expanded=False):
+@st.fragment
+def desmistificador():
     st.header("❌ Desmistificador de Conceitos")
     st.write("Responda a mitos e equívocos comuns no seu nicho")
     
@@ -934,35 +1286,32 @@ with st.expander("❌ Desmistificador de Conceitos", expanded=False):
         key="provas_9"
     )
     
-    if st.button("🔎 Gerar Resposta Completa", key="btn_resposta_9"):
+    entradas = {
+        "myth": myth,
+        "truth": truth,
+        "evidence": evidence
+    }
+    exibir_estimativa("desmistificador", entradas)
+    
+    gerar, regenerar = pedido_geracao("desmistificador", st.button("🔎 Gerar Resposta Completa", key="btn_resposta_9"))
+    
+    if gerar:
         if not myth or not truth:
             st.warning("Preencha o mito e a verdade correspondente")
         else:
-            with st.spinner('Construindo argumentação sólida...'):
-                prompt = f"""
-                Desconstrua este mito: "{myth}"
-
-                **Verdade:** {truth}
-                **Evidências:** {evidence or 'Inclua dados relevantes'}
-
-                **Estrutura:**
-                1. Origem do mito (por que existe)
-                2. Fatos concretos (com provas)
-                3. Exemplo real/analogia
-                4. Implicações de acreditar no mito
-                5. Como aplicar a verdade na prática
-
-                **Tom:**
-                - Educativo, não confrontativo
-                - Baseado em dados
-                - Chamada para ação positiva
-                """
+            prompt = FERRAMENTAS["desmistificador"].prompt(**entradas)
                 
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            gerar_resposta("desmistificador", myth, prompt, 'Construindo argumentação sólida...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("desmistificador")
+
+
+with st.expander("❌ Desmistificador de Conceitos", expanded=False):
+    desmistificador()
 
 # 10. GERADOR DE FAQ (índice 9 - agora no dropdown)
-with st.expander("❓ Gerador de Perguntas Frequentes", expanded=False):
+@st.fragment
+def gerador_faq():
     st.header("❓ Criador de Perguntas Frequentes")
     st.write("Desenvolva respostas completas para dúvidas comuns do seu público")
     
@@ -982,32 +1331,215 @@ with st.expander("❓ Gerador de Perguntas Frequentes", expanded=False):
         help="Quantos passos a resposta deve incluir?",
         key="passos_10"
     )
+    variantes = st.slider(
+        "Variantes para comparar",
+        1, MAX_VARIANTES, 1,
+        help="Gera versões alternativas da resposta numa chamada só e mostra lado a lado, com pontuação local",
+        key="variantes_10"
+    )
     
-    if st.button("📝 Gerar Resposta Ideal", key="btn_faq_10"):
+    entradas = {
+        "faq_question": faq_question,
+        "technical_level": technical_level,
+        "steps_needed": steps_needed
+    }
+    exibir_estimativa("gerador_faq", entradas)
+    
+    gerar, regenerar = pedido_geracao("gerador_faq", st.button("📝 Gerar Resposta Ideal", key="btn_faq_10"))
+    
+    if gerar:
         if not faq_question:
             st.warning("Digite a pergunta a ser respondida")
         else:
-            with st.spinner('Elaborando resposta perfeita...'):
-                prompt = f"""
-                Crie uma resposta completa para esta pergunta:
-                "{faq_question}"
-
-                **Nível Técnico:** {technical_level}
-                **Detalhamento:** {steps_needed} passos principais
-
-                **Componentes:**
-                1. Resposta direta (40 palavras)
-                2. Explicação detalhada
-                3. Passo-a-passo (se aplicável)
-                4. Problemas comuns + soluções
-                5. Recursos adicionais
-
-                **Formato:**
-                - Markdown com headers
-                - Listas numeradas para passos
-                - Destaques para dicas importantes
-                - Blocos de código se técnico
-                """
-                
-                response = modelo_texto.generate_content(prompt)
-                st.markdown(response.text)
+            prompt = FERRAMENTAS["gerador_faq"].prompt(**entradas)
+            if variantes > 1:
+                gerar_variantes("gerador_faq", prompt, variantes, 'Elaborando variantes da resposta...', faq_question, entradas,
+                                regenerar=regenerar)
+            else:
+                gerar_resposta("gerador_faq", faq_question, prompt, 'Elaborando resposta perfeita...', entradas, regenerar=regenerar)
+    
+    exibir_resultados("gerador_faq")
+
+
+with st.expander("❓ Gerador de Perguntas Frequentes", expanded=False):
+    gerador_faq()
+
+# 11. HISTÓRICO DE CONTEÚDO (somente com MONGO_URI)
+@st.fragment
+def historico_conteudo():
+    st.header("🗄️ Histórico de Conteúdo")
+    st.write("Busque tudo o que já foi gerado, por cliente, ferramenta, período ou termo")
+
+    busca = st.text_input("Buscar", placeholder="Ex: 'marketing digital'", key="busca_historico")
+    col1, col2, col3 = st.columns(3)
+    ferramenta = col1.selectbox("Ferramenta", ["Todas"] + sorted(FERRAMENTAS), key="ferramenta_historico")
+    cliente = col2.text_input("Cliente", value=st.session_state.get("site_cliente", ""), key="cliente_historico")
+    hoje = datetime.date.today()
+    periodo = col3.date_input("Período", (hoje - datetime.timedelta(days=30), hoje), key="periodo_historico")
+
+    # O período fica incompleto enquanto só a primeira data foi escolhida
+    desde = ate = None
+    if len(periodo) == 2:
+        desde = time.mktime(periodo[0].timetuple())
+        ate = time.mktime((periodo[1] + datetime.timedelta(days=1)).timetuple())
+    try:
+        geracoes = repositorio.buscar(busca, cliente, "" if ferramenta == "Todas" else ferramenta, desde, ate)
+    except PyMongoError as erro:
+        st.error(f"Histórico indisponível: {erro}")
+        return
+    if not geracoes:
+        st.caption("Nenhuma geração encontrada.")
+        return
+
+    st.dataframe(
+        [
+            {
+                "Data": time.strftime("%d/%m/%Y %H:%M", time.localtime(geracao["criado_em"])),
+                "Ferramenta": geracao["ferramenta"],
+                "Cliente": geracao["cliente"],
+                "Consulta": geracao["consulta"],
+                "Modelo": geracao["modelo"],
+                "Tokens": geracao["tokens_prompt"] + geracao["tokens_resposta"],
+                "Segundos": round(geracao["duracao"] or 0, 1),
+            }
+            for geracao in geracoes
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    rotulos = {str(geracao["_id"]): f"{geracao['ferramenta']} · {geracao['consulta'][:60]}" for geracao in geracoes}
+    id_escolhido = st.selectbox(
+        "Abrir geração",
+        [""] + list(rotulos),
+        format_func=lambda id_geracao: rotulos.get(id_geracao, "Escolha para ver"),
+        key="geracao_historico"
+    )
+    if not id_escolhido:
+        return
+    geracao = repositorio.obter(id_escolhido)
+    st.markdown(geracao["texto"])
+    for nome, id_artefato in geracao["artefatos"].items():
+        st.image(repositorio.artefato(id_artefato), caption=nome)
+    with st.popover("Entradas usadas"):
+        st.json(geracao["entradas"])
+    st.download_button(
+        "📥 Baixar Resultado",
+        geracao["texto"],
+        file_name=f"{geracao['ferramenta']}_{id_escolhido}.md",
+        key="baixar_historico"
+    )
+
+
+if repositorio is not None:
+    with st.expander("🗄️ Histórico de Conteúdo", expanded=False):
+        historico_conteudo()
+
+# Tarefas em segundo plano da sessão, atualizadas periodicamente sem rerun do app inteiro
+ICONES_STATUS = {"pendente": "🕒", "executando": "⚙️", CONCLUIDA: "✅", FALHOU: "❌"}
+
+
+@st.dialog("Resultado da Tarefa", width="large")
+def abrir_tarefa(id_tarefa):
+    tarefa = fila_tarefas.obter(id_tarefa)
+    st.caption(f"{tarefa['ferramenta']} · {tarefa['titulo']}")
+    if tarefa["status"] == CONCLUIDA:
+        st.markdown(tarefa["resultado"])
+        st.download_button(
+            "📥 Baixar Resultado",
+            tarefa["resultado"],
+            file_name=f"{tarefa['ferramenta']}_{id_tarefa}.md"
+        )
+    elif tarefa["status"] == FALHOU:
+        st.error(f"A tarefa falhou após {tarefa['tentativas']} tentativa(s): {tarefa['erro']}")
+    else:
+        st.info("A tarefa ainda está em andamento.")
+
+
+@st.fragment(run_every=3)
+def painel_tarefas():
+    tarefas = fila_tarefas.listar(id_sessao)
+    if not tarefas:
+        st.caption("Nenhuma tarefa nesta sessão.")
+    for tarefa in tarefas:
+        col1, col2 = st.columns([4, 1])
+        col1.write(f"{ICONES_STATUS[tarefa['status']]} **{tarefa['titulo'][:40]}**  \n`{tarefa['id']}` · {tarefa['ferramenta']}")
+        if tarefa["status"] in (CONCLUIDA, FALHOU) and col2.button("Abrir", key=f"abrir_{tarefa['id']}"):
+            abrir_tarefa(tarefa["id"])
+
+
+with st.sidebar:
+    st.toggle(
+        "⏱️ Executar em segundo plano",
+        help="O clique enfileira a geração e você pode acompanhar e reabrir o resultado depois, mesmo após recarregar a página",
+        key="segundo_plano"
+    )
+    with st.expander("📨 Minhas Tarefas", expanded=True):
+        painel_tarefas()
+
+# Conteúdo do site do cliente: base para contexto, links internos e alerta de canibalização
+with st.sidebar.expander("🌐 Site do Cliente"):
+    site = st.text_input("Site", placeholder="Ex: macfor.com.br", key="site_cliente")
+    if site:
+        indice_site = obter_indice_site(site)
+        origem = st.radio("Origem do conteúdo", ["Sitemap", "Exportação (.zip)", "Pasta local"], key="origem_site")
+        if origem == "Sitemap":
+            endereco = st.text_input("URL do sitemap", placeholder="https://site.com.br/sitemap.xml", key="sitemap_site")
+        elif origem == "Exportação (.zip)":
+            exportacao = st.file_uploader("Páginas em HTML ou markdown", type=["zip"], key="zip_site")
+        else:
+            pasta = st.text_input("Caminho da pasta", key="pasta_site")
+        if st.button("📥 Indexar", key="btn_indexar_site"):
+            progresso = st.progress(0.0, text="Indexando páginas...")
+            try:
+                if origem == "Sitemap":
+                    paginas = paginas_sitemap(
+                        endereco,
+                        ao_concluir=lambda feitas, total: progresso.progress(feitas / total, text=f"{feitas}/{total} páginas")
+                    )
+                elif origem == "Exportação (.zip)":
+                    paginas = paginas_zip(exportacao) if exportacao else []
+                else:
+                    paginas = paginas_pasta(pasta) if pasta else []
+                resultado = indice_site.adicionar(paginas)
+            except (requests.RequestException, zipfile.BadZipFile, OSError) as erro:
+                st.error(f"Não foi possível ler as páginas. ({erro})")
+            else:
+                st.success(
+                    f"{resultado['novas']} novas · {resultado['atualizadas']} atualizadas · "
+                    f"{resultado['inalteradas']} sem mudanças"
+                )
+            progresso.empty()
+        estatisticas_site = indice_site.estatisticas()
+        st.caption(
+            f"{estatisticas_site['paginas']:,} páginas · {estatisticas_site['passagens']:,} trechos · "
+            f"{estatisticas_site['termos']:,} termos indexados"
+        )
+
+# Painel de economia do cache
+with st.sidebar.expander("📊 Cache de Respostas"):
+    estatisticas = cliente_llm.cache.estatisticas
+    st.metric("Taxa de acerto", f"{estatisticas.taxa_acerto:.0%}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Memória", estatisticas.acertos_memoria)
+    col2.metric("Disco", estatisticas.acertos_disco)
+    col3.metric("Falhas", estatisticas.falhas)
+    st.caption(
+        f"Latência economizada: {estatisticas.segundos_economizados:.1f}s · "
+        f"{estatisticas.caracteres_economizados:,} caracteres não reenviados"
+    )
+    st.caption(
+        f"Fila do Gemini: {cliente_llm.agendador.tamanho_fila()} aguardando · "
+        f"{cliente_llm.agendador.estatisticas.novas_tentativas} novas tentativas"
+    )
+    mediana_primeiro_trecho = cliente_llm.mediana_primeiro_trecho()
+    if mediana_primeiro_trecho is not None:
+        st.metric("Mediana até o 1º trecho", f"{mediana_primeiro_trecho:.2f}s")
+
+# Percentis das chamadas recentes de cada ferramenta (todas as sessões deste processo)
+with st.sidebar.expander("📈 Desempenho por Ferramenta"):
+    resumo_metricas = cliente_llm.metricas.resumo()
+    if resumo_metricas:
+        st.dataframe(resumo_metricas, hide_index=True, use_container_width=True)
+        st.caption("Latências em segundos, sem acertos de cache · métricas completas em /metrics")
+    else:
+        st.caption("Nenhuma chamada registrada ainda.")
@@ -0,0 +1,194 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, start_http_server
+
+OK = "ok"
+CACHE = "cache"
+ERRO = "erro"
+
+# Faixas dos histogramas: chamadas ao Gemini vão de décimos de segundo a mais de um minuto
+FAIXAS_SEGUNDOS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+logger = logging.getLogger("aio.llm")
+
+
+@dataclass
+class RegistroChamada:
+    ferramenta: str
+    modelo: str
+    resultado: str
+    stream: bool
+    duracao: float
+    tempo_primeiro_trecho: float = None
+    tokens_prompt: int = 0
+    tokens_resposta: int = 0
+    caracteres_entrada: int = 0
+    caracteres_saida: int = 0
+    erro: str = None
+    momento: float = 0.0
+    sessao: str = None
+
+
+def tokens_uso(usage_metadata):
+    # usage_metadata pode faltar (cache, trechos intermediários) ou vir sem algum dos campos
+    if usage_metadata is None:
+        return 0, 0
+    return (
+        getattr(usage_metadata, "prompt_token_count", 0) or 0,
+        getattr(usage_metadata, "candidates_token_count", 0) or 0,
+    )
+
+
+def configurar_logs():
+    # Uma linha JSON por chamada na saída de erro, sem passar pelo formato do logging raiz
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+class MetricasLLM:
+    """Métricas de cada chamada ao modelo, por ferramenta e modelo.
+
+    Alimenta contadores e histogramas no formato Prometheus (registro próprio, para
+    poder haver mais de um cliente no mesmo processo), um log JSON por chamada e uma
+    janela recente por ferramenta para os percentis do painel.
+    """
+
+    def __init__(self, janela=200):
+        self.registro = CollectorRegistry()
+        rotulos = ("ferramenta", "modelo", "resultado")
+        self._chamadas = Counter(
+            "aio_llm_chamadas", "Chamadas ao modelo", rotulos, registry=self.registro
+        )
+        self._duracao = Histogram(
+            "aio_llm_duracao_segundos", "Tempo total da chamada", rotulos,
+            buckets=FAIXAS_SEGUNDOS, registry=self.registro,
+        )
+        self._primeiro_trecho = Histogram(
+            "aio_llm_primeiro_trecho_segundos", "Tempo até o primeiro trecho do stream", ("ferramenta", "modelo"),
+            buckets=FAIXAS_SEGUNDOS, registry=self.registro,
+        )
+        self._tokens = Counter(
+            "aio_llm_tokens", "Tokens informados pela API", ("ferramenta", "modelo", "tipo"), registry=self.registro
+        )
+        self._caracteres = Counter(
+            "aio_llm_caracteres_entrada", "Tamanho da entrada (caracteres de texto e bytes de imagem)", ("ferramenta", "modelo"),
+            registry=self.registro,
+        )
+        self._rotas = Counter(
+            "aio_llm_rotas", "Decisões do roteador de modelos", ("ferramenta", "modelo", "motivo"),
+            registry=self.registro,
+        )
+        self._reservas = Counter(
+            "aio_llm_reservas", "Chamadas repetidas no modelo reserva (hedge) e quem respondeu primeiro",
+            ("ferramenta", "vencedor"), registry=self.registro,
+        )
+        self._lock = threading.Lock()
+        self._recentes = defaultdict(lambda: deque(maxlen=janela))
+        self.decisoes = deque(maxlen=janela)
+
+    def registrar(self, registro):
+        registro.momento = registro.momento or time.time()
+        rotulos = (registro.ferramenta, registro.modelo)
+        self._chamadas.labels(*rotulos, registro.resultado).inc()
+        self._duracao.labels(*rotulos, registro.resultado).observe(registro.duracao)
+        if registro.tempo_primeiro_trecho is not None and registro.resultado == OK:
+            self._primeiro_trecho.labels(*rotulos).observe(registro.tempo_primeiro_trecho)
+        self._tokens.labels(*rotulos, "prompt").inc(registro.tokens_prompt)
+        self._tokens.labels(*rotulos, "resposta").inc(registro.tokens_resposta)
+        self._caracteres.labels(*rotulos).inc(registro.caracteres_entrada)
+        with self._lock:
+            self._recentes[registro.ferramenta].append(registro)
+        logger.info(json.dumps({"evento": "chamada_llm", **asdict(registro)}, ensure_ascii=False))
+
+    def exportar(self):
+        return generate_latest(self.registro)
+
+    def servir(self, porta):
+        # Endpoint /metrics próprio para processos sem servidor HTTP (o app Streamlit)
+        start_http_server(porta, registry=self.registro)
+
+    def registrar_decisao(self, decisao):
+        # Cada escolha do roteador, para comparar depois a latência prevista com a das chamadas
+        self._rotas.labels(decisao.ferramenta, decisao.modelo, decisao.motivo).inc()
+        with self._lock:
+            self.decisoes.append(decisao)
+        logger.info(json.dumps({"evento": "roteamento", "momento": time.time(), **asdict(decisao)}, ensure_ascii=False))
+
+    def registrar_reserva(self, ferramenta, vencedor):
+        self._reservas.labels(ferramenta, vencedor).inc()
+        logger.info(json.dumps({"evento": "reserva", "ferramenta": ferramenta, "vencedor": vencedor}))
+
+    def latencia_mediana(self, ferramenta):
+        return self.latencia(ferramenta, 50)
+
+    def latencia(self, ferramenta, percentil, modelo=None, minimo=1):
+        """Percentil da duração das chamadas recentes de ``ferramenta`` (só de ``modelo``, se informado)."""
+        with self._lock:
+            duracoes = [
+                r.duracao for r in self._recentes.get(ferramenta, ())
+                if r.resultado == OK and (modelo is None or r.modelo == modelo)
+            ]
+        return _percentil(duracoes, percentil) if len(duracoes) >= minimo else None
+
+    def vazao(self, modelo, minimo=1):
+        """Mediana dos tokens de resposta por segundo nas chamadas recentes de ``modelo``, em qualquer ferramenta."""
+        with self._lock:
+            vazoes = [
+                r.tokens_resposta / r.duracao for registros in self._recentes.values() for r in registros
+                if r.modelo == modelo and r.resultado == OK and r.tokens_resposta and r.duracao > 0
+            ]
+        return _percentil(vazoes, 50) if len(vazoes) >= minimo else None
+
+    def consumo(self, ferramenta, sessao, desde):
+        """Modelo, chamadas e tokens das chamadas de ``ferramenta`` feitas por ``sessao`` desde ``desde``."""
+        with self._lock:
+            registros = [
+                r for r in self._recentes.get(ferramenta, ())
+                if r.sessao == sessao and r.momento >= desde and r.resultado != ERRO
+            ]
+        modelos = [r.modelo for r in registros]
+        return {
+            "modelo": max(set(modelos), key=modelos.count) if modelos else None,
+            "chamadas": len(registros),
+            "tokens_prompt": sum(r.tokens_prompt for r in registros),
+            "tokens_resposta": sum(r.tokens_resposta for r in registros),
+        }
+
+    def resumo(self):
+        """Percentis da janela recente de cada ferramenta (acertos de cache fora das latências)."""
+        with self._lock:
+            recentes = {ferramenta: list(registros) for ferramenta, registros in self._recentes.items()}
+        linhas = []
+        for ferramenta, registros in sorted(recentes.items()):
+            chamadas = [r for r in registros if r.resultado == OK]
+            duracoes = [r.duracao for r in chamadas]
+            primeiros = [r.tempo_primeiro_trecho for r in chamadas if r.tempo_primeiro_trecho is not None]
+            linhas.append({
+                "ferramenta": ferramenta,
+                "chamadas": len(registros),
+                "p50_s": _percentil(duracoes, 50),
+                "p95_s": _percentil(duracoes, 95),
+                "primeiro_trecho_p50_s": _percentil(primeiros, 50),
+                "tokens_medios": round(sum(r.tokens_prompt + r.tokens_resposta for r in chamadas) / len(chamadas))
+                if chamadas else None,
+                "cache": sum(r.resultado == CACHE for r in registros),
+                "erros": sum(r.resultado == ERRO for r in registros),
+            })
+        return linhas
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return round(ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))], 3)
+
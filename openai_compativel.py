@@ -0,0 +1,132 @@
+import base64
+import os
+from types import SimpleNamespace
+
+import openai
+from google.api_core import exceptions
+
+# Erros do cliente OpenAI viram os equivalentes do Google: o agendador repete os mesmos
+# transitórios e a interface trata GoogleAPIError igual para qualquer provedor
+_ERROS = (
+    (openai.RateLimitError, exceptions.ResourceExhausted),
+    (openai.APITimeoutError, exceptions.DeadlineExceeded),
+    (openai.APIConnectionError, exceptions.ServiceUnavailable),
+    (openai.InternalServerError, exceptions.InternalServerError),
+    (openai.BadRequestError, exceptions.InvalidArgument),
+    (openai.AuthenticationError, exceptions.Unauthenticated),
+    (openai.PermissionDeniedError, exceptions.PermissionDenied),
+    (openai.NotFoundError, exceptions.NotFound),
+    (openai.OpenAIError, exceptions.Unknown),
+)
+# Parâmetros de generation_config com nome diferente na API de chat
+_PARAMETROS = {
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "max_output_tokens": "max_tokens",
+    "candidate_count": "n",
+    "stop_sequences": "stop",
+}
+
+
+def _traduzir_erro(erro):
+    for origem, destino in _ERROS:
+        if isinstance(erro, origem):
+            return destino(str(erro))
+    return erro
+
+
+def _mensagem(contents):
+    # Texto e imagens ({"mime_type", "data"}) na ordem em que vieram, como numa chamada ao Gemini
+    if isinstance(contents, str):
+        return [{"role": "user", "content": contents}]
+    partes = []
+    for parte in contents:
+        if isinstance(parte, str):
+            partes.append({"type": "text", "text": parte})
+        else:
+            dados = base64.b64encode(parte["data"]).decode("ascii")
+            partes.append({"type": "image_url", "image_url": {"url": f"data:{parte['mime_type']};base64,{dados}"}})
+    return [{"role": "user", "content": partes}]
+
+
+def _uso(usage):
+    if usage is None:
+        return None
+    return SimpleNamespace(prompt_token_count=usage.prompt_tokens, candidates_token_count=usage.completion_tokens)
+
+
+def _completa(resposta):
+    textos = [escolha.message.content or "" for escolha in resposta.choices]
+    return SimpleNamespace(
+        text=textos[0] if textos else "",
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=t)])) for t in textos],
+        usage_metadata=_uso(resposta.usage),
+    )
+
+
+def _trecho(trecho):
+    texto = (trecho.choices[0].delta.content or "") if trecho.choices else ""
+    return SimpleNamespace(text=texto, usage_metadata=_uso(trecho.usage))
+
+
+class ModeloOpenAI:
+    """Adaptador de um modelo com API compatível com a da OpenAI (vLLM, Ollama, OpenAI, Azure...)
+    para a interface de ``genai.GenerativeModel`` que o resto do app usa.
+
+    ``base_url`` e ``api_key`` vêm de OPENAI_BASE_URL e OPENAI_API_KEY quando não informados.
+    Sem novas tentativas no cliente: quem repete chamadas é o agendador.
+    """
+
+    def __init__(self, nome, base_url=None, api_key=None, timeout=120):
+        self.model_name = f"openai/{nome}"
+        self._nome = nome
+        configuracao = {
+            "base_url": base_url or os.getenv("OPENAI_BASE_URL"),
+            # Servidores locais costumam aceitar qualquer chave, mas o cliente exige uma
+            "api_key": api_key or os.getenv("OPENAI_API_KEY") or "local",
+            "timeout": timeout,
+            "max_retries": 0,
+        }
+        self._cliente = openai.OpenAI(**configuracao)
+        self._cliente_async = openai.AsyncOpenAI(**configuracao)
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        try:
+            resposta = self._cliente.chat.completions.create(**self._pedido(contents, generation_config, stream))
+        except openai.OpenAIError as erro:
+            raise _traduzir_erro(erro) from erro
+        return self._stream(resposta) if stream else _completa(resposta)
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        try:
+            resposta = await self._cliente_async.chat.completions.create(
+                **self._pedido(contents, generation_config, stream)
+            )
+        except openai.OpenAIError as erro:
+            raise _traduzir_erro(erro) from erro
+        return self._stream_async(resposta) if stream else _completa(resposta)
+
+    def _pedido(self, contents, generation_config, stream):
+        pedido = {
+            _PARAMETROS[chave]: valor for chave, valor in (generation_config or {}).items() if chave in _PARAMETROS
+        }
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            pedido["response_format"] = {"type": "json_object"}
+        if stream:
+            pedido["stream_options"] = {"include_usage": True}
+        return {"model": self._nome, "messages": _mensagem(contents), "stream": stream, **pedido}
+
+    def _stream(self, resposta):
+        # O uso de tokens chega num trecho final sem escolhas, como no Gemini
+        try:
+            for trecho in resposta:
+                yield _trecho(trecho)
+        except openai.OpenAIError as erro:
+            raise _traduzir_erro(erro) from erro
+
+    async def _stream_async(self, resposta):
+        try:
+            async for trecho in resposta:
+                yield _trecho(trecho)
+        except openai.OpenAIError as erro:
+            raise _traduzir_erro(erro) from erro
@@ -0,0 +1,219 @@
+import os
+import re
+import time
+from concurrent.futures import as_completed
+
+# Guia do Comprador e Comparador de Produtos em map-reduce: cada produto é analisado numa
+# chamada curta e própria (map) e uma chamada menor monta tabela e recomendações (reduce).
+# O prompt de cada análise depende só do produto, da categoria e dos critérios, então o
+# cache de respostas reaproveita a análise de um produto em qualquer guia ou comparação.
+MAPA_PRODUTOS = os.getenv("AIO_MAPA_PRODUTOS", "1") == "1"
+MIN_PRODUTOS = 2
+CARACTERES_POR_ANALISE = 1200
+MARCADOR_ANALISES = "[ANÁLISES]"
+
+_MARCADOR_LISTA = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_CAMPOS = (
+    ("RESUMO", "Resumo"),
+    ("PREÇO", "Preço"),
+    ("PONTOS FORTES", "Pontos fortes"),
+    ("PONTOS FRACOS", "Pontos fracos"),
+    ("IDEAL PARA", "Ideal para"),
+)
+_CAMPO = re.compile(r"(?im)^\s*(RESUMO|PRE[CÇ]O|PONTOS FORTES|PONTOS FRACOS|IDEAL PARA):\s*")
+
+
+def normalizar(texto):
+    return " ".join((texto or "").split())
+
+
+def listar_produtos(texto):
+    """Produtos de um campo "um por linha", sem marcadores de lista nem repetições."""
+    produtos, vistos = [], set()
+    for linha in (texto or "").splitlines():
+        produto = normalizar(_MARCADOR_LISTA.sub("", linha))
+        if produto and produto.casefold() not in vistos:
+            vistos.add(produto.casefold())
+            produtos.append(produto)
+    return produtos
+
+
+def guia_em_partes(valores):
+    return MAPA_PRODUTOS and len(listar_produtos(valores.get("top_products"))) >= MIN_PRODUTOS
+
+
+def comparacao_em_partes(valores):
+    return MAPA_PRODUTOS and bool(valores.get("product_a") and valores.get("product_b"))
+
+
+def prompt_analise_produto(produto, categoria, criterios):
+    # Nada do perfil do comprador nem do restante da lista: o mesmo produto gera o mesmo prompt
+    return f"""
+    Analise o produto/serviço "{produto}"{f' na categoria {categoria}' if categoria else ''}.
+
+    **Critérios:** {criterios or 'Use os padrões do mercado'}
+
+    **Responda exatamente neste formato, sem introdução, em no máximo 120 palavras:**
+    RESUMO: <uma frase sobre o que é e para quem serve>
+    PREÇO: <faixa de preço ou modelo de cobrança; "não informado" se não souber>
+    PONTOS FORTES:
+    - <até 3, com dados concretos quando possível>
+    PONTOS FRACOS:
+    - <até 3>
+    IDEAL PARA: <perfil de uso em uma linha>
+    """
+
+
+def formatar_analise(produto, texto):
+    """Análise estruturada em markdown; respostas fora do formato passam como vieram."""
+    texto = texto.strip()
+    trechos = _CAMPO.split(texto)
+    if len(trechos) < 3:
+        return f"### {produto}\n\n{texto}"
+    campos = {}
+    for rotulo, conteudo in zip(trechos[1::2], trechos[2::2]):
+        chave = rotulo.upper().replace("PRECO", "PREÇO")
+        campos.setdefault(chave, conteudo.strip())
+    linhas = [f"### {produto}"]
+    for chave, titulo in _CAMPOS:
+        if campos.get(chave):
+            conteudo = campos[chave]
+            linhas.append(f"**{titulo}:**\n{conteudo}" if "\n" in conteudo else f"**{titulo}:** {conteudo}")
+    return "\n\n".join(linhas)
+
+
+def analisar_produtos(cliente, modelo, produtos, categoria, criterios, ao_concluir_produto=None, sessao=None,
+                      ferramenta=None):
+    """Analisa os produtos ao mesmo tempo no laço do cliente; devolve as análises na ordem dos produtos.
+
+    ``ao_concluir_produto(concluidos, total)`` é chamado na thread de quem chamou.
+    """
+    futuros = {
+        cliente.laco.executar(cliente.gerar_async(
+            modelo, prompt_analise_produto(produto, normalizar(categoria), normalizar(criterios)),
+            sessao=sessao, ferramenta=ferramenta,
+        )): indice
+        for indice, produto in enumerate(produtos)
+    }
+    analises = [None] * len(produtos)
+    try:
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            analises[futuros[futuro]] = futuro.result()
+            if ao_concluir_produto is not None:
+                ao_concluir_produto(concluidos, len(produtos))
+    finally:
+        # Uma análise falhou (ou quem chamou desistiu): as outras não continuam no loop
+        for futuro in futuros:
+            futuro.cancel()
+    return analises
+
+
+def listar_analises(produtos, analises):
+    return "\n\n".join(
+        f"[{numero}] {produto}\n{analise.strip()[:CARACTERES_POR_ANALISE]}"
+        for numero, (produto, analise) in enumerate(zip(produtos, analises), start=1)
+    )
+
+
+# ----------------------------------------------
+# Guia do Comprador
+# ----------------------------------------------
+
+def prompt_consolidar_guia(product_category, buyer_profile, analises):
+    return f"""
+    Crie um guia de compra para {product_category} direcionado a {buyer_profile}.
+    Cada produto já foi analisado separadamente:
+
+    {analises}
+
+    **Seções Obrigatórias:**
+    1. Introdução (contextualize a necessidade)
+    2. Critérios de avaliação (o que considerar)
+    3. Tabela comparativa (todos os produtos acima)
+    4. Recomendações por cenário
+    5. Onde comprar/melhores ofertas
+
+    Não repita as análises individuais: entre os critérios e a tabela, escreva uma linha
+    contendo apenas {MARCADOR_ANALISES}, onde elas serão inseridas.
+
+    **Tom:**
+    - Informativo mas acessível
+    - Comparativo justo
+    - Destaque para soluções ideais
+    """
+
+
+def guia_por_produto(cliente, modelo, product_category, buyer_profile, top_products,
+                     ao_concluir_bloco=None, sessao=None):
+    """Guia do Comprador com uma análise por produto, reaproveitada entre guias, e uma consolidação."""
+    inicio = time.perf_counter()
+    ferramenta = "guia_comprador"
+    produtos = listar_produtos(top_products)
+    analises = analisar_produtos(
+        cliente, modelo, produtos, product_category, "", ao_concluir_bloco, sessao, ferramenta
+    )
+    consolidacao = cliente.gerar(
+        modelo, prompt_consolidar_guia(product_category, buyer_profile, listar_analises(produtos, analises)),
+        sessao=sessao, ferramenta=ferramenta,
+    ).strip()
+
+    individuais = "## Análise individual\n\n" + "\n\n".join(
+        formatar_analise(produto, analise) for produto, analise in zip(produtos, analises)
+    )
+    if MARCADOR_ANALISES in consolidacao:
+        texto = consolidacao.replace(MARCADOR_ANALISES, individuais, 1)
+    else:
+        texto = f"{consolidacao}\n\n{individuais}"
+    return {"texto": texto, "blocos": len(produtos), "tempo_total": time.perf_counter() - inicio}
+
+
+# ----------------------------------------------
+# Comparador de Produtos
+# ----------------------------------------------
+
+def prompt_consolidar_comparacao(product_a, product_b, concorrente, comparison_aspects, analises):
+    return f"""
+    Crie uma comparação detalhada entre:
+    #SERVIÇO DO USUÁRIO#
+    - {product_a}
+    #CONCORRENTE#
+    - {concorrente}
+    #Produto/serviço do concorrente#
+    - {product_b}
+
+    **Análises de cada produto, feitas separadamente:**
+    {analises}
+
+    **Critérios:** {comparison_aspects or 'Use os padrões do mercado'}
+
+    **Estrutura:**
+    1. Visão geral (50 palavras)
+    2. Tabela comparativa (recursos, preços, etc.)
+    3. Vantagens de cada um
+    4. Casos de uso ideais
+    5. Verdict final (quando escolher cada)
+
+    **Formato:**
+    - Markdown com tabelas
+    - Linguagem imparcial
+    - Use os dados das análises; não invente números
+    - Destaque para diferenciais
+    """
+
+
+def comparar_por_produto(cliente, modelo, product_a, product_b, concorrente, comparison_aspects,
+                         ao_concluir_bloco=None, sessao=None):
+    """Comparador com os dois produtos analisados em paralelo (e reaproveitados) antes da comparação."""
+    inicio = time.perf_counter()
+    ferramenta = "comparador_produtos"
+    produtos = [normalizar(product_a), normalizar(f"{product_b} ({concorrente})" if concorrente else product_b)]
+    analises = analisar_produtos(
+        cliente, modelo, produtos, "", comparison_aspects, ao_concluir_bloco, sessao, ferramenta
+    )
+    texto = cliente.gerar(
+        modelo,
+        prompt_consolidar_comparacao(product_a, product_b, concorrente, comparison_aspects,
+                                     listar_analises(produtos, analises)),
+        sessao=sessao, ferramenta=ferramenta,
+    )
+    return {"texto": texto.strip(), "blocos": len(produtos), "tempo_total": time.perf_counter() - inicio}
@@ -0,0 +1,166 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+import zstandard
+from bson import ObjectId
+from gridfs import GridFS
+from pymongo import ASCENDING, DESCENDING, TEXT, MongoClient
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("aio.repositorio")
+
+# Corpos comprimidos acima disso vão para o GridFS (o limite de um documento é 16 MB)
+LIMITE_CORPO = 1024 * 1024
+CARACTERES_RESUMO = 500
+NIVEL_ZSTD = 6
+TAMANHO_LOTE = 100
+INTERVALO_LOTE = 2.0
+TAMANHO_FILA = 10_000
+
+_clientes = {}
+_lock_clientes = threading.Lock()
+
+
+def cliente_mongo(uri):
+    """``MongoClient`` único por URI no processo: o pool de conexões é compartilhado por todas as sessões."""
+    with _lock_clientes:
+        if uri not in _clientes:
+            _clientes[uri] = MongoClient(uri, maxPoolSize=50, serverSelectionTimeoutMS=3000, appname="aio-agent")
+        return _clientes[uri]
+
+
+def descomprimir(dados):
+    # ZstdDecompressor não é thread-safe; criar um por chamada é barato
+    return zstandard.ZstdDecompressor().decompress(dados).decode("utf-8")
+
+
+class RepositorioConteudo:
+    """Histórico das gerações no MongoDB (coleção ``geracoes``).
+
+    Cada geração guarda ferramenta, cliente, consulta, modelo, tempos e tokens em campos
+    indexados; o texto e as entradas vão comprimidos com zstd, e artefatos grandes (prints
+    de tela, corpos acima de ``LIMITE_CORPO``) no GridFS. ``registrar`` só enfileira: uma
+    thread grava em lotes, fora do caminho da requisição.
+    """
+
+    def __init__(self, banco, tamanho_lote=TAMANHO_LOTE, intervalo=INTERVALO_LOTE):
+        self.banco = banco
+        self.geracoes = banco["geracoes"]
+        self._gridfs = GridFS(banco, collection="artefatos")
+        self._tamanho_lote = tamanho_lote
+        self._intervalo = intervalo
+        self._fila = queue.Queue(maxsize=TAMANHO_FILA)
+        self.descartadas = 0
+        threading.Thread(target=self._gravar_lotes, name="repositorio-conteudo", daemon=True).start()
+
+    def criar_indices(self):
+        self.geracoes.create_index([("cliente", ASCENDING), ("ferramenta", ASCENDING), ("criado_em", DESCENDING)])
+        self.geracoes.create_index([("ferramenta", ASCENDING), ("criado_em", DESCENDING)])
+        self.geracoes.create_index([("criado_em", DESCENDING)])
+        self.geracoes.create_index(
+            [("consulta", TEXT), ("resumo", TEXT)],
+            default_language="portuguese",
+            weights={"consulta": 5, "resumo": 1},
+            name="busca_texto",
+        )
+
+    def registrar(self, ferramenta, consulta, texto, entradas=None, cliente="", sessao=None, modelo=None,
+                  duracao=None, tokens_prompt=0, tokens_resposta=0, artefatos=None):
+        """Enfileira uma geração para gravação; com a fila cheia (banco fora do ar) ela é descartada."""
+        try:
+            self._fila.put_nowait({
+                "ferramenta": ferramenta,
+                "consulta": consulta,
+                "texto": texto,
+                "entradas": entradas or {},
+                "cliente": cliente or "",
+                "sessao": sessao,
+                "modelo": modelo,
+                "duracao": duracao,
+                "tokens_prompt": tokens_prompt,
+                "tokens_resposta": tokens_resposta,
+                "artefatos": artefatos or {},
+                "criado_em": time.time(),
+            })
+        except queue.Full:
+            self.descartadas += 1
+
+    def descarregar(self):
+        """Espera a gravação de tudo o que já foi enfileirado."""
+        self._fila.join()
+
+    def buscar(self, texto="", cliente="", ferramenta="", desde=None, ate=None, limite=50):
+        """Gerações mais recentes (ou mais relevantes, com ``texto``) sem o corpo, que fica em ``obter``."""
+        filtro = {}
+        if cliente:
+            filtro["cliente"] = cliente
+        if ferramenta:
+            filtro["ferramenta"] = ferramenta
+        if desde is not None or ate is not None:
+            filtro["criado_em"] = {
+                operador: valor for operador, valor in (("$gte", desde), ("$lt", ate)) if valor is not None
+            }
+        projecao = {"corpo": 0, "entradas": 0}
+        if texto:
+            filtro["$text"] = {"$search": texto}
+            projecao["relevancia"] = {"$meta": "textScore"}
+            ordem = [("relevancia", {"$meta": "textScore"}), ("criado_em", DESCENDING)]
+        else:
+            ordem = [("criado_em", DESCENDING)]
+        return list(self.geracoes.find(filtro, projecao).sort(ordem).limit(limite))
+
+    def obter(self, id_geracao):
+        """Geração completa, com texto e entradas descomprimidos e os nomes dos artefatos."""
+        documento = self.geracoes.find_one({"_id": ObjectId(id_geracao)})
+        if documento is None:
+            return None
+        corpo = documento.pop("corpo", None)
+        if corpo is None:
+            corpo = self._gridfs.get(documento["corpo_gridfs"]).read()
+        documento["texto"] = descomprimir(corpo)
+        documento["entradas"] = json.loads(descomprimir(documento["entradas"]))
+        return documento
+
+    def artefato(self, id_artefato):
+        return self._gridfs.get(id_artefato).read()
+
+    def _documento(self, item, compressor):
+        # Compressão e GridFS na thread de gravação, não na sessão que gerou o conteúdo
+        texto = item.pop("texto")
+        corpo = compressor.compress(texto.encode("utf-8"))
+        documento = {
+            **item,
+            "resumo": texto[:CARACTERES_RESUMO],
+            "caracteres": len(texto),
+            "entradas": compressor.compress(json.dumps(item["entradas"], ensure_ascii=False, default=str).encode("utf-8")),
+            "artefatos": {
+                nome.replace(".", "_"): self._gridfs.put(dados, filename=nome, ferramenta=item["ferramenta"])
+                for nome, dados in item["artefatos"].items()
+            },
+        }
+        if len(corpo) > LIMITE_CORPO:
+            documento["corpo_gridfs"] = self._gridfs.put(corpo, filename=f"{item['ferramenta']}.txt.zst")
+        else:
+            documento["corpo"] = corpo
+        return documento
+
+    def _gravar_lotes(self):
+        compressor = zstandard.ZstdCompressor(level=NIVEL_ZSTD)
+        while True:
+            lote = [self._fila.get()]
+            limite = time.monotonic() + self._intervalo
+            while len(lote) < self._tamanho_lote:
+                try:
+                    lote.append(self._fila.get(timeout=max(0.0, limite - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self.geracoes.insert_many([self._documento(item, compressor) for item in lote], ordered=False)
+            except PyMongoError as erro:
+                logger.warning("%d gerações não gravadas no MongoDB: %s", len(lote), erro)
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
@@ -0,0 +1,100 @@
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("aio.resultados")
+
+
+@dataclass
+class Resultado:
+    id: str
+    ferramenta: str
+    titulo: str
+    texto: str
+    formulario: dict
+    criado_em: float
+
+    @property
+    def tamanho(self):
+        return len(self.texto) + sum(len(str(valor)) for valor in self.formulario.values())
+
+
+class ResultadosSessao:
+    """Últimos resultados de cada ferramenta numa sessão, para continuarem na tela após os reruns.
+
+    Guarda até ``por_ferramenta`` resultados por ferramenta, com o texto e os valores do formulário
+    que os geraram, somando no máximo ``max_caracteres``; acima disso sai o resultado usado há mais
+    tempo (exibir ou recarregar conta como uso). Com ``colecao`` (MongoDB), cada resultado também é
+    gravado lá e o histórico da sessão volta quando ela é aberta de novo.
+    """
+
+    def __init__(self, sessao, por_ferramenta=5, max_caracteres=500_000, colecao=None):
+        self.sessao = sessao
+        self.por_ferramenta = por_ferramenta
+        self.max_caracteres = max_caracteres
+        self._colecao = colecao
+        self._itens = OrderedDict()
+        self._caracteres = 0
+        if colecao is not None:
+            self._carregar()
+
+    def guardar(self, ferramenta, titulo, texto, formulario):
+        resultado = Resultado(uuid.uuid4().hex, ferramenta, titulo, texto, dict(formulario), time.time())
+        self._adicionar(resultado)
+        if self._colecao is not None:
+            try:
+                self._colecao.insert_one({"sessao": self.sessao, **asdict(resultado)})
+            except PyMongoError as erro:
+                # O histórico persistente é um extra: sem o banco, a sessão segue só com a memória
+                logger.warning("Resultado não gravado no MongoDB: %s", erro)
+        return resultado
+
+    def ultimos(self, ferramenta):
+        # Mais recentes primeiro
+        return sorted(
+            (resultado for resultado in self._itens.values() if resultado.ferramenta == ferramenta),
+            key=lambda resultado: resultado.criado_em, reverse=True,
+        )
+
+    def usar(self, id_resultado):
+        resultado = self._itens.get(id_resultado)
+        if resultado is not None:
+            self._itens.move_to_end(id_resultado)
+        return resultado
+
+    @property
+    def caracteres(self):
+        return self._caracteres
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _adicionar(self, resultado):
+        self._itens[resultado.id] = resultado
+        self._caracteres += resultado.tamanho
+        excedentes = self.ultimos(resultado.ferramenta)[self.por_ferramenta:]
+        for antigo in excedentes:
+            self._remover(antigo.id)
+        # LRU: o recém-guardado fica mesmo que sozinho passe do limite
+        while self._caracteres > self.max_caracteres and len(self._itens) > 1:
+            self._remover(next(iter(self._itens)))
+
+    def _remover(self, id_resultado):
+        self._caracteres -= self._itens.pop(id_resultado).tamanho
+
+    def _carregar(self):
+        try:
+            documentos = list(
+                self._colecao.find({"sessao": self.sessao}, {"_id": 0, "sessao": 0})
+                .sort("criado_em", -1)
+                .limit(self.por_ferramenta * 20)
+            )
+        except PyMongoError as erro:
+            logger.warning("Histórico da sessão não carregado do MongoDB: %s", erro)
+            return
+        for documento in reversed(documentos):
+            self._adicionar(Resultado(**documento))
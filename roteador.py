@@ -0,0 +1,104 @@
+import json
+import os
+from dataclasses import dataclass
+
+from tokens import TOKENS_ENTRADA_POR_SEGUNDO
+
+RAPIDO = "gemini-1.5-flash"
+ROBUSTO = "gemini-1.5-pro"
+# Respostas a partir disso (≈ 1.200 palavras) ou entradas perto do orçamento dos prompts vão para o robusto
+SAIDA_LONGA = 1800
+ENTRADA_LONGA = 5000
+SLO_PADRAO = 60.0
+# Sem histórico do modelo: espera inicial (s) e tokens de saída por segundo de cada faixa
+DESEMPENHO_PADRAO = {RAPIDO: (0.8, 180), ROBUSTO: (2.0, 70)}
+# Amostras recentes necessárias para confiar no que foi observado em vez dos valores padrão
+AMOSTRAS_MINIMAS = 5
+# O modelo reserva recebe a chamada quando a principal passa do p95 observado (sem histórico, 1,5x a previsão)
+PERCENTIL_RESERVA = 95
+FOLGA_RESERVA = 1.5
+
+
+@dataclass
+class Decisao:
+    ferramenta: str
+    modelo: str
+    motivo: str
+    tokens_entrada: int
+    tokens_saida: int
+    slo: float
+    prevista: float
+    reserva: str = None
+    atraso_reserva: float = None
+    sessao: str = None
+
+
+class Roteador:
+    """Escolhe o modelo de cada chamada entre uma faixa rápida e uma robusta.
+
+    O robusto fica com respostas longas, entradas grandes e ferramentas que o pedem
+    (``Ferramenta.modelo``), desde que a latência prevista caiba no SLO da ferramenta;
+    nos outros casos vai o rápido. A previsão usa a vazão observada de cada modelo nas
+    ``metricas`` ou, enquanto não há histórico, os valores padrão. Com ``reserva``, a
+    decisão indica o outro modelo para receber a mesma chamada se a principal demorar.
+    """
+
+    def __init__(self, rapido=RAPIDO, robusto=ROBUSTO, slos=None, reserva=True, metricas=None):
+        self.rapido = rapido
+        self.robusto = robusto
+        self.slos = slos or {}
+        self.reserva = reserva and rapido != robusto
+        self.metricas = metricas
+        self._padrao = {rapido: DESEMPENHO_PADRAO[RAPIDO], robusto: DESEMPENHO_PADRAO[ROBUSTO]}
+
+    @classmethod
+    def do_ambiente(cls, metricas=None):
+        # AIO_MODELO_RAPIDO/AIO_MODELO_ROBUSTO aceitam os prefixos de provedor de criar_modelo
+        return cls(
+            rapido=os.getenv("AIO_MODELO_RAPIDO", RAPIDO),
+            robusto=os.getenv("AIO_MODELO_ROBUSTO", ROBUSTO),
+            slos=json.loads(os.getenv("AIO_SLO", "{}")),
+            reserva=os.getenv("AIO_RESERVA", "1") == "1",
+            metricas=metricas,
+        )
+
+    def faixa(self, preferido):
+        """Modelo configurado da faixa de ``preferido`` (para chamadas que não passam por ``escolher``)."""
+        return self.robusto if preferido in (ROBUSTO, self.robusto) else self.rapido
+
+    def prever(self, modelo, tokens_entrada, tokens_saida):
+        """Segundos esperados para a chamada completa."""
+        leitura = tokens_entrada / TOKENS_ENTRADA_POR_SEGUNDO
+        vazao = self.metricas.vazao(modelo, AMOSTRAS_MINIMAS) if self.metricas is not None else None
+        if vazao is not None:
+            # Tokens por segundo da chamada inteira: a espera inicial já entra na vazão observada
+            return leitura + tokens_saida / vazao
+        espera, tokens_por_segundo = self._padrao.get(modelo, DESEMPENHO_PADRAO[RAPIDO])
+        return espera + leitura + tokens_saida / tokens_por_segundo
+
+    def escolher(self, ferramenta, tokens_entrada, tokens_saida, preferido=None, slo=None):
+        slo = self.slos.get(ferramenta, slo or SLO_PADRAO)
+        if preferido in (ROBUSTO, self.robusto):
+            motivo = "ferramenta"
+        elif tokens_saida >= SAIDA_LONGA:
+            motivo = "saida_longa"
+        elif tokens_entrada >= ENTRADA_LONGA:
+            motivo = "entrada_longa"
+        else:
+            motivo = "curta"
+        modelo = self.rapido if motivo == "curta" else self.robusto
+        prevista = self.prever(modelo, tokens_entrada, tokens_saida)
+        if modelo != self.rapido and prevista > slo:
+            # O robusto não cabe no SLO: o rápido entra se for de fato mais rápido
+            alternativa = self.prever(self.rapido, tokens_entrada, tokens_saida)
+            if alternativa < prevista:
+                modelo, prevista, motivo = self.rapido, alternativa, "slo"
+
+        decisao = Decisao(ferramenta, modelo, motivo, tokens_entrada, tokens_saida, slo, round(prevista, 2))
+        if self.reserva:
+            decisao.reserva = self.robusto if modelo == self.rapido else self.rapido
+            observada = None
+            if self.metricas is not None:
+                observada = self.metricas.latencia(ferramenta, PERCENTIL_RESERVA, modelo, AMOSTRAS_MINIMAS)
+            decisao.atraso_reserva = round(observada or prevista * FOLGA_RESERVA, 2)
+        return decisao
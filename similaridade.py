@@ -0,0 +1,139 @@
+import re
+import threading
+import unicodedata
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+# 20 bandas de 6 linhas: pares com Jaccard ≥ 0,75 viram candidatos ~98% das vezes, pares com 0,3 ~1%
+NUM_PERMUTACOES = 120
+BANDAS = 20
+LIMIAR = 0.75
+CAPACIDADE = 100_000
+TAMANHO_SHINGLE = 4
+
+# Palavras que não mudam o pedido ("SEO em 2025" == "SEO 2025")
+PALAVRAS_VAZIAS = frozenset(
+    "a o as os de da do das dos e em no na nos nas para por com um uma uns umas que como "
+    "ao aos à às pelo pela pelos pelas sobre entre".split()
+)
+_PRIMO = (1 << 31) - 1
+_PALAVRA = re.compile(r"\w+")
+
+
+@dataclass
+class Similar:
+    chave: str
+    similaridade: float
+    entradas: dict
+
+
+def _normalizar(texto):
+    sem_acentos = unicodedata.normalize("NFKD", str(texto).lower())
+    palavras = _PALAVRA.findall("".join(c for c in sem_acentos if not unicodedata.combining(c)))
+    return " ".join(palavra for palavra in palavras if palavra not in PALAVRAS_VAZIAS)
+
+
+class IndiceSimilaridade:
+    """Índice de pedidos recentes para achar pedidos quase idênticos (MinHash + LSH).
+
+    Cada pedido vira uma assinatura MinHash dos n-gramas de caracteres do texto livre;
+    as assinaturas são divididas em bandas, e só pedidos que coincidem em alguma banda
+    inteira são comparados. A busca custa ``BANDAS`` consultas a dicionário mais uma
+    comparação vetorizada com os poucos candidatos, independentemente do tamanho do índice.
+    As assinaturas ficam num buffer circular: acima da capacidade, os mais antigos saem.
+    """
+
+    def __init__(self, num_permutacoes=NUM_PERMUTACOES, bandas=BANDAS, limiar=LIMIAR, capacidade=CAPACIDADE,
+                 semente=42):
+        aleatorio = np.random.default_rng(semente)
+        # Hash universal (a·x + b) mod p com p = 2³¹ − 1: o produto cabe em 64 bits e a assinatura em 32
+        self._a = aleatorio.integers(1, _PRIMO, size=(num_permutacoes, 1), dtype=np.uint64)
+        self._b = aleatorio.integers(0, _PRIMO, size=(num_permutacoes, 1), dtype=np.uint64)
+        self.bandas = bandas
+        self.linhas_por_banda = num_permutacoes // bandas
+        self.limiar = limiar
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        # np.zeros só ocupa memória à medida que as posições são escritas
+        self._assinaturas = np.zeros((capacidade, num_permutacoes), dtype=np.uint32)
+        self._registros = [None] * capacidade
+        self._baldes = defaultdict(set)
+        self._total = 0
+
+    def assinatura(self, texto):
+        normalizado = _normalizar(texto)
+        if len(normalizado) < TAMANHO_SHINGLE:
+            normalizado = normalizado.ljust(TAMANHO_SHINGLE)
+        shingles = {normalizado[i:i + TAMANHO_SHINGLE] for i in range(len(normalizado) - TAMANHO_SHINGLE + 1)}
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIMO for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((self._a * x + self._b) % _PRIMO).min(axis=1).astype(np.uint32)
+
+    def _chaves_bandas(self, contexto, assinatura):
+        linhas = assinatura.reshape(self.bandas, self.linhas_por_banda)
+        return [(contexto, banda, linhas[banda].tobytes()) for banda in range(self.bandas)]
+
+    def adicionar(self, contexto, texto, chave, entradas=None):
+        assinatura = self.assinatura(texto)
+        bandas = self._chaves_bandas(contexto, assinatura)
+        with self._lock:
+            posicao = self._total % self.capacidade
+            self._total += 1
+            antigo = self._registros[posicao]
+            if antigo is not None:
+                for banda in antigo[0]:
+                    balde = self._baldes[banda]
+                    balde.discard(posicao)
+                    if not balde:
+                        del self._baldes[banda]
+            self._assinaturas[posicao] = assinatura
+            self._registros[posicao] = (bandas, chave, entradas or {})
+            for banda in bandas:
+                self._baldes[banda].add(posicao)
+
+    def buscar(self, contexto, texto):
+        """Pedido guardado mais parecido com ``texto`` acima do limiar, ou None."""
+        assinatura = self.assinatura(texto)
+        with self._lock:
+            candidatos = set()
+            for banda in self._chaves_bandas(contexto, assinatura):
+                candidatos.update(self._baldes.get(banda, ()))
+            if not candidatos:
+                return None
+            posicoes = np.fromiter(candidatos, dtype=np.int64, count=len(candidatos))
+            # Fração de posições iguais estima a similaridade de Jaccard entre os conjuntos de n-gramas
+            valores = (self._assinaturas[posicoes] == assinatura).mean(axis=1)
+            melhor = int(valores.argmax())
+            if valores[melhor] < self.limiar:
+                return None
+            _, chave, entradas = self._registros[posicoes[melhor]]
+        return Similar(chave, float(valores[melhor]), entradas)
+
+    def __len__(self):
+        return min(self._total, self.capacidade)
+
+
+class IndicePorFerramenta:
+    """Um índice de similaridade por ferramenta, separando campos livres dos parâmetros exatos."""
+
+    def __init__(self, ferramentas, **kwargs):
+        self._ferramentas = ferramentas
+        self._indices = defaultdict(lambda: IndiceSimilaridade(**kwargs))
+
+    def _separar(self, nome, entradas):
+        ferramenta = self._ferramentas[nome]
+        exatos = tuple(str(entradas.get(campo.nome, "")) for campo in ferramenta.campos if campo.exato)
+        livre = " | ".join(
+            str(entradas.get(campo.nome) or "") for campo in ferramenta.campos if not campo.exato
+        )
+        return exatos, livre
+
+    def adicionar(self, nome, entradas, chave):
+        exatos, livre = self._separar(nome, entradas)
+        self._indices[nome].adicionar(exatos, livre, chave, dict(entradas))
+
+    def buscar(self, nome, entradas):
+        exatos, livre = self._separar(nome, entradas)
+        return self._indices[nome].buscar(exatos, livre)
@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from agendador import ERROS_TRANSITORIOS
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+# Espera antes de repetir uma tarefa que falhou por erro temporário; dobra a cada tentativa
+ESPERA_NOVA_TENTATIVA = 5.0
+
+
+class FilaTarefas:
+    """Fila de tarefas persistida em SQLite e atendida por um pool de workers.
+
+    Cada tarefa guarda o payload necessário para ser reexecutada, então sobrevive a
+    reruns, desconexões do navegador e reinícios do processo: ao iniciar, tarefas que
+    estavam em execução quando o processo morreu voltam para a fila. A recuperação
+    supõe um único processo usando o arquivo de banco.
+
+    Só erros temporários da API (cota, indisponibilidade) são repetidos, depois de uma
+    espera crescente (``disponivel_em``); qualquer outro erro falha a tarefa na hora.
+    """
+
+    def __init__(self, caminho, executar, workers=2, max_tentativas=3, espera_nova_tentativa=ESPERA_NOVA_TENTATIVA):
+        self._executar = executar
+        self.max_tentativas = max_tentativas
+        self.espera_nova_tentativa = espera_nova_tentativa
+        self._lock = threading.Lock()
+        self._nova_tarefa = threading.Event()
+        self._db = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                id TEXT PRIMARY KEY,
+                sessao TEXT NOT NULL,
+                ferramenta TEXT NOT NULL,
+                titulo TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                resultado TEXT,
+                erro TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                criado_em REAL NOT NULL,
+                iniciado_em REAL,
+                concluido_em REAL,
+                disponivel_em REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Bancos criados antes da espera entre tentativas
+        colunas = {linha["name"] for linha in self._db.execute("PRAGMA table_info(tarefas)")}
+        if "disponivel_em" not in colunas:
+            self._db.execute("ALTER TABLE tarefas ADD COLUMN disponivel_em REAL NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tarefas_sessao ON tarefas (sessao, criado_em)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tarefas_status ON tarefas (status, criado_em)")
+        self._recuperar()
+        for i in range(workers):
+            threading.Thread(target=self._trabalhar, name=f"tarefas-{i}", daemon=True).start()
+
+    def enfileirar(self, sessao, ferramenta, titulo, payload):
+        id_tarefa = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO tarefas (id, sessao, ferramenta, titulo, payload, status, criado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (id_tarefa, sessao, ferramenta, titulo, json.dumps(payload, ensure_ascii=False), PENDENTE, time.time()),
+            )
+        self._nova_tarefa.set()
+        return id_tarefa
+
+    def obter(self, id_tarefa):
+        with self._lock:
+            linha = self._db.execute("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,)).fetchone()
+        return _como_dict(linha) if linha else None
+
+    def listar(self, sessao, limite=20):
+        with self._lock:
+            linhas = self._db.execute(
+                "SELECT * FROM tarefas WHERE sessao = ? ORDER BY criado_em DESC LIMIT ?",
+                (sessao, limite),
+            ).fetchall()
+        return [_como_dict(linha) for linha in linhas]
+
+    def _recuperar(self):
+        # Tarefas "executando" num processo que morreu: voltam para a fila ou falham de vez
+        with self._lock:
+            self._db.execute(
+                "UPDATE tarefas SET status = ?, erro = 'interrompida: processo reiniciado', concluido_em = ? "
+                "WHERE status = ? AND tentativas >= ?",
+                (FALHOU, time.time(), EXECUTANDO, self.max_tentativas),
+            )
+            self._db.execute(
+                "UPDATE tarefas SET status = ?, iniciado_em = NULL WHERE status = ?",
+                (PENDENTE, EXECUTANDO),
+            )
+
+    def _reservar(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._db.execute(
+                    "SELECT * FROM tarefas WHERE status = ? AND disponivel_em <= ? ORDER BY criado_em LIMIT 1",
+                    (PENDENTE, time.time()),
+                ).fetchone()
+                if linha is not None:
+                    self._db.execute(
+                        "UPDATE tarefas SET status = ?, iniciado_em = ?, tentativas = tentativas + 1 WHERE id = ?",
+                        (EXECUTANDO, time.time(), linha["id"]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if linha is None:
+            return None
+        tarefa = _como_dict(linha)
+        tarefa["tentativas"] += 1
+        return tarefa
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self._reservar()
+            if tarefa is None:
+                self._nova_tarefa.wait(timeout=1.0)
+                self._nova_tarefa.clear()
+                continue
+            try:
+                resultado = self._executar(tarefa)
+            except ERROS_TRANSITORIOS as erro:
+                if tarefa["tentativas"] < self.max_tentativas:
+                    espera = self.espera_nova_tentativa * 2 ** (tarefa["tentativas"] - 1)
+                    self._atualizar(tarefa["id"], PENDENTE, None, str(erro), disponivel_em=time.time() + espera)
+                else:
+                    self._atualizar(tarefa["id"], FALHOU, None, str(erro))
+            except Exception as erro:
+                # Prompt inválido, erro na ferramenta...: repetir só gastaria outra chamada paga
+                self._atualizar(tarefa["id"], FALHOU, None, f"{type(erro).__name__}: {erro}")
+            else:
+                self._atualizar(tarefa["id"], CONCLUIDA, resultado, None)
+
+    def _atualizar(self, id_tarefa, status, resultado, erro, disponivel_em=0):
+        with self._lock:
+            self._db.execute(
+                "UPDATE tarefas SET status = ?, resultado = ?, erro = ?, concluido_em = ?, disponivel_em = ? "
+                "WHERE id = ?",
+                (status, resultado, erro, time.time() if status != PENDENTE else None, disponivel_em, id_tarefa),
+            )
+
+
+def _como_dict(linha):
+    tarefa = dict(linha)
+    tarefa["payload"] = json.loads(tarefa["payload"])
+    return tarefa
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+# Nenhum teste gasta cota: modelos sem prefixo de provedor viram o simulado
+os.environ.setdefault("AIO_GEMINI_FALSO", "1")
+
+
+@pytest.fixture
+def servidor_local():
+    """Sobe uma ``web.Application`` do aiohttp numa thread própria; devolve a URL base."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runners = []
+
+    def iniciar(app):
+        async def subir():
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            runners.append(runner)
+            return runner.addresses[0][1]
+
+        porta = asyncio.run_coroutine_threadsafe(subir(), loop).result()
+        return f"http://127.0.0.1:{porta}"
+
+    yield iniciar
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class ModeloRoteiro:
+    """Modelo que responde ``responder(prompt)`` depois de ``latencia`` segundos.
+
+    Guarda os prompts recebidos e o pico de chamadas em andamento ao mesmo tempo.
+    """
+
+    model_name = "models/roteiro"
+
+    def __init__(self, responder, latencia=0.0):
+        self.responder = responder
+        self.latencia = latencia
+        self.prompts = []
+        self.em_andamento = 0
+        self.pico = 0
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False):
+        prompt = contents if isinstance(contents, str) else contents[0]
+        self.prompts.append(prompt)
+        self.em_andamento += 1
+        self.pico = max(self.pico, self.em_andamento)
+        try:
+            await asyncio.sleep(self.latencia(prompt) if callable(self.latencia) else self.latencia)
+            texto = self.responder(prompt)
+        finally:
+            self.em_andamento -= 1
+        if not stream:
+            return SimpleNamespace(text=texto, usage_metadata=None)
+        return self._stream(texto)
+
+    async def _stream(self, texto):
+        for linha in texto.splitlines(keepends=True):
+            yield SimpleNamespace(text=linha, usage_metadata=None)
+
+
+@pytest.fixture
+def modelo_roteiro():
+    return ModeloRoteiro
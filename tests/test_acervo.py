@@ -0,0 +1,124 @@
+import acervo
+from acervo import IndiceSite, Pagina, contexto_prompt, dividir_passagens
+
+
+def paginas_base():
+    return [
+        Pagina("/jardim", "Como cuidar do jardim", "Regar as plantas do jardim cedo evita fungos nas folhas."),
+        Pagina("/piscina", "Manutenção de piscina", "O cloro da piscina deve ser medido toda semana."),
+        Pagina("/veiculos", "Veículos", "carro moto bicicleta"),
+    ]
+
+
+def test_indexa_e_busca_por_radical(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    assert indice.adicionar(paginas_base()) == {"novas": 3, "atualizadas": 0, "inalteradas": 0}
+    # "plantas" e "planta" têm o mesmo radical; acentos não importam
+    trechos = indice.buscar("planta no jardim")
+    assert [trecho.url for trecho in trechos] == ["/jardim"]
+    assert trechos[0].titulo == "Como cuidar do jardim"
+    assert indice.buscar("manutencao piscina")[0].url == "/piscina"
+    assert indice.estatisticas()["paginas"] == 3
+
+
+def test_pagina_sem_mudanca_e_pulada(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar(paginas_base())
+    passagens = indice.estatisticas()["passagens"]
+    assert indice.adicionar(paginas_base()) == {"novas": 0, "atualizadas": 0, "inalteradas": 3}
+    assert indice.estatisticas()["passagens"] == passagens
+    assert indice._removidas == 0
+
+
+def test_pagina_alterada_nao_devolve_o_texto_antigo(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar(paginas_base())
+    resultado = indice.adicionar([Pagina("/veiculos", "Veículos", "avião navio trem")])
+    assert resultado == {"novas": 0, "atualizadas": 1, "inalteradas": 0}
+    assert indice.buscar("carro") == []
+    assert [trecho.url for trecho in indice.buscar("navio")] == ["/veiculos"]
+    # Ao reabrir, o índice em memória sai do banco e continua igual
+    reaberto = IndiceSite(str(tmp_path / "acervo.db"))
+    assert reaberto.buscar("carro") == []
+    assert [trecho.url for trecho in reaberto.buscar("navio")] == ["/veiculos"]
+
+
+def test_pagina_alterada_varias_vezes(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    for versao in ("carro moto", "avião navio", "trem metrô", "carro moto"):
+        indice.adicionar([Pagina("/x", "X", versao)])
+    assert [trecho.url for trecho in indice.buscar("carro")] == ["/x"]
+    assert indice.buscar("navio") == []
+    assert indice.buscar("trem") == []
+
+
+def test_compactacao_descarta_as_lapides(tmp_path, monkeypatch):
+    monkeypatch.setattr(acervo, "FRACAO_COMPACTACAO", 0.4)
+    antigos = ["abacaxi", "banana", "caju", "damasco"]
+    novos = ["alface", "brócolis", "couve", "dente"]
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar([
+        Pagina(f"/p{numero}", f"Página {numero}", f"{palavra} comum") for numero, palavra in enumerate(antigos)
+    ])
+    indice.adicionar([Pagina("/p0", "Página 0", f"{novos[0]} comum")])
+    # Uma passagem removida de cinco: abaixo do limite, vira lápide
+    assert indice._removidas == 1
+    indice.adicionar([Pagina(f"/p{numero}", f"Página {numero}", f"{novos[numero]} comum") for numero in (1, 2, 3)])
+    # Acima do limite: o índice em memória é refeito a partir do banco, sem lápides
+    assert indice._removidas == 0
+    assert len(indice._listas["comum"][0]) == 4
+    assert indice.estatisticas() == {"paginas": 4, "passagens": 4, "termos": 5}
+    assert {trecho.url for trecho in indice.buscar("comum", k=10)} == {"/p0", "/p1", "/p2", "/p3"}
+    assert indice.buscar("caju") == []
+    assert [trecho.url for trecho in indice.buscar("couve")] == ["/p2"]
+
+
+def test_ranking_top_k(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar([
+        Pagina("/muito", "Muito", "seo seo seo técnico"),
+        Pagina("/pouco", "Pouco", "seo e marketing de conteúdo para lojas virtuais pequenas"),
+        Pagina("/medio", "Médio", "seo seo marketing"),
+        Pagina("/nada", "Nada", "receitas de bolo"),
+    ])
+    trechos = indice.buscar("seo", k=2)
+    assert [trecho.url for trecho in trechos] == ["/muito", "/medio"]
+    assert trechos[0].pontuacao > trechos[1].pontuacao > 0
+    # Passagens sem nenhum termo da consulta nunca entram, mesmo com k maior
+    assert [trecho.url for trecho in indice.buscar("seo", k=10)] == ["/muito", "/medio", "/pouco"]
+
+
+def test_remover_pagina(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar(paginas_base())
+    indice.remover("/piscina")
+    assert indice.buscar("piscina") == []
+    assert len(indice) == 2
+
+
+def test_sobreposicao_pelo_titulo(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar(paginas_base())
+    trecho, cobertura = indice.sobreposicao("cuidar do jardim")
+    assert trecho.url == "/jardim" and cobertura == 1.0
+    assert indice.sobreposicao("cloro semanal") is None
+
+
+def test_dividir_passagens_respeita_o_tamanho():
+    texto = "\n\n".join(" ".join(["palavra"] * 50) for _ in range(5)) + "\n\n" + " ".join(["longa"] * 300)
+    passagens = dividir_passagens(texto, palavras_por_passagem=120)
+    assert all(len(passagem.split()) <= 120 for passagem in passagens)
+    assert sum(len(passagem.split()) for passagem in passagens) == 550
+
+
+def test_contexto_prompt_limita_palavras(tmp_path):
+    indice = IndiceSite(str(tmp_path / "acervo.db"))
+    indice.adicionar(paginas_base())
+    trechos = indice.buscar("jardim piscina")
+    assert len(trechos) == 2
+    contexto = contexto_prompt(trechos, indice.relacionadas("jardim piscina"), max_palavras=10)
+    # O primeiro trecho sempre entra; o segundo passaria do limite de palavras
+    assert trechos[0].texto in contexto
+    assert trechos[1].texto not in contexto
+    assert f"- [{trechos[1].titulo}]({trechos[1].url})" in contexto
+    assert contexto_prompt([], []) == ""
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import threading
+
+import pytest
+from google.api_core import exceptions
+
+from agendador import Agendador, BaldeTokens, Ticket
+from gemini_falso import ModeloFalso
+
+MODELO = "falso/teste"
+
+
+def agendador(**opcoes):
+    # Backoff curto: os testes medem quantas tentativas houve, não quanto tempo levaram
+    return Agendador({MODELO: (10_000, 10_000_000)}, atraso_base=0.001, atraso_maximo=0.01, **opcoes)
+
+
+def test_balde_limita_e_repoe():
+    balde = BaldeTokens(capacidade=10, por_segundo=1)
+    inicio = balde._atualizado
+    balde.consumir(10, agora=inicio)
+    assert balde.espera(4, agora=inicio) == pytest.approx(4)
+    assert balde.espera(4, agora=inicio + 4) == pytest.approx(0)
+    # Pedido maior que a capacidade espera o balde encher, em vez de ficar para sempre na fila
+    assert balde.espera(50, agora=inicio + 4) == pytest.approx(6)
+
+
+def test_rodizio_entre_sessoes():
+    fila = agendador()
+    ordem = []
+    tickets = [Ticket(sessao, MODELO, 1) for sessao in ("a", "a", "a", "b")]
+    for numero, ticket in enumerate(tickets):
+        ticket.ao_liberar = lambda numero=numero: ordem.append(numero)
+    # Com o lock tomado, o despachante só vê os pedidos depois que todos estão na fila
+    with fila._cond:
+        for ticket in tickets:
+            fila._enfileirar(ticket)
+        assert [fila._posicao(ticket) for ticket in tickets] == [1, 3, 4, 2]
+    for ticket in tickets:
+        assert ticket.liberado.wait(2)
+    assert ordem == [0, 3, 1, 2]
+
+
+def test_repete_erros_transitorios_do_modelo_falso():
+    random.seed(7)
+    modelo = ModeloFalso(MODELO, latencia=0, taxa_erro=0.3)
+    fila = agendador(max_tentativas=10)
+    respostas = [
+        fila.executar(lambda: modelo.generate_content("Pergunta").text, MODELO, sessao=f"s{i % 3}")
+        for i in range(30)
+    ]
+    assert len(respostas) == 30
+    assert fila.estatisticas.novas_tentativas > 0
+    assert fila.estatisticas.falhas == 0
+
+
+def test_desiste_depois_das_tentativas():
+    modelo = ModeloFalso(MODELO, latencia=0, taxa_erro=1.0)
+    fila = agendador(max_tentativas=3)
+    with pytest.raises(exceptions.ResourceExhausted):
+        fila.executar(lambda: modelo.generate_content("Pergunta"), MODELO)
+    assert (fila.estatisticas.despachadas, fila.estatisticas.novas_tentativas, fila.estatisticas.falhas) == (3, 2, 1)
+
+
+def test_erro_nao_transitorio_nao_repete():
+    modelo = ModeloFalso(MODELO, latencia=0, max_candidatos=1)
+    fila = agendador()
+    with pytest.raises(exceptions.InvalidArgument):
+        fila.executar(lambda: modelo.generate_content("Pergunta", {"candidate_count": 2}), MODELO)
+    assert fila.estatisticas.novas_tentativas == 0
+
+
+def test_posicao_na_fila_chega_a_quem_espera():
+    # 1 requisição por minuto: o segundo pedido fica na fila até ser cancelado
+    fila = Agendador({MODELO: (1, 10_000_000)})
+    fila.executar(lambda: None, MODELO, sessao="a")
+    posicoes = []
+
+    async def esperar():
+        tarefa = asyncio.ensure_future(fila.executar_async(
+            lambda: asyncio.sleep(0), MODELO, sessao="b", ao_aguardar=posicoes.append
+        ))
+        await asyncio.sleep(1.2)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+
+    asyncio.run(esperar())
+    assert posicoes and set(posicoes) == {1}
+    # O pedido cancelado sai da fila em vez de gastar a próxima vaga
+    assert fila.tamanho_fila() == 0
+
+
+def test_executar_async_com_modelo_falso():
+    random.seed(3)
+    modelo = ModeloFalso(MODELO, latencia=0.01, taxa_erro=0.3)
+    fila = agendador(max_tentativas=10)
+
+    async def varias():
+        return await asyncio.gather(*(
+            fila.executar_async(lambda: modelo.generate_content_async("Pergunta"), MODELO, sessao=f"s{i % 4}")
+            for i in range(40)
+        ))
+
+    respostas = asyncio.run(varias())
+    assert all(resposta.text for resposta in respostas)
+    assert fila.estatisticas.despachadas == 40 + fila.estatisticas.novas_tentativas
+
+
+def test_sessoes_concorrentes_em_threads():
+    modelo = ModeloFalso(MODELO, latencia=0.01)
+    fila = agendador()
+    resultados = []
+
+    def sessao(nome):
+        for _ in range(5):
+            resultados.append(fila.executar(lambda: modelo.generate_content(nome).text, MODELO, sessao=nome))
+
+    threads = [threading.Thread(target=sessao, args=(f"s{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(resultados) == 40 and fila.tamanho_fila() == 0
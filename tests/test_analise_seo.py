@@ -0,0 +1,125 @@
+import pytest
+
+from analise_seo import ALERTA, OK, PROBLEMA, analisar_conteudo, marcar_diferencas, nivel_legibilidade
+from ferramentas import prompt_validador_seo
+
+GUIA = """# Guia de SEO local
+
+SEO local coloca a sua loja nas buscas do bairro. Cadastre a empresa no mapa.
+
+## Perfil da empresa
+
+Mantenha horários e telefone atualizados.
+
+#### Fotos
+
+- Fachada
+- Interior
+
+| Item | Prazo |
+|---|---|
+"""
+
+
+def test_marcar_diferencas_escapa_todo_o_html():
+    base = "Texto <b>seguro</b> aqui"
+    texto = "Texto <b>seguro</b> <script>alert(1)</script> aqui"
+    marcado = marcar_diferencas(base, texto)
+    assert "<script>" not in marcado
+    assert "<b>" not in marcado
+    assert "&lt;b&gt;seguro&lt;/b&gt;" in marcado
+    assert "<mark>&lt;script&gt;alert(1)&lt;/script&gt;</mark>" in marcado
+
+
+def test_marcar_diferencas_preserva_markdown():
+    base = "## Título\n\n- item um\n- item dois"
+    texto = "## Título\n\n- item um\n- item três"
+    assert marcar_diferencas(base, texto) == "## Título\n\n- item um\n- item <mark>três</mark>"
+
+
+def verificacao(analise, nome):
+    return next(v for v in analise.verificacoes if v.nome == nome)
+
+
+def test_conta_palavras_frases_paragrafos_e_estrutura():
+    analise = analisar_conteudo(GUIA)
+    # Títulos ficam fora da contagem; itens de lista e a linha da tabela encerram frases sem ponto final
+    assert analise.palavras == 24
+    assert analise.frases == 6
+    assert analise.paragrafos == 4
+    assert analise.titulos == {"H1": 1, "H2": 1, "H4": 1}
+    assert analise.saltos_titulos == 1
+    assert (analise.itens_lista, analise.linhas_tabela) == (2, 2)
+    estrutura = verificacao(analise, "Estrutura de títulos")
+    assert estrutura.valor == "H1: 1 · H2: 1 · H4: 1 · 1 salto(s) de nível"
+    assert estrutura.status == ALERTA
+
+
+def test_densidade_ignora_maiusculas_e_acentos():
+    texto = (
+        "Otimizacao de sites novos. " + "Texto comum sobre outro assunto. " * 18
+        + "Enfim a OTIMIZAÇÃO continua firme hoje."
+    )
+    analise = analisar_conteudo(texto, "otimização")
+    assert analise.palavras == 100
+    assert analise.ocorrencias_palavra_chave == 2
+    assert analise.densidade_palavra_chave == pytest.approx(0.02)
+    assert analise.palavra_chave_no_inicio and not analise.palavra_chave_em_titulos
+    assert verificacao(analise, "Densidade da palavra-chave").status == OK
+    assert verificacao(analise, "Palavra-chave em destaque").status == ALERTA
+
+
+def test_palavra_chave_composta_no_titulo_e_no_inicio():
+    analise = analisar_conteudo(GUIA, "SEO local")
+    assert analise.ocorrencias_palavra_chave == 1
+    assert analise.densidade_palavra_chave == pytest.approx(2 / 24)
+    assert analise.palavra_chave_no_inicio and analise.palavra_chave_em_titulos
+    # Acima de 3% é repetição forçada
+    assert verificacao(analise, "Densidade da palavra-chave").status == PROBLEMA
+    assert verificacao(analise, "Palavra-chave em destaque").status == OK
+
+
+def test_legibilidade_pelo_flesch_em_portugues():
+    # 6 palavras, 1 frase; sílabas: A(1) co-mu-ni-ca-ção(5) da(1) em-pre-sa(3) é(1) cla-ra(2) = 13
+    analise = analisar_conteudo("A comunicação da empresa é clara.")
+    assert analise.legibilidade == pytest.approx(248.835 - 1.015 * 6 - 84.6 * 13 / 6)
+    assert nivel_legibilidade(analise.legibilidade) == "fácil"
+    dificil = analisar_conteudo(
+        "A implementação institucional demanda especificações extraordinariamente detalhadas e padronizadas."
+    )
+    assert dificil.legibilidade < 25
+    assert verificacao(dificil, "Legibilidade (Flesch-PT)").status == PROBLEMA
+
+
+def test_paragrafos_longos_e_resposta_para_snippet():
+    resposta = " ".join(["palavra"] * 50) + "."
+    longo = " ".join(["termo"] * 99) + "."
+    analise = analisar_conteudo(f"{resposta}\n\n{longo}\n\nUm.\n\nDois.\n\nFim.")
+    assert analise.palavras_primeiro_paragrafo == 50
+    assert analise.paragrafos_snippet == 1
+    assert analise.paragrafos_longos == pytest.approx(1 / 5)
+    assert verificacao(analise, "Resposta para snippet").status == OK
+    assert verificacao(analise, "Parágrafos longos").status == ALERTA
+
+    sem_resposta = analisar_conteudo(f"{longo}\n\nFim.")
+    assert verificacao(sem_resposta, "Resposta para snippet").status == PROBLEMA
+
+
+def test_pontuacao_e_fatos_para_o_prompt():
+    analise = analisar_conteudo(GUIA, "SEO local")
+    pontos = {OK: 1.0, ALERTA: 0.5, PROBLEMA: 0.0}
+    esperada = round(100 * sum(pontos[v.status] for v in analise.verificacoes) / len(analise.verificacoes))
+    assert analise.pontuacao == esperada
+    linhas = analise.fatos().splitlines()
+    assert linhas[0] == f"- Pontuação técnica local: {esperada}/100"
+    assert "- Tamanho do conteúdo: 24 palavras (problema)" in linhas
+    assert len(linhas) == len(analise.verificacoes) + 1
+    # O validador recebe as medições prontas no prompt
+    assert analise.fatos() in prompt_validador_seo(GUIA, "SEO local", "Artigo")
+
+
+def test_texto_vazio():
+    analise = analisar_conteudo("", "seo")
+    assert (analise.palavras, analise.frases, analise.legibilidade) == (0, 0, 0.0)
+    assert analise.densidade_palavra_chave is None
+    assert verificacao(analise, "Estrutura de títulos").status == PROBLEMA
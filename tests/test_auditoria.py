@@ -0,0 +1,44 @@
+import asyncio
+
+from aiohttp import web
+
+from auditoria import ERRO, OK, auditar
+
+# Página sem problemas, com H1 e imagens só no fim de ~1 MB servido em trechos de 16 KB
+HTML = (
+    "<html><head><title>Guia completo de tênis de corrida para iniciantes</title>"
+    '<meta name="description" content="Como escolher o primeiro tênis de corrida: amortecimento, '
+    'tamanho, peso e quanto investir, com exemplos por tipo de pisada."></head><body>'
+    + "<p>Texto do guia de corrida com várias palavras.</p>" * 20_000
+    + '<h1>Guia de tênis</h1><img src="/a.jpg" alt="Tênis azul"></body></html>'
+).encode()
+
+
+async def em_trechos(requisicao):
+    resposta = web.StreamResponse(headers={"Content-Type": "text/html"})
+    await resposta.prepare(requisicao)
+    for inicio in range(0, len(HTML), 16 * 1024):
+        await resposta.write(HTML[inicio:inicio + 16 * 1024])
+        await asyncio.sleep(0)
+    await resposta.write_eof()
+    return resposta
+
+
+async def grande(requisicao):
+    return web.Response(body=b"x" * (6 * 1024 * 1024), content_type="text/html")
+
+
+def test_pagina_em_trechos_sem_falsos_problemas(servidor_local, tmp_path):
+    app = web.Application()
+    app.add_routes([web.get("/guia", em_trechos), web.get("/grande", grande)])
+    url = servidor_local(app)
+    registros = {}
+
+    contagem = auditar(
+        [f"{url}/guia", f"{url}/grande"], tmp_path,
+        ao_atualizar=lambda registro, _: registros.__setitem__(registro["url"], registro),
+    )
+
+    assert contagem[OK] == 1 and contagem[ERRO] == 1
+    assert registros[f"{url}/guia"]["problemas"] == []
+    assert "maior que" in registros[f"{url}/grande"]["erro"]
@@ -0,0 +1,216 @@
+import re
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions
+
+from agendador import estimar_tokens
+from artigo import SECOES_ARTIGO, gerar_artigo_paralelo
+from blocos import (
+    ORCAMENTO_REDUCAO,
+    TOKENS_POR_BLOCO,
+    dividir_em_blocos,
+    interpretar_ordem,
+    mapear_blocos,
+    reduzir_em_arvore,
+    reescrever_em_blocos,
+    validar_em_blocos,
+)
+from imagem import analisar_trechos
+from llm import ClienteLLM
+
+
+def numero_do_bloco(prompt):
+    return int(re.search(r"bloco (\d+)", prompt).group(1))
+
+
+def test_blocos_no_laco_sem_uma_thread_por_chamada(modelo_roteiro):
+    cliente = ClienteLLM()
+    threads = []
+    modelo = modelo_roteiro(
+        lambda prompt: threads.append(threading.active_count()) or f"resposta {numero_do_bloco(prompt)}",
+        # Blocos de número maior terminam antes: a ordem das respostas não pode depender disso
+        latencia=lambda prompt: 0.05 * (20 - numero_do_bloco(prompt)) / 20,
+    )
+    antes = threading.active_count()
+    progresso = []
+    respostas = mapear_blocos(
+        cliente, modelo, [f"texto {i}" for i in range(20)], lambda indice, bloco: f"bloco {indice}: {bloco}",
+        max_simultaneas=8, ao_concluir_bloco=lambda concluidos, total: progresso.append(
+            (concluidos, total, threading.current_thread() is threading.main_thread())
+        ),
+    )
+    assert respostas == [f"resposta {i}" for i in range(20)]
+    assert progresso == [(concluidos, 20, True) for concluidos in range(1, 21)]
+    assert modelo.pico == 8
+    # Nenhuma thread nova enquanto as chamadas estavam em andamento
+    assert max(threads) <= antes
+
+
+def test_falha_de_um_bloco_cancela_os_demais(modelo_roteiro):
+    def responder(prompt):
+        if numero_do_bloco(prompt) == 0:
+            raise exceptions.InvalidArgument("bloco inválido")
+        return "ok"
+
+    modelo = modelo_roteiro(responder, latencia=lambda prompt: 0.0 if numero_do_bloco(prompt) == 0 else 1.0)
+    inicio = time.monotonic()
+    with pytest.raises(exceptions.InvalidArgument):
+        mapear_blocos(
+            ClienteLLM(), modelo, ["x"] * 10, lambda indice, bloco: f"bloco {indice}", max_simultaneas=2
+        )
+    # O erro chega sem esperar os blocos lentos terminarem
+    assert time.monotonic() - inicio < 0.9
+    time.sleep(0.3)
+    # Os blocos que ainda esperavam vaga foram cancelados sem chegar ao modelo
+    assert len(modelo.prompts) < 5
+
+
+def test_reducao_em_arvore_mantem_a_ordem_dos_blocos(modelo_roteiro):
+    def condensar(prompt):
+        numeros = re.findall(r"^\[\d+\] (.+)$", prompt, re.MULTILINE)
+        return "+".join(numeros)
+
+    modelo = modelo_roteiro(condensar, latencia=0.02)
+    itens = [((indice,), f"r{indice} " + "x" * 400) for indice in range(12)]
+    reduzidos = reduzir_em_arvore(
+        ClienteLLM(), modelo, itens, lambda lista: f"Condense:\n{lista}\n", orcamento=300
+    )
+    # Cada item reduzido cobre blocos consecutivos, e juntos cobrem todos, na ordem
+    assert [indice for indices, _ in reduzidos for indice in indices] == list(range(12))
+    assert all(list(indices) == list(range(indices[0], indices[-1] + 1)) for indices, _ in reduzidos)
+    # Os grupos de uma mesma rodada foram condensados ao mesmo tempo
+    assert modelo.pico > 1
+
+
+def test_trechos_da_imagem_ao_mesmo_tempo(modelo_roteiro):
+    modelo = modelo_roteiro(lambda prompt: re.search(r"trecho (\d+) de", prompt).group(1), latencia=0.05)
+    partes = [{"mime_type": "image/jpeg", "data": bytes([i])} for i in range(4)]
+    assert analisar_trechos(ClienteLLM(), modelo, "Analise", partes) == ["1", "2", "3", "4"]
+    assert modelo.pico == 4
+
+
+def test_secoes_do_artigo_ao_mesmo_tempo(modelo_roteiro):
+    def responder(prompt):
+        secao = re.search(r"\*\*Seção a escrever:\*\* (.+?) \(", prompt)
+        return secao.group(1) if secao else "1. Resumo: tópico"
+
+    modelo = modelo_roteiro(responder, latencia=0.05)
+    concluidas = []
+    resultado = gerar_artigo_paralelo(
+        ClienteLLM(), modelo, "SEO local", "pontos", 800, "Intermediário",
+        ao_concluir_secao=lambda indice, texto: concluidas.append(indice),
+    )
+    assert resultado["texto"].split("\n\n") == [titulo for titulo, _, _ in SECOES_ARTIGO]
+    assert sorted(concluidas) == list(range(len(SECOES_ARTIGO)))
+    assert modelo.pico == len(SECOES_ARTIGO)
+
+
+def secao(numero, paragrafos, frases=15):
+    # ~10 tokens por frase: 10 parágrafos de 15 frases dão ~1500 tokens
+    corpo = "\n\n".join(
+        " ".join(f"Frase {numero}.{paragrafo}.{frase} sobre o tema da seção." for frase in range(frases))
+        for paragrafo in range(paragrafos)
+    )
+    return f"## Seção {numero}\n\n{corpo}"
+
+
+def test_divide_em_titulos_e_paragrafos_dentro_do_orcamento():
+    texto = "\n\n".join([secao(1, 1), secao(2, 1), secao(3, 40), secao(4, 2)])
+    blocos = dividir_em_blocos(texto, max_tokens=500)
+    assert all(estimar_tokens(bloco) <= 500 for bloco in blocos)
+    # Nenhum parágrafo é cortado nem muda de lugar
+    assert [paragrafo for bloco in blocos for paragrafo in bloco.split("\n\n")] == texto.split("\n\n")
+    # Seções pequenas seguidas ficam juntas; a grande é quebrada nos parágrafos
+    assert blocos[0].startswith("## Seção 1") and "## Seção 2" in blocos[0]
+    assert sum("Frase 3." in bloco for bloco in blocos) > 1
+
+
+def test_paragrafo_gigante_e_quebrado_em_frases_e_depois_por_tamanho():
+    frases = " ".join(f"Frase {numero} de um parágrafo sem fim." for numero in range(400))
+    blocos = dividir_em_blocos(frases, max_tokens=200)
+    assert all(estimar_tokens(bloco) <= 200 and bloco.endswith(".") for bloco in blocos)
+    assert " ".join(blocos).split() == frases.split()
+
+    sem_pontuacao = "palavra " * 5000
+    blocos = dividir_em_blocos(sem_pontuacao, max_tokens=200)
+    assert len(blocos) > 1 and all(estimar_tokens(bloco) <= 200 for bloco in blocos)
+
+
+def test_interpretar_ordem():
+    assert interpretar_ordem("TLDR: x\nORDEM: 3, 1, 3, 9, 0\nAÇÕES:\n- y", 4) == [2, 0, 1, 3]
+    assert interpretar_ordem("Sem a linha de ordem", 3) == [0, 1, 2]
+
+
+def responder_reescrita(prompt):
+    trecho = re.search(r"Ele é o trecho (\d+) de", prompt)
+    if trecho:
+        numero = trecho.group(1)
+        return f"## Parte {numero}\n\nTexto reescrito {numero}.\nRESUMO: resumo da parte {numero} " + "x" * 300
+    if "Resuma o conjunto" in prompt:
+        return "resumo condensado " + "y" * 300
+    return "TLDR: o conteúdo inteiro\nORDEM: 3, 1\nAÇÕES:\n- revisar os dados\n- citar as fontes"
+
+
+def test_reescrita_consolida_tldr_ordem_e_acoes(modelo_roteiro):
+    modelo = modelo_roteiro(responder_reescrita)
+    texto = "\n\n".join(secao(numero, 10) for numero in range(1, 4))
+    resultado = reescrever_em_blocos(ClienteLLM(), modelo, texto, "SEO local")
+    assert resultado["blocos"] == 3
+    partes = resultado["texto"].split("\n\n")
+    assert partes[0] == "**TLDR:** o conteúdo inteiro"
+    # A ordem pedida vem primeiro; a parte esquecida pela consolidação vai para o fim
+    titulos = [parte for parte in partes if parte.startswith("## Parte")]
+    assert titulos == ["## Parte 3", "## Parte 1", "## Parte 2"]
+    assert partes[-1] == "- revisar os dados\n- citar as fontes" and partes[-2] == "## Próximos passos"
+    assert "RESUMO:" not in resultado["texto"]
+
+
+def test_prompt_maximo_nao_cresce_com_a_entrada(modelo_roteiro):
+    picos = []
+    for secoes in (12, 120):
+        modelo = modelo_roteiro(responder_reescrita)
+        texto = "\n\n".join(secao(numero, 10) for numero in range(1, secoes + 1))
+        resultado = reescrever_em_blocos(ClienteLLM(), modelo, texto, "SEO local")
+        assert resultado["blocos"] == secoes
+        # Todas as partes chegam ao texto final, uma vez cada
+        assert sorted(re.findall(r"## Parte (\d+)", resultado["texto"]), key=int) == [
+            str(numero) for numero in range(1, secoes + 1)
+        ]
+        picos.append(max(estimar_tokens(prompt) for prompt in modelo.prompts))
+    assert all(pico < max(TOKENS_POR_BLOCO, ORCAMENTO_REDUCAO) + 500 for pico in picos)
+    assert estimar_tokens(texto) > 10 * picos[1]
+
+
+def test_validacao_pondera_pontuacao_e_mantem_tres_problemas(modelo_roteiro):
+    notas = {"1": "PONTUAÇÃO: 90", "2": "PONTUAÇÃO: 30", "3": "Sem nota"}
+
+    def responder(prompt):
+        trecho = re.search(r"Analise o trecho (\d+) de", prompt)
+        if trecho:
+            numero = trecho.group(1)
+            problemas = "\n".join(f"- problema {numero}{letra}: corrigir" for letra in "abcd")
+            return f"{notas[numero]}\nPROBLEMAS:\n{problemas}"
+        return "1. Melhoria urgente consolidada"
+
+    modelo = modelo_roteiro(responder)
+    texto = "\n\n".join([secao(1, 10), secao(2, 8), secao(3, 8)])
+    blocos = dividir_em_blocos(texto)
+    assert len(blocos) == 3
+    resultado = validar_em_blocos(ClienteLLM(), modelo, texto, "seo", "Artigo")
+
+    pesos = [estimar_tokens(bloco) for bloco in blocos]
+    esperada = round((pesos[0] * 90 + pesos[1] * 30) / (pesos[0] + pesos[1]))
+    assert esperada > 60
+    assert resultado["pontuacao"] == esperada
+    assert resultado["pontuacoes"] == [90, 30, None]
+    assert resultado["texto"].startswith(f"### Pontuação geral: {esperada}/100")
+    assert "| 3 | — |" in resultado["texto"]
+    assert resultado["texto"].endswith("1. Melhoria urgente consolidada")
+
+    consolidacao = modelo.prompts[-1]
+    assert f"é {esperada}/100" in consolidacao
+    # Só os 3 primeiros problemas de cada trecho seguem para a consolidação
+    assert "problema 1c" in consolidacao and "problema 1d" not in consolidacao
+    assert "problema 3a" in consolidacao
@@ -0,0 +1,33 @@
+import time
+
+import cache
+from cache import CacheRespostas
+
+
+def test_expiradas_saem_do_disco_ao_abrir(tmp_path):
+    caminho = str(tmp_path / "cache.db")
+    antigo = CacheRespostas(caminho, ttl_disco=60)
+    antigo.guardar("velha", "texto", 1.0, 10)
+    antigo._db.execute("UPDATE respostas SET criado_em = ?", (time.time() - 120,))
+    antigo._db.commit()
+
+    CacheRespostas(caminho, ttl_disco=60)
+    assert antigo._db.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] == 0
+
+
+def test_limite_de_linhas_remove_as_mais_antigas(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "LIMPEZA_A_CADA", 10)
+    respostas = CacheRespostas(str(tmp_path / "cache.db"), max_linhas_disco=5)
+    for indice in range(30):
+        respostas.guardar(f"chave-{indice}", f"texto {indice}", 1.0, 10)
+    # A limpeza roda a cada 10 gravações: depois da 30ª, ficam só as 5 mais recentes
+    chaves = {linha[0] for linha in respostas._db.execute("SELECT chave FROM respostas")}
+    assert chaves == {f"chave-{indice}" for indice in range(25, 30)}
+
+
+def test_limite_de_caracteres(tmp_path):
+    respostas = CacheRespostas(str(tmp_path / "cache.db"), max_caracteres_disco=250)
+    for indice in range(10):
+        respostas.guardar(f"chave-{indice}", "x" * 100, 1.0, 10)
+    assert respostas.limpar_expirados() == 8
+    assert respostas._db.execute("SELECT SUM(LENGTH(texto)) FROM respostas").fetchone()[0] == 200
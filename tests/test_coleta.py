@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from coleta import MESMO_CONTEUDO, NAO_MODIFICADA, RECENTE, REDE, ColetorPaginas
+
+ETAG = '"v1"'
+# O que importa (H1, imagens) fica no fim de uma página de ~1,3 MB, servida em trechos de 16 KB
+HTML = (
+    '<html lang="pt-BR"><head><title>Página longa</title></head><body>'
+    + "<p>Conteúdo da página com várias palavras.</p>" * 30_000
+    + '<h1>Título no fim</h1><img src="/a.jpg" alt="Foto"><img src="/b.jpg"></body></html>'
+).encode()
+
+
+async def em_trechos(requisicao):
+    resposta = web.StreamResponse(headers={"Content-Type": "text/html", "ETag": ETAG})
+    if requisicao.headers.get("If-None-Match") == ETAG:
+        return web.Response(status=304, headers={"ETag": ETAG})
+    await resposta.prepare(requisicao)
+    for inicio in range(0, len(HTML), 16 * 1024):
+        await resposta.write(HTML[inicio:inicio + 16 * 1024])
+        await asyncio.sleep(0)
+    await resposta.write_eof()
+    return resposta
+
+
+async def sem_validadores(requisicao):
+    return web.Response(body=HTML, content_type="text/html")
+
+
+async def grande(requisicao):
+    resposta = web.StreamResponse(headers={"Content-Type": "text/html"})
+    await resposta.prepare(requisicao)
+    for _ in range(6 * 16):
+        await resposta.write(b"<p>" + b"x" * 64 * 1024 + b"</p>")
+    await resposta.write_eof()
+    return resposta
+
+
+@pytest.fixture
+def url(servidor_local):
+    app = web.Application()
+    app.add_routes([web.get("/trechos", em_trechos), web.get("/copia", sem_validadores), web.get("/grande", grande)])
+    return servidor_local(app)
+
+
+@pytest.fixture
+def coletor(tmp_path):
+    coletores = []
+
+    def criar():
+        coletores.append(ColetorPaginas(str(tmp_path / "coleta.db")))
+        return coletores[-1]
+
+    yield criar
+    for aberto in coletores:
+        aberto.fechar()
+
+
+def test_pagina_em_trechos_chega_inteira(url, coletor):
+    coleta = coletor().coletar(f"{url}/trechos")
+    assert coleta.origem == REDE
+    assert ["h1", "Título no fim"] in coleta.fatos.titulos
+    assert (coleta.fatos.imagens, coleta.fatos.imagens_com_alt) == (2, 1)
+    assert coleta.fatos.palavras == 30_000 * 6 + 3
+
+
+def test_revalidacao_e_reaproveitamento(url, coletor):
+    primeiro = coletor()
+    primeiro.coletar(f"{url}/trechos")
+    assert primeiro.coletar(f"{url}/trechos").origem == RECENTE
+
+    # Outro processo com o mesmo banco: sem memória, revalida com If-None-Match
+    segundo = coletor()
+    assert segundo.coletar(f"{url}/trechos").origem == NAO_MODIFICADA
+    # Mesmo HTML em outra URL, sem ETag: os fatos vêm do hash, sem nova análise
+    copia = segundo.coletar(f"{url}/copia")
+    assert copia.origem == MESMO_CONTEUDO
+    assert copia.fatos.url == f"{url}/copia"
+
+
+def test_pagina_acima_do_limite_e_recusada(url, coletor):
+    with pytest.raises(ValueError, match="maior que"):
+        coletor().coletar(f"{url}/grande")
@@ -0,0 +1,27 @@
+from agendador import estimar_tokens
+from ferramentas import FERRAMENTAS
+from produtos import listar_produtos
+
+PRODUTOS_LONGOS = "\n".join(f"Produto {i}: " + f"descrição técnica {i} com recursos e preço. " * 80 for i in range(12))
+
+
+def test_guia_com_um_produto_respeita_o_orcamento():
+    guia = FERRAMENTAS["guia_comprador"]
+    valores = {"product_category": "CRMs", "buyer_profile": "PMEs", "top_products": "Produto único " * 8000}
+    assert not guia.em_blocos(valores)
+    assert guia.tokens_entrada(guia.ajustar(valores)) <= guia.orcamento_tokens
+
+
+def test_guia_em_partes_nao_corta_a_lista():
+    guia = FERRAMENTAS["guia_comprador"]
+    valores = {"product_category": "CRMs", "buyer_profile": "PMEs", "top_products": PRODUTOS_LONGOS}
+    assert guia.em_blocos(valores)
+    assert len(listar_produtos(guia.ajustar(valores)["top_products"])) == 12
+
+
+def test_comparador_sem_produto_b_respeita_o_orcamento():
+    comparador = FERRAMENTAS["comparador_produtos"]
+    valores = {"product_a": "CRM X", "product_b": "", "concorrente": "", "comparison_aspects": "preço " * 30000}
+    assert not comparador.em_blocos(valores)
+    ajustados = comparador.ajustar(valores)
+    assert estimar_tokens(comparador.construir_prompt(**ajustados)) <= comparador.orcamento_tokens
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agendador import Agendador
+from laco import LacoAssincrono, laco_compartilhado
+from llm import ClienteLLM
+
+
+class Desistiu(Exception):
+    pass
+
+
+def test_executar_devolve_futuro_com_o_resultado():
+    laco = LacoAssincrono()
+
+    async def nome_da_thread():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    assert laco.executar(nome_da_thread()).result(timeout=2) == "laco-llm"
+
+
+def test_esperar_entrega_avisos_na_thread_de_quem_chamou():
+    laco = LacoAssincrono()
+    avisos = []
+
+    async def com_avisos(avisar):
+        for posicao in (3, 2, 1, 0):
+            avisar(posicao)
+            await asyncio.sleep(0.1)
+        return "pronto"
+
+    resultado = laco.esperar(com_avisos, lambda posicao: avisos.append((posicao, threading.current_thread().name)))
+    assert resultado == "pronto"
+    assert avisos == [(posicao, threading.main_thread().name) for posicao in (3, 2, 1, 0)]
+
+
+def test_esperar_sem_ao_aguardar_nao_passa_aviso():
+    laco = LacoAssincrono()
+
+    async def sem_avisos(avisar):
+        return avisar
+
+    assert laco.esperar(sem_avisos) is None
+
+
+def test_quem_desiste_cancela_a_corrotina():
+    laco = LacoAssincrono()
+    cancelada = threading.Event()
+
+    async def demorada(avisar):
+        try:
+            while True:
+                avisar(1)
+                await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            cancelada.set()
+            raise
+
+    def desistir(posicao):
+        raise Desistiu
+
+    with pytest.raises(Desistiu):
+        laco.esperar(demorada, desistir)
+    assert cancelada.wait(2)
+
+
+def test_laco_compartilhado_e_unico():
+    assert laco_compartilhado() is laco_compartilhado()
+
+
+def test_pedido_interrompido_na_fila_sai_dela(modelo_roteiro):
+    # 60 requisições por minuto com o balde vazio: uma vaga nova a cada segundo
+    fila = Agendador({"roteiro": (60, 10_000_000)})
+    with fila._cond:
+        fila._baldes_modelo("roteiro")[0].consumir(60, time.monotonic())
+    inicio = time.monotonic()
+    cliente = ClienteLLM(agendador=fila)
+    modelo = modelo_roteiro(lambda prompt: f"resposta {prompt}")
+
+    def desistir(posicao):
+        raise Desistiu
+
+    # Primeiro aviso de posição (depois de ~0,5 s na fila): quem chamou desiste, como num rerun do Streamlit
+    with pytest.raises(Desistiu):
+        cliente.gerar(modelo, "primeiro", ao_aguardar=desistir)
+    time.sleep(0.1)
+    assert fila.tamanho_fila() == 0
+
+    # A vaga do primeiro segundo vai para o pedido seguinte, não para o que desistiu
+    assert cliente.gerar(modelo, "segundo") == "resposta segundo"
+    assert time.monotonic() - inicio < 1.8
+    assert modelo.prompts == ["segundo"]
@@ -0,0 +1,33 @@
+from cache import CacheRespostas, chave_cache
+from gemini_falso import ModeloFalso
+from llm import ClienteLLM
+from metricas import MetricasLLM
+
+
+def cliente_com_cache(tmp_path):
+    return ClienteLLM(cache=CacheRespostas(str(tmp_path / "cache.db")), metricas=MetricasLLM())
+
+
+def test_resposta_da_reserva_fica_na_chave_da_reserva(tmp_path):
+    cliente = cliente_com_cache(tmp_path)
+    lento = ModeloFalso("falso/lento", latencia=2.0, texto="texto do principal")
+    reserva = ModeloFalso("falso/reserva", latencia=0.01, texto="texto da reserva")
+
+    texto = cliente.gerar(lento, "Pergunta", reserva=reserva, atraso_reserva=0.05, ferramenta="gerador_faq")
+    assert texto == "texto da reserva"
+    assert cliente.cache.obter(chave_cache(lento.model_name, "Pergunta")) is None
+    assert cliente.cache.obter(chave_cache(reserva.model_name, "Pergunta")) == "texto da reserva"
+    # Um pedido seguinte ao principal vai à API, em vez de servir o texto do outro modelo
+    lento.latencia = 0.01
+    assert cliente.gerar(lento, "Pergunta", ferramenta="gerador_faq") == "texto do principal"
+
+
+def test_principal_rapido_nao_aciona_a_reserva(tmp_path):
+    cliente = cliente_com_cache(tmp_path)
+    principal = ModeloFalso("falso/principal", latencia=0.01, texto="texto do principal")
+    reserva = ModeloFalso("falso/reserva", latencia=0.01, texto="texto da reserva")
+
+    texto = cliente.gerar(principal, "Pergunta", reserva=reserva, atraso_reserva=1.0, ferramenta="gerador_faq")
+    assert texto == "texto do principal"
+    assert cliente.cache.obter(chave_cache(principal.model_name, "Pergunta")) == "texto do principal"
+    assert cliente.cache.obter(chave_cache(reserva.model_name, "Pergunta")) is None
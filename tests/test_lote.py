@@ -0,0 +1,56 @@
+import pytest
+from google.api_core import exceptions
+
+from lote import ExecucaoLote, executar_lote, id_lote, ler_planilha
+
+PLANILHA = "consulta,palavras\nSEO local,800\nSEO técnico,600\nLink building,900\n"
+
+
+class ClienteContado:
+    """Cliente de teste: conta as gerações e falha nas consultas indicadas."""
+
+    def __init__(self, erros=None):
+        self.prompts = []
+        self.erros = erros or {}
+
+    def gerar(self, modelo, prompt, **opcoes):
+        self.prompts.append(prompt)
+        for consulta, erro in self.erros.items():
+            if consulta in prompt:
+                raise erro
+        return f"Artigo {len(self.prompts)}"
+
+
+def test_lote_com_mesmo_nome_retoma_apos_corrigir_uma_linha(tmp_path):
+    execucao = ExecucaoLote(tmp_path / id_lote("Artigos de março"))
+    cliente = ClienteContado()
+    executar_lote(cliente, None, ler_planilha("lote.csv", PLANILHA.encode()), execucao)
+    assert len(cliente.prompts) == 3
+
+    # Arquivo diferente (uma linha corrigida), mesmo nome de lote: só a linha alterada é gerada
+    corrigida = PLANILHA.replace("SEO técnico,600", "SEO técnico,700").encode()
+    cliente = ClienteContado()
+    registros = executar_lote(
+        cliente, None, ler_planilha("lote-v2.csv", corrigida), ExecucaoLote(tmp_path / id_lote("Artigos de março"))
+    )
+    assert len(cliente.prompts) == 1
+    assert [registro["status"] for registro in registros] == ["reaproveitada", "concluida", "reaproveitada"]
+
+
+def test_so_erros_transitorios_sao_repetidos(tmp_path, monkeypatch):
+    monkeypatch.setattr("lote.time.sleep", lambda segundos: None)
+    cliente = ClienteContado({
+        "SEO local": exceptions.ServiceUnavailable("fora do ar"),
+        "SEO técnico": exceptions.InvalidArgument("prompt inválido"),
+    })
+    registros = executar_lote(
+        cliente, None, ler_planilha("lote.csv", PLANILHA.encode()), ExecucaoLote(tmp_path), tentativas=3
+    )
+    assert [(registro["status"], registro["tentativas"]) for registro in registros] == [
+        ("falhou", 3), ("falhou", 1), ("concluida", 1)
+    ]
+
+
+def test_xls_e_recusado():
+    with pytest.raises(ValueError, match=".xlsx"):
+        ler_planilha("antiga.xls", b"\xd0\xcf\x11\xe0")
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import socket
+
+import openai
+import pytest
+from aiohttp import web
+from google.api_core import exceptions
+
+from openai_compativel import ModeloOpenAI
+
+COMPLETA = {
+    "id": "c1", "object": "chat.completion", "created": 0, "model": "llama",
+    "choices": [
+        {"index": 0, "message": {"role": "assistant", "content": "primeira"}, "finish_reason": "stop"},
+        {"index": 1, "message": {"role": "assistant", "content": "segunda"}, "finish_reason": "stop"},
+    ],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17},
+}
+
+
+def servidor_chat(servidor_local, status=200, corpo=None, espera=0.0, pedidos=None):
+    async def completions(request):
+        pedido = await request.json()
+        if pedidos is not None:
+            pedidos.append(pedido)
+        await asyncio.sleep(espera)
+        if status != 200:
+            return web.json_response({"error": {"message": f"erro {status}", "type": "x"}}, status=status)
+        if pedido.get("stream"):
+            resposta = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await resposta.prepare(request)
+            base = {"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "llama"}
+            for texto in ("Olá", ", mundo"):
+                trecho = {**base, "choices": [{"index": 0, "delta": {"content": texto}}]}
+                await resposta.write(f"data: {json.dumps(trecho)}\n\n".encode())
+            uso = {**base, "choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}
+            await resposta.write(f"data: {json.dumps(uso)}\n\ndata: [DONE]\n\n".encode())
+            return resposta
+        return web.json_response(corpo or COMPLETA)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    return servidor_local(app) + "/v1"
+
+
+def test_resposta_completa_e_parametros(servidor_local):
+    pedidos = []
+    modelo = ModeloOpenAI("llama", base_url=servidor_chat(servidor_local, pedidos=pedidos))
+    resposta = modelo.generate_content(
+        ["Descreva a imagem", {"mime_type": "image/jpeg", "data": b"\xff\xd8"}],
+        generation_config={"temperature": 0.2, "max_output_tokens": 100, "candidate_count": 2, "top_k": 5},
+    )
+    assert resposta.text == "primeira"
+    assert [candidato.content.parts[0].text for candidato in resposta.candidates] == ["primeira", "segunda"]
+    assert (resposta.usage_metadata.prompt_token_count, resposta.usage_metadata.candidates_token_count) == (12, 5)
+    pedido = pedidos[0]
+    assert pedido["model"] == "llama"
+    assert (pedido["temperature"], pedido["max_tokens"], pedido["n"]) == (0.2, 100, 2)
+    # Parâmetros sem equivalente na API de chat não são enviados
+    assert "top_k" not in pedido
+    partes = pedido["messages"][0]["content"]
+    assert partes[0] == {"type": "text", "text": "Descreva a imagem"}
+    assert partes[1]["image_url"]["url"] == "data:image/jpeg;base64,/9g="
+    assert modelo.model_name == "openai/llama"
+
+
+def test_stream_assincrono(servidor_local):
+    modelo = ModeloOpenAI("llama", base_url=servidor_chat(servidor_local))
+
+    async def ler():
+        resposta = await modelo.generate_content_async("Oi", stream=True)
+        return [trecho async for trecho in resposta]
+
+    trechos = asyncio.run(ler())
+    assert "".join(trecho.text for trecho in trechos) == "Olá, mundo"
+    # O uso chega no último trecho, sem texto, como no Gemini
+    assert trechos[-1].text == ""
+    assert trechos[-1].usage_metadata.candidates_token_count == 2
+
+
+@pytest.mark.parametrize("status, esperado", [
+    (429, exceptions.ResourceExhausted),
+    (500, exceptions.InternalServerError),
+    (400, exceptions.InvalidArgument),
+    (401, exceptions.Unauthenticated),
+    (403, exceptions.PermissionDenied),
+    (404, exceptions.NotFound),
+    (422, exceptions.Unknown),
+])
+def test_erros_http_viram_excecoes_do_google(servidor_local, status, esperado):
+    modelo = ModeloOpenAI("llama", base_url=servidor_chat(servidor_local, status=status))
+    with pytest.raises(esperado) as erro:
+        modelo.generate_content("Oi")
+    assert isinstance(erro.value.__cause__, openai.OpenAIError)
+    with pytest.raises(esperado):
+        asyncio.run(modelo.generate_content_async("Oi"))
+
+
+def test_tempo_esgotado(servidor_local):
+    modelo = ModeloOpenAI("llama", base_url=servidor_chat(servidor_local, espera=2.0), timeout=0.2)
+    with pytest.raises(exceptions.DeadlineExceeded):
+        modelo.generate_content("Oi")
+
+
+def test_servidor_fora_do_ar():
+    with socket.socket() as livre:
+        livre.bind(("127.0.0.1", 0))
+        porta = livre.getsockname()[1]
+    modelo = ModeloOpenAI("llama", base_url=f"http://127.0.0.1:{porta}/v1")
+    with pytest.raises(exceptions.ServiceUnavailable):
+        modelo.generate_content("Oi")
@@ -0,0 +1,116 @@
+import os
+import time
+
+import mongomock
+import mongomock.gridfs
+import pytest
+from pymongo.errors import PyMongoError
+
+from repositorio import LIMITE_CORPO, RepositorioConteudo, cliente_mongo
+
+mongomock.gridfs.enable_gridfs_integration()
+
+
+@pytest.fixture
+def repositorio():
+    repositorio = RepositorioConteudo(mongomock.MongoClient()["aio_teste"], intervalo=0.05)
+    repositorio.criar_indices()
+    return repositorio
+
+
+def test_grava_e_le_geracao_comprimida(repositorio):
+    texto = "Parágrafo do guia de SEO local. " * 200
+    repositorio.registrar(
+        "construtor_paginas", "SEO local", texto, {"target_query": "SEO local", "word_count": 800},
+        cliente="acme", sessao="s1", modelo="gemini-1.5-flash", duracao=1.5, tokens_prompt=120,
+        tokens_resposta=900, artefatos={"print.png": b"\x89PNG" + b"0" * 1000},
+    )
+    repositorio.descarregar()
+
+    [resumo] = repositorio.buscar(cliente="acme")
+    # A listagem não traz o corpo nem as entradas
+    assert "corpo" not in resumo and "entradas" not in resumo
+    assert (resumo["ferramenta"], resumo["tokens_resposta"], resumo["caracteres"]) == (
+        "construtor_paginas", 900, len(texto)
+    )
+
+    completa = repositorio.obter(str(resumo["_id"]))
+    assert completa["texto"] == texto
+    assert completa["entradas"] == {"target_query": "SEO local", "word_count": 800}
+    assert repositorio.artefato(completa["artefatos"]["print_png"]).startswith(b"\x89PNG")
+    documento = repositorio.geracoes.find_one({"_id": resumo["_id"]})
+    assert len(documento["corpo"]) < len(texto.encode("utf-8")) / 10
+
+
+def test_corpo_grande_vai_para_o_gridfs(repositorio):
+    # Texto que não comprime: passa do limite de um documento
+    texto = os.urandom(LIMITE_CORPO).hex()
+    repositorio.registrar("reescritor_conteudo", "texto longo", texto)
+    repositorio.descarregar()
+    [resumo] = repositorio.buscar(ferramenta="reescritor_conteudo")
+    documento = repositorio.geracoes.find_one({"_id": resumo["_id"]})
+    assert "corpo" not in documento and "corpo_gridfs" in documento
+    assert repositorio.obter(str(resumo["_id"]))["texto"] == texto
+
+
+def test_filtros_por_ferramenta_cliente_e_data(repositorio):
+    for cliente, ferramenta in (("acme", "gerador_faq"), ("acme", "guia_comprador"), ("beta", "gerador_faq")):
+        repositorio.registrar(ferramenta, "consulta", "texto", cliente=cliente)
+    repositorio.descarregar()
+    assert len(repositorio.buscar(ferramenta="gerador_faq")) == 2
+    assert len(repositorio.buscar(cliente="acme", ferramenta="gerador_faq")) == 1
+    assert repositorio.buscar(desde=time.time() + 60) == []
+    datas = [geracao["criado_em"] for geracao in repositorio.buscar()]
+    assert datas == sorted(datas, reverse=True)
+
+
+def test_indices_compostos_e_de_texto(repositorio):
+    indices = repositorio.geracoes.index_information()
+    assert indices["cliente_1_ferramenta_1_criado_em_-1"]["key"] == [
+        ("cliente", 1), ("ferramenta", 1), ("criado_em", -1)
+    ]
+    assert "busca_texto" in indices
+
+
+def test_gravacao_em_lotes(repositorio, monkeypatch):
+    lotes = []
+    inserir = repositorio.geracoes.insert_many
+    monkeypatch.setattr(
+        repositorio.geracoes, "insert_many",
+        lambda documentos, **opcoes: (lotes.append(len(documentos)), inserir(documentos, **opcoes))[1],
+    )
+    # Enfileirar não espera o banco: tudo sai em poucos insert_many na thread de gravação
+    for indice in range(250):
+        repositorio.registrar("gerador_faq", f"pergunta {indice}", "resposta")
+    repositorio.descarregar()
+    assert sum(lotes) == 250
+    assert len(lotes) <= 5 and max(lotes) <= 100
+
+
+def test_falha_do_banco_nao_trava_a_fila(repositorio, monkeypatch):
+    def falhar(documentos, **opcoes):
+        raise PyMongoError("banco fora do ar")
+
+    monkeypatch.setattr(repositorio.geracoes, "insert_many", falhar)
+    repositorio.registrar("gerador_faq", "pergunta", "resposta")
+    repositorio.descarregar()
+    assert repositorio.geracoes.count_documents({}) == 0
+
+
+def test_cliente_mongo_unico_por_uri():
+    uri = "mongodb://localhost:1/?connect=false"
+    assert cliente_mongo(uri) is cliente_mongo(uri)
+
+
+@pytest.mark.skipif(not os.getenv("MONGO_URI_TESTE"), reason="busca por texto exige um mongod (MONGO_URI_TESTE)")
+def test_busca_por_texto_com_mongod():
+    cliente = cliente_mongo(os.environ["MONGO_URI_TESTE"])
+    cliente.drop_database("aio_teste")
+    repositorio = RepositorioConteudo(cliente["aio_teste"], intervalo=0.05)
+    repositorio.criar_indices()
+    repositorio.registrar("gerador_faq", "Como integrar o CRM com o WhatsApp", "Passo a passo da integração.")
+    repositorio.registrar("gerador_faq", "Quanto custa um site", "Preços de sites institucionais.")
+    repositorio.descarregar()
+    [geracao] = repositorio.buscar(texto="whatsapp")
+    assert geracao["consulta"] == "Como integrar o CRM com o WhatsApp"
+    cliente.drop_database("aio_teste")
@@ -0,0 +1,89 @@
+import pytest
+
+from metricas import OK, MetricasLLM, RegistroChamada
+from roteador import RAPIDO, ROBUSTO, Roteador
+
+
+def previsao_padrao(espera, tokens_por_segundo, tokens_entrada, tokens_saida):
+    return espera + tokens_entrada / 5000 + tokens_saida / tokens_por_segundo
+
+
+def test_pedido_curto_vai_para_o_rapido_com_o_robusto_de_reserva():
+    decisao = Roteador().escolher("gerador_faq", 500, 300)
+    assert (decisao.modelo, decisao.motivo) == (RAPIDO, "curta")
+    assert decisao.prevista == round(previsao_padrao(0.8, 180, 500, 300), 2)
+    assert decisao.reserva == ROBUSTO
+    assert decisao.atraso_reserva == round(decisao.prevista * 1.5, 2)
+
+
+def test_ferramenta_que_prefere_o_robusto():
+    decisao = Roteador().escolher("construtor_paginas", 500, 300, preferido=ROBUSTO)
+    assert (decisao.modelo, decisao.motivo, decisao.reserva) == (ROBUSTO, "ferramenta", RAPIDO)
+
+
+@pytest.mark.parametrize("entrada, saida, modelo, motivo", [
+    (500, 1799, RAPIDO, "curta"),
+    (500, 1800, ROBUSTO, "saida_longa"),
+    (4999, 300, RAPIDO, "curta"),
+    (5000, 300, ROBUSTO, "entrada_longa"),
+])
+def test_limiares_de_tamanho(entrada, saida, modelo, motivo):
+    decisao = Roteador().escolher("gerador_faq", entrada, saida)
+    assert (decisao.modelo, decisao.motivo) == (modelo, motivo)
+
+
+def test_slo_apertado_troca_o_robusto_pelo_rapido():
+    # Robusto previsto em ~27,8s para 1.800 tokens de saída; o rápido em ~10,9s
+    decisao = Roteador(slos={"gerador_faq": 15}).escolher("gerador_faq", 500, 1800)
+    assert (decisao.modelo, decisao.motivo, decisao.slo) == (RAPIDO, "slo", 15)
+    assert decisao.prevista == round(previsao_padrao(0.8, 180, 500, 1800), 2)
+    # O SLO da ferramenta (Ferramenta.slo) vale quando não há um configurado
+    assert Roteador().escolher("gerador_faq", 500, 1800, slo=15).motivo == "slo"
+    assert Roteador().escolher("gerador_faq", 500, 1800, slo=60).modelo == ROBUSTO
+
+
+def test_historico_de_vazao_substitui_os_valores_padrao():
+    metricas = MetricasLLM()
+    for _ in range(5):
+        metricas.registrar(RegistroChamada("gerador_faq", ROBUSTO, OK, False, duracao=2.0, tokens_resposta=2000))
+    roteador = Roteador(slos={"gerador_faq": 15}, metricas=metricas)
+    # 1.000 tokens/s observados: o robusto cabe no SLO e continua com o pedido longo
+    decisao = roteador.escolher("gerador_faq", 500, 1800)
+    assert (decisao.modelo, decisao.motivo) == (ROBUSTO, "saida_longa")
+    assert decisao.prevista == round(500 / 5000 + 1800 / 1000, 2)
+    # A reserva parte no p95 observado da ferramenta nesse modelo
+    assert decisao.atraso_reserva == 2.0
+
+
+def test_poucas_amostras_nao_contam():
+    metricas = MetricasLLM()
+    for _ in range(4):
+        metricas.registrar(RegistroChamada("gerador_faq", ROBUSTO, OK, False, duracao=2.0, tokens_resposta=2000))
+    decisao = Roteador(slos={"gerador_faq": 15}, metricas=metricas).escolher("gerador_faq", 500, 1800)
+    assert decisao.motivo == "slo"
+
+
+def test_sem_reserva():
+    assert Roteador(reserva=False).escolher("gerador_faq", 500, 300).reserva is None
+    # Com o mesmo modelo nas duas faixas não há para onde repetir a chamada
+    assert Roteador(rapido="falso/x", robusto="falso/x").escolher("gerador_faq", 500, 300).reserva is None
+
+
+def test_faixa_segue_os_modelos_configurados():
+    roteador = Roteador(rapido="openai/llama", robusto="openai/qwen")
+    assert roteador.faixa(ROBUSTO) == "openai/qwen"
+    assert roteador.faixa("openai/qwen") == "openai/qwen"
+    assert roteador.faixa(RAPIDO) == "openai/llama"
+    assert roteador.faixa(None) == "openai/llama"
+    assert roteador.escolher("gerador_faq", 500, 300, preferido=ROBUSTO).modelo == "openai/qwen"
+
+
+def test_do_ambiente(monkeypatch):
+    monkeypatch.setenv("AIO_MODELO_RAPIDO", "falso/rapido")
+    monkeypatch.setenv("AIO_MODELO_ROBUSTO", "falso/robusto")
+    monkeypatch.setenv("AIO_SLO", '{"gerador_faq": 12}')
+    monkeypatch.setenv("AIO_RESERVA", "0")
+    roteador = Roteador.do_ambiente()
+    assert (roteador.rapido, roteador.robusto, roteador.slos, roteador.reserva) == (
+        "falso/rapido", "falso/robusto", {"gerador_faq": 12}, False
+    )
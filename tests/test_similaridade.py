@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from ferramentas import FERRAMENTAS
+from similaridade import IndicePorFerramenta, IndiceSimilaridade
+
+PEDIDO = {
+    "target_query": "SEO em 2025",
+    "key_points": "Pesquisa por voz, respostas diretas e dados estruturados",
+    "word_count": 800,
+    "reading_level": "Intermediário",
+}
+
+
+def test_pedido_quase_identico_devolve_o_guardado():
+    indice = IndicePorFerramenta(FERRAMENTAS)
+    indice.adicionar("construtor_paginas", PEDIDO, "chave-1")
+    similar = indice.buscar("construtor_paginas", {**PEDIDO, "target_query": "SEO 2025"})
+    assert similar is not None
+    assert similar.chave == "chave-1"
+    assert similar.similaridade >= 0.75
+    # As entradas guardadas permitem mostrar de qual pedido veio o resultado
+    assert similar.entradas["target_query"] == "SEO em 2025"
+
+    maiusculas = indice.buscar("construtor_paginas", {**PEDIDO, "key_points": PEDIDO["key_points"].upper()})
+    assert maiusculas is not None and maiusculas.similaridade == 1.0
+
+
+def test_parametros_exatos_e_ferramentas_separam_os_pedidos():
+    indice = IndicePorFerramenta(FERRAMENTAS)
+    indice.adicionar("construtor_paginas", PEDIDO, "chave-1")
+    assert indice.buscar("construtor_paginas", {**PEDIDO, "word_count": 1500}) is None
+    assert indice.buscar("construtor_paginas", {**PEDIDO, "reading_level": "Avançado"}) is None
+
+    pergunta = {"faq_question": "Como fazer SEO local?", "technical_level": "Leigo", "steps_needed": 3}
+    indice.adicionar("gerador_faq", pergunta, "chave-faq")
+    assert indice.buscar("gerador_faq", pergunta).chave == "chave-faq"
+    assert indice.buscar("construtor_paginas", {**PEDIDO, "target_query": pergunta["faq_question"]}) is None
+
+
+def test_pedido_diferente_nao_e_encontrado():
+    indice = IndicePorFerramenta(FERRAMENTAS)
+    indice.adicionar("construtor_paginas", PEDIDO, "chave-1")
+    outro = {**PEDIDO, "target_query": "Receitas de bolo de cenoura", "key_points": "Massa fofa e cobertura"}
+    assert indice.buscar("construtor_paginas", outro) is None
+
+
+def test_capacidade_descarta_os_mais_antigos():
+    indice = IndiceSimilaridade(capacidade=3)
+    textos = ["marketing digital para lojas", "receita de pão caseiro", "viagem barata pela europa",
+              "treino de corrida para iniciantes"]
+    for numero, texto in enumerate(textos):
+        indice.adicionar((), texto, f"chave-{numero}")
+    assert len(indice) == 3
+    assert indice.buscar((), textos[0]) is None
+    assert [indice.buscar((), texto).chave for texto in textos[1:]] == ["chave-1", "chave-2", "chave-3"]
+
+
+def test_busca_abaixo_de_um_milissegundo():
+    aleatorio = random.Random(7)
+    silabas = ("ma", "ke", "ti", "co", "nte", "do", "se", "ven", "das", "pre", "tra", "fe", "go", "re", "so", "ci")
+    palavras = ["".join(aleatorio.choices(silabas, k=aleatorio.randint(2, 4))) for _ in range(3000)]
+    guardados = [" ".join(aleatorio.choices(palavras, k=aleatorio.randint(4, 12))) for _ in range(20_000)]
+    indice = IndiceSimilaridade(capacidade=len(guardados))
+    for numero, texto in enumerate(guardados):
+        indice.adicionar((), texto, f"chave-{numero}")
+
+    tempos, achados = [], 0
+    for texto in aleatorio.sample(guardados, 200):
+        inicio = time.perf_counter()
+        achados += indice.buscar((), f"dicas: {texto}") is not None
+        tempos.append(time.perf_counter() - inicio)
+    # Pedidos de poucas palavras mudam mais com uma palavra a mais e às vezes ficam abaixo do limiar
+    assert achados >= 190
+    # A busca só compara os candidatos das bandas, não o índice inteiro (benchmarks/similaridade.py mede 100 mil)
+    assert statistics.median(tempos) < 0.001
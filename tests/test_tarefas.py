@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions
+
+from tarefas import CONCLUIDA, EXECUTANDO, FALHOU, FilaTarefas
+
+
+def esperar_status(fila, id_tarefa, status, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        tarefa = fila.obter(id_tarefa)
+        if tarefa["status"] in status:
+            return tarefa
+        time.sleep(0.02)
+    pytest.fail(f"tarefa {id_tarefa} continuou {fila.obter(id_tarefa)['status']}")
+
+
+def test_enfileirar_e_acompanhar(tmp_path):
+    liberar = threading.Event()
+
+    def executar(tarefa):
+        liberar.wait(5)
+        return f"texto para {tarefa['payload']['prompt']}"
+
+    fila = FilaTarefas(str(tmp_path / "tarefas.db"), executar, workers=1)
+    id_tarefa = fila.enfileirar("sessao-1", "gerador_faq", "Pergunta", {"prompt": "Como medir SEO?"})
+    tarefa = esperar_status(fila, id_tarefa, {EXECUTANDO})
+    assert tarefa["payload"] == {"prompt": "Como medir SEO?"}
+    assert tarefa["tentativas"] == 1
+    liberar.set()
+    tarefa = esperar_status(fila, id_tarefa, {CONCLUIDA})
+    assert tarefa["resultado"] == "texto para Como medir SEO?"
+    assert tarefa["erro"] is None and tarefa["concluido_em"] is not None
+    assert fila.obter("inexistente") is None
+
+
+def test_listar_por_sessao(tmp_path):
+    fila = FilaTarefas(str(tmp_path / "tarefas.db"), lambda tarefa: "ok", workers=0)
+    primeira = fila.enfileirar("sessao-1", "gerador_faq", "A", {})
+    fila.enfileirar("sessao-2", "gerador_faq", "B", {})
+    segunda = fila.enfileirar("sessao-1", "expansor_topicos", "C", {})
+    # Da mais recente para a mais antiga, só as da sessão
+    assert [tarefa["id"] for tarefa in fila.listar("sessao-1")] == [segunda, primeira]
+    assert [tarefa["id"] for tarefa in fila.listar("sessao-1", limite=1)] == [segunda]
+    assert fila.listar("sessao-3") == []
+
+
+def test_recupera_tarefas_de_um_processo_que_morreu(tmp_path):
+    caminho = str(tmp_path / "tarefas.db")
+    antiga = FilaTarefas(caminho, lambda tarefa: "nunca", workers=0, max_tentativas=2)
+    interrompida = antiga.enfileirar("sessao-1", "gerador_faq", "Interrompida", {})
+    esgotada = antiga.enfileirar("sessao-1", "gerador_faq", "Esgotada", {})
+    # Reservadas como por um worker, sem nunca terminar: o processo "morre" aqui
+    assert antiga._reservar()["id"] == interrompida
+    antiga._db.execute("UPDATE tarefas SET tentativas = 2, status = ? WHERE id = ?", (EXECUTANDO, esgotada))
+
+    nova = FilaTarefas(caminho, lambda tarefa: "retomada", workers=1, max_tentativas=2)
+    assert esperar_status(nova, interrompida, {CONCLUIDA})["resultado"] == "retomada"
+    falhou = nova.obter(esgotada)
+    assert falhou["status"] == FALHOU
+    assert "interrompida" in falhou["erro"]
+
+
+def test_erro_permanente_falha_sem_repetir(tmp_path):
+    chamadas = []
+
+    def executar(tarefa):
+        chamadas.append(tarefa["id"])
+        raise exceptions.InvalidArgument("prompt inválido")
+
+    fila = FilaTarefas(str(tmp_path / "tarefas.db"), executar, workers=1, max_tentativas=3)
+    id_tarefa = fila.enfileirar("sessao-1", "gerador_faq", "Ruim", {})
+    tarefa = esperar_status(fila, id_tarefa, {FALHOU})
+    assert tarefa["tentativas"] == 1
+    assert "InvalidArgument" in tarefa["erro"]
+    time.sleep(0.2)
+    assert chamadas == [id_tarefa]
+
+
+def test_erro_temporario_repete_depois_da_espera(tmp_path):
+    momentos = []
+
+    def executar(tarefa):
+        momentos.append(time.monotonic())
+        if len(momentos) < 3:
+            raise exceptions.ResourceExhausted("429 cota")
+        return "ok"
+
+    fila = FilaTarefas(str(tmp_path / "tarefas.db"), executar, workers=2, max_tentativas=3, espera_nova_tentativa=0.3)
+    id_tarefa = fila.enfileirar("sessao-1", "gerador_faq", "Cota", {})
+    tarefa = esperar_status(fila, id_tarefa, {CONCLUIDA, FALHOU}, timeout=10)
+    assert tarefa["status"] == CONCLUIDA and tarefa["tentativas"] == 3
+    # Espera de 0,3s antes da 2ª tentativa e de 0,6s antes da 3ª
+    assert momentos[1] - momentos[0] >= 0.3
+    assert momentos[2] - momentos[1] >= 0.6
+
+
+def test_erro_temporario_esgota_as_tentativas(tmp_path):
+    def executar(tarefa):
+        raise exceptions.ServiceUnavailable("503")
+
+    fila = FilaTarefas(str(tmp_path / "tarefas.db"), executar, workers=1, max_tentativas=2, espera_nova_tentativa=0.05)
+    id_tarefa = fila.enfileirar("sessao-1", "gerador_faq", "Fora do ar", {})
+    tarefa = esperar_status(fila, id_tarefa, {FALHOU}, timeout=10)
+    assert tarefa["tentativas"] == 2
+    assert "503" in tarefa["erro"]
+
+
+def test_banco_antigo_ganha_a_coluna_de_espera(tmp_path):
+    caminho = str(tmp_path / "tarefas.db")
+    banco = sqlite3.connect(caminho)
+    banco.execute("""
+        CREATE TABLE tarefas (
+            id TEXT PRIMARY KEY, sessao TEXT NOT NULL, ferramenta TEXT NOT NULL, titulo TEXT NOT NULL,
+            payload TEXT NOT NULL, status TEXT NOT NULL, resultado TEXT, erro TEXT,
+            tentativas INTEGER NOT NULL DEFAULT 0, criado_em REAL NOT NULL, iniciado_em REAL, concluido_em REAL
+        )
+    """)
+    banco.execute(
+        "INSERT INTO tarefas VALUES ('antiga', 's', 'gerador_faq', 'T', '{}', 'pendente', NULL, NULL, 0, 1, NULL, NULL)"
+    )
+    banco.commit()
+    banco.close()
+
+    fila = FilaTarefas(caminho, lambda tarefa: "feita", workers=1)
+    assert esperar_status(fila, "antiga", {CONCLUIDA})["resultado"] == "feita"
@@ -0,0 +1,104 @@
+from ferramentas import FERRAMENTAS
+from tokens import comprimir
+
+ARTIGO = """# Guia de privacidade para sites
+
+## O que são cookies de terceiros?
+
+Cookies de terceiros são arquivos gravados por domínios diferentes do site visitado. Eles permitem
+rastrear o visitante entre sites e alimentam a maior parte da publicidade segmentada.
+
+## Publicidade programática em 2025
+
+A publicidade programática compra espaço de anúncio em leilões automáticos. Sem cookies de terceiros,
+os compradores dependem de dados primários e de contexto.
+
+## Compartilhe dados com cuidado
+
+Leia mais sobre consentimento antes de compartilhar dados de clientes com parceiros.
+"""
+
+PAGINA_COPIADA = """Pular para o conteúdo
+Menu
+Home
+Aceitar todos os cookies
+# Como escolher um CRM
+Um CRM organiza contatos, negociações e tarefas da equipe comercial.
+Compartilhe
+Leia também:
+© 2024 Empresa - Todos os direitos reservados
+Voltar ao topo
+"""
+
+
+def test_prosa_real_sobrevive():
+    comprimido = comprimir(ARTIGO)
+    for linha in ARTIGO.splitlines():
+        if linha.strip():
+            assert linha.strip() in comprimido
+
+
+def test_remove_linhas_inteiras_de_boilerplate():
+    comprimido = comprimir(PAGINA_COPIADA)
+    assert comprimido == "# Como escolher um CRM\nUm CRM organiza contatos, negociações e tarefas da equipe comercial."
+
+
+def test_titulos_de_boilerplate_continuam():
+    assert comprimir("## Publicidade\n\nTexto.") == "## Publicidade\n\nTexto."
+
+
+def test_nunca_devolve_vazio():
+    assert comprimir("Publicidade\nMenu") == "Publicidade\nMenu"
+
+
+TABELA = """| Plano | Preço | Usuários |
+|---|---|---|
+| Básico | R$ 49 | 3 |
+| Pro | R$ 99 | 10 |
+"""
+
+
+def linhas_de_tabela(texto):
+    return [linha for linha in texto.splitlines() if linha.startswith("|")]
+
+
+def test_tabelas_repetidas_continuam_validas():
+    secoes = [
+        f"## Loja {numero}\n\nA loja {numero} vende planos mensais para equipes de vendas. "
+        "Todos os planos incluem suporte por e-mail.\n\n" + TABELA
+        for numero in range(4)
+    ]
+    texto = "\n".join(secoes)
+    comprimido = comprimir(texto)
+    # As quatro tabelas continuam com cabeçalho, separadora e linhas, na ordem original
+    assert linhas_de_tabela(comprimido) == linhas_de_tabela(texto)
+    assert comprimido.count("|---|---|---|") == 4
+    for numero in range(4):
+        assert f"## Loja {numero}\n\nA loja {numero} vende planos" in comprimido
+    # A frase repetida em todas as seções sai das seguintes, sem afetar as tabelas
+    assert comprimido.count("Todos os planos incluem suporte por e-mail.") == 1
+
+
+def test_tabela_com_frases_repetidas_nas_celulas():
+    tabela = (
+        "| Recurso | Descrição |\n|:---|---:|\n"
+        + "| Relatórios | Disponível em todos os planos. Sem custo extra. |\n" * 3
+    )
+    assert linhas_de_tabela(comprimir(tabela + "\n" + tabela)) == linhas_de_tabela(tabela + "\n" + tabela)
+
+
+def test_listas_e_separadores_repetidos_ficam():
+    texto = "\n".join(["- Sim", "- Não", "---", "1. Passo", "> Nota"] * 3)
+    assert comprimir(texto) == texto
+
+
+def test_tabela_no_prompt_acima_do_orcamento():
+    reescritor = FERRAMENTAS["reescritor_conteudo"]
+    secao = (
+        "## Comparativo\n\nCompare os planos antes de assinar, pois o preço muda a cada ano. "
+        + "Texto de apoio com detalhes sobre cada recurso do plano. " * 40 + "\n\n" + TABELA
+    )
+    valores = {"target_query": "melhor plano de CRM", "original_content": "\n".join([secao] * 30)}
+    assert reescritor.tokens_entrada(valores) > reescritor.orcamento_tokens
+    ajustado = reescritor.ajustar(valores)["original_content"]
+    assert linhas_de_tabela(ajustado) == linhas_de_tabela(valores["original_content"])
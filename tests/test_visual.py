@@ -0,0 +1,45 @@
+import re
+
+from llm import ClienteLLM
+from visual import extrair_achados, pipeline_visual
+
+
+def analise_do_trecho(prompt):
+    trecho = re.search(r"trecho (\d+) de", prompt)
+    numero = trecho.group(1) if trecho else "único"
+    return (
+        f"#### Resumo dos problemas\n🔥 Problema do trecho {numero} (alto)\n---\n"
+        f"Detalhamento do trecho {numero}\n"
+    )
+
+
+def rodar(modelo_roteiro, partes):
+    visao = modelo_roteiro(analise_do_trecho)
+    plano = modelo_roteiro(lambda prompt: "1. Corrigir tudo\n")
+    cliente = ClienteLLM()
+    eventos = list(pipeline_visual(cliente, visao, plano, partes, "Homepage", ""))
+    return eventos, plano.prompts
+
+
+def test_plano_usa_os_achados_de_todos_os_trechos(modelo_roteiro):
+    eventos, prompts_plano = rodar(modelo_roteiro, [{"data": b"1"}, {"data": b"2"}, {"data": b"3"}])
+    assert len(prompts_plano) == 1
+    for numero in (1, 2, 3):
+        assert f"Problema do trecho {numero}" in prompts_plano[0]
+    # Só os resumos entram no plano, não o detalhamento
+    assert "Detalhamento" not in prompts_plano[0]
+    analise = [texto for estagio, texto in eventos if estagio == "analise"][-1]
+    assert "#### Trecho 3 de 3" in analise
+    assert [texto for estagio, texto in eventos if estagio == "plano"][-1] == "1. Corrigir tudo\n"
+
+
+def test_imagem_unica_usa_o_resumo(modelo_roteiro):
+    eventos, prompts_plano = rodar(modelo_roteiro, [{"data": b"1"}])
+    assert len(prompts_plano) == 1
+    assert "Problema do trecho único" in prompts_plano[0]
+    assert "Detalhamento" not in prompts_plano[0]
+
+
+def test_extrair_achados_sem_marcador():
+    assert extrair_achados("só um texto") == "só um texto"
+    assert extrair_achados("#### Trecho 1 de 2\n\nA\n---\nx\n#### Trecho 2 de 2\n\nB\n---\ny") == "A\n\nB"
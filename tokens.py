@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from agendador import estimar_tokens
+
+# Preço por milhão de tokens (entrada, saída), em US$, para prompts de até 128k tokens
+PRECOS = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+# Sem histórico de latência da ferramenta, estima pelo tamanho: espera inicial + geração da saída
+LATENCIA_BASE = 1.0
+TOKENS_SAIDA_POR_SEGUNDO = 150
+TOKENS_ENTRADA_POR_SEGUNDO = 5000
+# Texto em português gerado pelo modelo: tokens por palavra pedida
+TOKENS_POR_PALAVRA = 1.5
+
+AVISO_TRUNCADO = "\n\n[... conteúdo cortado para caber no orçamento de tokens]"
+
+# Linhas típicas de páginas copiadas do navegador que não carregam conteúdo. Só a linha inteira
+# conta: "## O que são cookies de terceiros?" é um título, não o aviso de cookies
+_BOILERPLATE = re.compile(
+    r"^(?:aceitar(?: todos os)? cookies|(?:este site )?usa(?:mos)? cookies|pol[ií]tica de (?:privacidade|cookies)"
+    r"|(?:©\s*)?(?:\d{4}\s*)?(?:[\w .-]+ - )?todos os direitos reservados|compartilh(?:e|ar)(?: (?:isso|no \w+))?"
+    r"|leia (?:tamb[eé]m|mais)|inscreva-se|assine (?:a|nossa) newsletter|siga-nos(?: nas redes sociais)?"
+    r"|publicidade|clique aqui|voltar ao topo|pular para o conte[uú]do"
+    r"|menu|buscar|pesquisar|entrar|login|home|in[ií]cio)[\s.:!…»›>|-]*$",
+    re.IGNORECASE,
+)
+_FRASE = re.compile(r"(?<=[.!?])\s+")
+# Estrutura markdown do próprio conteúdo: títulos, itens de lista, citações, separadores e blocos de código
+_ESTRUTURA = re.compile(r"^\s*(?:#{1,6}\s|[-*+]\s|\d+[.)]\s|>|(?:-{3,}|\*{3,}|_{3,})\s*$|```|~~~)")
+# Linhas de tabela markdown, inclusive a separadora "|---|---|" (com ou sem barra no início)
+_TABELA = re.compile(r"^\s*\||^\s*:?-{3,}:?\s*\|")
+
+
+@dataclass
+class Estimativa:
+    tokens_entrada: int
+    tokens_saida: int
+    custo: float
+    segundos: float
+    tokens_originais: int
+
+    @property
+    def comprimida(self):
+        return self.tokens_entrada < self.tokens_originais
+
+
+def comprimir(texto):
+    """Remove boilerplate, frases repetidas e espaços sobrando, preservando a estrutura markdown."""
+    linhas = texto.splitlines()
+    repeticoes = Counter(linha.strip().lower() for linha in linhas if linha.strip())
+    frases_vistas = set()
+    resultado = []
+    for linha in linhas:
+        recuo = re.match(r"[ \t]*", linha).group()
+        conteudo = re.sub(r"[ \t]+", " ", linha.strip())
+        chave = conteudo.lower()
+        if not conteudo:
+            resultado.append("")
+            continue
+        # Tabelas ficam inteiras: cortar uma linha repetida ou uma frase de uma célula desmonta a tabela
+        if _TABELA.match(conteudo):
+            resultado.append(recuo + conteudo)
+            continue
+        # Títulos, itens de lista e linhas com mais de uma frase são sempre conteúdo
+        protegida = bool(_ESTRUTURA.match(conteudo) or _FRASE.search(conteudo))
+        if not protegida and _BOILERPLATE.match(chave):
+            continue
+        # Linhas curtas repetidas muitas vezes são menus e rodapés, não conteúdo
+        if not protegida and repeticoes[chave] > 2 and len(chave) < 80:
+            continue
+        frases = []
+        for frase in _FRASE.split(conteudo):
+            normalizada = frase.lower()
+            if len(normalizada) > 20 and normalizada in frases_vistas:
+                continue
+            frases_vistas.add(normalizada)
+            frases.append(frase)
+        if frases:
+            resultado.append(recuo + " ".join(frases))
+    comprimido = re.sub(r"\n{3,}", "\n\n", "\n".join(resultado)).strip()
+    # Nunca troca um texto com conteúdo por um vazio: o corte por orçamento (truncar) faz o resto
+    return comprimido or texto.strip()
+
+
+def truncar(texto, max_tokens):
+    # Corta no último fim de frase ou de linha antes do limite
+    limite = max(0, max_tokens * 4 - len(AVISO_TRUNCADO))
+    if len(texto) <= limite:
+        return texto
+    corte = texto[:limite]
+    fim = max(corte.rfind(". "), corte.rfind("\n"))
+    if fim > limite // 2:
+        corte = corte[:fim + 1]
+    return corte.rstrip() + AVISO_TRUNCADO
+
+
+# Contagens exatas já feitas (a API cobra uma ida e volta por contagem)
+_contagens = OrderedDict()
+
+
+def contar_tokens(conteudo, modelo=None):
+    """Estimativa local; com AIO_TOKENS_EXATOS=1 e um modelo, usa ``count_tokens`` da API."""
+    if modelo is None or os.getenv("AIO_TOKENS_EXATOS") != "1" or not hasattr(modelo, "count_tokens"):
+        return estimar_tokens(conteudo)
+    chave = hashlib.sha256(f"{modelo.model_name}\n{conteudo}".encode("utf-8")).hexdigest()
+    if chave not in _contagens:
+        try:
+            _contagens[chave] = modelo.count_tokens(conteudo).total_tokens
+        except Exception:
+            return estimar_tokens(conteudo)
+        if len(_contagens) > 512:
+            _contagens.popitem(last=False)
+    _contagens.move_to_end(chave)
+    return _contagens[chave]
+
+
+def estimar_chamada(modelo, tokens_entrada, tokens_saida, tokens_originais=None, latencia_observada=None):
+    entrada, saida = PRECOS.get(modelo, PRECOS["gemini-1.5-flash"])
+    segundos = latencia_observada or (
+        LATENCIA_BASE + tokens_entrada / TOKENS_ENTRADA_POR_SEGUNDO + tokens_saida / TOKENS_SAIDA_POR_SEGUNDO
+    )
+    return Estimativa(
+        tokens_entrada=tokens_entrada,
+        tokens_saida=tokens_saida,
+        custo=(tokens_entrada * entrada + tokens_saida * saida) / 1_000_000,
+        segundos=segundos,
+        tokens_originais=tokens_originais or tokens_entrada,
+    )
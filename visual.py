@@ -0,0 +1,145 @@
+import queue
+import re
+import threading
+
+from imagem import analisar_trechos
+
+FERRAMENTA = "otimizador_visual"
+
+# Linha que separa o resumo dos problemas do detalhamento na análise visual.
+# Assim que ela chega, o plano de ação já pode começar a ser gerado.
+_MARCADOR = re.compile(r"\n\s*---\s*\n")
+_TITULO_TRECHO = re.compile(r"(?m)^#### Trecho .*$")
+
+
+def prompt_analise_visual(page_type, page_url, fatos_pagina=""):
+    # Com a URL coletada, title, headings, dados estruturados e alt vêm do HTML real, não da imagem
+    dados_html = f"""
+    **Dados reais do HTML da página (use estes valores; não os deduza da imagem):**
+    {fatos_pagina}
+    """ if fatos_pagina else ""
+    return f"""
+    Você é um especialista em SEO técnico e UX. Analise esta captura de tela de site e forneça recomendações detalhadas de otimização.
+
+    **Contexto:**
+    - Tipo de página: {page_type}
+    - URL: {page_url or 'Não fornecida'}
+    {dados_html}
+
+    **Itens para Avaliar:**
+    1. Estrutura visual e hierarquia de informações
+    2. Elementos de SEO on-page visíveis (títulos, headings)
+    3. Layout e espaçamento para leitura
+    4. Chamadas para ação visíveis
+    5. Elementos de confiança (selos, depoimentos)
+    6. Problemas de usabilidade aparentes
+    7. Oportunidades para rich snippets
+    8. Velocidade de carregamento (indicadores visuais)
+
+    **Formato da Resposta:**
+    - Comece com "#### Resumo dos problemas": uma linha por problema, em ordem de prioridade,
+      com o emoji da categoria, o problema e o impacto estimado (baixo/médio/alto)
+    - Em seguida, uma linha contendo apenas "---"
+    - Depois, recomendações específicas para cada problema, com exemplos visuais de melhorias
+
+    **Saída:**
+    Use markdown com destaques e emojis para categorizar:
+    🔥 Problema crítico
+    ⚡ Oportunidade rápida
+    🛠️ Melhoria técnica
+    ✨ Sugestão avançada
+    """
+
+
+def prompt_plano_acao(achados, page_type):
+    return f"""
+    Com base nos problemas encontrados na análise visual de uma página do tipo "{page_type}",
+    crie um plano de ação passo-a-passo para implementar as melhorias.
+
+    **Problemas encontrados:**
+    {achados}
+
+    **O plano deve incluir:**
+    1. Priorização (o que fazer primeiro), seguindo a gravidade de cada problema
+    2. Recursos necessários (time, ferramentas)
+    3. Tempo estimado por tarefa
+    4. Métricas para acompanhamento
+
+    Trate apenas dos problemas listados. Formate como lista markdown numerada com prazos e responsáveis.
+    """
+
+
+def extrair_achados(texto):
+    # Só os resumos entram no plano; o que vem depois do marcador é detalhamento
+    resumos = []
+    for parte in _TITULO_TRECHO.split(texto):
+        resumo = _MARCADOR.split(parte, maxsplit=1)[0].strip()
+        if resumo:
+            resumos.append(resumo)
+    return "\n\n".join(resumos)
+
+
+def pipeline_visual(cliente, modelo_visao, modelo_plano, partes_imagem, page_type, page_url, sessao=None,
+                    fatos_pagina=""):
+    """Roda a análise visual e o plano de ação como um pipeline de dois estágios.
+
+    A análise é transmitida em stream; o plano parte assim que o resumo dos problemas
+    termina (ou, sem marcador, quando a análise acaba) e é transmitido ao mesmo tempo
+    que o detalhamento. Com a captura dividida em trechos, o plano espera a análise de
+    todos: cada trecho tem o próprio resumo, e o plano precisa dos achados da página inteira. Gera tuplas ``(estagio, texto_acumulado)`` na thread de quem chamou.
+    ``fatos_pagina`` é o resumo dos fatos do HTML da URL, quando ela pôde ser coletada.
+    """
+    prompt = prompt_analise_visual(page_type, page_url, fatos_pagina)
+    if len(partes_imagem) == 1:
+        analise = cliente.gerar_stream(modelo_visao, [prompt, partes_imagem[0]], sessao=sessao, ferramenta=FERRAMENTA)
+    else:
+        analise = _analise_em_trechos(cliente, modelo_visao, prompt, partes_imagem, sessao)
+
+    resumo_parcial = len(partes_imagem) == 1
+
+    eventos = queue.Queue()
+    _produzir(eventos, "analise", analise)
+    textos = {"analise": "", "plano": ""}
+    ativos = {"analise"}
+    plano_iniciado = False
+
+    while ativos:
+        estagio, trecho = eventos.get()
+        if isinstance(trecho, Exception):
+            raise trecho
+        if trecho is None:
+            ativos.discard(estagio)
+        else:
+            textos[estagio] += trecho
+            yield estagio, textos[estagio]
+
+        resumo_pronto = estagio == "analise" and (
+            trecho is None or (resumo_parcial and _MARCADOR.search(textos["analise"]))
+        )
+        if not plano_iniciado and resumo_pronto:
+            plano_iniciado = True
+            achados = extrair_achados(textos["analise"])
+            plano = cliente.gerar_stream(
+                modelo_plano, prompt_plano_acao(achados, page_type), sessao=sessao, ferramenta=FERRAMENTA
+            )
+            _produzir(eventos, "plano", plano)
+            ativos.add("plano")
+
+
+def _analise_em_trechos(cliente, modelo, prompt, partes, sessao):
+    analises = analisar_trechos(cliente, modelo, prompt, partes, sessao=sessao, ferramenta=FERRAMENTA)
+    for indice, analise in enumerate(analises, start=1):
+        yield f"#### Trecho {indice} de {len(analises)}\n\n{analise}\n\n"
+
+
+def _produzir(eventos, estagio, trechos):
+    def consumir():
+        try:
+            for trecho in trechos:
+                eventos.put((estagio, trecho))
+        except Exception as erro:
+            eventos.put((estagio, erro))
+            return
+        eventos.put((estagio, None))
+
+    threading.Thread(target=consumir, name=f"pipeline-visual-{estagio}", daemon=True).start()